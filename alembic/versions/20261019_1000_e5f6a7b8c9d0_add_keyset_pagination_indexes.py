@@ -0,0 +1,50 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-19 10:00:00.000000+08:00
+
+为列表接口的 keyset 分页添加与排序键同序的复合索引，
+翻页时按 (排序键..., id) 直接定位，不再扫描并丢弃前面的行。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    op.create_index('idx_task_user_created', 'tasks', ['user_id', 'created_at', 'id'])
+    op.create_index('idx_plan_user_created', 'diet_plans', ['user_id', 'created_at', 'id'])
+    op.create_index(
+        'idx_meal_pet_history',
+        'meal_records',
+        ['pet_id', 'meal_date', 'meal_order', 'id'],
+    )
+    op.create_index(
+        'idx_todo_user_order',
+        'todo_items',
+        ['user_id', 'due_date', 'is_completed', 'created_at', 'id'],
+    )
+    op.create_index(
+        'idx_ingredient_listing',
+        'ingredients',
+        [sa.text('is_system DESC'), 'category', 'name', 'id'],
+    )
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    op.drop_index('idx_ingredient_listing', table_name='ingredients')
+    op.drop_index('idx_todo_user_order', table_name='todo_items')
+    op.drop_index('idx_meal_pet_history', table_name='meal_records')
+    op.drop_index('idx_plan_user_created', table_name='diet_plans')
+    op.drop_index('idx_task_user_created', table_name='tasks')
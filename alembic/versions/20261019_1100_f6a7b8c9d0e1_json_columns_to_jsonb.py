@@ -0,0 +1,55 @@
+"""json_columns_to_jsonb
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19 11:00:00.000000+08:00
+
+计划、任务输入输出和餐食营养详情改用 JSONB：
+读取时无需重新解析文本，大文档走 TOAST 压缩存储。
+这些列在 ORM 中已改为延迟加载，列表查询不再读取。
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS = (
+    ('diet_plans', 'plan_data', False),
+    ('tasks', 'input_data', False),
+    ('tasks', 'output_data', True),
+    ('meal_records', 'nutrition_data', True),
+)
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    for table, column, nullable in _COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    for table, column, nullable in _COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=nullable,
+            postgresql_using=f'{column}::json',
+        )
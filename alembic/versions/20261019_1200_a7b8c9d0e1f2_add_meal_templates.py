@@ -0,0 +1,130 @@
+"""add_meal_templates
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19 12:00:00.000000+08:00
+
+新增 meal_templates 表，按内容哈希保存单餐营养详情（食材、营养素汇总、做法、推荐理由）。
+同一周 7 天的 MealRecord 原先各存一份相同的 nutrition_data，这里把已有记录去重：
+写入模板、回填 meal_records.template_id 并清空内联 nutrition_data，结束时输出节省的字节数。
+降级时先把模板内容写回 nutrition_data 再删表。
+"""
+import hashlib
+import json
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+_JSON_DOCUMENT = sa.JSON().with_variant(postgresql.JSONB(), 'postgresql')
+_BATCH_SIZE = 1000
+
+meal_templates = sa.table(
+    'meal_templates',
+    sa.column('id', sa.String(64)),
+    sa.column('payload', _JSON_DOCUMENT),
+)
+
+
+def _canonical_json(doc) -> bytes:
+    """与 plan_blob_store.canonical_json 保持一致，保证迁移与应用得到相同的哈希。"""
+    return json.dumps(doc, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _deduplicate_nutrition_data() -> None:
+    bind = op.get_bind()
+    known = set(bind.execute(sa.text('SELECT id FROM meal_templates')).scalars())
+    rows_total = 0
+    templates_created = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    while True:
+        # 处理过的行 nutrition_data 被清空，每轮重新取前 N 行即可
+        batch = bind.execute(
+            sa.text("""
+                SELECT id, nutrition_data FROM meal_records
+                WHERE nutrition_data IS NOT NULL AND template_id IS NULL
+                ORDER BY id
+                LIMIT :limit
+            """),
+            {'limit': _BATCH_SIZE},
+        ).all()
+        if not batch:
+            break
+
+        new_templates = []
+        updates = []
+        for record_id, payload in batch:
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            raw = _canonical_json(payload)
+            template_id = hashlib.sha256(raw).hexdigest()
+            bytes_before += len(raw)
+            if template_id not in known:
+                known.add(template_id)
+                bytes_after += len(raw)
+                new_templates.append({'id': template_id, 'payload': payload})
+            updates.append({'record_id': record_id, 'template_id': template_id})
+
+        if new_templates:
+            bind.execute(meal_templates.insert(), new_templates)
+            templates_created += len(new_templates)
+        bind.execute(
+            sa.text("""
+                UPDATE meal_records
+                SET template_id = :template_id, nutrition_data = NULL
+                WHERE id = :record_id
+            """),
+            updates,
+        )
+        rows_total += len(batch)
+
+    logger.info(
+        'meal_records.nutrition_data 去重: %d 行 → %d 个新模板，%d → %d 字节（节省 %d 字节）',
+        rows_total, templates_created, bytes_before, bytes_after, bytes_before - bytes_after,
+    )
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    op.create_table(
+        'meal_templates',
+        sa.Column('id', sa.String(length=64), nullable=False),
+        sa.Column('payload', _JSON_DOCUMENT, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.add_column('meal_records', sa.Column('template_id', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_meal_records_template_id'), 'meal_records', ['template_id'], unique=False)
+    op.create_foreign_key(
+        'fk_meal_records_template_id', 'meal_records', 'meal_templates', ['template_id'], ['id']
+    )
+
+    _deduplicate_nutrition_data()
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    op.execute("""
+        UPDATE meal_records
+        SET nutrition_data = (
+            SELECT payload FROM meal_templates WHERE meal_templates.id = meal_records.template_id
+        )
+        WHERE template_id IS NOT NULL AND nutrition_data IS NULL
+    """)
+    op.drop_constraint('fk_meal_records_template_id', 'meal_records', type_='foreignkey')
+    op.drop_index(op.f('ix_meal_records_template_id'), table_name='meal_records')
+    op.drop_column('meal_records', 'template_id')
+    op.drop_table('meal_templates')
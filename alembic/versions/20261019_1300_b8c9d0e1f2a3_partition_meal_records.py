@@ -0,0 +1,114 @@
+"""partition_meal_records
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19 13:00:00.000000+08:00
+
+meal_records 改为按 meal_date 的月度 RANGE 分区表（仅 PostgreSQL）：
+- 旧表改名后以 LIKE 建分区父表，主键改为 (id, meal_date)（分区键必须包含在主键中）
+- 按已有数据的最早月份到本月后 3 个月逐月建分区，外加 DEFAULT 分区
+- 拷贝数据后删除旧表，再按迁移前捕获的定义重建索引与外键
+新增 meal_record_archives 归档目录表（所有方言），记录已导出到对象存储的月份。
+
+数据整表拷贝一次，大表请在维护窗口执行。降级只恢复仍在热表中的数据，已归档月份需从 Parquet 回灌。
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _capture_indexes_and_foreign_keys(bind) -> tuple[list[str], list[tuple[str, str]]]:
+    """捕获 meal_records 上除主键外的索引定义与外键定义。"""
+    indexes = bind.execute(sa.text("""
+        SELECT indexdef FROM pg_indexes
+        WHERE tablename = 'meal_records' AND indexname <> 'meal_records_pkey'
+    """)).scalars().all()
+    foreign_keys = bind.execute(sa.text("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = 'meal_records'::regclass AND contype = 'f'
+    """)).all()
+    return list(indexes), [tuple(row) for row in foreign_keys]
+
+
+def _restore_indexes_and_foreign_keys(indexes, foreign_keys) -> None:
+    for indexdef in indexes:
+        op.execute(indexdef)
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE meal_records ADD CONSTRAINT "{name}" {definition}')
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    op.create_table(
+        'meal_record_archives',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('object_name', sa.String(length=255), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('month'),
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    indexes, foreign_keys = _capture_indexes_and_foreign_keys(bind)
+    first_day = bind.execute(sa.text('SELECT min(meal_date) FROM meal_records')).scalar()
+
+    op.execute('ALTER TABLE meal_records RENAME TO meal_records_unpartitioned')
+    op.execute("""
+        CREATE TABLE meal_records (LIKE meal_records_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE (meal_date)
+    """)
+
+    current = date.today().replace(day=1)
+    month = (first_day or current).replace(day=1)
+    last = _add_months(current, _MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE meal_records_p{month:%Y%m} PARTITION OF meal_records "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute('CREATE TABLE meal_records_default PARTITION OF meal_records DEFAULT')
+
+    op.execute('INSERT INTO meal_records SELECT * FROM meal_records_unpartitioned')
+    op.execute('DROP TABLE meal_records_unpartitioned')
+
+    op.execute('ALTER TABLE meal_records ADD CONSTRAINT meal_records_pkey PRIMARY KEY (id, meal_date)')
+    _restore_indexes_and_foreign_keys(indexes, foreign_keys)
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        indexes, foreign_keys = _capture_indexes_and_foreign_keys(bind)
+        # 分区父表上的索引定义写作 ON ONLY，普通表上重建时去掉
+        indexes = [indexdef.replace(' ON ONLY ', ' ON ') for indexdef in indexes]
+
+        op.execute('CREATE TABLE meal_records_unpartitioned (LIKE meal_records INCLUDING DEFAULTS)')
+        op.execute('INSERT INTO meal_records_unpartitioned SELECT * FROM meal_records')
+        op.execute('DROP TABLE meal_records CASCADE')
+        op.execute('ALTER TABLE meal_records_unpartitioned RENAME TO meal_records')
+        op.execute('ALTER TABLE meal_records ADD CONSTRAINT meal_records_pkey PRIMARY KEY (id)')
+        _restore_indexes_and_foreign_keys(indexes, foreign_keys)
+
+    op.drop_table('meal_record_archives')
@@ -0,0 +1,85 @@
+"""hash_refresh_tokens
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-19 14:00:00.000000+08:00
+
+refresh_tokens 改为只保存令牌的 SHA-256 摘要：
+- 先删除已过期或已撤销的行（这些行不再参与校验，原先从不清理）
+- 新增 token_hash（定长 64 字符），按批回填剩余行的摘要后删除 500 字符的 token 列及其唯一索引
+- is_revoked 选择性极低，删除其索引；新增 expires_at 索引供后台清理按批删除
+
+降级无法还原令牌原文，会清空 refresh_tokens（所有用户需重新登录）。
+"""
+import hashlib
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d0e1f2a3b4'
+down_revision: Union[str, None] = 'b8c9d0e1f2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+_BATCH_SIZE = 1000
+
+
+def _backfill_token_hashes() -> None:
+    bind = op.get_bind()
+    rows_total = 0
+    while True:
+        # 处理过的行 token_hash 已非空，每轮重新取前 N 行即可
+        batch = bind.execute(
+            sa.text("""
+                SELECT id, token FROM refresh_tokens
+                WHERE token_hash IS NULL
+                ORDER BY id
+                LIMIT :limit
+            """),
+            {'limit': _BATCH_SIZE},
+        ).all()
+        if not batch:
+            break
+        bind.execute(
+            sa.text('UPDATE refresh_tokens SET token_hash = :token_hash WHERE id = :token_id'),
+            [
+                {'token_id': token_id, 'token_hash': hashlib.sha256(token.encode('utf-8')).hexdigest()}
+                for token_id, token in batch
+            ],
+        )
+        rows_total += len(batch)
+    logger.info('refresh_tokens 回填摘要 %d 行', rows_total)
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    deleted = op.get_bind().execute(
+        sa.text('DELETE FROM refresh_tokens WHERE is_revoked OR expires_at < now()')
+    ).rowcount
+    logger.info('refresh_tokens 删除过期/已撤销 %d 行', deleted)
+
+    op.add_column('refresh_tokens', sa.Column('token_hash', sa.String(length=64), nullable=True))
+    _backfill_token_hashes()
+    op.alter_column('refresh_tokens', 'token_hash', nullable=False)
+    op.create_index(op.f('ix_refresh_tokens_token_hash'), 'refresh_tokens', ['token_hash'], unique=True)
+    op.drop_index(op.f('ix_refresh_tokens_token'), table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token')
+    op.drop_index(op.f('ix_refresh_tokens_is_revoked'), table_name='refresh_tokens')
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    op.execute('DELETE FROM refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
+    op.create_index(op.f('ix_refresh_tokens_is_revoked'), 'refresh_tokens', ['is_revoked'], unique=False)
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(length=500), nullable=False))
+    op.create_index(op.f('ix_refresh_tokens_token'), 'refresh_tokens', ['token'], unique=True)
+    op.drop_index(op.f('ix_refresh_tokens_token_hash'), table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token_hash')
@@ -0,0 +1,56 @@
+"""unique_meal_slot
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-19 15:00:00.000000+08:00
+
+虚拟餐食在完成 / 取消完成时才落库，并发请求可能为同一餐各插入一行。
+为 meal_records 的 (pet_id, meal_date, meal_order) 加唯一索引，落库改为
+INSERT ... ON CONFLICT DO NOTHING 后重新查询：
+- 先清理已有的重复行：每餐保留已完成、更新时间最晚的一行
+- 索引包含分区键 meal_date，可直接建在分区父表上
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0e1f2a3b4c5'
+down_revision: Union[str, None] = 'c9d0e1f2a3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade() -> None:
+    """升级数据库"""
+    deleted = op.get_bind().execute(sa.text("""
+        DELETE FROM meal_records
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY pet_id, meal_date, meal_order
+                    ORDER BY is_completed DESC, updated_at DESC NULLS LAST, id DESC
+                ) AS slot_rank
+                FROM meal_records
+            ) ranked
+            WHERE slot_rank > 1
+        )
+    """)).rowcount
+    logger.info('meal_records 删除重复餐次 %d 行', deleted)
+
+    op.create_index(
+        'uq_meal_pet_date_order',
+        'meal_records',
+        ['pet_id', 'meal_date', 'meal_order'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """降级数据库"""
+    op.drop_index('uq_meal_pet_date_order', table_name='meal_records')
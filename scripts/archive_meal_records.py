@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+meal_records 分区维护与冷数据归档
+
+1. 预建本月及未来 MEAL_PARTITION_MONTHS_AHEAD 个月的分区
+2. 早于 N 个月的月份分区导出为 zstd Parquet 写入 MinIO，登记到 meal_record_archives 后摘除
+
+建议每月初由定时任务执行一次；重复执行是幂等的（已摘除的分区不会再出现）。
+需要 PostgreSQL（已执行迁移 b8c9d0e1f2a3）和 pyarrow（uv sync --extra archive）。
+
+用法:
+    uv run python scripts/archive_meal_records.py --dry-run
+    uv run python scripts/archive_meal_records.py --older-than-months 12
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.api.config import settings
+from src.api.services.meal_archive import meal_archiver
+from src.db.session import AsyncSessionLocal, close_db
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="meal_records 分区维护与冷数据归档")
+    parser.add_argument(
+        "--older-than-months",
+        type=int,
+        default=settings.meal_archive_after_months,
+        help="归档早于该月数的分区（默认取 MEAL_ARCHIVE_AFTER_MONTHS）",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="只列出待归档分区")
+    args = parser.parse_args()
+
+    if args.older_than_months <= 0:
+        print("归档未开启（older-than-months <= 0）")
+        return
+
+    try:
+        async with AsyncSessionLocal() as session:
+            partitions = await meal_archiver.archive_older_than(
+                session, args.older_than_months, dry_run=args.dry_run
+            )
+    finally:
+        await close_db()
+
+    action = "待归档" if args.dry_run else "已归档"
+    print(f"{action} {len(partitions)} 个分区")
+    for partition in partitions:
+        print(f"  {partition.name}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+启用/禁用用户、调整管理员权限
+
+通过 AuthService.set_user_status 修改，会同时失效认证依赖使用的 Redis 状态缓存，
+修改立即对所有 API 进程生效。直接改库的话要等 USER_STATUS_CACHE_TTL_SECONDS 过期。
+
+用法:
+    uv run python scripts/set_user_status.py <user_id> --disable
+    uv run python scripts/set_user_status.py <user_id> --enable --superuser
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.api.services.auth_service import AuthService
+from src.api.utils.errors import NotFoundException
+from src.db.redis import close_redis
+from src.db.session import AsyncSessionLocal, close_db
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="启用/禁用用户、调整管理员权限")
+    parser.add_argument("user_id", help="用户 ID")
+    active = parser.add_mutually_exclusive_group()
+    active.add_argument("--enable", dest="is_active", action="store_true", default=None, help="启用用户")
+    active.add_argument("--disable", dest="is_active", action="store_false", help="禁用用户")
+    superuser = parser.add_mutually_exclusive_group()
+    superuser.add_argument("--superuser", dest="is_superuser", action="store_true", default=None, help="设为管理员")
+    superuser.add_argument("--no-superuser", dest="is_superuser", action="store_false", help="取消管理员")
+    args = parser.parse_args()
+
+    if args.is_active is None and args.is_superuser is None:
+        parser.error("至少指定 --enable/--disable 或 --superuser/--no-superuser 之一")
+
+    try:
+        async with AsyncSessionLocal() as session:
+            user = await AuthService(session).set_user_status(
+                args.user_id, is_active=args.is_active, is_superuser=args.is_superuser
+            )
+    except NotFoundException as exc:
+        print(exc.message)
+        sys.exit(1)
+    finally:
+        await close_redis()
+        await close_db()
+
+    print(f"{user.username}: is_active={user.is_active} is_superuser={user.is_superuser}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
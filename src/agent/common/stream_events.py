@@ -27,18 +27,9 @@ from typing import Any, Optional
 from langchain_core.messages import AIMessage
 from pydantic import BaseModel, Field
 
-logger = logging.getLogger(__name__)
-
+from src.utils.serialization import to_jsonable
 
-def _deep_serialize(obj: Any) -> Any:
-    """递归序列化嵌套的 Pydantic 模型 / dataclass / 列表 / 字典为原生类型"""
-    if hasattr(obj, "model_dump"):
-        return obj.model_dump()
-    if isinstance(obj, dict):
-        return {k: _deep_serialize(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [_deep_serialize(item) for item in obj]
-    return obj
+logger = logging.getLogger(__name__)
 
 
 class ProgressEventType(str, Enum):
@@ -183,12 +174,12 @@ class ProgressEvent(BaseModel):
     def to_dict(self) -> dict:
         """序列化为 dict，剔除 None 值以减少传输体积。
 
-        对 detail 字段中可能包含的 Pydantic 模型进行递归序列化，
+        detail 不参与 model_dump，单独经 to_jsonable 转换一次（按类型缓存转换函数），
         确保最终输出全部为 JSON 可序列化的原生类型。
         """
-        data = self.model_dump(mode="json")
-        if data.get("detail") is not None:
-            data["detail"] = _deep_serialize(self.detail)
+        data = self.model_dump(mode="json", exclude={"detail"})
+        if self.detail is not None:
+            data["detail"] = to_jsonable(self.detail)
         return {k: v for k, v in data.items() if v is not None}
 
 
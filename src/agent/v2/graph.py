@@ -4,6 +4,7 @@ V2 Agent 图拓扑
 START → plan_agent → generate_coordination_guide → dispatch_weeks → week_agent (×4 并行) → gather_and_structure → END
 
 Checkpoint：复用 settings.database_url 自动接入 PostgreSQL 持久化。
+- 与 agent 工具共用 src.db.pg_pool 的 psycopg 连接池（尺寸由连接预算决定）
 - 由 FastAPI lifespan 托管：startup 打开连接池，shutdown 关闭
 - 首次启动自动建表（checkpoints / checkpoint_blobs / checkpoint_writes）
 - 非 PostgreSQL 或显式关闭时降级为无持久化模式
@@ -14,10 +15,10 @@ from typing import Any
 
 from langgraph.graph.state import StateGraph, START, END
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from psycopg.rows import dict_row
 from psycopg_pool import AsyncConnectionPool
 
 from src.api.config import settings
+from src.db.pg_pool import get_pg_pool, resolve_postgres_dsn
 from src.agent.v2.node import (
     plan_agent_with_sub,
     generate_coordination_guide,
@@ -72,41 +73,28 @@ def _resolve_postgres_dsn() -> str | None:
     if not settings.langgraph_checkpoint_enabled:
         return None
 
-    dsn = settings.database_url
-    for driver in ("+asyncpg", "+psycopg2", "+psycopg"):
-        dsn = dsn.replace(driver, "")
-
-    if not dsn.lower().startswith(("postgres://", "postgresql://")):
+    dsn = resolve_postgres_dsn()
+    if not dsn:
         logger.warning("V2 checkpoint 跳过：当前数据库不是 PostgreSQL")
-        return None
-
     return dsn
 
 
 async def open_v2_checkpointer() -> tuple[AsyncConnectionPool, AsyncPostgresSaver] | None:
-    """打开 V2 PostgreSQL checkpointer（连接池模式）。
+    """打开 V2 PostgreSQL checkpointer（共享连接池模式）。
 
-    必备 psycopg 参数（kwargs 注入到每个连接）：
+    共享池的连接参数已满足 PostgresSaver 要求：
     - autocommit=True：setup() 建表 DDL 必须立即提交
     - row_factory=dict_row：PostgresSaver 通过 row["col"] 访问字段
 
     返回 (pool, checkpointer)；失败或未启用返回 None。
-    调用方在 lifespan shutdown 时 `await pool.close()` 即可。
+    连接池与 agent 工具共用，调用方在 lifespan shutdown 时 `await close_pg_pool()`。
     """
     dsn = _resolve_postgres_dsn()
     if not dsn:
         return None
 
-    pool: AsyncConnectionPool | None = None
     try:
-        pool = AsyncConnectionPool(
-            conninfo=dsn,
-            min_size=1,
-            max_size=20,
-            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
-            open=False,
-        )
-        await pool.open()
+        pool = await get_pg_pool()
 
         checkpointer = AsyncPostgresSaver(pool)
         try:
@@ -122,12 +110,8 @@ async def open_v2_checkpointer() -> tuple[AsyncConnectionPool, AsyncPostgresSave
         logger.info("V2 PostgreSQL checkpoint 已启用")
         return pool, checkpointer
     except Exception as exc:
+        # 连接池由 agent 工具共用，这里不关闭
         logger.error("V2 checkpoint 初始化失败，降级为无持久化模式：%s", exc, exc_info=True)
-        if pool is not None:
-            try:
-                await pool.close()
-            except Exception:
-                pass
         return None
 
 
@@ -347,7 +347,9 @@ async def gather_and_structure(state: State, config: RunnableConfig):
     if plan_id:
         try:
             from datetime import datetime, timezone
+            from src.api.infrastructure.plan_blob_store import offload_document
             from src.db.redis import set_json
+            from src.db.redis_keys import temp_plan_key
             from src.utils.strtuct import PetInformation
 
             pet_info_obj = ctx.pet_information
@@ -364,18 +366,18 @@ async def gather_and_structure(state: State, config: RunnableConfig):
                 "user_id": ctx.user_id,
                 "task_id": plan_id,
                 "pet_info": pet_info_dict,
-                "plan_data": {
+                "plan_data": await offload_document({
                     "pet_information": pet_info_filtered,
                     "ai_suggestions": ai_suggestions,
                     "pet_diet_plan": {"monthly_diet_plan": serialized_plans},
-                },
+                }),
                 "created_at": datetime.now(timezone.utc).isoformat(),
             }
-            ok = await set_json(f"temp_plan:{plan_id}", temp_data, expire=86400)
+            ok = await set_json(temp_plan_key(plan_id), temp_data, expire=86400)
             if ok:
-                logger.info("AG-UI 临时计划已存入 Redis: temp_plan:%s (TTL 24h)", plan_id)
+                logger.info("AG-UI 临时计划已存入 Redis: %s (TTL 24h)", temp_plan_key(plan_id))
             else:
-                logger.error("AG-UI 临时计划存入 Redis 失败: temp_plan:%s", plan_id)
+                logger.error("AG-UI 临时计划存入 Redis 失败: %s", temp_plan_key(plan_id))
         except Exception as exc:
             logger.warning("AG-UI 写 Redis 临时计划异常: %s", exc)
 
@@ -1,70 +1,84 @@
 """
-Agent 工具专用数据库查询（同步驱动 + asyncio.to_thread）
+Agent 工具专用数据库查询（共享 psycopg3 异步连接池）
 
-asyncpg 在首次连接时调用 os.getcwd()，被 langgraph dev 的
-blockbuster 拦截。解决方案：使用 psycopg2 同步驱动，通过
-asyncio.to_thread 在独立线程中执行查询，完全绕过 blockbuster。
+查询走 src.db.pg_pool 的连接池，与 LangGraph checkpointer 共用连接预算，
+不再单独维护 psycopg2 同步引擎和线程池。
+psycopg3 异步连接不会触发 asyncpg 首连时的 os.getcwd()，
+因此在 langgraph dev 的 blockbuster 下同样可用。
+
+SQLAlchemy 语句按 psycopg 方言编译后直接执行：
+- select(Model)：结果映射为游离（detached）的 ORM 实例，只读使用
+- select(col1, col2, ...)：返回可按列名属性访问的行
 
 用法:
     from src.agent.v2.tools.db import run_query
-    rows = await run_query(stmt)              # list[Row]
-    row  = await run_query(stmt, one=True)    # Row | None
+    rows = await run_query(stmt)              # list[Model]
+    row  = await run_query(stmt, one=True)    # Model | None
 """
-import asyncio
-import os
-
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from typing import Any
 
-_engine = None
-_factory: sessionmaker | None = None
+from psycopg.rows import dict_row, namedtuple_row
+from sqlalchemy import inspect
+from sqlalchemy.exc import MultipleResultsFound
+from sqlalchemy.dialects.postgresql.psycopg import PGDialectAsync_psycopg
+from sqlalchemy.orm.attributes import set_committed_value
 
+from src.db.pg_pool import get_pg_pool
 
-def _ensure_factory() -> sessionmaker:
-    """延迟创建同步 engine，仅在首次查询时初始化。"""
-    global _engine, _factory
-    if _factory is not None:
-        return _factory
+_dialect = PGDialectAsync_psycopg()
 
-    async_url = os.environ.get("DATABASE_URL", "")
-    if not async_url:
-        raise RuntimeError("DATABASE_URL 环境变量未设置")
 
-    # postgresql+asyncpg://... → postgresql://... (psycopg2 默认驱动)
-    sync_url = async_url.replace("+asyncpg", "")
+def _compile(stmt) -> tuple[str, dict[str, Any]]:
+    """按 psycopg 方言编译语句，IN 列表展开为独立参数。"""
+    compiled = stmt.compile(dialect=_dialect, compile_kwargs={"render_postcompile": True})
+    return str(compiled), compiled.params
 
-    _engine = create_engine(
-        sync_url,
-        pool_pre_ping=True,
-        pool_size=5,
-        max_overflow=10,
-    )
-    _factory = sessionmaker(_engine, class_=Session, expire_on_commit=False)
-    return _factory
 
+def _scalar_entity(stmt):
+    """select(Model) 返回 Model，否则返回 None。"""
+    expr = stmt.column_descriptions[0]["expr"]
+    return expr if isinstance(expr, type) else None
 
-def _execute_sync(stmt, one: bool = False, scalars: bool = True):
-    """在当前线程中执行 SQL（同步）。
 
-    scalars=True: 返回 ORM 对象列表（适用于 select(Model)）
-    scalars=False: 返回原始 Row 列表（适用于 select(col1, col2, ...)）
-    """
-    factory = _ensure_factory()
-    with factory() as session:
-        result = session.execute(stmt)
-        if one:
-            return result.scalar_one_or_none()
-        if scalars:
-            return result.scalars().all()
-        return result.all()
+def _to_instance(entity, row: dict[str, Any]):
+    """把按列名索引的行构造成 ORM 实例（值视为已持久化，不产生脏标记）。"""
+    mapper = inspect(entity)
+    obj = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        column = attr.columns[0].name
+        if column in row:
+            set_committed_value(obj, attr.key, row[column])
+    return obj
 
 
 async def run_query(stmt, one: bool = False, scalars: bool = True):
-    """将 DB 查询放到独立线程执行，避免 blockbuster 拦截。
+    """在共享连接池上异步执行只读查询。
 
     Args:
         stmt: SQLAlchemy select() 语句
         one: True → scalar_one_or_none, False → list
         scalars: True → 返回 ORM 对象, False → 返回原始 Row（用于 group_by 等聚合查询）
     """
-    return await asyncio.to_thread(_execute_sync, stmt, one, scalars)
+    sql, params = _compile(stmt)
+    raw_rows = not (scalars or one)
+
+    pool = await get_pg_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor(row_factory=namedtuple_row if raw_rows else dict_row) as cur:
+            await cur.execute(sql, params)
+            rows = await cur.fetchall()
+
+    if raw_rows:
+        return rows
+
+    entity = _scalar_entity(stmt)
+    if entity is not None:
+        values = [_to_instance(entity, row) for row in rows]
+    else:
+        values = [next(iter(row.values())) for row in rows]
+
+    if one:
+        if len(values) > 1:
+            raise MultipleResultsFound("run_query(one=True) 返回了多行结果")
+        return values[0] if values else None
+    return values
@@ -1,9 +1,8 @@
 """
 食材查询工具 -- 接入真实 PostgreSQL 数据库
 
-通过 asyncio.to_thread 将 DB 查询放到独立线程执行，
-完全绕过 langgraph dev 的 blockbuster 对 asyncpg os.getcwd() 的拦截。
-使用同步 psycopg2 驱动，线程安全。
+查询经 run_query 走与 checkpointer 共用的 psycopg3 异步连接池，
+不触发 langgraph dev 的 blockbuster 对 asyncpg os.getcwd() 的拦截。
 """
 import json
 from enum import Enum
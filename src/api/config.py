@@ -3,7 +3,7 @@ FastAPI 应用配置
 使用 Pydantic Settings 管理环境变量
 """
 import os
-from typing import List, Literal
+from typing import Dict, List, Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, field_validator
 from pathlib import Path
@@ -28,6 +28,24 @@ class Settings(BaseSettings):
     api_reload: bool = Field(default=True, description="自动重载（开发模式）")
     api_workers: int = Field(default=1, description="工作进程数")
     log_level: str = Field(default="info", description="日志级别")
+    trusted_responses_enabled: bool = Field(
+        default=True,
+        description="可信响应路径总开关：列表类路由由已校验的 ORM 数据免校验构造响应并直接序列化",
+    )
+    trusted_response_routes: List[str] = Field(
+        default=["list_diet_plans", "get_today_meals", "get_meals_by_date", "get_weekly_calendar", "list_todos"],
+        description="走可信响应路径的路由（按路由函数名）",
+    )
+    trusted_response_validate_rate: float = Field(
+        default=0.1,
+        ge=0.0,
+        le=1.0,
+        description="开发模式下可信响应按该比例抽样做完整校验，发现模型与数据漂移",
+    )
+    trusted_response_validate_strict: bool = Field(
+        default=False,
+        description="抽样校验发现漂移时直接抛出而不是记录告警（测试 / CI 开启）",
+    )
 
     # ============ JWT 认证配置 ============
     jwt_secret_key: str = Field(..., description="JWT 签名密钥")
@@ -40,19 +58,75 @@ class Settings(BaseSettings):
         default=7,
         description="Refresh Token 有效期（天）"
     )
+    jwt_verified_token_cache_size: int = Field(
+        default=10000,
+        description="已验证 Access Token 的进程内 LRU 条目上限（0 关闭）",
+    )
+    user_status_cache_ttl_seconds: int = Field(
+        default=300,
+        description="Redis 中用户启用/管理员状态缓存的有效期（秒），禁用或更新用户时主动失效",
+    )
+    refresh_token_sweep_interval_seconds: int = Field(
+        default=3600,
+        description="后台清理过期/已撤销刷新令牌的间隔（秒），0 关闭",
+    )
+    refresh_token_sweep_batch_size: int = Field(default=1000, description="刷新令牌清理每批删除的行数")
 
     # ============ 数据库配置 ============
     database_url: str = Field(..., description="异步数据库连接字符串")
     database_echo: bool = Field(default=False, description="是否打印 SQL 语句")
+    database_replica_url: str = Field(default="", description="只读副本连接字符串（留空则全部读主库）")
+    db_replica_max_lag_seconds: float = Field(
+        default=5.0,
+        description="副本复制延迟超过该值时只读请求回退主库（秒）",
+    )
+    db_replica_lag_check_interval: float = Field(default=2.0, description="副本延迟检测间隔（秒）")
+    db_read_your_writes_seconds: int = Field(
+        default=5,
+        description="用户写入后该时间窗口内的只读请求仍走主库（秒）",
+    )
     langgraph_checkpoint_enabled: bool = Field(
         default=True,
         description="是否启用 LangGraph PostgreSQL checkpoint（复用 database_url）"
     )
+    db_connection_budget: int = Field(
+        default=100,
+        description="单节点 Postgres 连接预算（所有 worker 合计，应不超过 max_connections）",
+    )
+    db_reserved_connections: int = Field(
+        default=10,
+        description="从预算中预留给迁移、运维脚本的连接数",
+    )
+    db_pool_weights: Dict[str, float] = Field(
+        default={"api": 0.6, "agent": 0.4},
+        description="各连接池消费方的预算权重（api: SQLAlchemy 引擎，agent: checkpointer + agent 工具）",
+    )
+    db_query_stats_enabled: bool = Field(
+        default=True,
+        description="是否统计每个请求的 SQL 查询次数与耗时（开发环境附加 X-DB-Queries/X-DB-Time 响应头）",
+    )
+    db_n_plus_one_threshold: int = Field(
+        default=5,
+        description="同一语句在单个请求内执行达到该次数时记录疑似 N+1 告警",
+    )
 
     # ============ Redis 配置 ============
     redis_url: str = Field(default="redis://localhost:6379/0", description="Redis 连接字符串")
     redis_password: str = Field(default="", description="Redis 密码")
     redis_db: int = Field(default=0, description="Redis 数据库编号")
+    redis_cluster_mode: bool = Field(
+        default=False,
+        description="是否以 Redis Cluster 模式连接（redis_url 指向任一集群节点）",
+    )
+    redis_client_cache_enabled: bool = Field(
+        default=True,
+        description="是否启用 Redis 客户端侧缓存（服务端协助失效，需 Redis 6+）",
+    )
+    redis_client_cache_prefixes: List[str] = Field(
+        default=["temp_plan:", "cache:", "feature_flag:", "user_status:"],
+        description="允许客户端侧缓存的读多写少 key 前缀",
+    )
+    redis_client_cache_max_entries: int = Field(default=10000, description="客户端侧缓存最大条目数")
 
     # ============ CORS 配置 ============
     cors_origins: List[str] = Field(
@@ -74,6 +148,28 @@ class Settings(BaseSettings):
     allowed_hosts: List[str] = Field(default=["*"], description="允许的主机名")
     max_request_size: int = Field(default=10485760, description="最大请求大小（字节）")
 
+    # ============ 条件请求与预压缩 ============
+    response_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="按 ETag 缓存的预序列化/预压缩响应体总字节上限（进程内 LRU）",
+    )
+    response_precompress_encodings: List[str] = Field(
+        default=["br", "zstd", "gzip"],
+        description="预压缩编码的服务端偏好顺序（br 需要安装 brotli）",
+    )
+    response_precompress_min_size: int = Field(
+        default=1000,
+        description="小于该字节数的响应体不压缩（与 GZipMiddleware 的 minimum_size 一致）",
+    )
+    gzip_excluded_content_types: List[str] = Field(
+        default=[
+            "image/", "video/", "audio/", "font/woff",
+            "application/zip", "application/gzip", "application/zstd", "application/vnd.apache.parquet",
+            "text/event-stream",
+        ],
+        description="压缩中间件跳过的 Content-Type 前缀（本身已压缩的媒体、SSE）",
+    )
+
     # ============ 任务配置 ============
     task_timeout_seconds: int = Field(default=3600, description="任务超时时间（秒）")
     task_max_concurrent: int = Field(default=5, description="最大并发任务数")
@@ -81,6 +177,46 @@ class Settings(BaseSettings):
         default="v2",
         description="饮食计划 API 使用的 agent 图版本",
     )
+    event_bus_local_fast_path: bool = Field(
+        default=True,
+        description="同进程订阅者直接从内存通道接收任务事件（Redis 仍用于回放与跨 worker）",
+    )
+    executor_cpu_workers: int = Field(
+        default=0,
+        description="CPU 密集线程池（bcrypt 等）线程数，0 表示使用 CPU 核数",
+    )
+    executor_io_workers: int = Field(default=16, description="阻塞 I/O 线程池（MinIO 等）线程数")
+    executor_bcrypt_workers: int = Field(
+        default=0,
+        description="密码哈希专用线程池线程数，0 表示使用 CPU 核数",
+    )
+    executor_bcrypt_max_queue: int = Field(
+        default=32,
+        description="密码哈希排队上限，超出时登录/注册直接返回 503",
+    )
+    executor_image_workers: int = Field(
+        default=2,
+        description="图片衍生尺寸编码进程池进程数（Pillow 解码/缩放/编码不受 GIL 限制）",
+    )
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31, description="新密码哈希使用的 bcrypt cost")
+    bcrypt_rehash_on_login: bool = Field(
+        default=True,
+        description="登录成功且已有哈希的 cost 与 BCRYPT_ROUNDS 不同时，用明文重新哈希并保存",
+    )
+    meal_schedule_mode: Literal["virtual", "materialized"] = Field(
+        default="virtual",
+        description="应用计划时的餐食排期方式：virtual 读时展开活跃计划 / materialized 预生成 30 天 MealRecord",
+    )
+
+    # ============ 餐食记录分区与归档 ============
+    meal_partition_months_ahead: int = Field(
+        default=3,
+        description="启动与归档任务预建 meal_records 月度分区的月数（仅 PostgreSQL）",
+    )
+    meal_archive_after_months: int = Field(
+        default=12,
+        description="早于该月数的分区导出为 Parquet 并从热表摘除，<=0 表示不归档",
+    )
 
     # ============ 速率限制配置 ============
     rate_limit_enabled: bool = Field(default=True, description="是否启用速率限制")
@@ -102,6 +238,33 @@ class Settings(BaseSettings):
     minio_secure: bool = Field(default=False, description="是否使用HTTPS")
     minio_bucket: str = Field(default="petfood-bucket", description="MinIO存储桶")
     minio_public_endpoint: str = Field(default="", description="MinIO外部访问端点")
+    avatar_disk_cache_dir: str = Field(
+        default="",
+        description="头像代理的本地磁盘缓存目录，留空使用系统临时目录下的 petfood-avatar-cache",
+    )
+    avatar_disk_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        description="头像磁盘缓存总字节上限（每个进程各自计算，多 worker 共用目录时占用约为 worker 数 × 上限），0 关闭",
+    )
+    avatar_cache_max_age_seconds: int = Field(
+        default=86400,
+        description="头像响应的浏览器缓存时间；对象名不可变，过期后凭 ETag 重新验证",
+    )
+    image_derivative_widths: List[int] = Field(
+        default=[64, 128, 256],
+        description="上传图片后在后台生成的衍生尺寸宽度（像素），为空关闭；需要安装 images 可选依赖",
+    )
+    image_derivative_format: Literal["webp", "avif"] = Field(
+        default="webp",
+        description="衍生图编码格式；Pillow 不支持 AVIF 时回退 WebP",
+    )
+    image_derivative_quality: int = Field(default=80, ge=1, le=100, description="衍生图编码质量")
+    plan_blob_offload_enabled: bool = Field(
+        default=True,
+        description="是否把大计划文档（plan_data / 任务输出 / 临时计划）压缩后卸载到 MinIO",
+    )
+    plan_blob_min_bytes: int = Field(default=16384, description="规范化 JSON 超过该字节数才卸载")
+    plan_blob_zstd_level: int = Field(default=10, description="计划对象 zstd 压缩级别")
 
     # ============ 验证码配置 ============
     verification_code_length: int = Field(default=6, description="验证码长度")
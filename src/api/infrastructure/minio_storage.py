@@ -5,19 +5,57 @@ import asyncio
 import io
 import logging
 from datetime import timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 from urllib.parse import urlparse
 
 from minio import Minio
 from minio.error import S3Error
 
 from src.api.config import settings
+from src.utils.executors import run_blocking_io
 
 logger = logging.getLogger(__name__)
 
 MINIO_REFERENCE_PREFIX = "minio://"
 LOCAL_ENDPOINT_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0"}
 
+# S3 分片上传的最小分片；小于该大小的上传在事件循环上收齐后单次 PUT
+STREAM_PART_SIZE = 5 * 1024 * 1024
+
+
+class _AsyncChunkReader:
+    """
+    把事件循环上的异步分块迭代器包装成同步 read()
+
+    put_object 在 I/O 线程中按分片调用 read()，这里再把读取请求投递回事件循环
+    取下一块，内存中最多保留一个分片。
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], loop: asyncio.AbstractEventLoop, prefix: bytes = b""):
+        self._chunks = chunks
+        self._loop = loop
+        self._buffer = bytearray(prefix)
+        self._eof = False
+
+    async def _next(self) -> Optional[bytes]:
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = asyncio.run_coroutine_threadsafe(self._next(), self._loop).result()
+            if chunk is None:
+                self._eof = True
+            else:
+                self._buffer += chunk
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
 
 class MinioConfig:
     """MinIO配置类"""
@@ -115,8 +153,9 @@ class MinioManager:
         object_name: str,
         file_data: bytes,
         content_type: str = "application/octet-stream",
+        metadata: dict | None = None,
     ) -> bool:
-        """上传文件"""
+        """上传文件（metadata 可携带 Content-Encoding 等对象头）"""
         try:
             self._ensure_initialized()
             if self.client is None:
@@ -129,6 +168,7 @@ class MinioManager:
                 data=file_stream,
                 length=len(file_data),
                 content_type=content_type,
+                metadata=metadata,
             )
             return True
         except S3Error:
@@ -158,6 +198,26 @@ class MinioManager:
             logger.exception("Error uploading file from path: %s", object_name)
             return False
 
+    def upload_stream(self, object_name: str, reader, content_type: str = "application/octet-stream") -> bool:
+        """从 read() 流上传（长度未知，按 STREAM_PART_SIZE 分片上传，失败时 minio 自动中止分片）"""
+        try:
+            self._ensure_initialized()
+            if self.client is None:
+                raise RuntimeError("MinIO client is not initialized")
+
+            self.client.put_object(
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=reader,
+                length=-1,
+                part_size=STREAM_PART_SIZE,
+                content_type=content_type,
+            )
+            return True
+        except S3Error:
+            logger.exception("Error uploading stream: %s", object_name)
+            return False
+
     def download_file(self, object_name: str) -> Optional[bytes]:
         """下载文件"""
         try:
@@ -175,6 +235,24 @@ class MinioManager:
             logger.exception("Error downloading file: %s", object_name)
             return None
 
+    def open_object(self, object_name: str, offset: int = 0, length: int = 0):
+        """
+        打开对象流（一次 GET，响应头里带 ETag / Content-Type / Content-Length）
+
+        调用方负责 close() + release_conn()。对象不存在返回 None；
+        Range 越界（InvalidRange）等其他 S3 错误向上抛出。
+        """
+        self._ensure_initialized()
+        if self.client is None:
+            raise RuntimeError("MinIO client is not initialized")
+
+        try:
+            return self.client.get_object(self.bucket_name, object_name, offset=offset, length=length)
+        except S3Error as exc:
+            if exc.code == "NoSuchKey":
+                return None
+            raise
+
     def download_file_to_path(self, object_name: str, file_path: str) -> bool:
         """下载文件到路径"""
         try:
@@ -320,7 +398,7 @@ class MinioManager:
 
         return self.get_file_url(object_name, request_host=request_host) or file_reference
 
-    # ──────────── 异步包装：将阻塞 I/O 卸载到线程池 ────────────
+    # ──────────── 异步包装：将阻塞 I/O 卸载到专用 I/O 线程池 ────────────
     #
     # 以下 a-前缀 方法用于 async 路径（FastAPI 路由/Service）。
     # 仅包装涉及真实网络 I/O 的操作；预签名 URL 生成（get_file_url
@@ -333,12 +411,37 @@ class MinioManager:
         object_name: str,
         file_data: bytes,
         content_type: str = "application/octet-stream",
+        metadata: dict | None = None,
     ) -> bool:
-        """异步上传（to_thread 卸载 put_object）。"""
-        return await asyncio.to_thread(
-            self.upload_file, object_name, file_data, content_type
+        """异步上传（I/O 线程池卸载 put_object）。"""
+        return await run_blocking_io(
+            self.upload_file, object_name, file_data, content_type, metadata
         )
 
+    async def aupload_stream(
+        self,
+        object_name: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str = "application/octet-stream",
+    ) -> bool:
+        """
+        异步流式上传
+
+        先在事件循环上收集至多一个分片：数据在此之前结束（头像等小文件）就单次 PUT，
+        I/O 线程不必等待客户端慢速上传；超过一个分片才交给 put_object 分片上传，
+        由 _AsyncChunkReader 按需从 chunks 拉取。chunks 抛出的异常（如超过大小上限）原样向上传递。
+        """
+        iterator = chunks.__aiter__()
+        head = bytearray()
+        while len(head) <= STREAM_PART_SIZE:
+            try:
+                head += await iterator.__anext__()
+            except StopAsyncIteration:
+                return await self.aupload_file(object_name, bytes(head), content_type)
+
+        reader = _AsyncChunkReader(iterator, asyncio.get_running_loop(), prefix=bytes(head))
+        return await run_blocking_io(self.upload_stream, object_name, reader, content_type)
+
     async def aupload_file_from_path(
         self,
         object_name: str,
@@ -346,33 +449,37 @@ class MinioManager:
         content_type: str | None = None,
     ) -> bool:
         """异步从路径上传。"""
-        return await asyncio.to_thread(
+        return await run_blocking_io(
             self.upload_file_from_path, object_name, file_path, content_type
         )
 
     async def adownload_file(self, object_name: str) -> Optional[bytes]:
-        """异步下载（to_thread 卸载 get_object）。"""
-        return await asyncio.to_thread(self.download_file, object_name)
+        """异步下载（I/O 线程池卸载 get_object）。"""
+        return await run_blocking_io(self.download_file, object_name)
+
+    async def aopen_object(self, object_name: str, offset: int = 0, length: int = 0):
+        """异步打开对象流（I/O 线程池卸载 get_object，读取分块同样需卸载）。"""
+        return await run_blocking_io(self.open_object, object_name, offset, length)
 
     async def adownload_file_to_path(self, object_name: str, file_path: str) -> bool:
         """异步下载到路径。"""
-        return await asyncio.to_thread(self.download_file_to_path, object_name, file_path)
+        return await run_blocking_io(self.download_file_to_path, object_name, file_path)
 
     async def adelete_file(self, object_name: str) -> bool:
-        """异步删除（to_thread 卸载 remove_object）。"""
-        return await asyncio.to_thread(self.delete_file, object_name)
+        """异步删除（I/O 线程池卸载 remove_object）。"""
+        return await run_blocking_io(self.delete_file, object_name)
 
     async def alist_files(self, prefix: str = "") -> list[str]:
-        """异步列出（to_thread 卸载 list_objects）。"""
-        return await asyncio.to_thread(self.list_files, prefix)
+        """异步列出（I/O 线程池卸载 list_objects）。"""
+        return await run_blocking_io(self.list_files, prefix)
 
     async def aget_file_info(self, object_name: str) -> Optional[dict]:
-        """异步获取文件信息（to_thread 卸载 stat_object）。"""
-        return await asyncio.to_thread(self.get_file_info, object_name)
+        """异步获取文件信息（I/O 线程池卸载 stat_object）。"""
+        return await run_blocking_io(self.get_file_info, object_name)
 
     async def afile_exists(self, object_name: str) -> bool:
-        """异步存在性检查（to_thread 卸载 stat_object）。"""
-        return await asyncio.to_thread(self.file_exists, object_name)
+        """异步存在性检查（I/O 线程池卸载 stat_object）。"""
+        return await run_blocking_io(self.file_exists, object_name)
 
 
 def get_minio_client() -> MinioManager:
@@ -0,0 +1,161 @@
+"""
+MinIO 对象的本地磁盘 LRU 缓存
+
+头像等对象名带随机后缀、写入后不再修改（替换头像会生成新的对象名并删除旧对象），
+因此按对象名缓存不会读到旧内容。每个对象在缓存目录下存两份文件：
+- <sha256(object_name)>        对象内容
+- <sha256(object_name)>.json   元数据（对象名、ETag、Content-Type、大小）
+
+索引在内存中按访问顺序维护，总字节数超过上限时淘汰最久未访问的对象。
+首次使用时扫描目录恢复索引（按文件 mtime 排序），进程重启后缓存仍然有效。
+所有方法都是同步文件操作，async 路径经 run_blocking_io 调用，会在多个 I/O 线程上并发执行，
+索引的读写（含首次扫描）都在同一把锁内完成。
+
+字节上限按进程计算：多个 worker 共用同一目录时，磁盘占用最多是 worker 数 × 上限，
+且每个进程只按自己的索引淘汰，可能删掉其他进程仍在索引中的文件（对方下次 get 时发现文件
+不存在，按未命中处理）。需要严格上限时给每个 worker 配置独立目录。
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CachedObject:
+    object_name: str
+    etag: str
+    content_type: str
+    size: int
+    path: str
+
+
+class DiskObjectCache:
+    """按总字节数淘汰的对象磁盘缓存。"""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedObject]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def _key(object_name: str) -> str:
+        return hashlib.sha256(object_name.encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        """扫描目录恢复索引；调用方持有锁，扫描完成前其他线程看不到半成品索引。"""
+        if self._loaded:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        restored = []
+        for meta_path in self.root.glob("*.json"):
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                data_path = meta_path.with_suffix("")
+                entry = CachedObject(**{**meta, "path": str(data_path)})
+                restored.append((data_path.stat().st_mtime, entry))
+            except (OSError, ValueError, TypeError):
+                meta_path.unlink(missing_ok=True)
+        for _, entry in sorted(restored, key=lambda item: item[0]):
+            self._entries[entry.object_name] = entry
+            self._size += entry.size
+        # 上次进程退出时未完成的临时文件
+        for tmp_path in self.root.glob("*.tmp"):
+            tmp_path.unlink(missing_ok=True)
+        self._evict()
+        self._loaded = True
+
+    def get(self, object_name: str) -> Optional[CachedObject]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._load()
+            entry = self._entries.get(object_name)
+            if entry is None or not os.path.exists(entry.path):
+                if entry is not None:
+                    self._drop(object_name)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(object_name)
+            self.hits += 1
+            return entry
+
+    def temp_path(self) -> str:
+        """写入中的对象先落到临时文件，完整写完再 commit。"""
+        with self._lock:
+            self._load()
+        return str(self.root / f"{uuid.uuid4().hex}.tmp")
+
+    def commit(self, object_name: str, temp_path: str, etag: str, content_type: str, size: int) -> None:
+        """把完整写入的临时文件登记为缓存条目；超过上限的单个对象直接丢弃。"""
+        if size > self.max_bytes:
+            os.unlink(temp_path)
+            return
+        with self._lock:
+            self._load()
+            self._drop(object_name)
+            data_path = self.root / self._key(object_name)
+            os.replace(temp_path, data_path)
+            entry = CachedObject(object_name, etag, content_type, size, str(data_path))
+            meta = {k: v for k, v in asdict(entry).items() if k != "path"}
+            data_path.with_suffix(".json").write_text(json.dumps(meta), encoding="utf-8")
+            self._entries[object_name] = entry
+            self._size += size
+            self._evict()
+
+    def discard(self, object_name: str) -> None:
+        """对象被删除或替换时移除缓存。"""
+        if self.enabled:
+            with self._lock:
+                self._load()
+                self._drop(object_name)
+
+    # _drop / _evict 只在持有 _lock 时调用
+
+    def _drop(self, object_name: str) -> None:
+        entry = self._entries.pop(object_name, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        Path(entry.path).unlink(missing_ok=True)
+        Path(entry.path).with_suffix(".json").unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "objects": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+avatar_cache = DiskObjectCache(
+    Path(settings.avatar_disk_cache_dir or Path(tempfile.gettempdir()) / "petfood-avatar-cache"),
+    settings.avatar_disk_cache_max_bytes,
+)
@@ -0,0 +1,157 @@
+"""
+饮食计划大文档的对象存储卸载
+
+完整的 4 周计划动辄几百 KB，原先内联在 diet_plans.plan_data、tasks.output_data
+与 Redis temp_plan:* 里，拖大了表/TOAST、备份和 Redis 工作集。这里把超过阈值的
+文档规范化（sort_keys 紧凑 JSON）后 zstd 压缩写入 MinIO：
+
+- 对象名由规范化内容的 sha256 决定，内容相同的计划自动去重
+- 原位置只保留"存根"：{"$plan_blob": <digest>, ...小字段摘要}
+- 读取方用 hydrate_document() 还原；详情接口可直接透传压缩字节（Content-Encoding: zstd）
+
+对象按内容寻址、可能被多条记录共享，删除计划时不删对象。
+"""
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import zstandard
+
+from src.api.config import settings
+from src.utils.executors import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+PLAN_BLOB_MARKER = "$plan_blob"
+PLAN_BLOB_PREFIX = "plans/"
+PLAN_BLOB_CONTENT_ENCODING = "zstd"
+
+# 存根里保留的单个顶级字段上限（字节），更大的字段只存在对象里
+_SUMMARY_FIELD_MAX_BYTES = 2048
+
+
+@dataclass(frozen=True)
+class EncodedPlan:
+    """规范化并压缩后的计划文档。"""
+
+    digest: str
+    size: int
+    data: bytes
+
+
+def canonical_json(doc: Any) -> bytes:
+    """规范化 JSON：键排序、紧凑分隔符，保证相同内容得到相同字节。"""
+    return json.dumps(doc, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def encode_plan_document(doc: dict, level: int | None = None) -> EncodedPlan:
+    """规范化 + 计算摘要 + zstd 压缩（CPU 密集，异步路径经 run_cpu_bound 调用）。"""
+    raw = canonical_json(doc)
+    compressor = zstandard.ZstdCompressor(level=level or settings.plan_blob_zstd_level)
+    return EncodedPlan(
+        digest=hashlib.sha256(raw).hexdigest(),
+        size=len(raw),
+        data=compressor.compress(raw),
+    )
+
+
+def decode_plan_blob(data: bytes) -> dict:
+    """解压并解析计划对象。"""
+    return json.loads(zstandard.ZstdDecompressor().decompress(data))
+
+
+def blob_object_name(digest: str) -> str:
+    """对象名：plans/<前两位>/<digest>.json.zst，前缀分散避免单目录过大。"""
+    return f"{PLAN_BLOB_PREFIX}{digest[:2]}/{digest}.json.zst"
+
+
+def is_blob_stub(doc: Any) -> bool:
+    """是否为指向对象存储的存根。"""
+    return isinstance(doc, dict) and isinstance(doc.get(PLAN_BLOB_MARKER), str)
+
+
+def summarize_document(doc: dict, digest: str) -> dict:
+    """构造存根：引用 + 体积较小的顶级字段（pet_information、ai_suggestions 等）。"""
+    stub: dict[str, Any] = {PLAN_BLOB_MARKER: digest}
+    for key, value in doc.items():
+        if len(canonical_json(value)) <= _SUMMARY_FIELD_MAX_BYTES:
+            stub[key] = value
+    return stub
+
+
+class PlanBlobStore:
+    """计划文档对象存储（MinIO 上按内容寻址的 zstd 对象）。"""
+
+    def __init__(self, storage=None):
+        self._storage = storage
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from src.api.infrastructure.minio_storage import get_minio_client
+
+            self._storage = get_minio_client()
+        return self._storage
+
+    async def put(self, doc: dict) -> Optional[str]:
+        """写入文档并返回 digest；对象已存在时跳过上传，上传失败返回 None。"""
+        encoded = await run_cpu_bound(encode_plan_document, doc)
+        object_name = blob_object_name(encoded.digest)
+        if await self.storage.afile_exists(object_name):
+            return encoded.digest
+        ok = await self.storage.aupload_file(
+            object_name,
+            encoded.data,
+            content_type="application/json",
+            metadata={"Content-Encoding": PLAN_BLOB_CONTENT_ENCODING},
+        )
+        if not ok:
+            return None
+        logger.info(
+            "计划文档已写入对象存储: %s (%d → %d 字节)",
+            object_name, encoded.size, len(encoded.data),
+        )
+        return encoded.digest
+
+    async def get_compressed(self, digest: str) -> bytes:
+        """读取压缩字节（用于 Content-Encoding 透传）。"""
+        data = await self.storage.adownload_file(blob_object_name(digest))
+        if data is None:
+            raise LookupError(f"计划对象不存在: {digest}")
+        return data
+
+    async def get(self, digest: str) -> dict:
+        """读取并还原文档。"""
+        return await run_cpu_bound(decode_plan_blob, await self.get_compressed(digest))
+
+
+plan_blob_store = PlanBlobStore()
+
+
+async def offload_document(doc: Optional[dict]) -> Optional[dict]:
+    """
+    超过阈值的文档写入对象存储并返回存根，否则原样返回
+
+    已是存根、未开启卸载、或对象存储写入失败时都原样返回（宁可内联也不丢数据）。
+    """
+    if not settings.plan_blob_offload_enabled or not isinstance(doc, dict) or is_blob_stub(doc):
+        return doc
+    if len(canonical_json(doc)) < settings.plan_blob_min_bytes:
+        return doc
+    try:
+        digest = await plan_blob_store.put(doc)
+    except Exception as exc:
+        logger.warning("计划文档写入对象存储失败，保留内联: %s", exc)
+        return doc
+    if digest is None:
+        return doc
+    return summarize_document(doc, digest)
+
+
+async def hydrate_document(doc: Optional[dict]) -> Optional[dict]:
+    """存根还原为完整文档；非存根原样返回。"""
+    if not is_blob_stub(doc):
+        return doc
+    return await plan_blob_store.get(doc[PLAN_BLOB_MARKER])
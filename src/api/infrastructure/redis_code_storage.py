@@ -9,6 +9,12 @@ from redis.asyncio import Redis
 
 from src.api.domain.verification import VerificationCode, VerificationCodeType
 from src.api.infrastructure.interfaces import ICodeStorage
+from src.db.redis_keys import (
+    daily_send_count_key,
+    legacy_verification_code_key,
+    send_cooldown_key,
+    verification_code_key,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -16,21 +22,19 @@ logger = logging.getLogger(__name__)
 class RedisCodeStorage(ICodeStorage):
     """Redis 验证码存储实现"""
 
-    # Redis Key 前缀
-    CODE_KEY_PREFIX = "verification_code:"
-    COOLDOWN_KEY_PREFIX = "send_cooldown:"
-    DAILY_COUNT_KEY_PREFIX = "daily_send_count:"
+    # Redis Key 统一由 src.db.redis_keys 构造，以 {email} 为 hash tag，
+    # 同一邮箱的验证码、冷却、每日计数落在同一 Cluster slot
 
     def __init__(self, redis_client: Redis):
         self.redis = redis_client
 
     def _build_code_key(self, email: str, code_type: VerificationCodeType) -> str:
         """构建验证码 Redis Key"""
-        return f"{self.CODE_KEY_PREFIX}{code_type.value}:{email}"
+        return verification_code_key(code_type.value, email)
 
     def _build_cooldown_key(self, email: str) -> str:
         """构建冷却时间 Redis Key"""
-        return f"{self.COOLDOWN_KEY_PREFIX}{email}"
+        return send_cooldown_key(email)
 
     def _build_daily_count_key(self, email: str) -> str:
         """
@@ -39,7 +43,7 @@ class RedisCodeStorage(ICodeStorage):
         使用 UTC 时间确保跨时区一致性
         """
         today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        return f"{self.DAILY_COUNT_KEY_PREFIX}{email}:{today}"
+        return daily_send_count_key(email, today)
 
     async def save_code(self, code: VerificationCode) -> bool:
         """
@@ -96,6 +100,9 @@ class RedisCodeStorage(ICodeStorage):
         try:
             key = self._build_code_key(email, code_type)
             data = await self.redis.get(key)
+            if not data:
+                # 升级前已发出、尚未过期的验证码仍使用旧 key
+                data = await self.redis.get(legacy_verification_code_key(code_type.value, email))
 
             if not data:
                 return None
@@ -145,6 +152,8 @@ class RedisCodeStorage(ICodeStorage):
         try:
             key = self._build_code_key(email, code_type)
             await self.redis.delete(key)
+            # 新旧 key 不在同一 slot，分开删除避免 CROSSSLOT
+            await self.redis.delete(legacy_verification_code_key(code_type.value, email))
             logger.debug(f"验证码已删除: email={email}, code_type={code_type}")
             return True
         except Exception as e:
@@ -9,11 +9,15 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 
 from src.api.config import settings
-from src.db.redis import close_redis, test_redis_connection
+from src.api.middleware.compression import CompressionMiddleware
+from src.db.redis import close_redis, get_client_cache_stats, start_client_cache, test_redis_connection
+from src.db.pg_pool import close_pg_pool, get_pg_pool
+from src.db.pool_budget import pool_usage
 from src.db.session import close_db, test_connection
+from src.utils.executors import executor_stats, shutdown_executors
+from src.utils.serialization import ORJSONResponse
 from src.__version__ import __version__
 
 logging.basicConfig(
@@ -49,8 +53,26 @@ async def lifespan(app: FastAPI):
     elif db_ok:
         logger.info("Database connection ok; skip create_all outside dev")
 
+    if db_ok:
+        # meal_records 月度分区：预建未来几个月，避免新数据落入 default 分区
+        try:
+            from src.db.partitions import ensure_meal_partitions
+            from src.db.session import engine
+
+            async with engine.begin() as conn:
+                await ensure_meal_partitions(conn, settings.meal_partition_months_ahead)
+        except Exception as exc:
+            logger.warning("meal_records partition maintenance failed: %s", exc)
+
+        # 过期与已撤销的刷新令牌按批后台清理
+        from src.api.services.refresh_token_store import refresh_token_sweeper
+
+        refresh_token_sweeper.start()
+
     # Redis 只做轻量探活，不在启动阶段执行额外预热逻辑。
     redis_ok = await test_redis_connection()
+    if redis_ok:
+        await start_client_cache()
     if db_ok and redis_ok:
         logger.info("Infrastructure health check passed")
     else:
@@ -70,6 +92,13 @@ async def lifespan(app: FastAPI):
         app.state.v2_checkpoint_pool = pool
     else:
         checkpointer = None
+        if db_ok:
+            # checkpoint 关闭时也预先打开 agent 工具共用的连接池，
+            # 避免首个计划任务的 4 个 week_agent 同时触发建连
+            try:
+                await get_pg_pool()
+            except Exception as exc:
+                logger.warning("Agent tool pool warm-up skipped: %s", exc)
     app.state.v2_graph = compile_v2_graph(checkpointer=checkpointer)
 
     has_langgraph_route = any(getattr(route, "path", None) == "/langgraph" for route in app.routes)
@@ -89,10 +118,16 @@ async def lifespan(app: FastAPI):
 
     # 应用退出时统一关闭连接池。
     logger.info("Shutting down FastAPI application")
-    if app.state.v2_checkpoint_pool is not None:
-        await app.state.v2_checkpoint_pool.close()
+    from src.api.services.progress_writer import progress_writer
+    from src.api.services.refresh_token_store import refresh_token_sweeper
+
+    await progress_writer.close()
+    await refresh_token_sweeper.close()
+    # checkpointer 与 agent 工具共用的 psycopg 连接池
+    await close_pg_pool()
     await close_db()
     await close_redis()
+    shutdown_executors()
     logger.info("Shutdown complete")
 
 
@@ -115,7 +150,11 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"],
 )
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=1000,
+    excluded_content_types=settings.gzip_excluded_content_types,
+)
 
 from src.api.middleware.logging import RequestLoggingMiddleware
 
@@ -127,12 +166,24 @@ if settings.rate_limit_enabled:
 
     app.add_middleware(RateLimitMiddleware, redis_getter=get_redis_client)
 
+if settings.database_replica_url:
+    from src.api.middleware.db_routing import ReadYourWritesMiddleware
+
+    app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.db_query_stats_enabled:
+    from src.api.middleware.query_stats import QueryStatsMiddleware
+    from src.db.query_stats import install_query_hooks
+
+    install_query_hooks()
+    app.add_middleware(QueryStatsMiddleware)
+
 from src.api.middleware.exceptions import setup_exception_handlers
 
 setup_exception_handlers(app)
 
 
-@app.get("/", tags=["system"])
+@app.get("/", tags=["system"], response_class=ORJSONResponse)
 async def root():
     return {
         "code": 0,
@@ -149,7 +200,7 @@ async def root():
     }
 
 
-@app.get("/health", tags=["system"])
+@app.get("/health", tags=["system"], response_class=ORJSONResponse)
 async def health_check():
     return {
         "code": 0,
@@ -158,7 +209,7 @@ async def health_check():
     }
 
 
-@app.get("/health/detail", tags=["system"])
+@app.get("/health/detail", tags=["system"], response_class=ORJSONResponse)
 async def health_check_detail():
     db_status = await test_connection()
     redis_status = await test_redis_connection()
@@ -169,8 +220,15 @@ async def health_check_detail():
             "status": "healthy" if (db_status and redis_status) else "unhealthy",
             "version": __version__,
             "components": {
-                "database": {"status": "healthy" if db_status else "unhealthy"},
-                "redis": {"status": "healthy" if redis_status else "unhealthy"},
+                "database": {
+                    "status": "healthy" if db_status else "unhealthy",
+                    "pools": pool_usage(),
+                },
+                "executors": executor_stats(),
+                "redis": {
+                    "status": "healthy" if redis_status else "unhealthy",
+                    "client_cache": get_client_cache_stats(),
+                },
             },
         },
     }
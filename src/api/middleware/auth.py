@@ -2,6 +2,9 @@
 认证中间件。
 
 负责解析 JWT、校验用户状态，并为路由提供可复用的认证依赖。
+访问令牌经进程内 LRU 缓存验证结果，只需要启用/管理员状态的依赖读 Redis 状态缓存，
+不再每个请求查 users 表（如上传头像）；读取资料字段的路由（/me、/profile、/subscription）
+本来就要加载用户对象，仍使用 get_current_active_user_record，直接用加载到的行判断启用状态。
 """
 
 from typing import Optional
@@ -12,7 +15,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
-from src.api.utils.security import verify_token
+from src.api.services.user_status import get_user_status
+from src.api.utils.security import verify_token_cached
 from src.db.models import User
 
 
@@ -42,7 +46,7 @@ async def get_current_user_optional(
         return None
 
     try:
-        payload = verify_token(credentials.credentials, token_type="access")
+        payload = verify_token_cached(credentials.credentials, token_type="access")
     except ValueError:
         return None
 
@@ -57,7 +61,7 @@ async def get_current_user(
         raise _build_auth_error(status.HTTP_401_UNAUTHORIZED, "未提供认证凭据")
 
     try:
-        payload = verify_token(credentials.credentials, token_type="access")
+        payload = verify_token_cached(credentials.credentials, token_type="access")
     except ValueError as exc:
         raise _build_auth_error(status.HTTP_401_UNAUTHORIZED, str(exc)) from exc
 
@@ -76,6 +80,7 @@ async def get_current_active_user_record(
     返回已校验的用户对象。
 
     这里直接返回 ORM 实体，供后续依赖和路由复用，避免同一个请求里重复查询用户。
+    只需要启用状态的路由应使用 get_current_active_user，不加载用户对象。
     """
     result = await db.execute(select(User).where(User.id == current_user_id))
     user = result.scalars().first()
@@ -90,17 +95,35 @@ async def get_current_active_user_record(
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_active_user_record),
+    current_user_id: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session),
 ) -> str:
-    """兼容旧接口：保留返回用户 ID 的依赖定义。"""
-    return current_user.id
+    """返回已启用用户的 ID（状态来自缓存，不加载用户对象）。"""
+    user_status = await get_user_status(db, current_user_id)
+
+    if user_status is None:
+        raise _build_auth_error(status.HTTP_404_NOT_FOUND, "用户不存在")
+
+    if not user_status.is_active:
+        raise _build_auth_error(status.HTTP_403_FORBIDDEN, "用户已被禁用")
+
+    return current_user_id
 
 
 async def require_superuser(
-    current_user: User = Depends(get_current_active_user_record),
+    current_user_id: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session),
 ) -> str:
     """要求当前用户具备超级管理员权限。"""
-    if not current_user.is_superuser:
+    user_status = await get_user_status(db, current_user_id)
+
+    if user_status is None:
+        raise _build_auth_error(status.HTTP_404_NOT_FOUND, "用户不存在")
+
+    if not user_status.is_active:
+        raise _build_auth_error(status.HTTP_403_FORBIDDEN, "用户已被禁用")
+
+    if not user_status.is_superuser:
         raise _build_auth_error(status.HTTP_403_FORBIDDEN, "需要超级管理员权限")
 
-    return current_user.id
+    return current_user_id
@@ -0,0 +1,68 @@
+"""
+响应压缩中间件
+
+在 Starlette GZipMiddleware 的基础上按响应的 Content-Type 跳过压缩：
+图片、音视频、压缩包等本身已压缩的媒体再压一遍只浪费 CPU，
+流式转发时还会让 Content-Length 与实际字节不符。
+带 Content-Range 的部分内容（206）同样原样放行，压缩后范围就对不上了。
+"""
+from typing import Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _SkipExcludedMixin:
+    """http.response.start 时判断是否跳过压缩，跳过则之后的消息原样转发。"""
+
+    excluded_content_types: Tuple[str, ...] = ()
+    _skip = False
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self._skip = (
+                headers.get("content-type", "").startswith(self.excluded_content_types)
+                or "content-range" in headers
+            )
+        if self._skip:
+            await self.send(message)
+            return
+        await super().send_with_compression(message)
+
+
+class _GZipResponder(_SkipExcludedMixin, GZipResponder):
+    pass
+
+
+class _IdentityResponder(_SkipExcludedMixin, IdentityResponder):
+    pass
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware，跳过 excluded_content_types 前缀匹配的媒体类型与部分内容响应。"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        compresslevel: int = 9,
+        excluded_content_types: Sequence[str] = (),
+    ) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.excluded_content_types = tuple(excluded_content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        responder: _SkipExcludedMixin
+        if "gzip" in headers.get("Accept-Encoding", ""):
+            responder = _GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = _IdentityResponder(self.app, self.minimum_size)
+        responder.excluded_content_types = self.excluded_content_types
+        await responder(scope, receive, send)
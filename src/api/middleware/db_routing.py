@@ -0,0 +1,59 @@
+"""
+读写分离的请求侧接入
+
+- get_read_db_session：只读接口使用的会话依赖，按 src.db.read_routing 的规则选择副本或主库
+- ReadYourWritesMiddleware：写请求（POST/PUT/PATCH/DELETE）成功后标记当前用户，
+  窗口内该用户的只读请求回到主库
+
+只在配置了 database_replica_url 时注册中间件；未配置时依赖直接返回主库会话。
+"""
+import logging
+from typing import AsyncGenerator, Optional
+
+from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.api.middleware.auth import get_current_user_optional
+from src.api.utils.security import verify_token
+from src.db.read_routing import get_read_db, mark_recent_write
+
+logger = logging.getLogger(__name__)
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+async def get_read_db_session(
+    current_user_id: Optional[str] = Depends(get_current_user_optional),
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取只读数据库会话（依赖注入）
+
+    仅用于不写库的接口；需要写入的接口继续使用 get_db_session。
+    """
+    async for session in get_read_db(current_user_id):
+        yield session
+
+
+def _user_id_from_request(request: Request) -> Optional[str]:
+    """从 Bearer Token 解析用户 ID，无效时返回 None。"""
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return verify_token(token, token_type="access").get("sub")
+    except ValueError:
+        return None
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """写请求成功后标记用户，保证随后的只读请求能读到自己的写入"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            user_id = _user_id_from_request(request)
+            if user_id:
+                await mark_recent_write(user_id)
+        return response
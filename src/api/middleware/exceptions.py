@@ -3,11 +3,12 @@
 统一处理所有异常并返回标准格式
 """
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import logging
 
+from src.utils.serialization import ORJSONResponse
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,7 +18,7 @@ def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(APIException)
     async def api_exception_handler(request: Request, exc: APIException):
         """处理自定义 API 异常"""
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={
                 "code": exc.code,
@@ -29,7 +30,7 @@ def setup_exception_handlers(app: FastAPI):
     @app.exception_handler(StarletteHTTPException)
     async def http_exception_handler(request: Request, exc: StarletteHTTPException):
         """处理 HTTP 异常"""
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={
                 "code": exc.status_code,
@@ -49,7 +50,7 @@ def setup_exception_handlers(app: FastAPI):
                 "type": error["type"]
             })
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             content={
                 "code": 422,
@@ -73,7 +74,7 @@ def setup_exception_handlers(app: FastAPI):
         )
 
         # 返回通用错误响应
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "code": -1,
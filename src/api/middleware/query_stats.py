@@ -0,0 +1,44 @@
+"""
+请求级 SQL 查询统计中间件
+
+- 每个请求统计查询次数与数据库耗时
+- 同一语句形状在一个请求内执行次数达到阈值时记录结构化告警（疑似 N+1）
+- 开发环境下附加 X-DB-Queries / X-DB-Time 响应头
+"""
+import logging
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.api.config import settings
+from src.db.query_stats import track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """请求级 SQL 查询统计中间件"""
+
+    async def dispatch(self, request: Request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        repeated = stats.repeated(settings.db_n_plus_one_threshold)
+        if repeated:
+            shape, times = repeated[0]
+            logger.warning(
+                f"疑似 N+1 查询: {request.method} {request.url.path} - "
+                f"同一语句执行 {times} 次，共 {stats.count} 次查询",
+                extra={
+                    "db_queries": stats.count,
+                    "db_time_ms": round(stats.total_time * 1000, 2),
+                    "repeated_statements": [
+                        {"statement": s[:500], "count": n} for s, n in repeated
+                    ],
+                },
+            )
+
+        if settings.is_dev:
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["X-DB-Time"] = f"{stats.total_time * 1000:.2f}ms"
+        return response
@@ -9,6 +9,7 @@ from starlette.responses import JSONResponse
 import time
 
 from src.api.config import settings
+from src.db.redis_keys import rate_limit_key
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +40,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
             # 生成限制键（基于 IP 或用户 ID）
             identifier = await self._get_identifier(request)
-            limit_key = f"rate_limit:{identifier}"
+            limit_key = rate_limit_key(identifier)
 
             # 获取当前时间窗口内的请求次数
             current = await redis_client.get(limit_key)
@@ -104,10 +104,12 @@ class TaskResponse(BaseModel):
 
 
 class TaskListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     page: int = Field(..., ge=1)
     page_size: int = Field(..., ge=1, le=100)
     items: list[TaskResponse]
+    next_cursor: Optional[str] = None
+    total_approximate: bool = False
 
 
 class TaskCancelResponse(BaseModel):
@@ -156,10 +158,12 @@ class DietPlanDetailResponse(BaseModel):
 
 
 class DietPlanListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     page: int = Field(..., ge=1)
     page_size: int = Field(..., ge=1, le=100)
     items: list[DietPlanSummaryResponse]
+    next_cursor: Optional[str] = None
+    total_approximate: bool = False
 
 
 class HealthCheckResponse(BaseModel):
@@ -190,6 +194,8 @@ class PetResponse(BaseModel):
     weight: float
     gender: Optional[str] = None
     avatar_url: Optional[str] = None
+    # 衍生尺寸头像 {宽度: 地址}，尚未生成时地址回退原图
+    avatar_thumbnails: Optional[dict[int, str]] = None
     health_status: Optional[str] = None
     special_requirements: Optional[str] = None
     allergens: Optional[list[str]] = None
@@ -207,6 +213,7 @@ class PetListResponse(BaseModel):
 
 class AvatarUploadResponse(BaseModel):
     avatar_url: str
+    avatar_thumbnails: Optional[dict[int, str]] = None
 
 
 class UserProfileResponse(BaseModel):
@@ -263,10 +270,12 @@ class MealHistoryItem(BaseModel):
 
 
 class MealHistoryResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
     items: list[MealHistoryItem]
+    next_cursor: Optional[str] = None
+    total_approximate: bool = False
 
 
 class CalendarDayResponse(BaseModel):
@@ -401,5 +410,7 @@ class TodoItemResponse(BaseModel):
 
 
 class TodoListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     items: list[TodoItemResponse]
+    next_cursor: Optional[str] = None
+    total_approximate: bool = False
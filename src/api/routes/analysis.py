@@ -5,7 +5,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.response import (
     ApiResponse,
@@ -26,7 +26,7 @@ async def get_nutrition_analysis(
     pet_id: str = Query(..., description="宠物 ID"),
     period: str = Query("week", pattern=r'^(week|month|year)$', description="时间周期: week/month/year"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ):
     """
     获取营养分析数据
@@ -2,16 +2,17 @@
 认证路由
 处理用户注册、登录、Token 刷新、获取用户信息等请求
 """
-import mimetypes
 from datetime import datetime, timezone
 from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.config import settings
 from src.api.dependencies import get_db_session, get_minio_storage
 from src.api.infrastructure.minio_storage import MinioManager
+from src.api.infrastructure.object_cache import avatar_cache
 from src.api.models.request import (
     RegisterRequest, LoginRequest, RefreshTokenRequest,
     UpdateProfileRequest
@@ -26,8 +27,11 @@ from src.api.models.response import (
 )
 from src.api.services.auth_service import AuthService
 from src.api.utils.errors import to_http_exception, APIException
-from src.api.middleware.auth import get_current_active_user_record
+from src.api.utils.object_proxy import proxy_object
+from src.api.utils.uploads import AVATAR_MAX_BYTES, IMAGE_UPLOAD_OPENAPI, MultipartImageUpload
+from src.api.middleware.auth import get_current_active_user, get_current_active_user_record
 from src.db.models import User
+from src.utils.executors import run_blocking_io
 
 router = APIRouter()
 
@@ -39,11 +43,22 @@ router = APIRouter()
 )
 async def get_user_avatar_object(
     object_name: str,
+    request: Request,
     storage: MinioManager = Depends(get_minio_storage),
 ):
-    """通过后端统一主机地址代理 MinIO 中的用户头像。"""
-    file_content = await storage.adownload_file(object_name)
-    if file_content is None:
+    """
+    通过后端统一主机地址代理 MinIO 中的用户头像。
+
+    与宠物头像相同：流式转发 + 本地磁盘缓存，支持 Range 与 If-None-Match（见 utils/object_proxy.py）。
+    """
+    response = await proxy_object(
+        request,
+        storage,
+        object_name,
+        avatar_cache,
+        cache_control=f"public, max-age={settings.avatar_cache_max_age_seconds}",
+    )
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={
@@ -52,19 +67,7 @@ async def get_user_avatar_object(
                 "detail": None,
             }
         )
-
-    file_info = await storage.aget_file_info(object_name) or {}
-    media_type = (
-        file_info.get("content_type")
-        or mimetypes.guess_type(object_name)[0]
-        or "application/octet-stream"
-    )
-
-    return Response(
-        content=file_content,
-        media_type=media_type,
-        headers={"Cache-Control": "public, max-age=3600"},
-    )
+    return response
 
 
 def _resolve_user_avatar_url(
@@ -329,11 +332,15 @@ async def update_profile(
         )
 
 
-@router.post("/avatar", response_model=ApiResponse[AvatarUploadResponse], summary="上传用户头像")
+@router.post(
+    "/avatar",
+    response_model=ApiResponse[AvatarUploadResponse],
+    summary="上传用户头像",
+    openapi_extra=IMAGE_UPLOAD_OPENAPI,
+)
 async def upload_avatar(
     http_request: Request,
-    file: UploadFile = File(..., description="头像文件"),
-    current_user: User = Depends(get_current_active_user_record),
+    current_user_id: str = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db_session),
     storage: MinioManager = Depends(get_minio_storage),
 ):
@@ -347,52 +354,16 @@ async def upload_avatar(
     """
     uploaded_object_name: Optional[str] = None
     try:
-        # 验证文件类型
-        allowed_types = ["image/jpeg", "image/png", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "code": 5002,
-                    "message": f"不支持的文件类型: {file.content_type}",
-                    "detail": f"支持的类型: {', '.join(allowed_types)}"
-                }
-            )
-
-        # 验证文件大小（2MB）
-        max_file_size = 2 * 1024 * 1024
-        content = await file.read()
-        if len(content) > max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "code": 5003,
-                    "message": "文件大小超过限制",
-                    "detail": "最大支持 2MB"
-                }
-            )
-
-        # 推导文件扩展名
-        allowed_extensions = {".jpg", ".jpeg", ".png", ".webp"}
-        file_ext = ""
-        if file.filename:
-            parts = file.filename.rsplit(".", maxsplit=1)
-            if len(parts) == 2:
-                file_ext = f".{parts[1].lower()}"
-        if file_ext not in allowed_extensions:
-            content_type_to_ext = {
-                "image/jpeg": ".jpg",
-                "image/png": ".png",
-                "image/webp": ".webp",
-            }
-            file_ext = content_type_to_ext[file.content_type]
+        # 流式读取请求体：按文件头魔数校验类型，边读边限制大小，分块写入 MinIO
+        upload = MultipartImageUpload(http_request, max_size=AVATAR_MAX_BYTES)
+        await upload.open()
 
         # 上传至 MinIO
-        uploaded_object_name = f"avatars/users/{current_user.id}/{uuid4().hex}{file_ext}"
-        upload_success = await storage.aupload_file(
+        uploaded_object_name = f"avatars/users/{current_user_id}/{uuid4().hex}{upload.extension}"
+        upload_success = await storage.aupload_stream(
             object_name=uploaded_object_name,
-            file_data=content,
-            content_type=file.content_type,
+            chunks=upload.chunks(),
+            content_type=upload.content_type,
         )
         if not upload_success:
             raise HTTPException(
@@ -404,20 +375,18 @@ async def upload_avatar(
                 }
             )
 
-        # 更新数据库
-        old_avatar_reference = current_user.avatar_url
+        # 更新数据库（启用状态来自缓存，不加载用户对象，只读旧头像引用）
         avatar_reference = storage.build_object_reference(uploaded_object_name)
-        current_user.avatar_url = avatar_reference
-        await db.commit()
-        await db.refresh(current_user)
+        old_avatar_reference = await AuthService(db).replace_avatar(current_user_id, avatar_reference)
 
         # 清理旧头像
         old_object_name = storage.extract_object_name(old_avatar_reference)
         if old_object_name and old_object_name != uploaded_object_name:
             await storage.adelete_file(old_object_name)
+            await run_blocking_io(avatar_cache.discard, old_object_name)
 
         # 解析为可访问 URL
-        avatar_url = _resolve_user_avatar_url(current_user.avatar_url, storage, request=http_request)
+        avatar_url = _resolve_user_avatar_url(avatar_reference, storage, request=http_request)
         if not avatar_url:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -438,6 +407,10 @@ async def upload_avatar(
         if uploaded_object_name:
             await storage.adelete_file(uploaded_object_name)
         raise
+    except APIException as e:
+        if uploaded_object_name:
+            await storage.adelete_file(uploaded_object_name)
+        raise to_http_exception(e)
     except Exception as e:
         if uploaded_object_name:
             await storage.adelete_file(uploaded_object_name)
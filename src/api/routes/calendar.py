@@ -1,7 +1,8 @@
 """
 日历相关接口。
 
-周历接口已经改成单次批量查询，避免按天逐次查库。
+周历接口已经改成单次批量查询，避免按天逐次查库；餐食来自 MealService.get_schedule，
+即持久化记录 + 活跃计划读时展开的虚拟餐食。
 """
 from datetime import date, timedelta
 from typing import Optional
@@ -10,14 +11,16 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.response import (
     ApiResponse,
     CalendarDayResponse,
     MonthlyCalendarResponse,
 )
-from src.db.models import MealRecord, Pet
+from src.api.services.meal_service import MealLike, MealService
+from src.api.utils.responses import api_response, trusted_response_enabled
+from src.db.models import Pet
 
 
 router = APIRouter()
@@ -55,7 +58,7 @@ async def get_monthly_calendar(
     year: Optional[int] = Query(None, ge=2020, le=2100, description="Calendar year"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Calendar month"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     try:
         # 先做一次宠物归属校验，后续查询只面向当前宠物。
@@ -76,19 +79,10 @@ async def get_monthly_calendar(
         month_start = date(year, month, 1)
         month_end = date(year, month, days_in_month)
 
-        # 月历场景一次性拉取当月餐食，再按日期分组。
-        meal_result = await db.execute(
-            select(MealRecord).where(
-                and_(
-                    MealRecord.pet_id == pet_id,
-                    MealRecord.meal_date >= month_start,
-                    MealRecord.meal_date <= month_end,
-                )
-            ).order_by(MealRecord.meal_date)
-        )
-        meals = meal_result.scalars().all()
+        # 月历场景一次性拉取当月餐食（不含 nutrition_data），再按日期分组。
+        meals = await MealService(db).get_schedule(pet_id, month_start, month_end)
 
-        meals_by_date: dict[date, list[MealRecord]] = {}
+        meals_by_date: dict[date, list[MealLike]] = {}
         for meal in meals:
             meals_by_date.setdefault(meal.meal_date, []).append(meal)
 
@@ -146,7 +140,7 @@ async def get_weekly_calendar(
     pet_id: str = Query(..., description="Pet ID"),
     start_date: Optional[str] = Query(None, description="Week start date in YYYY-MM-DD"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     try:
         # 周历同样先做一次宠物归属校验。
@@ -162,19 +156,10 @@ async def get_weekly_calendar(
         end = start + timedelta(days=6)
 
         # 一次性查询整周餐食，替代原来的按天 N+1 查询。
-        meal_result = await db.execute(
-            select(MealRecord).where(
-                and_(
-                    MealRecord.pet_id == pet_id,
-                    MealRecord.meal_date >= start,
-                    MealRecord.meal_date <= end,
-                )
-            ).order_by(MealRecord.meal_date, MealRecord.meal_order)
-        )
-        week_meals = meal_result.scalars().all()
+        week_meals = await MealService(db).get_schedule(pet_id, start, end)
 
         # 将结果按日期分桶，后续循环只做内存读取。
-        meals_by_date: dict[date, list[MealRecord]] = {}
+        meals_by_date: dict[date, list[MealLike]] = {}
         for meal in week_meals:
             meals_by_date.setdefault(meal.meal_date, []).append(meal)
 
@@ -207,7 +192,11 @@ async def get_weekly_calendar(
                 }
             )
 
-        return ApiResponse(
+        # 周历由纯 dict 组成，可信路径下直接序列化，不再逐层校验
+        return api_response(
+            ApiResponse[dict],
+            "get_weekly_calendar",
+            trusted_response_enabled("get_weekly_calendar"),
             code=0,
             message="Weekly calendar retrieved successfully",
             data={
@@ -2,8 +2,8 @@
 食材库路由
 
 /api/v1/ingredients/
-  GET    /              列表（支持搜索、分类筛选、分页）
-  GET    /categories    类别聚合
+  GET    /              列表（支持搜索、分类筛选、分页；ETag 条件请求）
+  GET    /categories    类别聚合（ETag 条件请求）
   GET    /{id}          详情
   POST   /              创建自定义食材
   PUT    /{id}          更新自定义食材
@@ -11,14 +11,17 @@
 """
 from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.response import ApiResponse
 from src.api.services.ingredient_service import IngredientService, NUTRITION_FIELDS
+from src.api.utils.http_cache import conditional_response, version_etag
+from src.db.pagination import InvalidCursorError, TotalMode
 
 
 router = APIRouter()
@@ -142,10 +145,12 @@ class IngredientResponse(IngredientBase):
 
 
 class IngredientListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None
     limit: int
     offset: int
     items: list[IngredientResponse]
+    next_cursor: Optional[str] = None
+    total_approximate: bool = False
 
 
 class IngredientCategoryItem(BaseModel):
@@ -174,27 +179,47 @@ class ResolvedIconItem(BaseModel):
     summary="食材列表",
 )
 async def list_ingredients(
+    request: Request,
     keyword: Optional[str] = Query(None, max_length=100, description="名称模糊搜索"),
     category: Optional[str] = Query(None, max_length=50, description="按大类别筛选"),
     sub_category: Optional[str] = Query(None, max_length=50, description="按子类别筛选"),
     scope: Literal["all", "system", "custom"] = Query("all", description="归属范围"),
     limit: int = Query(50, ge=1, le=200, description="分页大小"),
     offset: int = Query(0, ge=0, description="分页偏移"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor（传入后忽略 offset）"),
+    total_mode: TotalMode = Query("exact", description="总数计算方式：exact / approx / none"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     service = IngredientService(db)
     try:
-        data = await service.list_ingredients(
-            user_id=current_user_id,
-            keyword=keyword,
-            category=category,
-            sub_category=sub_category,
-            scope=scope,
-            limit=limit,
-            offset=offset,
+        version = await service.catalog_version(user_id=current_user_id)
+        etag = version_etag(
+            "ingredients", current_user_id, version,
+            keyword, category, sub_category, scope, limit, offset, cursor, total_mode,
+        )
+
+        async def render() -> bytes:
+            data = await service.list_ingredients(
+                user_id=current_user_id,
+                keyword=keyword,
+                category=category,
+                sub_category=sub_category,
+                scope=scope,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                total_mode=total_mode,
+            )
+            content = ApiResponse[IngredientListResponse](code=0, message="获取成功", data=data)
+            return content.__pydantic_serializer__.to_json(content)
+
+        return await conditional_response(request, etag, render)
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 4000, "message": str(exc), "detail": None},
         )
-        return ApiResponse(code=0, message="获取成功", data=data)
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -208,13 +233,22 @@ async def list_ingredients(
     summary="食材分类聚合",
 )
 async def list_categories(
+    request: Request,
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     service = IngredientService(db)
     try:
-        data = await service.list_categories(user_id=current_user_id)
-        return ApiResponse(code=0, message="获取成功", data=data)
+        version = await service.catalog_version(user_id=current_user_id)
+
+        async def render() -> bytes:
+            data = await service.list_categories(user_id=current_user_id)
+            content = ApiResponse[list[IngredientCategoryItem]](code=0, message="获取成功", data=data)
+            return content.__pydantic_serializer__.to_json(content)
+
+        return await conditional_response(
+            request, version_etag("ingredient_categories", current_user_id, version), render
+        )
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
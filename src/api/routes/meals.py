@@ -3,13 +3,14 @@
 
 处理餐食记录的创建、查询、打卡等请求
 """
-from datetime import date
+from datetime import date, datetime
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.response import (
     ApiResponse,
@@ -21,11 +22,56 @@ from src.api.models.response import (
     AIInsight
 )
 from src.api.services.meal_service import MealService
+from src.api.utils.responses import api_response, build_model, trusted_response_enabled
+from src.db.pagination import InvalidCursorError, TotalMode
 
 
 router = APIRouter()
 
 
+def _day_meals_response(result: dict, route: str):
+    """把 MealService 的单日餐食结果转换为响应（可信路径下免校验直接序列化，见 utils.responses）"""
+    trusted = trusted_response_enabled(route)
+    meals = []
+    for m in result["meals"]:
+        details = m.get("details", {})
+        completed_at = m["completed_at"]
+        meals.append(build_model(
+            MealDetail,
+            trusted,
+            id=m["id"],
+            type=m["type"],
+            name=m["name"],
+            time=m["time"],
+            description=m["description"],
+            calories=m["calories"],
+            is_completed=m["is_completed"],
+            completed_at=datetime.fromisoformat(completed_at) if completed_at else None,
+            notes=m.get("notes"),
+            food_items=details.get("food_items"),
+            nutrition_data={
+                "macro_nutrients": details.get("macro_nutrients", {}),
+                "micro_nutrients": details.get("micro_nutrients", {}),
+            },
+            ai_tip=details.get("recommend_reason") or details.get("cook_method", ""),
+        ))
+
+    return api_response(
+        ApiResponse[TodayMealsResponse],
+        route,
+        trusted,
+        code=0,
+        message="获取成功",
+        data=build_model(
+            TodayMealsResponse,
+            trusted,
+            date=result["date"],
+            meals=meals,
+            nutrition_summary=build_model(MealNutritionSummary, trusted, **result["nutrition_summary"]),
+        ),
+    )
+
+
 @router.get("/today", response_model=ApiResponse[TodayMealsResponse], summary="获取今日餐食")
 async def get_today_meals(
     pet_id: str = Query(..., description="宠物 ID"),
@@ -44,38 +90,7 @@ async def get_today_meals(
 
         result = await meal_service.get_today_meals(current_user_id, pet_id)
 
-        # 转换餐食详情
-        meals = [
-            MealDetail(
-                id=m["id"],
-                type=m["type"],
-                name=m["name"],
-                time=m["time"],
-                description=m["description"],
-                calories=m["calories"],
-                is_completed=m["is_completed"],
-                completed_at=m["completed_at"],
-                notes=m.get("notes"),
-                food_items=m.get("details", {}).get("food_items"),
-                nutrition_data={
-                    "macro_nutrients": m.get("details", {}).get("macro_nutrients", {}),
-                    "micro_nutrients": m.get("details", {}).get("micro_nutrients", {}),
-                },
-                ai_tip=m.get("details", {}).get("recommend_reason")
-                    or m.get("details", {}).get("cook_method", "")
-            )
-            for m in result["meals"]
-        ]
-
-        return ApiResponse(
-            code=0,
-            message="获取成功",
-            data=TodayMealsResponse(
-                date=result["date"],
-                meals=meals,
-                nutrition_summary=MealNutritionSummary(**result["nutrition_summary"])
-            )
-        )
+        return _day_meals_response(result, "get_today_meals")
 
     except ValueError as e:
         raise HTTPException(
@@ -128,37 +143,7 @@ async def get_meals_by_date(
 
         result = await meal_service.get_meals_by_date(current_user_id, pet_id, parsed_date)
 
-        meals = [
-            MealDetail(
-                id=m["id"],
-                type=m["type"],
-                name=m["name"],
-                time=m["time"],
-                description=m["description"],
-                calories=m["calories"],
-                is_completed=m["is_completed"],
-                completed_at=m["completed_at"],
-                notes=m.get("notes"),
-                food_items=m.get("details", {}).get("food_items"),
-                nutrition_data={
-                    "macro_nutrients": m.get("details", {}).get("macro_nutrients", {}),
-                    "micro_nutrients": m.get("details", {}).get("micro_nutrients", {}),
-                },
-                ai_tip=m.get("details", {}).get("recommend_reason")
-                    or m.get("details", {}).get("cook_method", "")
-            )
-            for m in result["meals"]
-        ]
-
-        return ApiResponse(
-            code=0,
-            message="获取成功",
-            data=TodayMealsResponse(
-                date=result["date"],
-                meals=meals,
-                nutrition_summary=MealNutritionSummary(**result["nutrition_summary"])
-            )
-        )
+        return _day_meals_response(result, "get_meals_by_date")
 
     except HTTPException:
         raise
@@ -288,8 +273,10 @@ async def get_meal_history(
     end_date: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页大小"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor（传入后忽略 page）"),
+    total_mode: TotalMode = Query("exact", description="总数计算方式：exact / approx / none"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ):
     """
     获取餐食历史记录
@@ -299,6 +286,8 @@ async def get_meal_history(
     - **end_date**: 结束日期（可选）
     - **page**: 页码（默认 1）
     - **page_size**: 每页大小（默认 10，最大 100）
+    - **cursor**: 游标翻页（可选），取上一页响应的 next_cursor
+    - **total_mode**: exact 精确计数 / approx 规划器估算 / none 不计数
     """
     try:
         meal_service = MealService(db)
@@ -331,7 +320,9 @@ async def get_meal_history(
             start_date=parsed_start,
             end_date=parsed_end,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode,
         )
 
         return ApiResponse(
@@ -341,12 +332,19 @@ async def get_meal_history(
                 total=result["total"],
                 page=result["page"],
                 page_size=result["page_size"],
-                items=result["items"]
+                items=result["items"],
+                next_cursor=result["next_cursor"],
+                total_approximate=result["total_approximate"],
             )
         )
 
     except HTTPException:
         raise
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 4000, "message": str(e), "detail": None}
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
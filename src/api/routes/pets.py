@@ -3,15 +3,16 @@
 
 处理宠物的 CRUD 操作
 """
-import mimetypes
 from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.config import settings
 from src.api.dependencies import get_db_session, get_minio_storage
 from src.api.infrastructure.minio_storage import MinioManager
+from src.api.infrastructure.object_cache import avatar_cache
 from src.api.middleware.auth import get_current_user
 from src.api.models.request import CreatePetRequest, UpdatePetRequest, PetListRequest
 from src.api.models.response import (
@@ -20,7 +21,16 @@ from src.api.models.response import (
     PetListResponse,
     AvatarUploadResponse
 )
+from src.api.services.image_derivatives import (
+    derivative_urls,
+    fallback_cache_control,
+    proxy_derivative,
+    schedule_derivatives,
+)
 from src.api.services.pet_service import PetService
+from src.api.utils.object_proxy import proxy_object
+from src.api.utils.uploads import AVATAR_MAX_BYTES, IMAGE_UPLOAD_OPENAPI, MultipartImageUpload
+from src.utils.executors import run_blocking_io
 
 
 router = APIRouter()
@@ -33,11 +43,23 @@ router = APIRouter()
 )
 async def get_pet_avatar_object(
     object_name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, description="期望宽度（像素），返回不小于该宽度的最小衍生图"),
     storage: MinioManager = Depends(get_minio_storage),
 ):
-    """通过后端统一主机地址代理 MinIO 中的宠物头像。"""
-    file_content = await storage.adownload_file(object_name)
-    if file_content is None:
+    """
+    通过后端统一主机地址代理 MinIO 中的宠物头像。
+
+    流式转发 + 本地磁盘缓存，支持 Range 与 If-None-Match（见 utils/object_proxy.py）。
+    带 w 时优先返回衍生尺寸（见 services/image_derivatives.py），衍生图不存在时以 no-cache 返回原图。
+    """
+    cache_control = f"public, max-age={settings.avatar_cache_max_age_seconds}"
+    response = await proxy_derivative(request, storage, object_name, w, avatar_cache, cache_control)
+    if response is None:
+        response = await proxy_object(
+            request, storage, object_name, avatar_cache, fallback_cache_control(w, cache_control)
+        )
+    if response is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail={
@@ -46,19 +68,7 @@ async def get_pet_avatar_object(
                 "detail": None,
             }
         )
-
-    file_info = await storage.aget_file_info(object_name) or {}
-    media_type = (
-        file_info.get("content_type")
-        or mimetypes.guess_type(object_name)[0]
-        or "application/octet-stream"
-    )
-
-    return Response(
-        content=file_content,
-        media_type=media_type,
-        headers={"Cache-Control": "public, max-age=3600"},
-    )
+    return response
 
 
 def _resolve_avatar_url(
@@ -75,6 +85,18 @@ def _resolve_avatar_url(
     return storage.resolve_file_url(avatar_url, request_host=request_host)
 
 
+def _resolve_avatar_thumbnails(
+    avatar_url: Optional[str],
+    storage: MinioManager,
+    request: Request | None = None,
+) -> Optional[dict[int, str]]:
+    """衍生尺寸头像地址；仅存放在 MinIO、经后端代理的头像才有"""
+    object_name = storage.extract_object_name(avatar_url)
+    if not object_name or not request:
+        return None
+    return derivative_urls(str(request.url_for("get_pet_avatar_object", object_name=object_name)))
+
+
 def pet_to_response(
     pet: "Pet",
     storage: MinioManager,
@@ -92,6 +114,7 @@ def pet_to_response(
         weight=float(pet.weight) if pet.weight else 0,
         gender=pet.gender,
         avatar_url=_resolve_avatar_url(pet.avatar_url, storage, request=request),
+        avatar_thumbnails=_resolve_avatar_thumbnails(pet.avatar_url, storage, request=request),
         health_status=pet.health_status,
         special_requirements=pet.special_requirements,
         allergens=pet.allergens,
@@ -134,6 +157,7 @@ async def list_pets(
                 weight=pet["weight"],
                 gender=pet["gender"],
                 avatar_url=_resolve_avatar_url(pet["avatar_url"], storage, request=http_request),
+                avatar_thumbnails=_resolve_avatar_thumbnails(pet["avatar_url"], storage, request=http_request),
                 health_status=pet["health_status"],
                 special_requirements=pet["special_requirements"],
                 allergens=pet.get("allergens"),
@@ -246,20 +270,12 @@ async def get_pet(
             )
 
         # 检查是否有计划
-        from sqlalchemy import select, func
-        from src.db.models import DietPlan
-
-        plan_result = await db.execute(
-            select(func.count(DietPlan.id)).where(
-                DietPlan.pet_id == pet_id
-            )
-        )
-        plan_count = plan_result.scalar()
+        has_plan = pet.id in await pet_service.pet_ids_with_plans(current_user_id, [pet.id])
 
         return ApiResponse(
             code=0,
             message="获取成功",
-            data=pet_to_response(pet, storage=storage, request=http_request, has_plan=plan_count > 0)
+            data=pet_to_response(pet, storage=storage, request=http_request, has_plan=has_plan)
         )
     except HTTPException:
         raise
@@ -324,20 +340,12 @@ async def update_pet(
             )
 
         # 检查是否有计划
-        from sqlalchemy import select, func
-        from src.db.models import DietPlan
-
-        plan_result = await db.execute(
-            select(func.count(DietPlan.id)).where(
-                DietPlan.pet_id == pet_id
-            )
-        )
-        plan_count = plan_result.scalar()
+        has_plan = pet.id in await pet_service.pet_ids_with_plans(current_user_id, [pet.id])
 
         return ApiResponse(
             code=0,
             message="更新成功",
-            data=pet_to_response(pet, storage=storage, request=http_request, has_plan=plan_count > 0)
+            data=pet_to_response(pet, storage=storage, request=http_request, has_plan=has_plan)
         )
     except HTTPException:
         raise
@@ -398,11 +406,15 @@ async def delete_pet(
         )
 
 
-@router.post("/{pet_id}/avatar", response_model=ApiResponse[AvatarUploadResponse], summary="上传宠物头像")
+@router.post(
+    "/{pet_id}/avatar",
+    response_model=ApiResponse[AvatarUploadResponse],
+    summary="上传宠物头像",
+    openapi_extra=IMAGE_UPLOAD_OPENAPI,
+)
 async def upload_pet_avatar(
     http_request: Request,
     pet_id: str,
-    file: UploadFile = File(..., description="头像文件"),
     current_user_id: str = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
 ):
@@ -429,51 +441,15 @@ async def upload_pet_avatar(
                 }
             )
 
-        # 验证文件类型
-        allowed_types = ["image/jpeg", "image/png", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "code": 5002,
-                    "message": f"不支持的文件类型: {file.content_type}",
-                    "detail": f"支持的类型: {', '.join(allowed_types)}"
-                }
-            )
+        # 流式读取请求体：按文件头魔数校验类型，边读边限制大小，分块写入 MinIO
+        upload = MultipartImageUpload(http_request, max_size=AVATAR_MAX_BYTES)
+        await upload.open()
 
-        # 验证文件大小（2MB）
-        max_file_size = 2 * 1024 * 1024
-        content = await file.read()
-        if len(content) > max_file_size:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={
-                    "code": 5003,
-                    "message": "文件大小超过限制",
-                    "detail": "最大支持 2MB"
-                }
-            )
-
-        # 生成对象名
-        allowed_extensions = {".jpg", ".jpeg", ".png", ".webp"}
-        file_ext = ""
-        if file.filename:
-            filename_parts = file.filename.rsplit(".", maxsplit=1)
-            if len(filename_parts) == 2:
-                file_ext = f".{filename_parts[1].lower()}"
-        if file_ext not in allowed_extensions:
-            content_type_to_ext = {
-                "image/jpeg": ".jpg",
-                "image/png": ".png",
-                "image/webp": ".webp",
-            }
-            file_ext = content_type_to_ext[file.content_type]
-
-        uploaded_object_name = f"avatars/pets/{pet_id}/{uuid4().hex}{file_ext}"
-        upload_success = await storage.aupload_file(
+        uploaded_object_name = f"avatars/pets/{pet_id}/{uuid4().hex}{upload.extension}"
+        upload_success = await storage.aupload_stream(
             object_name=uploaded_object_name,
-            file_data=content,
-            content_type=file.content_type,
+            chunks=upload.chunks(),
+            content_type=upload.content_type,
         )
         if not upload_success:
             raise HTTPException(
@@ -503,6 +479,12 @@ async def upload_pet_avatar(
         old_object_name = storage.extract_object_name(old_avatar_reference)
         if old_object_name and old_object_name != uploaded_object_name:
             await storage.adelete_file(old_object_name)
+            await run_blocking_io(avatar_cache.discard, old_object_name)
+        else:
+            old_object_name = None
+
+        # 衍生尺寸在后台生成，旧头像的衍生图也在后台清理，不阻塞响应
+        schedule_derivatives(storage, uploaded_object_name, avatar_cache, replaced_object_name=old_object_name)
 
         avatar_url = _resolve_avatar_url(pet.avatar_url, storage, request=http_request)
         if not avatar_url:
@@ -518,7 +500,10 @@ async def upload_pet_avatar(
         return ApiResponse(
             code=0,
             message="上传成功",
-            data=AvatarUploadResponse(avatar_url=avatar_url)
+            data=AvatarUploadResponse(
+                avatar_url=avatar_url,
+                avatar_thumbnails=_resolve_avatar_thumbnails(pet.avatar_url, storage, request=http_request),
+            )
         )
     except HTTPException:
         if uploaded_object_name:
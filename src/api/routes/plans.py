@@ -5,10 +5,11 @@ Diet plan routes.
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.request import CreatePlanRequest
 from src.api.models.response import (
@@ -18,8 +19,19 @@ from src.api.models.response import (
     DietPlanListResponse,
     PetType,
 )
+from src.api.infrastructure.plan_blob_store import (
+    PLAN_BLOB_CONTENT_ENCODING,
+    PLAN_BLOB_MARKER,
+    hydrate_document,
+    is_blob_stub,
+    plan_blob_store,
+)
 from src.api.services.plan_service import PlanService
 from src.api.utils.errors import APIException, to_http_exception
+from src.api.utils.http_cache import conditional_response, version_etag
+from src.api.utils.responses import api_response, trusted_response_enabled
+from src.db.pagination import InvalidCursorError, TotalMode
+from src.utils.serialization import ORJSONResponse
 from src.utils.strtuct import PetInformation
 
 router = APIRouter()
@@ -182,7 +194,7 @@ async def apply_diet_plan(
     current_user_id: str = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ):
-    """应用饮食计划：停用旧计划 → 激活新计划 → 从今天起生成 MealRecords"""
+    """应用饮食计划：停用旧计划 → 激活新计划 → 从今天起排期（默认读时展开，不预生成 MealRecords）"""
     try:
         service = PlanService(db, app_state=http_request.app.state)
         result = await service.apply_diet_plan(
@@ -209,24 +221,38 @@ async def list_diet_plans(
     pet_type: PetType | None = Query(None, description="宠物类型筛选"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页大小"),
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor（传入后忽略 page）"),
+    total_mode: TotalMode = Query("exact", description="总数计算方式：exact / approx / none"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
 ):
     try:
+        trusted = trusted_response_enabled("list_diet_plans")
         plan_service = PlanService(db, app_state=http_request.app.state)
         result = await plan_service.list_diet_plans(
             user_id=current_user_id,
             pet_type=pet_type.value if pet_type else None,
             page=page,
             page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode,
+            trusted=trusted,
         )
-        return ApiResponse(
+        return api_response(
+            ApiResponse[DietPlanListResponse],
+            "list_diet_plans",
+            trusted,
             code=0,
             message="获取成功",
             data=result,
         )
     except HTTPException:
         raise
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 4000, "message": str(exc), "detail": None},
+        )
     except Exception as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -241,16 +267,18 @@ async def get_diet_plan(
     current_user_id: str = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ):
+    """计划详情：按 updated_at 生成 ETag，未变化时 304 或直接返回缓存的预压缩响应体"""
     try:
         plan_service = PlanService(db, app_state=http_request.app.state)
-        result = await plan_service.get_diet_plan_detail(
-            plan_id=plan_id,
-            user_id=current_user_id,
-        )
-        return ApiResponse(
-            code=0,
-            message="获取成功",
-            data=result,
+        version = await plan_service.get_diet_plan_version(plan_id=plan_id, user_id=current_user_id)
+
+        async def render() -> bytes:
+            result = await plan_service.get_diet_plan_detail(plan_id=plan_id, user_id=current_user_id)
+            content = ApiResponse[DietPlanDetailResponse](code=0, message="获取成功", data=result)
+            return content.__pydantic_serializer__.to_json(content)
+
+        return await conditional_response(
+            http_request, version_etag("plan", plan_id, current_user_id, version), render
         )
     except HTTPException:
         raise
@@ -261,6 +289,38 @@ async def get_diet_plan(
         )
 
 
+@router.get("/{plan_id}/document", summary="获取饮食计划完整文档")
+async def get_diet_plan_document(
+    http_request: Request,
+    plan_id: str,
+    current_user_id: str = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db_session),
+):
+    """
+    直接返回 PetDietPlan 文档（不包 ApiResponse）
+
+    计划已卸载到对象存储且客户端 Accept-Encoding 含 zstd 时，
+    原样透传压缩对象（Content-Encoding: zstd），服务端不解压不重新序列化。
+    """
+    plan_service = PlanService(db, app_state=http_request.app.state)
+    try:
+        document = await plan_service.get_plan_document(plan_id=plan_id, user_id=current_user_id)
+        headers = {"Vary": "Accept-Encoding"}
+        accept_encoding = http_request.headers.get("accept-encoding", "")
+        if is_blob_stub(document) and PLAN_BLOB_CONTENT_ENCODING in accept_encoding:
+            data = await plan_blob_store.get_compressed(document[PLAN_BLOB_MARKER])
+            headers["Content-Encoding"] = PLAN_BLOB_CONTENT_ENCODING
+            return Response(content=data, media_type="application/json", headers=headers)
+        return ORJSONResponse(await hydrate_document(document), headers=headers)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"code": -1, "message": "获取计划文档失败", "detail": str(exc)},
+        )
+
+
 @router.delete("/{plan_id}", response_model=ApiResponse[dict], summary="删除饮食计划")
 async def delete_diet_plan(
     http_request: Request,
@@ -2,10 +2,13 @@
 任务管理路由
 处理任务状态查询、取消等操作
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status as http_status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status as http_status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
+from src.api.middleware.db_routing import get_read_db_session
 from src.api.middleware.auth import get_current_user
 from src.api.models.request import TaskStatus, TaskType
 from src.api.models.response import (
@@ -17,12 +20,15 @@ from src.api.models.response import (
 )
 from src.api.services.task_service import TaskService
 from src.api.utils.errors import to_http_exception, APIException
+from src.api.utils.http_cache import conditional_response, version_etag
+from src.db.pagination import InvalidCursorError, TotalMode
 
 router = APIRouter()
 
 
 @router.get("/{task_id}", response_model=ApiResponse[TaskResponse], summary="获取任务状态")
 async def get_task_status(
+    request: Request,
     task_id: str,
     current_user_id: str = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session)
@@ -32,18 +38,25 @@ async def get_task_status(
 
     - **task_id**: 任务 ID
 
-    返回任务的当前状态、进度、错误信息等
+    返回任务的当前状态、进度、错误信息等；轮询时携带 If-None-Match，状态未变化返回 304
     """
     try:
         task_service = TaskService(db)
         task = await task_service.get_task(task_id, current_user_id)
-
-        return ApiResponse(
-            code=0,
-            message="获取成功",
-            data=TaskResponse.model_validate(task)
+        etag = version_etag(
+            "task", task.id, current_user_id, task.updated_at, task.status, task.progress, task.current_node
         )
 
+        async def render() -> bytes:
+            content = ApiResponse[TaskResponse](
+                code=0,
+                message="获取成功",
+                data=TaskResponse.model_validate(task)
+            )
+            return content.__pydantic_serializer__.to_json(content)
+
+        return await conditional_response(request, etag, render)
+
     except APIException as e:
         raise to_http_exception(e)
     except Exception as e:
@@ -63,8 +76,10 @@ async def list_tasks(
     task_type: TaskType | None = None,
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页大小"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor（传入后忽略 page）"),
+    total_mode: TotalMode = Query("exact", description="总数计算方式：exact / approx / none"),
     current_user_id: str = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db_session)
+    db: AsyncSession = Depends(get_read_db_session)
 ):
     """
     获取当前用户的任务列表
@@ -73,6 +88,8 @@ async def list_tasks(
     - **task_type**: 任务类型筛选（可选）：create_plan, generate_report
     - **page**: 页码（默认 1）
     - **page_size**: 每页大小（默认 10，最大 100）
+    - **cursor**: 游标翻页（可选），取上一页响应的 next_cursor
+    - **total_mode**: exact 精确计数 / approx 规划器估算 / none 不计数
     """
     try:
         task_service = TaskService(db)
@@ -81,7 +98,9 @@ async def list_tasks(
             status=task_status.value if task_status else None,
             task_type=task_type.value if task_type else None,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            cursor=cursor,
+            total_mode=total_mode,
         )
 
         return ApiResponse(
@@ -91,10 +110,17 @@ async def list_tasks(
                 total=result.total,
                 page=result.page,
                 page_size=result.page_size,
-                items=[TaskResponse.model_validate(item) for item in result.items]
+                items=[TaskResponse.model_validate(item) for item in result.items],
+                next_cursor=result.next_cursor,
+                total_approximate=result.total_approximate,
             )
         )
 
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail={"code": 4000, "message": str(e), "detail": None}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -177,7 +203,7 @@ async def get_task_result(
             message="获取成功",
             data=TaskResultResponse(
                 task_id=task.id,
-                output=task.output_data or {}
+                output=await task_service.get_task_output(task.id, current_user_id)
             )
         )
 
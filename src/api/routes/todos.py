@@ -8,7 +8,7 @@ from datetime import date, datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import and_, select, func as sa_func
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.dependencies import get_db_session
@@ -20,14 +20,27 @@ from src.api.models.response import (
     TodoItemResponse,
     TodoListResponse,
 )
+from src.api.utils.responses import api_response, build_model, trusted_response_enabled
 from src.db.models import Pet, TodoItem
+from src.db.pagination import InvalidCursorError, KeyColumn, TotalMode, paginate
 
 router = APIRouter()
 
+TODO_LIST_KEYS = (
+    KeyColumn(TodoItem.due_date),
+    KeyColumn(TodoItem.is_completed),
+    KeyColumn(TodoItem.created_at),
+    KeyColumn(TodoItem.id),
+)
+
 
-def _todo_to_response(todo: TodoItem, pet_name: Optional[str] = None) -> TodoItemResponse:
-    """将 ORM 对象转换为响应模型"""
-    return TodoItemResponse(
+def _todo_to_response(
+    todo: TodoItem, pet_name: Optional[str] = None, trusted: bool = False
+) -> TodoItemResponse:
+    """将 ORM 对象转换为响应模型（trusted=True 时免校验构造为 dict，见 utils.responses）"""
+    return build_model(
+        TodoItemResponse,
+        trusted,
         id=todo.id,
         user_id=todo.user_id,
         pet_id=todo.pet_id,
@@ -74,7 +87,7 @@ async def _validate_pet_ownership(
 
 
 async def _enrich_with_pet_names(
-    db: AsyncSession, todos: list[TodoItem]
+    db: AsyncSession, todos: list[TodoItem], trusted: bool = False
 ) -> list[TodoItemResponse]:
     """批量查询关联宠物名称"""
     pet_ids = {t.pet_id for t in todos if t.pet_id}
@@ -86,7 +99,7 @@ async def _enrich_with_pet_names(
         pet_name_map = {row.id: row.name for row in result.all()}
 
     return [
-        _todo_to_response(t, pet_name_map.get(t.pet_id) if t.pet_id else None)
+        _todo_to_response(t, pet_name_map.get(t.pet_id) if t.pet_id else None, trusted)
         for t in todos
     ]
 
@@ -97,6 +110,9 @@ async def list_todos(
     date_end: Optional[str] = Query(None, description="结束日期 YYYY-MM-DD"),
     pet_id: Optional[str] = Query(None, description="宠物 ID 筛选"),
     is_completed: Optional[bool] = Query(None, description="完成状态筛选"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="每页大小（不传则返回全部）"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    total_mode: TotalMode = Query("exact", description="总数计算方式：exact / approx / none"),
     current_user_id: str = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ):
@@ -112,25 +128,37 @@ async def list_todos(
         if is_completed is not None:
             conditions.append(TodoItem.is_completed == is_completed)
 
-        # 总数
-        count_result = await db.execute(
-            select(sa_func.count(TodoItem.id)).where(and_(*conditions))
-        )
-        total = count_result.scalar() or 0
-
-        # 列表
-        result = await db.execute(
-            select(TodoItem)
-            .where(and_(*conditions))
-            .order_by(TodoItem.due_date, TodoItem.is_completed, TodoItem.created_at)
+        # 按 (due_date, is_completed, created_at, id) 正序翻页，对应索引 idx_todo_user_order
+        page = await paginate(
+            db,
+            select(TodoItem).where(and_(*conditions)),
+            TODO_LIST_KEYS,
+            limit=limit,
+            cursor=cursor,
+            total_mode=total_mode,
         )
-        todos = result.scalars().all()
-        items = await _enrich_with_pet_names(db, list(todos))
+        trusted = trusted_response_enabled("list_todos")
+        items = await _enrich_with_pet_names(db, page.items, trusted)
 
-        return ApiResponse(
+        return api_response(
+            ApiResponse[TodoListResponse],
+            "list_todos",
+            trusted,
             code=0,
             message="获取成功",
-            data=TodoListResponse(total=total, items=items),
+            data=build_model(
+                TodoListResponse,
+                trusted,
+                total=page.total,
+                items=items,
+                next_cursor=page.next_cursor,
+                total_approximate=page.total_approximate,
+            ),
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"code": 4000, "message": str(e), "detail": None},
         )
     except ValueError as e:
         raise HTTPException(
@@ -5,19 +5,30 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from fastapi import HTTPException, status
 
 from src.db.models import User, RefreshToken
 from src.api.utils.security import (
     hash_password,
+    password_needs_rehash,
     verify_password,
     create_access_token,
     create_refresh_token,
+    hash_refresh_token,
     verify_token
 )
-from src.api.utils.errors import DuplicateException, AuthException, NotFoundException, ValidationException
+from src.api.config import settings
+from src.api.utils.errors import (
+    AuthException,
+    DuplicateException,
+    NotFoundException,
+    ServiceUnavailableException,
+    ValidationException,
+)
 from src.api.models.response import UserResponse, TokenResponse
+from src.api.services.refresh_token_store import consume_refresh_token, remember_refresh_token
+from src.api.services.user_status import invalidate_user_status
 
 
 class AuthService:
@@ -143,6 +154,13 @@ class AuthService:
         if not user.is_active:
             raise AuthException("用户已被禁用")
 
+        # bcrypt cost 调整后，借登录时的明文透明地重新哈希（随刷新令牌一起提交）
+        if settings.bcrypt_rehash_on_login and password_needs_rehash(user.hashed_password):
+            try:
+                user.hashed_password = await hash_password(password)
+            except ServiceUnavailableException:
+                pass  # 哈希池繁忙时跳过，下次登录再重新哈希
+
         # 生成 Token
         tokens = self._create_tokens(user.id, user.username)
 
@@ -176,30 +194,22 @@ class AuthService:
             user_id = payload.get("sub")
             username = payload.get("username")
 
-            # 检查刷新令牌是否在数据库中且未被撤销
-            result = await self.db.execute(
-                select(RefreshToken).where(
-                    RefreshToken.token == refresh_token,
-                    RefreshToken.user_id == user_id,
-                    RefreshToken.is_revoked == False
-                )
-            )
-            token_record = result.scalars().first()
-
-            if not token_record:
+            # Redis 里的有效令牌 GETDEL 掉，并发的重复刷新只有一个能命中；
+            # 令牌是否有效以数据库条件 UPDATE 为准：登出、管理员撤销只改数据库，
+            # Redis 记录可能比数据库行活得久，命中与否都要求恰好撤销一行
+            token_hash = hash_refresh_token(refresh_token)
+            await consume_refresh_token(user_id, token_hash)
+            revoke = update(RefreshToken).where(
+                RefreshToken.token_hash == token_hash,
+                RefreshToken.user_id == user_id,
+                RefreshToken.is_revoked == False
+            ).values(is_revoked=True)
+            if (await self.db.execute(revoke)).rowcount != 1:
                 raise AuthException("刷新令牌无效或已撤销")
 
-            # 检查刷新令牌是否过期
-            if token_record.expires_at < datetime.now(timezone.utc):
-                raise AuthException("刷新令牌已过期")
-
-            # 生成新的 Token
+            # 生成新的 Token（旧令牌的撤销随新令牌一起提交）
             new_tokens = self._create_tokens(user_id, username)
 
-            # 撤销旧的刷新令牌
-            token_record.is_revoked = True
-            await self.db.commit()
-
             # 保存新的刷新令牌
             await self._save_refresh_token(user_id, new_tokens.refresh_token)
 
@@ -231,6 +241,68 @@ class AuthService:
 
         return self._user_to_response(user)
 
+    async def set_user_status(
+        self,
+        user_id: str,
+        *,
+        is_active: Optional[bool] = None,
+        is_superuser: Optional[bool] = None
+    ) -> UserResponse:
+        """
+        启用/禁用用户或调整管理员权限，并失效认证依赖使用的状态缓存
+
+        Args:
+            user_id: 用户 ID
+            is_active: 是否启用（None 表示不修改）
+            is_superuser: 是否超级管理员（None 表示不修改）
+
+        Returns:
+            更新后的用户对象
+
+        Raises:
+            NotFoundException: 用户不存在
+        """
+        result = await self.db.execute(
+            select(User).where(User.id == user_id)
+        )
+        user = result.scalars().first()
+
+        if not user:
+            raise NotFoundException("用户不存在")
+
+        if is_active is not None:
+            user.is_active = is_active
+        if is_superuser is not None:
+            user.is_superuser = is_superuser
+        await self.db.commit()
+        await self.db.refresh(user)
+
+        # 提交后再失效，避免并发请求在提交前把旧状态回填进缓存
+        await invalidate_user_status(user_id)
+        return self._user_to_response(user)
+
+    async def replace_avatar(self, user_id: str, avatar_reference: str) -> Optional[str]:
+        """
+        替换用户头像并返回旧头像引用
+
+        只读 avatar_url 一列（加行锁，并发替换时不会拿到别人的旧头像），不加载整个用户对象。
+
+        Raises:
+            NotFoundException: 用户不存在
+        """
+        result = await self.db.execute(
+            select(User.avatar_url).where(User.id == user_id).with_for_update()
+        )
+        row = result.first()
+        if row is None:
+            raise NotFoundException("用户不存在")
+
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(avatar_url=avatar_reference)
+        )
+        await self.db.commit()
+        return row.avatar_url
+
     def _create_tokens(self, user_id: str, username: str) -> TokenResponse:
         """
         创建访问令牌和刷新令牌
@@ -260,17 +332,18 @@ class AuthService:
             user_id: 用户 ID
             token: 刷新令牌
         """
-        from src.api.config import settings
-
+        token_hash = hash_refresh_token(token)
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.jwt_refresh_token_expire_days)
         refresh_token_record = RefreshToken(
             id=self._generate_uuid(),
             user_id=user_id,
-            token=token,
-            expires_at=datetime.now(timezone.utc) + timedelta(days=settings.jwt_refresh_token_expire_days)
+            token_hash=token_hash,
+            expires_at=expires_at
         )
 
         self.db.add(refresh_token_record)
         await self.db.commit()
+        await remember_refresh_token(user_id, token_hash, expires_at)
 
     def _generate_uuid(self) -> str:
         """生成 UUID"""
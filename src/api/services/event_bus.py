@@ -7,17 +7,28 @@
 - 客户端断线重连时可从 stream 头部回放历史
 
 设计要点：
-- 每个任务一个 stream key: plan:events:{task_id}
+- 每个任务一个 stream key: plan:events:{<task_id>}（hash tag，与 temp_plan 同 Cluster slot）
 - TTL 24 小时（与 temp_plan 对齐）
 - MAXLEN ~ 2000 防止单流无限增长
 - sentinel 事件 type='__end__' 标记流终止，订阅者收到后退出
+
+可替换后端（EventBus）：
+- RedisStreamEventBus：仅走 Redis Streams，所有订阅者统一 XREAD
+- LocalFirstEventBus：SSE 端点与后台任务同 worker 时走进程内通道，
+  事件先写入 Redis（保证回放与跨 worker 订阅看到同样的内容），成功后
+  直接投递给本进程订阅者，省去 XREAD 阻塞轮询；本进程没有该任务通道时回退到 XREAD
+- 由 settings.event_bus_local_fast_path 选择，也可通过 configure_event_bus 注入自定义实现
 """
 import asyncio
-import json
 import logging
-from typing import Any, AsyncGenerator, Dict
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, Optional, Set
 
+from src.api.config import settings
 from src.db.redis import get_redis
+from src.db.redis_keys import task_events_key
+from src.utils.serialization import JSONDecodeError, dumps, loads
 
 logger = logging.getLogger(__name__)
 
@@ -25,28 +36,301 @@ EVENT_STREAM_KEY_PREFIX = "plan:events:"
 EVENT_STREAM_TTL_SECONDS = 86400  # 24h
 EVENT_STREAM_MAXLEN = 2000
 END_SENTINEL_TYPE = "__end__"
+DEFAULT_IDLE_TIMEOUT_SECONDS = 1800.0
 
 
 def _stream_key(task_id: str) -> str:
-    return f"{EVENT_STREAM_KEY_PREFIX}{task_id}"
+    return task_events_key(task_id)
 
 
-async def publish_event(task_id: str, event: Dict[str, Any]) -> None:
+def _encode_event(event: Dict[str, Any]) -> bytes:
+    return dumps(event)
+
+
+class EventBus(ABC):
+    """任务事件总线接口"""
+
+    @abstractmethod
+    async def publish(self, task_id: str, event: Dict[str, Any]) -> None:
+        """发布一条事件；END_SENTINEL_TYPE 事件表示流终止。"""
+
+    @abstractmethod
+    def subscribe(
+        self,
+        task_id: str,
+        *,
+        from_beginning: bool = False,
+        block_ms: int = 15000,
+        idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """订阅任务事件，收到终止 sentinel 或空闲超时后结束。"""
+
+    @abstractmethod
+    async def exists(self, task_id: str) -> bool:
+        """判断任务事件流是否存在。"""
+
+    def open_channel(self, task_id: str) -> None:
+        """发布方启动前的预注册钩子，默认无操作。"""
+
+    def close_channel(self, task_id: str) -> None:
+        """发布方异常退出（未发送 sentinel）时的清理钩子，默认无操作。"""
+
+
+class RedisStreamEventBus(EventBus):
+    """Redis Streams 实现：事件持久化 + 跨进程订阅 + 断线回放"""
+
+    async def _persist(self, task_id: str, payload: bytes) -> bool:
+        """
+        使用 pipeline 一次性 XADD + EXPIRE，确保 TTL 滚动刷新。
+
+        两条命令作用于同一个 key，Cluster 模式下也只路由到一个节点；
+        集群 pipeline 不包 MULTI，单机仍按事务提交。
+        """
+        client = await get_redis()
+        key = _stream_key(task_id)
+        try:
+            pipe = client.pipeline(transaction=not settings.redis_cluster_mode)
+            pipe.xadd(key, {"data": payload}, maxlen=EVENT_STREAM_MAXLEN, approximate=True)
+            pipe.expire(key, EVENT_STREAM_TTL_SECONDS)
+            await pipe.execute()
+            return True
+        except Exception as exc:
+            logger.error("publish_event 失败 task_id=%s: %s", task_id, exc)
+            return False
+
+    async def publish(self, task_id: str, event: Dict[str, Any]) -> None:
+        await self._persist(task_id, _encode_event(event))
+
+    async def subscribe(
+        self,
+        task_id: str,
+        *,
+        from_beginning: bool = False,
+        block_ms: int = 15000,
+        idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        client = await get_redis()
+        key = _stream_key(task_id)
+        last_id = "0-0" if from_beginning else "$"
+
+        last_event_at = asyncio.get_event_loop().time()
+
+        while True:
+            now = asyncio.get_event_loop().time()
+            if now - last_event_at > idle_timeout_seconds:
+                logger.info(
+                    "subscribe_events 空闲超时退出: task_id=%s last_id=%s", task_id, last_id
+                )
+                return
+
+            try:
+                resp = await client.xread({key: last_id}, count=100, block=block_ms)
+            except Exception as exc:
+                logger.error("XREAD 失败 task_id=%s: %s", task_id, exc)
+                await asyncio.sleep(1)
+                continue
+
+            if not resp:
+                # 阻塞超时未读到事件 — 继续下一轮，让外层心跳包装器有机会发心跳
+                continue
+
+            for _stream_name, entries in resp:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    last_event_at = asyncio.get_event_loop().time()
+                    raw = fields.get("data") if isinstance(fields, dict) else None
+                    if not raw:
+                        continue
+                    try:
+                        event = loads(raw)
+                    except JSONDecodeError:
+                        logger.warning("事件 JSON 解析失败 task_id=%s id=%s", task_id, entry_id)
+                        continue
+                    if event.get("type") == END_SENTINEL_TYPE:
+                        logger.info("收到终止 sentinel，退出订阅: task_id=%s", task_id)
+                        return
+                    yield event
+
+    async def exists(self, task_id: str) -> bool:
+        client = await get_redis()
+        try:
+            return bool(await client.exists(_stream_key(task_id)))
+        except Exception as exc:
+            logger.error("stream_exists 失败 task_id=%s: %s", task_id, exc)
+            return False
+
+
+class LocalEventChannel:
+    """
+    单个任务的进程内事件通道。
+
+    保留与 Redis stream 相同上限的历史事件，供同进程订阅者 from_beginning 回放；
+    实时事件通过每个订阅者独立的 asyncio.Queue 直接投递，不经过网络。
+    """
+
+    __slots__ = ("history", "subscribers", "closed")
+
+    def __init__(self) -> None:
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=EVENT_STREAM_MAXLEN)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.closed = False
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """记录历史并投递给所有本地订阅者（同步、无等待）。"""
+        self.history.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def close(self) -> None:
+        """标记通道终止，唤醒所有订阅者退出。"""
+        self.closed = True
+        for queue in self.subscribers:
+            queue.put_nowait(None)
+
+
+class LocalFirstEventBus(RedisStreamEventBus):
+    """
+    Redis Streams + 进程内通道。
+
+    只有发布方显式 open_channel 的任务才有本地通道；事件写入 Redis 成功后才进入
+    本地通道，且本地投递的是与 Redis 回放相同的 JSON 解码副本，
+    因此同 worker 与跨 worker 的订阅者看到的事件内容完全一致。
+    """
+
+    def __init__(self) -> None:
+        # task_id → 本进程内活跃的本地通道；终止 sentinel 发布或发布方退出后移除
+        self.channels: Dict[str, LocalEventChannel] = {}
+
+    def open_channel(self, task_id: str) -> None:
+        if task_id not in self.channels:
+            self.channels[task_id] = LocalEventChannel()
+
+    def close_channel(self, task_id: str) -> None:
+        channel = self.channels.pop(task_id, None)
+        if channel is not None:
+            channel.close()
+
+    async def publish(self, task_id: str, event: Dict[str, Any]) -> None:
+        payload = _encode_event(event)
+        persisted = await self._persist(task_id, payload)
+
+        if event.get("type") == END_SENTINEL_TYPE:
+            self.close_channel(task_id)
+            return
+
+        channel = self.channels.get(task_id)
+        if channel is not None and persisted:
+            channel.publish(loads(payload))
+
+    async def subscribe(
+        self,
+        task_id: str,
+        *,
+        from_beginning: bool = False,
+        block_ms: int = 15000,
+        idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        channel = self.channels.get(task_id)
+        if channel is None or channel.closed:
+            source = super().subscribe(
+                task_id,
+                from_beginning=from_beginning,
+                block_ms=block_ms,
+                idle_timeout_seconds=idle_timeout_seconds,
+            )
+        else:
+            source = self._subscribe_local(
+                task_id,
+                channel,
+                from_beginning=from_beginning,
+                idle_timeout_seconds=idle_timeout_seconds,
+            )
+        async for event in source:
+            yield event
+
+    async def _subscribe_local(
+        self,
+        task_id: str,
+        channel: LocalEventChannel,
+        *,
+        from_beginning: bool,
+        idle_timeout_seconds: float,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        从本进程通道订阅。
+
+        注册队列与拷贝历史在同一事件循环步内完成，二者之间不可能插入新事件，
+        因此回放与实时跟进之间既不丢也不重。发布方可能在发送 sentinel 之前
+        就被取消，所以与 Redis 路径一样按最后一次事件时间执行空闲超时。
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        channel.subscribers.add(queue)
+        backlog = list(channel.history) if from_beginning else []
+        logger.debug("subscribe_events 命中本地通道: task_id=%s backlog=%d", task_id, len(backlog))
+        try:
+            for event in backlog:
+                yield event
+            last_event_at = loop.time()
+            while True:
+                remaining = idle_timeout_seconds - (loop.time() - last_event_at)
+                if remaining <= 0:
+                    logger.info("subscribe_events 本地通道空闲超时退出: task_id=%s", task_id)
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    continue
+                if event is None:
+                    return
+                last_event_at = loop.time()
+                yield event
+        finally:
+            channel.subscribers.discard(queue)
+
+    async def exists(self, task_id: str) -> bool:
+        channel = self.channels.get(task_id)
+        if channel is not None and channel.history:
+            return True
+        return await super().exists(task_id)
+
+
+_REDIS_BUS = RedisStreamEventBus()
+_LOCAL_FIRST_BUS = LocalFirstEventBus()
+_custom_bus: Optional[EventBus] = None
+
+
+def configure_event_bus(bus: Optional[EventBus]) -> None:
+    """注入自定义事件总线实现；传 None 恢复按配置选择。"""
+    global _custom_bus
+    _custom_bus = bus
+
+
+def get_event_bus() -> EventBus:
+    """返回当前生效的事件总线。"""
+    if _custom_bus is not None:
+        return _custom_bus
+    return _LOCAL_FIRST_BUS if settings.event_bus_local_fast_path else _REDIS_BUS
+
+
+def open_local_channel(task_id: str) -> None:
     """
-    向任务事件流发布一条事件。
+    为即将在本进程发布事件的任务注册本地通道。
 
-    使用 pipeline 一次性 XADD + EXPIRE，确保 TTL 滚动刷新。
+    发布方在启动后台任务之前调用，保证随后同进程的订阅者一定能命中快速通道；
+    后台任务结束时应调用 close_local_channel 兜底（已正常发送 sentinel 时为无操作）。
     """
-    client = await get_redis()
-    key = _stream_key(task_id)
-    payload = json.dumps(event, ensure_ascii=False, default=str)
-    try:
-        pipe = client.pipeline()
-        pipe.xadd(key, {"data": payload}, maxlen=EVENT_STREAM_MAXLEN, approximate=True)
-        pipe.expire(key, EVENT_STREAM_TTL_SECONDS)
-        await pipe.execute()
-    except Exception as exc:
-        logger.error("publish_event 失败 task_id=%s: %s", task_id, exc)
+    get_event_bus().open_channel(task_id)
+
+
+def close_local_channel(task_id: str) -> None:
+    """发布方退出后兜底关闭本地通道，唤醒仍在等待的本地订阅者。"""
+    get_event_bus().close_channel(task_id)
+
+
+async def publish_event(task_id: str, event: Dict[str, Any]) -> None:
+    """向任务事件流发布一条事件。"""
+    await get_event_bus().publish(task_id, event)
 
 
 async def publish_end_sentinel(task_id: str) -> None:
@@ -59,7 +343,7 @@ async def subscribe_events(
     *,
     from_beginning: bool = False,
     block_ms: int = 15000,
-    idle_timeout_seconds: float = 1800.0,
+    idle_timeout_seconds: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     订阅任务事件流。
@@ -73,54 +357,15 @@ async def subscribe_events(
     Yields:
         dict: 解码后的事件字典（不含 sentinel）
     """
-    client = await get_redis()
-    key = _stream_key(task_id)
-    last_id = "0-0" if from_beginning else "$"
-
-    last_event_at = asyncio.get_event_loop().time()
-
-    while True:
-        now = asyncio.get_event_loop().time()
-        if now - last_event_at > idle_timeout_seconds:
-            logger.info(
-                "subscribe_events 空闲超时退出: task_id=%s last_id=%s", task_id, last_id
-            )
-            return
-
-        try:
-            resp = await client.xread({key: last_id}, count=100, block=block_ms)
-        except Exception as exc:
-            logger.error("XREAD 失败 task_id=%s: %s", task_id, exc)
-            await asyncio.sleep(1)
-            continue
-
-        if not resp:
-            # 阻塞超时未读到事件 — 继续下一轮，让外层心跳包装器有机会发心跳
-            continue
-
-        for _stream_name, entries in resp:
-            for entry_id, fields in entries:
-                last_id = entry_id
-                last_event_at = asyncio.get_event_loop().time()
-                raw = fields.get("data") if isinstance(fields, dict) else None
-                if not raw:
-                    continue
-                try:
-                    event = json.loads(raw)
-                except json.JSONDecodeError:
-                    logger.warning("事件 JSON 解析失败 task_id=%s id=%s", task_id, entry_id)
-                    continue
-                if event.get("type") == END_SENTINEL_TYPE:
-                    logger.info("收到终止 sentinel，退出订阅: task_id=%s", task_id)
-                    return
-                yield event
+    async for event in get_event_bus().subscribe(
+        task_id,
+        from_beginning=from_beginning,
+        block_ms=block_ms,
+        idle_timeout_seconds=idle_timeout_seconds,
+    ):
+        yield event
 
 
 async def stream_exists(task_id: str) -> bool:
     """判断任务事件流是否存在（用于 resume 时判断历史是否可回放）。"""
-    client = await get_redis()
-    try:
-        return bool(await client.exists(_stream_key(task_id)))
-    except Exception as exc:
-        logger.error("stream_exists 失败 task_id=%s: %s", task_id, exc)
-        return False
+    return await get_event_bus().exists(task_id)
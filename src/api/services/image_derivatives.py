@@ -0,0 +1,205 @@
+"""
+图片衍生尺寸（缩略图）流水线
+
+头像原图最大 2MB，宠物列表却只需要几十像素的小图。上传完成后在后台生成固定宽度
+（IMAGE_DERIVATIVE_WIDTHS）的 WebP / AVIF 衍生图，与原图存放在同一个 bucket：
+- 对象名为 <原对象名>@w<宽度>，命名确定，数据库不需要新增字段；
+  Content-Type 记录在对象上，切换编码格式不影响命名
+- 上传请求只写原图并登记后台任务，不等待编码；后台任务从 MinIO 读回原图，
+  在 image 进程池中解码、缩放、编码（src/utils/images.py），再逐个写回 MinIO
+- 代理路由按 ?w= 选择不小于该宽度的最小衍生图；衍生图还没生成、原图本身更小、
+  或未安装 Pillow 时回退原图，所以响应里给出的衍生图地址总是可用。
+  回退的原图以 no-cache 返回：上传接口立刻给出衍生图地址，首次请求多半赶上后台还没生成，
+  不能让浏览器 / CDN 把原图按缩略图地址缓存一整天（ETag 重新验证仍可 304）
+- 头像被替换时，后台任务顺带删除旧对象的衍生图与本地缓存
+
+Pillow 为可选依赖（uv sync --extra images），未安装时只记录一次警告，不生成衍生图。
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.api.config import settings
+from src.api.infrastructure.minio_storage import MinioManager
+from src.api.infrastructure.object_cache import DiskObjectCache
+from src.api.utils.object_proxy import proxy_object
+from src.utils.executors import run_blocking_io, run_in_image_process
+from src.utils.images import render_derivatives
+
+logger = logging.getLogger(__name__)
+
+# 请求了衍生图却回退原图时的 Cache-Control
+FALLBACK_CACHE_CONTROL = "no-cache"
+
+# 衍生图缺失的对象名短期记一下，避免每次 ?w= 请求都先到 MinIO 白跑一趟 404
+MISSING_TTL_SECONDS = 60.0
+_MISSING_MAX_ENTRIES = 4096
+_missing: "OrderedDict[str, float]" = OrderedDict()
+
+_pillow_missing_logged = False
+
+# 后台任务强引用集合：防止 asyncio.create_task 创建的任务被 GC 回收
+_BACKGROUND_TASKS: set[asyncio.Task] = set()
+
+
+def derivative_widths() -> Tuple[int, ...]:
+    """配置的衍生图宽度（升序、去重）。"""
+    return tuple(sorted({w for w in settings.image_derivative_widths if w > 0}))
+
+
+def derivative_object_name(object_name: str, width: int) -> str:
+    return f"{object_name}@w{width}"
+
+
+def pick_derivative_width(requested: Optional[int]) -> Optional[int]:
+    """不小于 requested 的最小衍生宽度；未指定或比所有衍生图都宽时返回 None（使用原图）。"""
+    if requested is None:
+        return None
+    for width in derivative_widths():
+        if width >= requested:
+            return width
+    return None
+
+
+def fallback_cache_control(requested_width: Optional[int], cache_control: str) -> str:
+    """proxy_derivative 回退原图时使用的 Cache-Control：本应有衍生图的宽度不长期缓存原图。"""
+    if pick_derivative_width(requested_width) is None:
+        return cache_control
+    return FALLBACK_CACHE_CONTROL
+
+
+def derivative_urls(original_url: Optional[str]) -> Optional[Dict[int, str]]:
+    """由原图代理地址生成 {宽度: 地址}，供客户端拼 srcset；未启用衍生图时返回 None。"""
+    widths = derivative_widths()
+    if not original_url or not widths:
+        return None
+    separator = "&" if "?" in original_url else "?"
+    return {width: f"{original_url}{separator}w={width}" for width in widths}
+
+
+def _is_missing(object_name: str) -> bool:
+    expires_at = _missing.get(object_name)
+    if expires_at is None:
+        return False
+    if expires_at < time.monotonic():
+        _missing.pop(object_name, None)
+        return False
+    return True
+
+
+def _mark_missing(object_name: str) -> None:
+    _missing[object_name] = time.monotonic() + MISSING_TTL_SECONDS
+    _missing.move_to_end(object_name)
+    while len(_missing) > _MISSING_MAX_ENTRIES:
+        _missing.popitem(last=False)
+
+
+async def proxy_derivative(
+    request: Request,
+    storage: MinioManager,
+    object_name: str,
+    requested_width: Optional[int],
+    cache: DiskObjectCache,
+    cache_control: str,
+) -> Optional[Response]:
+    """
+    按请求宽度代理衍生图
+
+    Returns:
+        响应；未请求宽度或衍生图不存在时返回 None，由调用方回退原图
+    """
+    width = pick_derivative_width(requested_width)
+    if width is None:
+        return None
+    name = derivative_object_name(object_name, width)
+    if _is_missing(name):
+        return None
+    response = await proxy_object(request, storage, name, cache, cache_control)
+    if response is None:
+        _mark_missing(name)
+    return response
+
+
+async def generate_derivatives(storage: MinioManager, object_name: str) -> Dict[int, str]:
+    """
+    读回原图，在进程池中生成衍生图并写入 MinIO
+
+    Returns:
+        {宽度: 衍生图对象名}；未启用、原图不存在或编码失败时为空
+    """
+    global _pillow_missing_logged
+    widths = derivative_widths()
+    if not widths:
+        return {}
+
+    data = await storage.adownload_file(object_name)
+    if data is None:
+        logger.warning("Original image missing, skip derivatives: %s", object_name)
+        return {}
+
+    try:
+        content_type, rendered = await run_in_image_process(
+            render_derivatives,
+            data,
+            widths,
+            settings.image_derivative_format,
+            settings.image_derivative_quality,
+        )
+    except ImportError:
+        if not _pillow_missing_logged:
+            _pillow_missing_logged = True
+            logger.warning("Pillow 未安装（uv sync --extra images），跳过图片衍生尺寸生成")
+        return {}
+    except Exception:
+        logger.exception("Error rendering derivatives: %s", object_name)
+        return {}
+
+    written: Dict[int, str] = {}
+    for width, payload in rendered.items():
+        name = derivative_object_name(object_name, width)
+        if await storage.aupload_file(name, payload, content_type):
+            _missing.pop(name, None)
+            written[width] = name
+    return written
+
+
+async def delete_derivatives(storage: MinioManager, object_name: str, cache: DiskObjectCache) -> None:
+    """删除对象的全部衍生图及其本地缓存（不存在的衍生图删除也视为成功）。"""
+    for width in derivative_widths():
+        name = derivative_object_name(object_name, width)
+        await storage.adelete_file(name)
+        await run_blocking_io(cache.discard, name)
+
+
+async def _process_upload(
+    storage: MinioManager,
+    object_name: str,
+    replaced_object_name: Optional[str],
+    cache: DiskObjectCache,
+) -> None:
+    try:
+        if replaced_object_name:
+            await delete_derivatives(storage, replaced_object_name, cache)
+        await generate_derivatives(storage, object_name)
+    except Exception:
+        logger.exception("Image derivative task failed: %s", object_name)
+
+
+def schedule_derivatives(
+    storage: MinioManager,
+    object_name: str,
+    cache: DiskObjectCache,
+    replaced_object_name: Optional[str] = None,
+) -> Optional[asyncio.Task]:
+    """登记后台任务：清理被替换对象的衍生图，再为新对象生成衍生图；未启用时不登记。"""
+    if not derivative_widths():
+        return None
+    task = asyncio.create_task(_process_upload(storage, object_name, replaced_object_name, cache))
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
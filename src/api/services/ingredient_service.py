@@ -15,6 +15,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func as sa_func
 
 from src.db.models import Ingredient
+from src.db.pagination import KeyColumn, TotalMode, paginate
 
 
 # 全量营养字段（与 Ingredient 模型对齐）
@@ -30,6 +31,14 @@ NUTRITION_FIELDS: tuple[str, ...] = (
 # 基础描述字段
 BASIC_FIELDS: tuple[str, ...] = ("name", "category", "sub_category", "note", "has_nutrition_data", "icon_key")
 
+# 列表排序键：系统食材优先，再按分类、名称；id 保证游标唯一
+INGREDIENT_LIST_KEYS = (
+    KeyColumn(Ingredient.is_system, descending=True),
+    KeyColumn(Ingredient.category),
+    KeyColumn(Ingredient.name),
+    KeyColumn(Ingredient.id),
+)
+
 
 def _to_float(value: Any) -> Optional[float]:
     if value is None:
@@ -78,6 +87,8 @@ class IngredientService:
         scope: str = "all",  # all | system | custom
         limit: int = 50,
         offset: int = 0,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = "exact",
     ) -> dict:
         """当前用户可见的食材列表。
 
@@ -85,6 +96,8 @@ class IngredientService:
           - all:    系统 + 自己创建的
           - system: 仅系统食材
           - custom: 仅自己创建的自定义食材
+
+        传入 cursor（上一页的 next_cursor）时按 keyset 翻页，忽略 offset。
         """
         # 归属过滤
         if scope == "system":
@@ -105,29 +118,42 @@ class IngredientService:
         if sub_category:
             conditions.append(Ingredient.sub_category == sub_category)
 
-        base_stmt = select(Ingredient).where(and_(*conditions))
-
-        # 总数
-        count_stmt = select(sa_func.count()).select_from(base_stmt.subquery())
-        total_res = await self.db.execute(count_stmt)
-        total = total_res.scalar() or 0
-
-        # 分页 + 排序（系统优先、按名称字典序）
-        list_stmt = (
-            base_stmt
-            .order_by(Ingredient.is_system.desc(), Ingredient.category, Ingredient.name)
-            .limit(limit)
-            .offset(offset)
+        # 分页 + 排序（系统优先、按名称字典序），对应索引 idx_ingredient_listing
+        page = await paginate(
+            self.db,
+            select(Ingredient).where(and_(*conditions)),
+            INGREDIENT_LIST_KEYS,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            total_mode=total_mode,
         )
-        rows = (await self.db.execute(list_stmt)).scalars().all()
 
         return {
-            "total": total,
+            "total": page.total,
             "limit": limit,
             "offset": offset,
-            "items": [_ingredient_to_dict(r) for r in rows],
+            "items": [_ingredient_to_dict(r) for r in page.items],
+            "next_cursor": page.next_cursor,
+            "total_approximate": page.total_approximate,
         }
 
+    async def catalog_version(self, *, user_id: str) -> tuple:
+        """当前用户可见食材集合的版本（条数 + 最近更新时间），用于列表/分类接口的 ETag。
+
+        新增、修改会推进 max(updated_at)，删除会减少条数。
+        """
+        scope_cond = or_(
+            Ingredient.is_system.is_(True),
+            and_(Ingredient.is_system.is_(False), Ingredient.user_id == user_id),
+        )
+        row = (
+            await self.db.execute(
+                select(sa_func.count(Ingredient.id), sa_func.max(Ingredient.updated_at)).where(scope_cond)
+            )
+        ).one()
+        return tuple(row)
+
     async def list_categories(self, *, user_id: str) -> list[dict]:
         """当前用户可见的类别/子类别聚合统计。"""
         scope_cond = or_(
@@ -0,0 +1,299 @@
+"""
+meal_records 冷数据归档
+
+早于 meal_archive_after_months 个月（或归档脚本 --older-than-months 指定）的月份分区
+按批流式导出为 zstd 压缩的 Parquet，写入 MinIO（archive/meal_records/YYYY/YYYY-MM.parquet），
+登记到 meal_record_archives 后从热表摘除。
+读路径（MealService.get_schedule）查询区间早于归档边界时，从这里透明地补上归档数据。
+归档边界取自 meal_record_archives 中最晚的已归档月份（而不是配置），每个进程缓存
+BOUNDARY_TTL_SECONDS 秒：近期区间不查归档目录，热路径没有额外开销。
+
+Parquet 读写依赖 pyarrow（可选依赖：uv sync --extra archive）。未安装时归档任务直接报错，
+读路径记录告警并只返回热表数据。
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.config import settings
+from src.db.models import MealRecord, MealRecordArchive
+from src.db.partitions import (
+    MealPartition,
+    add_months,
+    detach_meal_partition,
+    ensure_meal_partitions,
+    list_meal_partitions,
+    month_start,
+)
+from src.utils.executors import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFIX = "archive/meal_records/"
+ARCHIVE_CONTENT_TYPE = "application/vnd.apache.parquet"
+
+# 归档列顺序即 Parquet schema 顺序
+ARCHIVE_COLUMNS = (
+    "id",
+    "pet_id",
+    "plan_id",
+    "template_id",
+    "meal_date",
+    "meal_type",
+    "meal_order",
+    "food_name",
+    "description",
+    "calories",
+    "protein",
+    "fat",
+    "carbohydrates",
+    "dietary_fiber",
+    "is_completed",
+    "completed_at",
+    "notes",
+    "nutrition_data",
+    "created_at",
+    "updated_at",
+)
+
+# 导出时每批读取的行数（每批写成一个 Parquet 行组），内存占用与分区大小无关
+ARCHIVE_BATCH_ROWS = 10000
+
+# 归档边界在进程内的缓存时间；归档脚本每月运行一次，其他进程最多晚这么久看到新边界
+BOUNDARY_TTL_SECONDS = 60.0
+
+# 已下载的月份对象缓存（压缩字节），长区间分析反复读取同几个月
+_OBJECT_CACHE_MAX_ENTRIES = 24
+
+
+def archive_object_name(month: date) -> str:
+    """归档对象名：archive/meal_records/YYYY/YYYY-MM.parquet。"""
+    return f"{ARCHIVE_PREFIX}{month:%Y}/{month:%Y-%m}.parquet"
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    timestamp = pa.timestamp("us", tz="UTC")
+    types = {
+        "meal_date": pa.date32(),
+        "meal_order": pa.int32(),
+        "calories": pa.int32(),
+        "protein": pa.float64(),
+        "fat": pa.float64(),
+        "carbohydrates": pa.float64(),
+        "dietary_fiber": pa.float64(),
+        "is_completed": pa.bool_(),
+        "completed_at": timestamp,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+    }
+    return pa.schema([(name, types.get(name, pa.string())) for name in ARCHIVE_COLUMNS])
+
+
+def _to_archive_value(name: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return float(value)
+    if name == "nutrition_data":
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class MonthArchiveWriter:
+    """
+    逐批写一个月的 Parquet
+
+    每批写成一个行组，内存里只有当前批次和已压缩的输出。
+    调用方按 (pet_id, meal_date, meal_order) 顺序送入记录，行组统计可用于按宠物过滤。
+    """
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._schema = _arrow_schema()
+        self._sink = pa.BufferOutputStream()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="zstd")
+        self.row_count = 0
+
+    def write(self, rows: list[dict]) -> None:
+        import pyarrow as pa
+
+        columns = {name: [_to_archive_value(name, row.get(name)) for row in rows] for name in ARCHIVE_COLUMNS}
+        self._writer.write_table(pa.table(columns, schema=self._schema))
+        self.row_count += len(rows)
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.getvalue().to_pybytes()
+
+
+def encode_month_rows(rows: list[dict]) -> bytes:
+    """把一个月的记录（已在内存中）写成 Parquet。"""
+    rows = sorted(rows, key=lambda row: (row["pet_id"], row["meal_date"], row["meal_order"]))
+    writer = MonthArchiveWriter()
+    for offset in range(0, len(rows), ARCHIVE_BATCH_ROWS):
+        writer.write(rows[offset:offset + ARCHIVE_BATCH_ROWS])
+    return writer.finish()
+
+
+def decode_month_rows(data: bytes, pet_id: str, start: date, end: date) -> list[dict]:
+    """读取 Parquet 中某只宠物在 [start, end] 内的记录。"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(
+        pa.BufferReader(data),
+        filters=[("pet_id", "=", pet_id), ("meal_date", ">=", start), ("meal_date", "<=", end)],
+    )
+    rows = table.to_pylist()
+    for row in rows:
+        if isinstance(row.get("nutrition_data"), str):
+            row["nutrition_data"] = json.loads(row["nutrition_data"])
+    return rows
+
+
+class MealArchiver:
+    """meal_records 月份分区的导出、摘除与读取。"""
+
+    def __init__(self, storage=None):
+        self._storage = storage
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._boundary: Optional[date] = None
+        self._boundary_expires_at = 0.0
+
+    @property
+    def storage(self):
+        if self._storage is None:
+            from src.api.infrastructure.minio_storage import get_minio_client
+
+            self._storage = get_minio_client()
+        return self._storage
+
+    # ──────────────────────────── 归档 ────────────────────────────
+
+    async def archive_partition(self, db: AsyncSession, partition: MealPartition) -> MealRecordArchive:
+        """导出一个月份分区 → 上传 → 登记 → 摘除并删除分区（同一事务内登记与摘除）。"""
+        conn = await db.connection()
+        # 分区与父表同结构，按模型列类型解析结果（日期、JSON 等与 ORM 读取一致）
+        columns = [MealRecord.__table__.c[name] for name in ARCHIVE_COLUMNS]
+        query = text(
+            f'SELECT {", ".join(ARCHIVE_COLUMNS)} FROM "{partition.name}" ORDER BY pet_id, meal_date, meal_order'
+        ).columns(*columns)
+        result = await conn.stream(query)
+        writer: Optional[MonthArchiveWriter] = None
+        async for batch in result.mappings().partitions(ARCHIVE_BATCH_ROWS):
+            if writer is None:
+                writer = await run_cpu_bound(MonthArchiveWriter)
+            await run_cpu_bound(writer.write, [dict(row) for row in batch])
+
+        object_name = ""
+        size = 0
+        row_count = 0
+        if writer is not None:
+            data = await run_cpu_bound(writer.finish)
+            row_count = writer.row_count
+            object_name = archive_object_name(partition.month)
+            ok = await self.storage.aupload_file(object_name, data, content_type=ARCHIVE_CONTENT_TYPE)
+            if not ok:
+                raise RuntimeError(f"归档对象上传失败: {object_name}")
+            size = len(data)
+
+        archive = await db.get(MealRecordArchive, partition.month)
+        if archive is None:
+            archive = MealRecordArchive(month=partition.month)
+            db.add(archive)
+        archive.object_name = object_name
+        archive.row_count = row_count
+        archive.size_bytes = size
+
+        await detach_meal_partition(conn, partition)
+        await db.commit()
+        self._cache.pop(object_name, None)
+        self._boundary_expires_at = 0.0
+        logger.info("已归档 meal_records %s: %d 行 → %s (%d 字节)", partition.name, row_count, object_name, size)
+        return archive
+
+    async def archive_older_than(
+        self,
+        db: AsyncSession,
+        months: int,
+        *,
+        today: Optional[date] = None,
+        dry_run: bool = False,
+    ) -> list[MealPartition]:
+        """
+        归档早于 months 个月的月份分区
+
+        Returns:
+            已归档（dry_run 时为待归档）的分区
+        """
+        conn = await db.connection()
+        await ensure_meal_partitions(conn, settings.meal_partition_months_ahead, today=today)
+        cutoff = add_months(month_start(today or date.today()), -months)
+        partitions = [p for p in await list_meal_partitions(conn) if p.upper_bound <= cutoff]
+        await db.commit()
+        if dry_run:
+            return partitions
+        for partition in partitions:
+            await self.archive_partition(db, partition)
+        return partitions
+
+    # ──────────────────────────── 读取 ────────────────────────────
+
+    async def archive_boundary(self, db: AsyncSession) -> Optional[date]:
+        """
+        归档边界（月初）：早于该日期的月份可能已归档；还没有归档过返回 None
+
+        取自 meal_record_archives 中最晚的已归档月份，与实际归档到哪里一致，
+        不受 MEAL_ARCHIVE_AFTER_MONTHS 与脚本参数不一致的影响。
+        """
+        now = time.monotonic()
+        if now >= self._boundary_expires_at:
+            latest = (await db.execute(select(func.max(MealRecordArchive.month)))).scalar()
+            self._boundary = add_months(latest, 1) if latest else None
+            self._boundary_expires_at = now + BOUNDARY_TTL_SECONDS
+        return self._boundary
+
+    async def _fetch(self, object_name: str) -> bytes:
+        data = self._cache.get(object_name)
+        if data is not None:
+            self._cache.move_to_end(object_name)
+            return data
+        data = await self.storage.adownload_file(object_name)
+        if data is None:
+            raise LookupError(f"归档对象不存在: {object_name}")
+        self._cache[object_name] = data
+        while len(self._cache) > _OBJECT_CACHE_MAX_ENTRIES:
+            self._cache.popitem(last=False)
+        return data
+
+    async def load_rows(self, db: AsyncSession, pet_id: str, start: date, end: date) -> list[dict]:
+        """读取某只宠物在 [start, end] 内已归档的记录（按日期、餐序排序）。"""
+        result = await db.execute(
+            select(MealRecordArchive).where(
+                MealRecordArchive.month >= month_start(start),
+                MealRecordArchive.month <= end,
+                MealRecordArchive.row_count > 0,
+            ).order_by(MealRecordArchive.month)
+        )
+        rows = []
+        for archive in result.scalars().all():
+            data = await self._fetch(archive.object_name)
+            rows.extend(await run_cpu_bound(decode_month_rows, data, pet_id, start, end))
+        rows.sort(key=lambda row: (row["meal_date"], row["meal_order"]))
+        return rows
+
+
+meal_archiver = MealArchiver()
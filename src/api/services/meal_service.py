@@ -2,15 +2,92 @@
 饮食记录服务
 
 处理餐食记录的 CRUD 操作和营养统计
+
+餐食排期默认是"虚拟"的：活跃 DietPlan + active_start_date 即定义了 30 天内每天的餐食，
+读接口（今日/指定日期/日历/历史/分析）按日期区间现场展开；meal_records 只保存
+用户完成或备注过的稀疏行，以及旧版预生成的记录。同一 (日期, 餐序) 有持久化行时以行为准。
+
+单餐营养详情按内容哈希存入 meal_templates，记录只保存 template_id 与顶级营养字段。
 """
+import hashlib
+import heapq
+import logging
 import uuid
-from typing import Any, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, fields as dataclass_fields
+from itertools import islice
+from typing import Any, Optional, Union
 from datetime import datetime, date, timedelta
-from sqlalchemy import select, func, and_, desc
+from sqlalchemy import select, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload, undefer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models import MealRecord, Pet, DietPlan
-
+from src.api.infrastructure.plan_blob_store import canonical_json, hydrate_document
+from src.api.services.meal_archive import meal_archiver
+from src.db.models import MealRecord, MealTemplate, Pet, DietPlan
+from src.db.pagination import (
+    KeyColumn,
+    Page,
+    TotalMode,
+    count_rows,
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
+    paginate,
+)
+
+logger = logging.getLogger(__name__)
+
+MEAL_HISTORY_KEYS = (
+    KeyColumn(MealRecord.meal_date, descending=True),
+    KeyColumn(MealRecord.meal_order, descending=True),
+    KeyColumn(MealRecord.id, descending=True),
+)
+
+# 历史列表只返回摘要字段，不读取 nutrition_data
+MEAL_HISTORY_COLUMNS = (
+    MealRecord.id,
+    MealRecord.pet_id,
+    MealRecord.meal_date,
+    MealRecord.meal_type,
+    MealRecord.meal_order,
+    MealRecord.calories,
+    MealRecord.is_completed,
+    MealRecord.completed_at,
+    MealRecord.food_name,
+)
+
+# 排期读取的持久化列（nutrition_data / 模板只在需要详情时加载）
+SCHEDULE_ROW_COLUMNS = (
+    MealRecord.id,
+    MealRecord.pet_id,
+    MealRecord.plan_id,
+    MealRecord.template_id,
+    MealRecord.meal_date,
+    MealRecord.meal_type,
+    MealRecord.meal_order,
+    MealRecord.food_name,
+    MealRecord.description,
+    MealRecord.calories,
+    MealRecord.protein,
+    MealRecord.fat,
+    MealRecord.carbohydrates,
+    MealRecord.dietary_fiber,
+    MealRecord.is_completed,
+    MealRecord.completed_at,
+    MealRecord.notes,
+)
+
+# 一个计划从 active_start_date 起覆盖的天数（4 周循环，第 5 周沿用最后一周）
+SCHEDULE_DAYS = 30
+
+VIRTUAL_MEAL_ID_PREFIX = "v"
+
+# 计划 → 按周餐食模板的进程内缓存，键含 updated_at，计划内容变更后自然失效
+_TEMPLATE_CACHE_MAX_ENTRIES = 256
+_template_cache: "OrderedDict[tuple[str, str], list[list[dict]]]" = OrderedDict()
 
 FIXED_MICRO_PREFERRED_UNITS = {
     "vitamin_a": "IU",
@@ -39,6 +116,86 @@ LEGACY_ADDITIONAL_UNIT_HINTS = {
 }
 
 
+@dataclass
+class ScheduledMeal:
+    """由活跃计划展开的虚拟餐食，字段与 MealRecord 同名，读路径可统一处理。"""
+
+    id: str
+    pet_id: str
+    plan_id: Optional[str]
+    meal_date: date
+    meal_type: str
+    meal_order: int
+    food_name: Optional[str] = None
+    description: Optional[str] = None
+    calories: Optional[int] = None
+    protein: Optional[float] = None
+    fat: Optional[float] = None
+    carbohydrates: Optional[float] = None
+    dietary_fiber: Optional[float] = None
+    nutrition_data: Optional[dict] = None
+    is_completed: bool = False
+    completed_at: Optional[datetime] = None
+    notes: Optional[str] = None
+
+
+MealLike = Union[MealRecord, ScheduledMeal]
+
+
+def virtual_meal_id(plan_id: str, meal_date: date, meal_order: int) -> str:
+    """虚拟餐食 ID：v.<plan_id>.<YYYYMMDD>.<餐序>，完成打卡时据此定位计划中的那一餐。"""
+    return f"{VIRTUAL_MEAL_ID_PREFIX}.{plan_id}.{meal_date:%Y%m%d}.{meal_order}"
+
+
+def parse_virtual_meal_id(meal_id: str) -> Optional[tuple[str, date, int]]:
+    """解析虚拟餐食 ID，非虚拟 ID 返回 None。"""
+    parts = meal_id.split(".")
+    if len(parts) != 4 or parts[0] != VIRTUAL_MEAL_ID_PREFIX:
+        return None
+    try:
+        return parts[1], datetime.strptime(parts[2], "%Y%m%d").date(), int(parts[3])
+    except ValueError:
+        return None
+
+
+def meal_template_id(payload: dict) -> str:
+    """餐食模板 ID：规范化 JSON 的 sha256（与迁移 a7b8c9d0e1f2 的回填算法一致）。"""
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+
+def _week_meals(weeks: list[list[dict]], day_offset: int) -> list[dict]:
+    """第 day_offset 天对应的周模板（每 7 天换一周，超出后沿用最后一周）。"""
+    if not weeks or day_offset < 0 or day_offset >= SCHEDULE_DAYS:
+        return []
+    return weeks[min(day_offset // 7, len(weeks) - 1)]
+
+
+def _history_key(meal: MealLike) -> tuple:
+    return (meal.meal_date, meal.meal_order, meal.id)
+
+
+@dataclass(frozen=True)
+class _ActiveSchedule:
+    """宠物当前活跃计划的排期。"""
+
+    plan_id: str
+    start_date: date
+    weeks: list[list[dict]]
+
+    @property
+    def end_date(self) -> date:
+        return self.start_date + timedelta(days=SCHEDULE_DAYS - 1)
+
+    def meals_on(self, day: date) -> list[dict]:
+        return _week_meals(self.weeks, (day - self.start_date).days)
+
+    def meal_at(self, day: date, meal_order: int) -> Optional[dict]:
+        for meal_fields in self.meals_on(day):
+            if meal_fields["meal_order"] == meal_order:
+                return meal_fields
+        return None
+
+
 class MealService:
     """餐食记录服务类"""
 
@@ -53,7 +210,7 @@ class MealService:
         plan_data: dict
     ) -> list[MealRecord]:
         """
-        从饮食计划创建餐食记录（30天）
+        从饮食计划预生成餐食记录（30天，meal_schedule_mode=materialized 时使用）
 
         Args:
             user_id: 用户 ID
@@ -66,117 +223,349 @@ class MealService:
         """
         records = []
         start_date = date.today()
+        weeks = self.build_meal_templates(plan_data)
+        # 营养详情按周去重写入 meal_templates，记录只引用模板
+        template_ids = iter(await self._ensure_templates(
+            [meal_fields["nutrition_data"] for week in weeks for meal_fields in week]
+        ))
+        week_template_ids = [[next(template_ids) for _ in week] for week in weeks]
+
+        # 已有记录的餐次（如切换计划前今天已完成的餐食）保留原记录，不再重复插入
+        result = await self.db.execute(
+            select(MealRecord.meal_date, MealRecord.meal_order).where(
+                MealRecord.pet_id == pet_id,
+                MealRecord.meal_date >= start_date,
+                MealRecord.meal_date < start_date + timedelta(days=SCHEDULE_DAYS),
+            )
+        )
+        occupied = set(result.all())
 
-        # 提取月度计划
-        monthly_plan = plan_data.get("pet_diet_plan", {})
+        for day_offset in range(SCHEDULE_DAYS):
+            meal_date = start_date + timedelta(days=day_offset)
+            day_meals = zip(_week_meals(weeks, day_offset), _week_meals(week_template_ids, day_offset))
+            for meal_fields, template_id in day_meals:
+                if (meal_date, meal_fields["meal_order"]) in occupied:
+                    continue
+                summary = {key: value for key, value in meal_fields.items() if key != "nutrition_data"}
+                record = MealRecord(
+                    id=str(uuid.uuid4()),
+                    pet_id=pet_id,
+                    plan_id=plan_id,
+                    meal_date=meal_date,
+                    template_id=template_id,
+                    is_completed=False,
+                    **summary,
+                )
+                self.db.add(record)
+                records.append(record)
+
+        await self.db.commit()
+        return records
+
+    def build_meal_templates(self, plan_data: Optional[dict]) -> list[list[dict]]:
+        """
+        把 PetDietPlan 展开为按周的餐食模板
+
+        Returns:
+            每周一个列表，元素为 MealRecord 字段字典（餐名、热量、营养汇总等）
+        """
+        monthly_plan = (plan_data or {}).get("pet_diet_plan", {})
         monthly_diet_plan = monthly_plan.get("monthly_diet_plan", [])
 
-        for day_offset in range(30):  # 30 天
-            meal_date = start_date + timedelta(days=day_offset)
+        weeks = []
+        for week_plan in monthly_diet_plan:
+            daily_plan = (week_plan or {}).get("weekly_diet_plan", {})
+            daily_meals = daily_plan.get("daily_diet_plans", [])
+            weeks.append([
+                self._meal_fields(meal, meal_order)
+                for meal_order, meal in enumerate(daily_meals, start=1)
+            ])
+        return weeks
+
+    def _meal_fields(self, meal: dict, meal_order: int) -> dict:
+        """计算单餐的 MealRecord 字段（营养信息从食材汇总）。"""
+        meal_type = self._meal_order_to_type(meal_order)
+
+        # 提取营养信息
+        food_items = meal.get("food_items", [])
+        total_calories = 0
+        macro_nutrients = {
+            "protein": 0,
+            "fat": 0,
+            "carbohydrates": 0,
+            "dietary_fiber": 0
+        }
+        micro_nutrients = {}
+        additional_micro_nutrients = {}
+
+        for item in food_items:
+            macro = item.get("macro_nutrients", {})
+            micro = item.get("micro_nutrients", {})
+
+            total_calories += (macro.get("protein", 0) * 4 +
+                              macro.get("fat", 0) * 9 +
+                              macro.get("carbohydrates", 0) * 4)
+
+            macro_nutrients["protein"] += macro.get("protein", 0)
+            macro_nutrients["fat"] += macro.get("fat", 0)
+            macro_nutrients["carbohydrates"] += macro.get("carbohydrates", 0)
+            macro_nutrients["dietary_fiber"] += macro.get("dietary_fiber", 0)
+
+            for nutrient_name, preferred_unit in FIXED_MICRO_PREFERRED_UNITS.items():
+                self._merge_nutrient_amount(
+                    micro_nutrients,
+                    nutrient_name,
+                    micro.get(nutrient_name),
+                    preferred_unit=preferred_unit,
+                    legacy_unit=LEGACY_FIXED_MICRO_UNITS[nutrient_name],
+                )
 
-            # 选择对应的周计划（每 7 天换一周）
-            week_index = min(day_offset // 7, len(monthly_diet_plan) - 1)
-            week_plan = monthly_diet_plan[week_index] if monthly_diet_plan else None
-
-            if week_plan:
-                daily_plan = week_plan.get("weekly_diet_plan", {})
-                daily_meals = daily_plan.get("daily_diet_plans", [])
-
-                meal_order = 1
-                for meal in daily_meals:
-                    meal_type = self._meal_order_to_type(meal_order)
-
-                    # 提取营养信息
-                    food_items = meal.get("food_items", [])
-                    total_calories = 0
-                    macro_nutrients = {
-                        "protein": 0,
-                        "fat": 0,
-                        "carbohydrates": 0,
-                        "dietary_fiber": 0
-                    }
-                    micro_nutrients = {}
-                    additional_micro_nutrients = {}
-
-                    for item in food_items:
-                        macro = item.get("macro_nutrients", {})
-                        micro = item.get("micro_nutrients", {})
-
-                        total_calories += (macro.get("protein", 0) * 4 +
-                                          macro.get("fat", 0) * 9 +
-                                          macro.get("carbohydrates", 0) * 4)
-
-                        macro_nutrients["protein"] += macro.get("protein", 0)
-                        macro_nutrients["fat"] += macro.get("fat", 0)
-                        macro_nutrients["carbohydrates"] += macro.get("carbohydrates", 0)
-                        macro_nutrients["dietary_fiber"] += macro.get("dietary_fiber", 0)
-
-                        for nutrient_name, preferred_unit in FIXED_MICRO_PREFERRED_UNITS.items():
-                            self._merge_nutrient_amount(
-                                micro_nutrients,
-                                nutrient_name,
-                                micro.get(nutrient_name),
-                                preferred_unit=preferred_unit,
-                                legacy_unit=LEGACY_FIXED_MICRO_UNITS[nutrient_name],
-                            )
-
-                        additional = micro.get("additional_nutrients", {})
-                        if isinstance(additional, dict):
-                            for nutrient_name, nutrient_value in additional.items():
-                                inferred_unit = self._infer_additional_unit(nutrient_name)
-                                self._merge_nutrient_amount(
-                                    additional_micro_nutrients,
-                                    nutrient_name,
-                                    nutrient_value,
-                                    preferred_unit=inferred_unit,
-                                    legacy_unit=inferred_unit,
-                                )
-
-                    for nutrient_name, preferred_unit in FIXED_MICRO_PREFERRED_UNITS.items():
-                        micro_nutrients.setdefault(
-                            nutrient_name,
-                            {"value": 0.0, "unit": preferred_unit},
-                        )
-
-                    # 构造营养数据
-                    nutrition_data = {
-                        "macro_nutrients": macro_nutrients,
-                        "micro_nutrients": {
-                            **micro_nutrients,
-                            "additional_nutrients": additional_micro_nutrients,
-                        },
-                        "food_items": food_items,
-                        "cook_method": meal.get("cook_method", ""),
-                        "recommend_reason": meal.get("recommend_reason", "")
-                    }
-
-                    # 餐名：食材拼接（与 PlanDetails 一致），fallback 到计划名
-                    item_names = [item.get("name", "") for item in food_items if item.get("name")]
-                    food_name = " + ".join(item_names) if item_names else meal.get("name", f"第{meal_order}餐")
-
-                    record = MealRecord(
-                        id=str(uuid.uuid4()),
-                        pet_id=pet_id,
-                        plan_id=plan_id,
-                        meal_date=meal_date,
-                        meal_type=meal_type,
-                        meal_order=meal_order,
-                        food_name=food_name,
-                        description=meal.get("description", ""),
-                        calories=total_calories,
-                        nutrition_data=nutrition_data,
-                        protein=round(macro_nutrients["protein"], 2),
-                        fat=round(macro_nutrients["fat"], 2),
-                        carbohydrates=round(macro_nutrients["carbohydrates"], 2),
-                        dietary_fiber=round(macro_nutrients["dietary_fiber"], 2),
-                        is_completed=False
+            additional = micro.get("additional_nutrients", {})
+            if isinstance(additional, dict):
+                for nutrient_name, nutrient_value in additional.items():
+                    inferred_unit = self._infer_additional_unit(nutrient_name)
+                    self._merge_nutrient_amount(
+                        additional_micro_nutrients,
+                        nutrient_name,
+                        nutrient_value,
+                        preferred_unit=inferred_unit,
+                        legacy_unit=inferred_unit,
                     )
-                    self.db.add(record)
-                    records.append(record)
-                    meal_order += 1
 
-        await self.db.commit()
-        return records
+        for nutrient_name, preferred_unit in FIXED_MICRO_PREFERRED_UNITS.items():
+            micro_nutrients.setdefault(
+                nutrient_name,
+                {"value": 0.0, "unit": preferred_unit},
+            )
+
+        # 构造营养数据
+        nutrition_data = {
+            "macro_nutrients": macro_nutrients,
+            "micro_nutrients": {
+                **micro_nutrients,
+                "additional_nutrients": additional_micro_nutrients,
+            },
+            "food_items": food_items,
+            "cook_method": meal.get("cook_method", ""),
+            "recommend_reason": meal.get("recommend_reason", "")
+        }
+
+        # 餐名：食材拼接（与 PlanDetails 一致），fallback 到计划名
+        item_names = [item.get("name", "") for item in food_items if item.get("name")]
+        food_name = " + ".join(item_names) if item_names else meal.get("name", f"第{meal_order}餐")
+
+        return {
+            "meal_type": meal_type,
+            "meal_order": meal_order,
+            "food_name": food_name,
+            "description": meal.get("description", ""),
+            # calories 列与响应模型都是整数，虚拟餐食不经过数据库转换，这里统一取整
+            "calories": int(round(total_calories)),
+            "nutrition_data": nutrition_data,
+            "protein": round(macro_nutrients["protein"], 2),
+            "fat": round(macro_nutrients["fat"], 2),
+            "carbohydrates": round(macro_nutrients["carbohydrates"], 2),
+            "dietary_fiber": round(macro_nutrients["dietary_fiber"], 2),
+        }
+
+    async def _ensure_templates(self, payloads: list[dict]) -> list[str]:
+        """
+        按内容哈希写入餐食模板（已存在的跳过）
+
+        Returns:
+            与 payloads 一一对应的模板 ID
+        """
+        template_ids = [meal_template_id(payload) for payload in payloads]
+        unique = dict(zip(template_ids, payloads))
+        if not unique:
+            return template_ids
+
+        result = await self.db.execute(select(MealTemplate.id).where(MealTemplate.id.in_(unique)))
+        existing = set(result.scalars().all())
+        for template_id, payload in unique.items():
+            if template_id in existing:
+                continue
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(MealTemplate(id=template_id, payload=payload))
+            except IntegrityError:
+                # 并发请求已写入相同内容的模板，按哈希寻址直接复用
+                pass
+        return template_ids
+
+    # ──────────────────────────── 虚拟排期 ────────────────────────────
+
+    async def _plan_templates(self, plan_id: str, updated_at: Optional[datetime]) -> list[list[dict]]:
+        """读取（并缓存）计划的周餐食模板，缓存未命中时才读取 plan_data。"""
+        key = (plan_id, updated_at.isoformat() if updated_at else "")
+        weeks = _template_cache.get(key)
+        if weeks is not None:
+            _template_cache.move_to_end(key)
+            return weeks
+
+        result = await self.db.execute(select(DietPlan.plan_data).where(DietPlan.id == plan_id))
+        weeks = self.build_meal_templates(await hydrate_document(result.scalar()))
+        _template_cache[key] = weeks
+        while len(_template_cache) > _TEMPLATE_CACHE_MAX_ENTRIES:
+            _template_cache.popitem(last=False)
+        return weeks
+
+    async def _load_active_schedule(self, pet_id: str) -> Optional[_ActiveSchedule]:
+        """宠物当前活跃计划的排期，没有已应用的活跃计划时返回 None。"""
+        result = await self.db.execute(
+            select(DietPlan)
+            .options(load_only(DietPlan.id, DietPlan.active_start_date, DietPlan.updated_at, raiseload=True))
+            .where(
+                DietPlan.pet_id == pet_id,
+                DietPlan.is_active == True,
+                DietPlan.active_start_date.is_not(None),
+            )
+            .order_by(DietPlan.applied_at.desc())
+            .limit(1)
+        )
+        plan = result.scalars().first()
+        if plan is None:
+            return None
+        weeks = await self._plan_templates(plan.id, plan.updated_at)
+        return _ActiveSchedule(plan_id=plan.id, start_date=plan.active_start_date, weeks=weeks)
+
+    def _expand_schedule(
+        self,
+        schedule: _ActiveSchedule,
+        pet_id: str,
+        start: Optional[date],
+        end: Optional[date],
+        covered: set,
+    ) -> list[ScheduledMeal]:
+        """展开 [start, end] 内的虚拟餐食，跳过已有持久化行的 (日期, 餐序)。"""
+        day = max(start, schedule.start_date) if start else schedule.start_date
+        last = min(end, schedule.end_date) if end else schedule.end_date
+        meals = []
+        while day <= last:
+            for meal_fields in schedule.meals_on(day):
+                if (day, meal_fields["meal_order"]) in covered:
+                    continue
+                meals.append(ScheduledMeal(
+                    id=virtual_meal_id(schedule.plan_id, day, meal_fields["meal_order"]),
+                    pet_id=pet_id,
+                    plan_id=schedule.plan_id,
+                    meal_date=day,
+                    **meal_fields,
+                ))
+            day += timedelta(days=1)
+        return meals
+
+    def _with_details(self, meal: MealLike, schedule: Optional[_ActiveSchedule]) -> MealLike:
+        """
+        补齐记录的营养详情（不修改 ORM 对象）
+
+        优先级：内联 nutrition_data（旧数据）→ meal_templates → 活跃计划展开的模板。
+        """
+        if not isinstance(meal, MealRecord) or meal.nutrition_data is not None:
+            return meal
+        details = meal.template.payload if meal.template is not None else None
+        if details is None and schedule is not None and meal.plan_id == schedule.plan_id:
+            planned = schedule.meal_at(meal.meal_date, meal.meal_order)
+            details = planned["nutrition_data"] if planned else None
+        if details is None:
+            return meal
+        values = {f.name: getattr(meal, f.name) for f in dataclass_fields(ScheduledMeal)}
+        values["nutrition_data"] = details
+        return ScheduledMeal(**values)
+
+    async def get_schedule(
+        self,
+        pet_id: str,
+        start: date,
+        end: date,
+        *,
+        with_details: bool = False,
+    ) -> list[MealLike]:
+        """
+        获取 [start, end] 内的餐食：持久化行 + 活跃计划展开的虚拟餐食
+
+        Args:
+            pet_id: 宠物 ID（调用方负责校验归属）
+            start: 开始日期
+            end: 结束日期
+            with_details: 是否需要 nutrition_data
+
+        Returns:
+            按 (日期, 餐序) 排序的 MealRecord / ScheduledMeal 列表
+        """
+        options = [load_only(*SCHEDULE_ROW_COLUMNS, raiseload=True)]
+        if with_details:
+            # 模板按 template_id 批量加载（一条 IN 查询），相同模板只读一次
+            options += [undefer(MealRecord.nutrition_data), selectinload(MealRecord.template)]
+        result = await self.db.execute(
+            select(MealRecord)
+            .options(*options)
+            .where(
+                and_(
+                    MealRecord.pet_id == pet_id,
+                    MealRecord.meal_date >= start,
+                    MealRecord.meal_date <= end
+                )
+            ).order_by(MealRecord.meal_date, MealRecord.meal_order)
+        )
+        meals: list[MealLike] = list(result.scalars().all())
+
+        schedule = await self._load_active_schedule(pet_id)
+        if with_details:
+            meals = [self._with_details(meal, schedule) for meal in meals]
+
+        # 早于归档边界的区间补上已导出到 Parquet 的月份
+        boundary = await meal_archiver.archive_boundary(self.db)
+        if boundary is not None and start < boundary:
+            meals.extend(await self._archived_meals(pet_id, start, end, with_details=with_details))
+            meals.sort(key=lambda meal: (meal.meal_date, meal.meal_order))
+        if schedule is None:
+            return meals
+
+        covered = {(meal.meal_date, meal.meal_order) for meal in meals}
+        meals.extend(self._expand_schedule(schedule, pet_id, start, end, covered))
+        meals.sort(key=lambda meal: (meal.meal_date, meal.meal_order))
+        return meals
+
+    async def _archived_meals(
+        self,
+        pet_id: str,
+        start: date,
+        end: date,
+        *,
+        with_details: bool,
+    ) -> list[ScheduledMeal]:
+        """已归档的餐食（只读），归档不可用时降级为空列表。"""
+        try:
+            rows = await meal_archiver.load_rows(self.db, pet_id, start, end)
+        except Exception as exc:
+            logger.warning("读取归档餐食失败，只返回热表数据: %s", exc)
+            return []
+
+        names = {f.name for f in dataclass_fields(ScheduledMeal)}
+        meals = [ScheduledMeal(**{key: value for key, value in row.items() if key in names}) for row in rows]
+        if not with_details:
+            return meals
+
+        template_ids = {
+            row["template_id"] for row in rows
+            if row.get("template_id") and row.get("nutrition_data") is None
+        }
+        if template_ids:
+            result = await self.db.execute(
+                select(MealTemplate.id, MealTemplate.payload).where(MealTemplate.id.in_(template_ids))
+            )
+            payloads = dict(result.all())
+            for meal, row in zip(meals, rows):
+                if meal.nutrition_data is None:
+                    meal.nutrition_data = payloads.get(row.get("template_id"))
+        return meals
+
+    async def plan_schedule_size(self, plan_id: str) -> int:
+        """计划在一个排期周期（SCHEDULE_DAYS 天）内的餐食数。"""
+        result = await self.db.execute(select(DietPlan.updated_at).where(DietPlan.id == plan_id))
+        weeks = await self._plan_templates(plan_id, result.scalar())
+        return sum(len(_week_meals(weeks, day_offset)) for day_offset in range(SCHEDULE_DAYS))
 
     def _meal_order_to_type(self, order: int) -> str:
         """将餐序号转换为类型"""
@@ -205,16 +594,8 @@ class MealService:
 
         today = date.today()
 
-        # 查询今日餐食
-        result = await self.db.execute(
-            select(MealRecord).where(
-                and_(
-                    MealRecord.pet_id == pet_id,
-                    MealRecord.meal_date == today
-                )
-            ).order_by(MealRecord.meal_order)
-        )
-        meals = result.scalars().all()
+        # 查询今日餐食（持久化行 + 活跃计划展开）
+        meals = await self.get_schedule(pet_id, today, today, with_details=True)
 
         # 计算营养摘要
         nutrition_summary = await self._calculate_nutrition_summary(meals)
@@ -261,15 +642,7 @@ class MealService:
         if not pet:
             raise ValueError("宠物不存在")
 
-        result = await self.db.execute(
-            select(MealRecord).where(
-                and_(
-                    MealRecord.pet_id == pet_id,
-                    MealRecord.meal_date == target_date
-                )
-            ).order_by(MealRecord.meal_order)
-        )
-        meals = result.scalars().all()
+        meals = await self.get_schedule(pet_id, target_date, target_date, with_details=True)
 
         nutrition_summary = await self._calculate_nutrition_summary(meals)
 
@@ -302,15 +675,17 @@ class MealService:
         """
         标记餐食完成
 
+        虚拟餐食在此时才落一条稀疏记录（营养详情引用 meal_templates）。
+
         Args:
             user_id: 用户 ID
-            meal_id: 餐食 ID
+            meal_id: 餐食 ID（记录 ID 或虚拟餐食 ID）
             notes: 备注
 
         Returns:
             更新后的餐食记录，不存在返回 None
         """
-        meal = await self._verify_meal_ownership(user_id, meal_id)
+        meal = await self._resolve_meal(user_id, meal_id, materialize=True)
         if not meal:
             return None
 
@@ -327,20 +702,23 @@ class MealService:
         self,
         user_id: str,
         meal_id: str
-    ) -> Optional[MealRecord]:
+    ) -> Optional[MealLike]:
         """
         取消餐食完成标记
 
         Args:
             user_id: 用户 ID
-            meal_id: 餐食 ID
+            meal_id: 餐食 ID（记录 ID 或虚拟餐食 ID）
 
         Returns:
             更新后的餐食记录，不存在返回 None
         """
-        meal = await self._verify_meal_ownership(user_id, meal_id)
+        meal = await self._resolve_meal(user_id, meal_id, materialize=False)
         if not meal:
             return None
+        if isinstance(meal, ScheduledMeal):
+            # 尚未落库的虚拟餐食本来就是未完成状态
+            return meal
 
         meal.is_completed = False
         meal.completed_at = None
@@ -356,7 +734,9 @@ class MealService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = "exact",
     ) -> dict:
         """
         获取餐食历史记录
@@ -366,8 +746,10 @@ class MealService:
             pet_id: 宠物 ID
             start_date: 开始日期
             end_date: 结束日期
-            page: 页码
+            page: 页码（传入 cursor 时忽略）
             page_size: 每页大小
+            cursor: 上一页返回的 next_cursor
+            total_mode: 总数计算方式（exact / approx / none）
 
         Returns:
             餐食历史记录
@@ -378,31 +760,47 @@ class MealService:
             raise ValueError("宠物不存在")
 
         # 构建查询
-        query = select(MealRecord).where(MealRecord.pet_id == pet_id)
+        query = (
+            select(MealRecord)
+            .options(load_only(*MEAL_HISTORY_COLUMNS, raiseload=True))
+            .where(MealRecord.pet_id == pet_id)
+        )
 
         if start_date:
             query = query.where(MealRecord.meal_date >= start_date)
         if end_date:
             query = query.where(MealRecord.meal_date <= end_date)
 
-        # 获取总数
-        count_result = await self.db.execute(
-            select(func.count()).select_from(query.alias())
-        )
-        total = count_result.scalar()
-
-        # 分页查询
-        offset = (page - 1) * page_size
-        query = query.order_by(desc(MealRecord.meal_date), desc(MealRecord.meal_order))
-        query = query.offset(offset).limit(page_size)
-
-        result = await self.db.execute(query)
-        meals = result.scalars().all()
+        # 活跃计划中尚未落库的虚拟餐食（最多 SCHEDULE_DAYS 天）与持久化行合并分页
+        virtual_meals = await self._history_virtual_meals(pet_id, start_date, end_date)
+
+        # 按 (meal_date, meal_order, id) 倒序翻页，对应索引 idx_meal_pet_history
+        if virtual_meals:
+            result = await self._paginate_with_virtual(
+                query,
+                virtual_meals,
+                page_size=page_size,
+                offset=(page - 1) * page_size,
+                cursor=cursor,
+                total_mode=total_mode,
+            )
+        else:
+            result = await paginate(
+                self.db,
+                query,
+                MEAL_HISTORY_KEYS,
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                cursor=cursor,
+                total_mode=total_mode,
+            )
 
         return {
-            "total": total,
+            "total": result.total,
             "page": page,
             "page_size": page_size,
+            "next_cursor": result.next_cursor,
+            "total_approximate": result.total_approximate,
             "items": [
                 {
                     "id": meal.id,
@@ -414,7 +812,7 @@ class MealService:
                     "completed_at": meal.completed_at.isoformat() if meal.completed_at else None,
                     "food_name": meal.food_name
                 }
-                for meal in meals
+                for meal in result.items
             ]
         }
 
@@ -452,17 +850,8 @@ class MealService:
             start_date = end_date - timedelta(days=365)
             days_range = 365
 
-        # 查询时间段内的餐食记录
-        result = await self.db.execute(
-            select(MealRecord).where(
-                and_(
-                    MealRecord.pet_id == pet_id,
-                    MealRecord.meal_date >= start_date,
-                    MealRecord.meal_date <= end_date
-                )
-            ).order_by(MealRecord.meal_date)
-        )
-        meals = result.scalars().all()
+        # 查询时间段内的餐食（旧数据没有顶级营养字段，需要 nutrition_data 兜底）
+        meals = await self.get_schedule(pet_id, start_date, end_date, with_details=True)
 
         # 计算每日数据
         daily_data = []
@@ -574,6 +963,153 @@ class MealService:
         )
         return result.scalar_one_or_none()
 
+    async def _resolve_meal(
+        self,
+        user_id: str,
+        meal_id: str,
+        *,
+        materialize: bool,
+    ) -> Optional[MealLike]:
+        """
+        按 ID 定位餐食：记录 ID 直接校验归属；虚拟 ID 先找已落库的稀疏行，
+        没有时按活跃计划构造（materialize=True 时 INSERT ... ON CONFLICT DO NOTHING 落库后重新查询）
+        """
+        virtual = parse_virtual_meal_id(meal_id)
+        if virtual is None:
+            return await self._verify_meal_ownership(user_id, meal_id)
+
+        plan_id, meal_date, meal_order = virtual
+        result = await self.db.execute(
+            select(DietPlan)
+            .options(load_only(
+                DietPlan.id, DietPlan.pet_id, DietPlan.active_start_date, DietPlan.updated_at,
+                raiseload=True,
+            ))
+            .join(Pet, Pet.id == DietPlan.pet_id)
+            .where(
+                and_(
+                    DietPlan.id == plan_id,
+                    DietPlan.user_id == user_id,
+                    DietPlan.is_active == True,
+                    DietPlan.active_start_date.is_not(None),
+                    Pet.is_active == True
+                )
+            )
+        )
+        plan = result.scalars().first()
+        if not plan:
+            return None
+
+        existing = await self._meal_at_slot(plan.pet_id, meal_date, meal_order)
+        if existing:
+            return existing
+
+        schedule = _ActiveSchedule(
+            plan_id=plan.id,
+            start_date=plan.active_start_date,
+            weeks=await self._plan_templates(plan.id, plan.updated_at),
+        )
+        planned = schedule.meal_at(meal_date, meal_order)
+        if planned is None:
+            return None
+
+        if not materialize:
+            return ScheduledMeal(id=meal_id, pet_id=plan.pet_id, plan_id=plan.id, meal_date=meal_date, **planned)
+
+        # 并发完成同一虚拟餐食时只有一个插入生效（唯一索引 uq_meal_pet_date_order），
+        # 其余请求重新查询拿到同一行
+        [template_id] = await self._ensure_templates([planned["nutrition_data"]])
+        summary = {key: value for key, value in planned.items() if key != "nutrition_data"}
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        await self.db.execute(
+            dialect.insert(MealRecord)
+            .values(
+                id=str(uuid.uuid4()),
+                pet_id=plan.pet_id,
+                plan_id=plan.id,
+                meal_date=meal_date,
+                template_id=template_id,
+                is_completed=False,
+                **summary,
+            )
+            .on_conflict_do_nothing(index_elements=["pet_id", "meal_date", "meal_order"])
+        )
+        return await self._meal_at_slot(plan.pet_id, meal_date, meal_order)
+
+    async def _meal_at_slot(self, pet_id: str, meal_date: date, meal_order: int) -> Optional[MealRecord]:
+        """某只宠物某天某餐次已落库的记录（唯一）。"""
+        result = await self.db.execute(
+            select(MealRecord).where(
+                MealRecord.pet_id == pet_id,
+                MealRecord.meal_date == meal_date,
+                MealRecord.meal_order == meal_order,
+            )
+        )
+        return result.scalars().first()
+
+    async def _history_virtual_meals(
+        self,
+        pet_id: str,
+        start_date: Optional[date],
+        end_date: Optional[date],
+    ) -> list[ScheduledMeal]:
+        """历史区间内尚未落库的虚拟餐食。"""
+        schedule = await self._load_active_schedule(pet_id)
+        if schedule is None:
+            return []
+        window_start = max(start_date, schedule.start_date) if start_date else schedule.start_date
+        window_end = min(end_date, schedule.end_date) if end_date else schedule.end_date
+        if window_start > window_end:
+            return []
+
+        result = await self.db.execute(
+            select(MealRecord.meal_date, MealRecord.meal_order).where(
+                and_(
+                    MealRecord.pet_id == pet_id,
+                    MealRecord.meal_date >= window_start,
+                    MealRecord.meal_date <= window_end
+                )
+            )
+        )
+        covered = {(row.meal_date, row.meal_order) for row in result.all()}
+        return self._expand_schedule(schedule, pet_id, window_start, window_end, covered)
+
+    async def _paginate_with_virtual(
+        self,
+        query,
+        virtual_meals: list[ScheduledMeal],
+        *,
+        page_size: int,
+        offset: int,
+        cursor: Optional[str],
+        total_mode: TotalMode,
+    ) -> Page:
+        """持久化行（keyset 查询）与内存中的虚拟餐食按同一排序键归并分页。"""
+        total, approximate = await count_rows(self.db, query, total_mode)
+        if total is not None:
+            total += len(virtual_meals)
+
+        stmt = query
+        if cursor:
+            after = tuple(decode_cursor(cursor, MEAL_HISTORY_KEYS))
+            stmt = stmt.where(keyset_condition(MEAL_HISTORY_KEYS, after))
+            virtual_meals = [meal for meal in virtual_meals if _history_key(meal) < after]
+            offset = 0
+
+        # 归并前最多需要 offset + page_size + 1 行持久化记录
+        stmt = stmt.order_by(*(key.ordering for key in MEAL_HISTORY_KEYS)).limit(offset + page_size + 1)
+        rows = (await self.db.execute(stmt)).scalars().all()
+
+        virtual_meals = sorted(virtual_meals, key=_history_key, reverse=True)
+        merged = heapq.merge(rows, virtual_meals, key=_history_key, reverse=True)
+        items = list(islice(merged, offset, offset + page_size + 1))
+
+        next_cursor = None
+        if len(items) > page_size:
+            items = items[:page_size]
+            next_cursor = encode_cursor(items[-1], MEAL_HISTORY_KEYS)
+        return Page(items=items, total=total, total_approximate=approximate, next_cursor=next_cursor)
+
     async def _calculate_nutrition_summary(self, meals: list) -> dict:
         """计算营养摘要（优先读顶级字段，fallback 到 JSON 兼容旧数据）"""
         total_calories = sum(m.calories or 0 for m in meals)
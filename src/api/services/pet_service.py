@@ -6,7 +6,7 @@
 import uuid
 from typing import Optional
 from datetime import datetime
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import Pet, DietPlan, User
@@ -244,20 +244,12 @@ class PetService:
         """
         pets = await self.get_pets_by_user(user_id, is_active)
 
-        # 批量查询每个宠物是否有计划
+        # 一次分组查询拿到所有有计划的宠物，避免逐个 count
+        planned = await self.pet_ids_with_plans(user_id, [pet.id for pet in pets])
+
         result_list = []
         for pet in pets:
-            # 查询该宠物是否有饮食计划
-            plan_result = await self.db.execute(
-                select(func.count(DietPlan.id)).where(
-                    and_(
-                        DietPlan.pet_id == pet.id,
-                        DietPlan.user_id == user_id
-                    )
-                )
-            )
-            plan_count = plan_result.scalar()
-            has_plan = plan_count > 0
+            has_plan = pet.id in planned
 
             result_list.append({
                 "id": pet.id,
@@ -281,6 +273,31 @@ class PetService:
 
         return result_list
 
+    async def pet_ids_with_plans(self, user_id: str, pet_ids: list[str]) -> set[str]:
+        """
+        批量查询哪些宠物已有饮食计划
+
+        Args:
+            user_id: 用户 ID
+            pet_ids: 宠物 ID 列表
+
+        Returns:
+            有计划的宠物 ID 集合
+        """
+        if not pet_ids:
+            return set()
+        result = await self.db.execute(
+            select(DietPlan.pet_id)
+            .where(
+                and_(
+                    DietPlan.user_id == user_id,
+                    DietPlan.pet_id.in_(pet_ids)
+                )
+            )
+            .group_by(DietPlan.pet_id)
+        )
+        return set(result.scalars().all())
+
     async def get_pet_for_plan(
         self,
         user_id: str,
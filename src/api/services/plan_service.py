@@ -6,7 +6,6 @@
 - `v1`：旧版图
 - `v2`：新版 deep-agent 图
 """
-import json
 import asyncio
 import logging
 from typing import Dict, Any, AsyncGenerator, TYPE_CHECKING, Literal
@@ -14,14 +13,21 @@ from datetime import datetime, timezone, date
 import uuid
 
 from fastapi import HTTPException
-from sqlalchemy import delete, func, select
+from sqlalchemy import delete, select
+from sqlalchemy.orm import load_only, undefer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.infrastructure.plan_blob_store import hydrate_document, offload_document
+from src.db.pagination import KeyColumn, TotalMode, paginate
 from src.db.session import AsyncSessionLocal
+from src.db.redis_keys import legacy_temp_plan_key, temp_plan_key
 from src.api.services.task_service import TaskService
 from src.api.services.pet_service import PetService
+from src.api.services.progress_writer import progress_writer
 from src.api.services.meal_service import MealService
 from src.api.services.event_bus import (
+    close_local_channel,
+    open_local_channel,
     publish_end_sentinel,
     publish_event,
     stream_exists,
@@ -34,6 +40,7 @@ from src.api.models.response import (
     PetType as ResponsePetType,
 )
 from src.api.config import settings
+from src.api.utils.responses import build_model
 from src.api.utils.stream import create_sse_event, stream_with_heartbeat
 from src.utils.strtuct import PetInformation
 
@@ -43,10 +50,6 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-# 控制高频进度事件的落库频率，避免数据库被事件流打满。
-PROGRESS_DB_WRITE_INTERVAL_SECONDS = 1.0
-PROGRESS_DB_WRITE_DELTA = 5
-
 # 后台任务强引用集合：防止 asyncio.create_task 创建的任务被 GC 回收
 # 任务完成后通过 done callback 自动从集合中移除
 _BACKGROUND_TASKS: set[asyncio.Task] = set()
@@ -60,6 +63,26 @@ def _spawn_background_task(coro) -> asyncio.Task:
     return task
 
 
+def _plan_summary_columns() -> tuple:
+    """计划列表摘要需要的列（不含 plan_data）。"""
+    from src.db.models import DietPlan
+
+    return (
+        DietPlan.id,
+        DietPlan.task_id,
+        DietPlan.pet_id,
+        DietPlan.pet_type,
+        DietPlan.pet_breed,
+        DietPlan.pet_age,
+        DietPlan.pet_weight,
+        DietPlan.health_status,
+        DietPlan.is_active,
+        DietPlan.applied_at,
+        DietPlan.created_at,
+        DietPlan.updated_at,
+    )
+
+
 class PlanService:
     """饮食计划服务类"""
 
@@ -111,22 +134,37 @@ class PlanService:
         pet_type: str | None = None,
         page: int = 1,
         page_size: int = 10,
-    ) -> DietPlanListResponse:
+        cursor: str | None = None,
+        total_mode: TotalMode = "exact",
+        trusted: bool = False,
+    ) -> DietPlanListResponse | dict[str, Any]:
+        """trusted=True 时免校验构造为 dict（字段均来自已落库的计划行），见 utils.responses。"""
         from src.db.models import DietPlan
 
-        query = select(DietPlan).where(DietPlan.user_id == user_id)
+        query = (
+            select(DietPlan)
+            .options(load_only(*_plan_summary_columns(), raiseload=True))
+            .where(DietPlan.user_id == user_id)
+        )
         if pet_type:
             query = query.where(DietPlan.pet_type == pet_type)
 
-        total_query = select(func.count()).select_from(query.subquery())
-        total = (await self.db.execute(total_query)).scalar_one()
-
-        offset = (page - 1) * page_size
-        plans_query = query.order_by(DietPlan.created_at.desc()).offset(offset).limit(page_size)
-        plans = (await self.db.execute(plans_query)).scalars().all()
+        # 按 (created_at, id) 倒序翻页，对应索引 idx_plan_user_created
+        result = await paginate(
+            self.db,
+            query,
+            (KeyColumn(DietPlan.created_at, descending=True), KeyColumn(DietPlan.id, descending=True)),
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
+        plans = result.items
 
         items = [
-            DietPlanSummaryResponse(
+            build_model(
+                DietPlanSummaryResponse,
+                trusted,
                 id=plan.id,
                 task_id=plan.task_id,
                 pet_id=plan.pet_id,
@@ -143,13 +181,39 @@ class PlanService:
             for plan in plans
         ]
 
-        return DietPlanListResponse(
-            total=total,
+        return build_model(
+            DietPlanListResponse,
+            trusted,
+            total=result.total,
             page=page,
             page_size=page_size,
             items=items,
+            next_cursor=result.next_cursor,
+            total_approximate=result.total_approximate,
         )
 
+    async def get_diet_plan_version(
+        self,
+        *,
+        plan_id: str,
+        user_id: str,
+    ) -> datetime:
+        """计划版本（updated_at），用于详情接口的 ETag；同时做归属校验。"""
+        from src.db.models import DietPlan
+
+        updated_at = await self.db.scalar(
+            select(DietPlan.updated_at).where(
+                DietPlan.id == plan_id,
+                DietPlan.user_id == user_id,
+            )
+        )
+        if updated_at is None:
+            raise HTTPException(
+                status_code=404,
+                detail={"code": 404, "message": "饮食计划不存在", "detail": None},
+            )
+        return updated_at
+
     async def get_diet_plan_detail(
         self,
         *,
@@ -159,7 +223,9 @@ class PlanService:
         from src.db.models import DietPlan
 
         result = await self.db.execute(
-            select(DietPlan).where(
+            select(DietPlan)
+            .options(undefer(DietPlan.plan_data))
+            .where(
                 DietPlan.id == plan_id,
                 DietPlan.user_id == user_id,
             )
@@ -181,11 +247,34 @@ class PlanService:
             pet_age=plan.pet_age,
             pet_weight=float(plan.pet_weight),
             health_status=plan.health_status,
-            plan_data=plan.plan_data or {},
+            plan_data=await hydrate_document(plan.plan_data) or {},
             created_at=plan.created_at,
             updated_at=plan.updated_at,
         )
 
+    async def get_plan_document(
+        self,
+        *,
+        plan_id: str,
+        user_id: str,
+    ) -> dict:
+        """读取计划文档的原始存储形式（可能是对象存储存根，由调用方决定透传或还原）。"""
+        from src.db.models import DietPlan
+
+        result = await self.db.execute(
+            select(DietPlan.plan_data).where(
+                DietPlan.id == plan_id,
+                DietPlan.user_id == user_id,
+            )
+        )
+        row = result.first()
+        if row is None:
+            raise HTTPException(
+                status_code=404,
+                detail={"code": 404, "message": "饮食计划不存在", "detail": None},
+            )
+        return row.plan_data or {}
+
     async def delete_diet_plan(
         self,
         *,
@@ -229,7 +318,10 @@ class PlanService:
         user_id: str,
     ) -> dict:
         """
-        应用饮食计划：停用旧活跃计划 → 激活新计划 → 从今天起生成 MealRecords
+        应用饮食计划：停用旧活跃计划 → 激活新计划 → 从今天起排期
+
+        虚拟排期（默认）只切换活跃状态与 active_start_date，餐食在读取时展开；
+        meal_schedule_mode=materialized 时仍预生成 30 天 MealRecords。
 
         Args:
             plan_id: 要应用的计划 ID
@@ -237,6 +329,7 @@ class PlanService:
 
         Returns:
             包含 plan_id, is_active, applied_at, meals_created 的字典
+            （虚拟排期下 meals_created 为排期周期内的餐食数）
         """
         from src.db.models import DietPlan, MealRecord, Pet
 
@@ -301,20 +394,28 @@ class PlanService:
 
         await self.db.flush()
 
-        # 5. 从今天起生成 MealRecords（4 周循环）
+        # 5. 从今天起排期（4 周循环）
         meal_service = MealService(self.db)
-        records = await meal_service.create_meal_records_from_plan(
-            user_id=user_id,
-            pet_id=plan.pet_id,
-            plan_id=plan_id,
-            plan_data=plan.plan_data,
-        )
+        if settings.meal_schedule_mode == "materialized":
+            plan_data = (
+                await self.db.execute(select(DietPlan.plan_data).where(DietPlan.id == plan_id))
+            ).scalar()
+            records = await meal_service.create_meal_records_from_plan(
+                user_id=user_id,
+                pet_id=plan.pet_id,
+                plan_id=plan_id,
+                plan_data=await hydrate_document(plan_data),
+            )
+            meals_created = len(records)
+        else:
+            await self.db.commit()
+            meals_created = await meal_service.plan_schedule_size(plan_id)
 
         return {
             "plan_id": plan_id,
             "is_active": True,
             "applied_at": now.isoformat(),
-            "meals_created": len(records),
+            "meals_created": meals_created,
         }
 
     async def execute_diet_plan_stream(
@@ -354,8 +455,13 @@ class PlanService:
 
         yield create_sse_event({"type": "task_created", "task_id": task_id})
 
+        # 先注册本地通道，同进程订阅直接走内存，不必等 XREAD 轮询
+        open_local_channel(task_id)
+
         # 启动后台任务（独立 session、独立生命周期、强引用防 GC）
-        _spawn_background_task(self._run_plan_task_in_background(task_id, user_id, pet_info))
+        # 任务在首步之前被取消时不会发送 sentinel，由 done callback 兜底关闭本地通道
+        bg_task = _spawn_background_task(self._run_plan_task_in_background(task_id, user_id, pet_info))
+        bg_task.add_done_callback(lambda _: close_local_channel(task_id))
 
         # SSE 流：订阅事件总线 + 心跳保活
         # 使用 from_beginning=True 避免后台任务先于订阅 publish 时丢失早期事件
@@ -379,102 +485,101 @@ class PlanService:
 
         与 SSE 客户端连接完全解耦：客户端断开/挂起不影响本任务推进。
         所有 chunk 通过 publish_event 写入事件总线，结束后 publish_end_sentinel
-        通知订阅者关流。
+        通知订阅者关流。进度由 progress_writer 写后批量落库，整个运行期间
+        只在状态切换时短暂借用数据库连接。
 
         Args:
             task_id: 任务 ID
             user_id: 用户 ID
             pet_info: 宠物信息
         """
-        async with AsyncSessionLocal() as db:
-            task_service = TaskService(db)
-            completed_data: Dict[str, Any] = {}
-            progress_state = {"progress": -1, "node": "", "saved_at": 0.0}
+        completed_data: Dict[str, Any] = {}
 
-            try:
-                graph = await self._build_graph()
-                config = {
-                    "configurable": {
-                        "thread_id": task_id,
-                        "user_id": user_id,
-                    }
+        try:
+            graph = await self._build_graph()
+            config = {
+                "configurable": {
+                    "thread_id": task_id,
+                    "user_id": user_id,
                 }
+            }
 
-                await task_service.update_task_status(task_id, "running")
+            # 状态写入各用一个短 session，图执行期间不占用连接池连接
+            async with AsyncSessionLocal() as db:
+                await TaskService(db).update_task_status(task_id, "running")
 
-                inputs, context = self._prepare_inputs(
-                    pet_info,
-                    user_id=user_id,
-                )
+            inputs, context = self._prepare_inputs(
+                pet_info,
+                user_id=user_id,
+            )
 
-                async for namespace, mode, chunk in graph.astream(
-                    input=inputs,
-                    config=config,
-                    stream_mode=["custom"],
-                    context=context,
-                    subgraphs=True,
-                ):
-                    if mode != "custom":
-                        continue
-                    if not isinstance(chunk, dict):
-                        continue
-
-                    # 截获 completed 事件用于持久化
-                    if chunk.get("type") == "completed":
-                        completed_data.update(chunk)
-
-                    # 更新数据库进度（节流）
-                    await self._update_task_progress_from_chunk(
-                        task_id,
-                        chunk,
-                        task_service=task_service,
-                        progress_state=progress_state,
-                    )
-
-                    # 发布到事件总线供 SSE 端点消费
-                    await publish_event(task_id, chunk)
-
-                # 流式结束 → 持久化临时计划 → 通知订阅者
-                await task_service.complete_task(task_id, completed_data)
-                plan_id = str(uuid.uuid4())
-                await self._save_temp_plan(plan_id, user_id, task_id, pet_info, completed_data)
-
-                await publish_event(task_id, {
-                    "type": "task_completed",
-                    "task_id": task_id,
-                    "plan_id": plan_id,
-                })
+            async for namespace, mode, chunk in graph.astream(
+                input=inputs,
+                config=config,
+                stream_mode=["custom"],
+                context=context,
+                subgraphs=True,
+            ):
+                if mode != "custom":
+                    continue
+                if not isinstance(chunk, dict):
+                    continue
+
+                # 截获 completed 事件用于持久化
+                if chunk.get("type") == "completed":
+                    completed_data.update(chunk)
+
+                # 进度交给写后缓冲，按秒批量落库
+                self._record_task_progress(task_id, chunk)
+
+                # 发布到事件总线供 SSE 端点消费
+                await publish_event(task_id, chunk)
+
+            # 流式结束 → 持久化临时计划 → 通知订阅者
+            progress_writer.discard(task_id)
+            async with AsyncSessionLocal() as db:
+                await TaskService(db).complete_task(task_id, completed_data)
+            # 临时计划直接以 task_id 为 ID（与 AG-UI 路径一致），
+            # temp_plan 与事件流共用 hash tag，落在同一 Redis Cluster slot
+            plan_id = task_id
+            await self._save_temp_plan(plan_id, user_id, task_id, pet_info, completed_data)
+
+            await publish_event(task_id, {
+                "type": "task_completed",
+                "task_id": task_id,
+                "plan_id": plan_id,
+            })
 
-            except asyncio.CancelledError:
-                logger.warning("后台任务被取消: task_id=%s", task_id)
-                try:
-                    await task_service.fail_task(task_id, "任务已取消")
-                except Exception:
-                    pass
-                await publish_event(task_id, {
-                    "type": "error",
-                    "task_id": task_id,
-                    "error": "任务已取消",
-                })
-                raise
-            except Exception as exc:
-                logger.error("后台任务执行失败 task_id=%s: %s", task_id, exc, exc_info=True)
-                try:
-                    await db.rollback()
-                except Exception:
-                    pass
-                try:
-                    await task_service.fail_task(task_id, str(exc))
-                except Exception as fail_err:
-                    logger.error("标记任务失败时出错 task_id=%s: %s", task_id, fail_err)
-                await publish_event(task_id, {
-                    "type": "error",
-                    "task_id": task_id,
-                    "error": str(exc),
-                })
-            finally:
-                # 无论如何都通知订阅者关流
-                await publish_end_sentinel(task_id)
+        except asyncio.CancelledError:
+            logger.warning("后台任务被取消: task_id=%s", task_id)
+            progress_writer.discard(task_id)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await TaskService(db).fail_task(task_id, "任务已取消")
+            except Exception:
+                pass
+            await publish_event(task_id, {
+                "type": "error",
+                "task_id": task_id,
+                "error": "任务已取消",
+            })
+            raise
+        except Exception as exc:
+            logger.error("后台任务执行失败 task_id=%s: %s", task_id, exc, exc_info=True)
+            progress_writer.discard(task_id)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await TaskService(db).fail_task(task_id, str(exc))
+            except Exception as fail_err:
+                logger.error("标记任务失败时出错 task_id=%s: %s", task_id, fail_err)
+            await publish_event(task_id, {
+                "type": "error",
+                "task_id": task_id,
+                "error": str(exc),
+            })
+        finally:
+            # 无论如何都通知订阅者关流
+            await publish_end_sentinel(task_id)
 
     async def resume_diet_plan_stream(
         self,
@@ -507,7 +612,7 @@ class PlanService:
                 yield create_sse_event({
                     "type": "task_completed",
                     "task_id": task.id,
-                    "result": task.output_data or {},
+                    "result": await task_service.get_task_output(task_id, user_id),
                 })
                 return
 
@@ -681,7 +786,7 @@ class PlanService:
                 yield create_sse_event({
                     "type": "task_completed",
                     "task_id": task.id,
-                    "result": task.output_data or {},
+                    "result": await svc.get_task_output(task_id, user_id),
                 })
                 return
 
@@ -708,86 +813,17 @@ class PlanService:
 
             await asyncio.sleep(poll_interval)
 
-    async def _update_task_progress_from_event(
-        self,
-        task_id: str,
-        event: str,
-        *,
-        task_service: "TaskService | None" = None,
-        progress_state: Dict[str, Any] | None = None,
-    ):
-        """
-        从 SSE 事件字符串中提取进度并更新任务（兼容旧接口）
-
-        新代码请使用 _update_task_progress_from_chunk 直接传 dict。
-        """
-        try:
-            if event.startswith("data: "):
-                data = json.loads(event[6:].strip())
-                await self._update_task_progress_from_chunk(
-                    task_id, data,
-                    task_service=task_service,
-                    progress_state=progress_state,
-                )
-        except (json.JSONDecodeError, KeyError):
-            pass
-
-    async def _update_task_progress_from_chunk(
-        self,
-        task_id: str,
-        chunk: Dict[str, Any],
-        *,
-        task_service: "TaskService | None" = None,
-        progress_state: Dict[str, Any] | None = None,
-    ):
-        """
-        从原始 chunk dict 中提取进度并节流写入数据库。
-
-        Args:
-            task_id: 任务 ID
-            chunk: ProgressEvent 序列化后的 dict（含 progress / node / type 等）
-            task_service: 后台任务专用 TaskService（持有独立 session）
-            progress_state: 跨调用复用的状态字典，控制写库频率
-        """
-        svc = task_service or self.task_service
+    def _record_task_progress(self, task_id: str, chunk: Dict[str, Any]) -> None:
+        """从 chunk 中提取进度交给写后缓冲，不等待落库。"""
         progress = chunk.get("progress")
         if progress is None:
             return
-
         try:
             progress_value = int(progress)
         except (TypeError, ValueError):
             return
-
         node = chunk.get("node", "") or chunk.get("type", "")
-
-        if progress_state is None:
-            await svc.update_task_progress_lightweight(task_id, progress_value, node)
-            return
-
-        now = asyncio.get_running_loop().time()
-        last_progress = progress_state.get("progress", -1)
-        last_node = progress_state.get("node", "")
-        last_saved = progress_state.get("saved_at", 0.0)
-        progress_delta = abs(progress_value - last_progress) if last_progress >= 0 else progress_value
-        progress_changed = progress_value != last_progress
-        node_changed = node != last_node
-        enough_time_elapsed = now - last_saved >= PROGRESS_DB_WRITE_INTERVAL_SECONDS
-        should_persist = (
-            last_progress < 0
-            or progress_value >= 100
-            or (progress_changed and progress_delta >= PROGRESS_DB_WRITE_DELTA)
-            or (node_changed and enough_time_elapsed)
-            or (progress_changed and enough_time_elapsed)
-        )
-
-        if not should_persist:
-            return
-
-        await svc.update_task_progress_lightweight(task_id, progress_value, node)
-        progress_state["progress"] = progress_value
-        progress_state["node"] = node
-        progress_state["saved_at"] = now
+        progress_writer.record(task_id, progress_value, node)
 
     async def _save_temp_plan(
         self,
@@ -840,11 +876,15 @@ class PlanService:
             "created_at": datetime.now(timezone.utc).isoformat(),
         }
 
-        success = await set_json(f"temp_plan:{plan_id}", temp_data, expire=86400)
+        # 大计划卸载到对象存储，Redis 只留存根；confirm 时存根原样写入数据库
+        temp_data["plan_data"] = await offload_document(temp_data["plan_data"])
+
+        key = temp_plan_key(plan_id)
+        success = await set_json(key, temp_data, expire=86400)
         if success:
-            logger.info("临时计划已存入 Redis: temp_plan:%s (TTL 24h)", plan_id)
+            logger.info("临时计划已存入 Redis: %s (TTL 24h)", key)
         else:
-            logger.error("临时计划存入 Redis 失败: temp_plan:%s", plan_id)
+            logger.error("临时计划存入 Redis 失败: %s", key)
 
     async def confirm_diet_plan(self, plan_id: str, user_id: str) -> str:
         """
@@ -861,9 +901,14 @@ class PlanService:
             HTTPException: 计划不存在/已过期 或 无权限
         """
         from fastapi import HTTPException
-        from src.db.redis import get_json, get_redis
+        from src.db.redis import delete_key, get_json
 
-        temp = await get_json(f"temp_plan:{plan_id}")
+        key = temp_plan_key(plan_id)
+        temp = await get_json(key)
+        if not temp:
+            # 升级前写入、尚未过期的临时计划仍使用旧 key
+            key = legacy_temp_plan_key(plan_id)
+            temp = await get_json(key)
         if not temp:
             raise HTTPException(
                 status_code=404,
@@ -883,13 +928,9 @@ class PlanService:
             plan_data=temp["plan_data"],
         )
 
-        # 直接删除精确 key（比 scan_iter 模式匹配更高效）
-        try:
-            client = await get_redis()
-            await client.delete(f"temp_plan:{plan_id}")
-            logger.info("Redis 临时计划已删除: temp_plan:%s", plan_id)
-        except Exception as e:
-            logger.warning("删除 Redis 临时计划失败: %s", e)
+        # 直接删除精确 key（比 scan_iter 模式匹配更高效），同时失效本进程缓存
+        await delete_key(key)
+        logger.info("Redis 临时计划已删除: %s", key)
 
         return saved_id
 
@@ -928,6 +969,9 @@ class PlanService:
                 report = report.model_dump()
             plan_data = report
 
+        # 超过阈值的计划只在库里保存对象存储引用 + 摘要
+        plan_data = await offload_document(plan_data)
+
         plan_id = str(uuid.uuid4())
         diet_plan = DietPlan(
             id=plan_id,
@@ -0,0 +1,161 @@
+"""
+任务进度写后缓冲（write-behind）
+
+后台计划任务每秒可能产生多条进度事件。逐条 UPDATE + COMMIT 会让长时间运行的
+任务一直占着一个连接池连接。这里改为：
+- record() 只在内存中记录每个任务的最新进度（同一任务后写覆盖先写）
+- 后台刷写循环每 FLUSH_INTERVAL_SECONDS 秒把所有脏任务合并成一条
+  `UPDATE tasks ... FROM (VALUES ...)` 语句，用一个短生命周期连接提交
+- 两次刷写之间不持有任何数据库连接
+
+只覆盖 pending/running 状态的任务，且终态写入前会 discard 缓冲，
+避免迟到的进度把 completed/failed 改回 running。
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, or_, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.db.models import Task
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 1.0
+
+# 进度可被覆盖的任务状态
+_WRITABLE_STATUSES = ("pending", "running")
+
+
+class ProgressWriter:
+    """进程级任务进度写后缓冲。"""
+
+    def __init__(
+        self,
+        engine: Optional[AsyncEngine] = None,
+        flush_interval: float = FLUSH_INTERVAL_SECONDS,
+    ):
+        self._engine = engine
+        self.flush_interval = flush_interval
+        # task_id → (progress, current_node, updated_at)
+        self._dirty: Dict[str, Tuple[int, str, datetime]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from src.db.session import engine
+
+            self._engine = engine
+        return self._engine
+
+    @property
+    def pending(self) -> int:
+        """尚未落库的任务数。"""
+        return len(self._dirty)
+
+    def record(self, task_id: str, progress: int, current_node: str) -> None:
+        """记录任务最新进度，下一次刷写时落库。"""
+        self._dirty[task_id] = (progress, current_node, datetime.now(timezone.utc))
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._task.get_loop() is not loop:
+            # 事件循环已更换（如测试之间），旧循环上的锁与任务不可复用
+            self._lock = asyncio.Lock()
+            self._task = None
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def discard(self, task_id: str) -> None:
+        """丢弃任务尚未落库的进度（写终态之前调用）。"""
+        self._dirty.pop(task_id, None)
+
+    async def flush(self) -> int:
+        """
+        立即把所有脏任务写入数据库。
+
+        Returns:
+            本次写入的任务数
+        """
+        async with self._lock:
+            if not self._dirty:
+                return 0
+            batch, self._dirty = self._dirty, {}
+            try:
+                async with self.engine.begin() as conn:
+                    if conn.dialect.name == "postgresql":
+                        stmt, params = self._build_values_update(batch)
+                        await conn.execute(stmt, params)
+                    else:
+                        await conn.execute(
+                            update(Task)
+                            .where(
+                                Task.id == bindparam("task_id"),
+                                # executemany 不支持 IN 展开参数，改用 OR
+                                or_(*(Task.status == s for s in _WRITABLE_STATUSES)),
+                            )
+                            .values(
+                                status="running",
+                                progress=bindparam("progress"),
+                                current_node=bindparam("current_node"),
+                                updated_at=bindparam("updated_at"),
+                            ),
+                            [
+                                {
+                                    "task_id": task_id,
+                                    "progress": progress,
+                                    "current_node": node,
+                                    "updated_at": updated_at,
+                                }
+                                for task_id, (progress, node, updated_at) in batch.items()
+                            ],
+                        )
+            except Exception as exc:
+                logger.error("任务进度批量落库失败 count=%d: %s", len(batch), exc)
+                # 失败的进度放回缓冲，但不覆盖期间写入的更新值
+                for task_id, value in batch.items():
+                    self._dirty.setdefault(task_id, value)
+                return 0
+            return len(batch)
+
+    @staticmethod
+    def _build_values_update(batch: Dict[str, Tuple[int, str, datetime]]):
+        rows = []
+        params = {}
+        for i, (task_id, (progress, node, updated_at)) in enumerate(batch.items()):
+            rows.append(
+                f"(CAST(:id_{i} AS VARCHAR), CAST(:progress_{i} AS INTEGER), "
+                f"CAST(:node_{i} AS VARCHAR), CAST(:updated_at_{i} AS TIMESTAMPTZ))"
+            )
+            params[f"id_{i}"] = task_id
+            params[f"progress_{i}"] = progress
+            params[f"node_{i}"] = node
+            params[f"updated_at_{i}"] = updated_at
+        stmt = text(
+            "UPDATE tasks SET status = 'running', progress = v.progress, "
+            "current_node = v.current_node, updated_at = v.updated_at "
+            f"FROM (VALUES {', '.join(rows)}) AS v(id, progress, current_node, updated_at) "
+            "WHERE tasks.id = v.id AND tasks.status IN ('pending', 'running')"
+        )
+        return stmt, params
+
+    async def _run(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        """停止刷写循环并落库剩余进度（应用退出时调用）。"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await self.flush()
+
+
+progress_writer = ProgressWriter()
@@ -0,0 +1,132 @@
+"""
+刷新令牌存储
+
+refresh_tokens 原先保存 500 字符的 JWT 原文并建唯一索引，每次刷新都按原文查库，
+过期、已撤销的行也从不清理。现在：
+- 库中只存 SHA-256 摘要（token_hash，定长 64 字符），索引体积小，泄库也拿不到可用令牌
+- 签发时在 Redis 记录有效令牌（refresh_token:{user_id}:{hash}，TTL 到令牌过期），
+  刷新时 GETDEL 原子地“消费”该 key，旧令牌不会在 Redis 中残留
+- 令牌是否有效以数据库为准：无论 Redis 是否命中，都用带 is_revoked = false 条件的 UPDATE
+  一步完成校验与撤销，恰好撤销一行才算有效（登出、管理员撤销只改数据库，
+  Redis 记录可能比数据库行活得久，不能单凭 Redis 命中放行）
+- RefreshTokenSweeper 后台循环按批删除过期或已撤销的行，每批一个短事务
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.api.config import settings
+from src.db.models import RefreshToken
+from src.db.redis import get_redis
+from src.db.redis_keys import refresh_token_key
+
+logger = logging.getLogger(__name__)
+
+
+async def remember_refresh_token(user_id: str, token_hash: str, expires_at: datetime) -> bool:
+    """签发后记录有效令牌；失败只记日志，刷新时会回源数据库。"""
+    ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+    if ttl <= 0:
+        return False
+    try:
+        client = await get_redis()
+        await client.set(refresh_token_key(user_id, token_hash), 1, ex=ttl)
+        return True
+    except Exception as e:
+        logger.error("Redis remember refresh token failed: %s", e)
+        return False
+
+
+async def consume_refresh_token(user_id: str, token_hash: str) -> bool:
+    """
+    原子地消费一个有效令牌
+
+    Returns:
+        True 表示令牌在 Redis 中且已移除；False 表示未命中或 Redis 不可用。
+        两种情况调用方都要以数据库为准校验
+    """
+    try:
+        client = await get_redis()
+        return await client.getdel(refresh_token_key(user_id, token_hash)) is not None
+    except Exception as e:
+        logger.error("Redis consume refresh token failed: %s", e)
+        return False
+
+
+class RefreshTokenSweeper:
+    """按批清理过期或已撤销的刷新令牌。"""
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self._engine = engine
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            from src.db.session import engine
+
+            self._engine = engine
+        return self._engine
+
+    async def sweep(self, batch_size: Optional[int] = None) -> int:
+        """
+        删除所有过期或已撤销的行
+
+        每批先按主键选出至多 batch_size 行再删除，单个事务持锁时间有上限，
+        不会一次删除几十万行拖住复制与 autovacuum。
+
+        Returns:
+            删除的总行数
+        """
+        batch_size = batch_size or settings.refresh_token_sweep_batch_size
+        now = datetime.now(timezone.utc)
+        total = 0
+        while True:
+            async with self.engine.begin() as conn:
+                ids = (
+                    await conn.execute(
+                        select(RefreshToken.id)
+                        .where(or_(RefreshToken.expires_at < now, RefreshToken.is_revoked.is_(True)))
+                        .limit(batch_size)
+                    )
+                ).scalars().all()
+                if not ids:
+                    break
+                await conn.execute(delete(RefreshToken).where(RefreshToken.id.in_(ids)))
+            total += len(ids)
+            if len(ids) < batch_size:
+                break
+        if total:
+            logger.info("清理刷新令牌 %d 行", total)
+        return total
+
+    def start(self) -> None:
+        """启动后台清理循环（SWEEP_INTERVAL <= 0 时不启动）。"""
+        if settings.refresh_token_sweep_interval_seconds <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as exc:
+                logger.warning("刷新令牌清理失败: %s", exc)
+            await asyncio.sleep(settings.refresh_token_sweep_interval_seconds)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+refresh_token_sweeper = RefreshTokenSweeper()
@@ -2,64 +2,39 @@
 任务管理服务
 处理任务的创建、查询、取消等操作
 """
-import json
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Any
+from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.attributes import set_committed_value
 import uuid
 
+from src.api.infrastructure.plan_blob_store import hydrate_document, offload_document
 from src.db.models import Task, User
+from src.db.pagination import KeyColumn, TotalMode, paginate
 from src.api.utils.errors import NotFoundException, TaskException
 from src.api.models.response import TaskResponse, TaskListResponse
 from src.api.config import settings
+from src.utils.serialization import to_jsonable
 
 logger = logging.getLogger(__name__)
 
+TASK_LIST_KEYS = (KeyColumn(Task.created_at, descending=True), KeyColumn(Task.id, descending=True))
 
-def _sanitize_for_json(obj: Any) -> Any:
-    """
-    递归清洗数据，确保可被 JSON 序列化。
-
-    将 LangChain Message 对象、Pydantic BaseModel 等转换为纯 dict/list/基本类型。
-    """
-    # None / bool / int / float / str 直接返回
-    if obj is None or isinstance(obj, (bool, int, float, str)):
-        return obj
-
-    # Pydantic BaseModel（含 LangChain Message 子类）
-    if hasattr(obj, "model_dump"):
-        try:
-            return obj.model_dump()
-        except Exception:
-            pass
-
-    # 旧版 Pydantic / 自定义对象的 dict() 方法
-    if hasattr(obj, "dict") and callable(obj.dict):
-        try:
-            return obj.dict()
-        except Exception:
-            pass
-
-    # dict —— 递归清洗键值
-    if isinstance(obj, dict):
-        return {str(k): _sanitize_for_json(v) for k, v in obj.items()}
-
-    # list / tuple —— 递归清洗元素
-    if isinstance(obj, (list, tuple)):
-        return [_sanitize_for_json(item) for item in obj]
-
-    # set
-    if isinstance(obj, set):
-        return [_sanitize_for_json(item) for item in obj]
-
-    # 最后兜底：尝试 str()
-    try:
-        json.dumps(obj)
-        return obj
-    except (TypeError, ValueError):
-        return str(obj)
+# 列表只需要 TaskResponse 的字段，input_data / output_data 不读取
+TASK_SUMMARY_COLUMNS = (
+    Task.id,
+    Task.task_type,
+    Task.status,
+    Task.progress,
+    Task.current_node,
+    Task.error_message,
+    Task.started_at,
+    Task.completed_at,
+    Task.created_at,
+)
 
 
 class TaskService:
@@ -103,7 +78,7 @@ class TaskService:
 
     async def get_task(self, task_id: str, user_id: str) -> Task:
         """
-        获取任务信息
+        获取任务信息（不含 input_data / output_data，需要结果时用 get_task_output）
 
         Args:
             task_id: 任务 ID
@@ -128,6 +103,33 @@ class TaskService:
 
         return task
 
+    async def get_task_output(self, task_id: str, user_id: str) -> dict:
+        """
+        单独读取任务输出
+
+        Args:
+            task_id: 任务 ID
+            user_id: 用户 ID
+
+        Returns:
+            任务输出，未产出时为空 dict
+
+        Raises:
+            NotFoundException: 任务不存在
+        """
+        result = await self.db.execute(
+            select(Task.output_data).where(
+                Task.id == task_id,
+                Task.user_id == user_id
+            )
+        )
+        row = result.first()
+
+        if row is None:
+            raise NotFoundException("任务不存在")
+
+        return await hydrate_document(row.output_data) or {}
+
     async def update_task_status(
         self,
         task_id: str,
@@ -255,9 +257,13 @@ class TaskService:
             progress=100
         )
 
-        task.output_data = _sanitize_for_json(output_data)
+        # 大输出（含完整计划）卸载到对象存储，库里只留存根；get_task_output 读取时还原
+        output = await offload_document(to_jsonable(output_data))
+        task.output_data = output
         await self.db.commit()
         await self.db.refresh(task)
+        # refresh 不会重新加载延迟列；直接回填刚写入的值，避免再读一遍大字段
+        set_committed_value(task, "output_data", output)
 
         return task
 
@@ -321,7 +327,9 @@ class TaskService:
         status: Optional[str] = None,
         task_type: Optional[str] = None,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = "exact",
     ) -> TaskListResponse:
         """
         获取任务列表
@@ -329,40 +337,47 @@ class TaskService:
         Args:
             user_id: 用户 ID
             status: 状态筛选
-            page: 页码
+            page: 页码（传入 cursor 时忽略）
             page_size: 每页大小
+            cursor: 上一页返回的 next_cursor
+            total_mode: 总数计算方式（exact / approx / none）
 
         Returns:
             任务列表响应
         """
         # 构建查询
-        query = select(Task).where(Task.user_id == user_id)
+        query = (
+            select(Task)
+            .options(load_only(*TASK_SUMMARY_COLUMNS, raiseload=True))
+            .where(Task.user_id == user_id)
+        )
 
         if status:
             query = query.where(Task.status == status)
         if task_type:
             query = query.where(Task.task_type == task_type)
 
-        # 获取总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar()
-
-        # 分页查询
-        query = query.order_by(Task.created_at.desc())
-        query = query.offset((page - 1) * page_size).limit(page_size)
-
-        result = await self.db.execute(query)
-        tasks = result.scalars().all()
+        # 按 (created_at, id) 倒序翻页，对应索引 idx_task_user_created
+        result = await paginate(
+            self.db,
+            query,
+            TASK_LIST_KEYS,
+            limit=page_size,
+            offset=(page - 1) * page_size,
+            cursor=cursor,
+            total_mode=total_mode,
+        )
 
         # 转换为响应模型
-        items = [TaskResponse.model_validate(task) for task in tasks]
+        items = [TaskResponse.model_validate(task) for task in result.items]
 
         return TaskListResponse(
-            total=total,
+            total=result.total,
             page=page,
             page_size=page_size,
-            items=items
+            items=items,
+            next_cursor=result.next_cursor,
+            total_approximate=result.total_approximate,
         )
 
     async def cleanup_old_tasks(self, days: int = 7) -> int:
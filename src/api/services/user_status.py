@@ -0,0 +1,50 @@
+"""
+用户状态缓存
+
+需要检查用户是否启用 / 是否管理员的认证依赖，原先每个请求都 SELECT 一次 users。
+这里把 (is_active, is_superuser) 缓存在 Redis（user_status:{user_id}），
+key 前缀在客户端侧缓存范围内（REDIS_CLIENT_CACHE_PREFIXES），命中时只是一次进程内字典查找；
+其他进程写入或删除该 key 时由 Redis 推送失效。
+
+禁用、启用或修改用户权限后调用 invalidate_user_status()；TTL 兜底覆盖绕过应用直接改库的情况。
+Redis 不可用时直接查库。
+"""
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.config import settings
+from src.db.models import User
+from src.db.redis import delete_key, get_json, set_json
+from src.db.redis_keys import user_status_key
+
+
+@dataclass(frozen=True)
+class UserStatus:
+    is_active: bool
+    is_superuser: bool
+
+
+async def get_user_status(db: AsyncSession, user_id: str) -> Optional[UserStatus]:
+    """读取用户状态（先 Redis，未命中查库并回填）；用户不存在返回 None。"""
+    key = user_status_key(user_id)
+    cached = await get_json(key)
+    if cached is not None:
+        return UserStatus(**cached)
+
+    row = (
+        await db.execute(select(User.is_active, User.is_superuser).where(User.id == user_id))
+    ).first()
+    if row is None:
+        return None
+
+    user_status = UserStatus(is_active=bool(row.is_active), is_superuser=bool(row.is_superuser))
+    await set_json(key, asdict(user_status), expire=settings.user_status_cache_ttl_seconds)
+    return user_status
+
+
+async def invalidate_user_status(user_id: str) -> None:
+    """用户被禁用或更新后失效缓存。"""
+    await delete_key(user_status_key(user_id))
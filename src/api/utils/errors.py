@@ -119,6 +119,22 @@ class RateLimitException(APIException):
         )
 
 
+class ServiceUnavailableException(APIException):
+    """服务繁忙异常"""
+
+    def __init__(
+        self,
+        message: str = "服务繁忙，请稍后重试",
+        detail: Optional[Any] = None
+    ):
+        super().__init__(
+            message=message,
+            code=503,
+            detail=detail,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
 class TaskException(APIException):
     """任务异常"""
 
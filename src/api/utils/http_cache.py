@@ -0,0 +1,179 @@
+"""
+条件请求（ETag / If-None-Match）与预压缩响应体缓存
+
+计划详情、食材目录、任务状态这类响应体积大、变化少，原先每次请求都重新序列化，
+再由 GZipMiddleware 重新压缩一遍。这里改为：
+- 路由先用一次轻量查询拿到资源版本（updated_at / 计数等），连同用户与查询参数算出 ETag
+- If-None-Match 命中直接 304，不读完整数据、不序列化
+- 否则按 (ETag, 编码) 查进程内 LRU：命中直接返回预压缩字节；未命中才渲染 JSON，
+  按客户端 Accept-Encoding 选 br / zstd / gzip 压缩一次后缓存
+  （每个版本只压缩一次，所以用比 GZipMiddleware 更高的压缩级别）
+
+每种编码的响应体字节不同，ETag 也按编码区分（"<版本>-gzip"，未压缩为 "<版本>"），
+保持强校验器语义：Range 请求与按编码分别存储的缓存不会把不同字节当成同一表示。
+
+响应已带 Content-Encoding，GZipMiddleware 会原样放行。版本变化即 ETag 变化，
+旧条目不需要主动失效，按 LRU 自然淘汰。br 依赖可选的 brotli 包（uv sync --extra brotli），
+未安装时只提供 zstd / gzip。
+"""
+import gzip
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import zstandard
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.api.config import settings
+from src.utils.executors import run_cpu_bound
+
+try:
+    import brotli
+except ImportError:  # 可选依赖
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IDENTITY = "identity"
+
+_GZIP_LEVEL = 9
+_ZSTD_LEVEL = 12
+_BROTLI_QUALITY = 9
+
+
+def _gzip(data: bytes) -> bytes:
+    # mtime=0：相同内容得到相同字节
+    return gzip.compress(data, compresslevel=_GZIP_LEVEL, mtime=0)
+
+
+def _zstd(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+
+
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {"zstd": _zstd, "gzip": _gzip}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=_BROTLI_QUALITY)
+
+
+def version_etag(*parts: Any) -> str:
+    """由资源版本各组成部分（类型、ID、用户、updated_at、查询参数……）生成强 ETag。"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """某个编码下响应体的 ETag：在版本 ETag 的引号内追加 -<编码>，未压缩时不变。"""
+    if encoding == IDENTITY:
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，支持列表与 *）。"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> str:
+    """按服务端偏好（RESPONSE_PRECOMPRESS_ENCODINGS）选出客户端接受的第一个编码。"""
+    if not accept_encoding:
+        return IDENTITY
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        token, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in settings.response_precompress_encodings:
+        if encoding in _COMPRESSORS and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return IDENTITY
+
+
+class EncodedBodyCache:
+    """按 (ETag, 编码) 缓存响应体字节，按总字节数 LRU 淘汰。"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        body = self._entries.get((etag, encoding))
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end((etag, encoding))
+        self.hits += 1
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        previous = self._entries.pop((etag, encoding), None)
+        if previous is not None:
+            self._size -= len(previous)
+        self._entries[(etag, encoding)] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+
+body_cache = EncodedBodyCache(settings.response_cache_max_bytes)
+
+
+async def conditional_response(
+    request: Request,
+    etag: str,
+    render: Callable[[], Awaitable[bytes]],
+    media_type: str = "application/json",
+) -> Response:
+    """
+    带 ETag 的响应
+
+    etag 是资源版本的 ETag，响应头里按实际编码换成 encoded_etag。
+    render 只在该版本首次被请求（或已被淘汰）时调用，返回未压缩的响应体字节。
+    """
+    headers = {"Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # 响应体小于压缩阈值时即使协商出压缩编码也按原样返回，两种 ETag 都算命中
+    if_none_match = request.headers.get("if-none-match")
+    for candidate in (encoded_etag(etag, encoding), etag):
+        if etag_matches(if_none_match, candidate):
+            headers["ETag"] = candidate
+            return Response(status_code=304, headers=headers)
+
+    body = body_cache.get(etag, encoding) if encoding != IDENTITY else None
+    if body is None:
+        raw = body_cache.get(etag, IDENTITY)
+        if raw is None:
+            raw = await render()
+            body_cache.put(etag, IDENTITY, raw)
+        if encoding == IDENTITY or len(raw) < settings.response_precompress_min_size:
+            encoding, body = IDENTITY, raw
+        else:
+            body = await run_cpu_bound(_COMPRESSORS[encoding], raw)
+            body_cache.put(etag, encoding, body)
+
+    headers["ETag"] = encoded_etag(etag, encoding)
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
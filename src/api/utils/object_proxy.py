@@ -0,0 +1,160 @@
+"""
+MinIO 对象流式代理
+
+原先头像代理把整个对象读进内存（get_object + read），再单独 stat 一次取 Content-Type，
+每次查看头像都是两次 MinIO 调用加一次完整下载。这里改为：
+- 先查本地磁盘缓存（object_cache.DiskObjectCache）：命中时 If-None-Match 直接 304，
+  否则 FileResponse 直接发送文件（Starlette 负责 Range / 206 / 416）
+- 未命中时只发一次 GET，ETag、Content-Type、Content-Length 取自响应头；
+  分块（CHUNK_SIZE）从 MinIO 读出后立即转发给客户端，同时写入缓存临时文件，
+  完整读完才登记到缓存，客户端中途断开则丢弃临时文件
+- 未命中且带单段 Range（bytes=start-[end]）时把范围透传给 MinIO，返回 206，不写缓存；
+  后缀范围与多段范围按 RFC 9110 忽略，返回完整内容
+
+阻塞的 MinIO 读取与文件写入都在 I/O 线程池执行。
+图片本身已压缩，压缩中间件按 Content-Type 跳过（GZIP_EXCLUDED_CONTENT_TYPES，
+见 middleware/compression.py），Content-Length / Content-Range 与实际字节一致。
+"""
+import logging
+import mimetypes
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+from minio.error import S3Error
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+from src.api.infrastructure.minio_storage import MinioManager
+from src.api.infrastructure.object_cache import DiskObjectCache
+from src.api.utils.http_cache import etag_matches
+from src.utils.executors import run_blocking_io
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_single_range(header: Optional[str]) -> Optional[Tuple[int, int]]:
+    """解析 bytes=start-[end]，返回 (offset, length)，length 为 0 表示读到末尾；其他形式返回 None。"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    if not start.isdigit() or (end and not end.isdigit()):
+        return None
+    offset = int(start)
+    if not end:
+        return offset, 0
+    if int(end) < offset:
+        return None
+    return offset, int(end) - offset + 1
+
+
+def _quote_etag(etag: str) -> str:
+    return f'"{etag.strip(chr(34))}"'
+
+
+def _read_chunk(upstream, sink) -> bytes:
+    chunk = upstream.read(CHUNK_SIZE)
+    if chunk and sink is not None:
+        sink.write(chunk)
+    return chunk
+
+
+def _release(upstream) -> None:
+    upstream.close()
+    upstream.release_conn()
+
+
+async def _stream(
+    upstream,
+    cache: Optional[DiskObjectCache],
+    object_name: str,
+    etag: str,
+    content_type: str,
+    expected_size: Optional[int],
+) -> AsyncIterator[bytes]:
+    """逐块转发；cache 不为空且大小已知时边转发边写缓存。"""
+    temp_path = None
+    if cache is not None and cache.enabled and expected_size is not None and expected_size <= cache.max_bytes:
+        temp_path = await run_blocking_io(cache.temp_path)
+    sink = await run_blocking_io(open, temp_path, "wb") if temp_path else None
+    written = 0
+    committed = False
+    try:
+        while True:
+            chunk = await run_blocking_io(_read_chunk, upstream, sink)
+            if not chunk:
+                break
+            written += len(chunk)
+            yield chunk
+        if sink is not None and written == expected_size:
+            await run_blocking_io(sink.close)
+            await run_blocking_io(cache.commit, object_name, temp_path, etag, content_type, written)
+            committed = True
+    finally:
+        _release(upstream)
+        if sink is not None and not committed:
+            sink.close()
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
+
+async def proxy_object(
+    request: Request,
+    storage: MinioManager,
+    object_name: str,
+    cache: DiskObjectCache,
+    cache_control: str,
+) -> Optional[Response]:
+    """
+    代理读取 MinIO 对象
+
+    Returns:
+        响应；对象不存在返回 None
+    """
+    if_none_match = request.headers.get("if-none-match")
+
+    cached = await run_blocking_io(cache.get, object_name)
+    if cached is not None:
+        headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+        if etag_matches(if_none_match, cached.etag):
+            return Response(status_code=304, headers=headers)
+        return FileResponse(cached.path, media_type=cached.content_type, headers=headers)
+
+    byte_range = parse_single_range(request.headers.get("range"))
+    offset, length = byte_range or (0, 0)
+    try:
+        upstream = await storage.aopen_object(object_name, offset, length)
+    except S3Error as exc:
+        if exc.code == "InvalidRange":
+            return Response(status_code=416)
+        logger.exception("Error opening object: %s", object_name)
+        return None
+    if upstream is None:
+        return None
+
+    etag = _quote_etag(upstream.headers.get("ETag", ""))
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+    if etag_matches(if_none_match, etag):
+        await run_blocking_io(_release, upstream)
+        return Response(status_code=304, headers=headers)
+
+    content_type = (
+        upstream.headers.get("Content-Type")
+        or mimetypes.guess_type(object_name)[0]
+        or "application/octet-stream"
+    )
+    content_length = upstream.headers.get("Content-Length")
+    if content_length is not None:
+        headers["Content-Length"] = content_length
+
+    if byte_range is not None:
+        headers["Content-Range"] = upstream.headers.get("Content-Range", "")
+        body = _stream(upstream, None, object_name, etag, content_type, None)
+        return StreamingResponse(body, status_code=206, media_type=content_type, headers=headers)
+
+    expected_size = int(content_length) if content_length is not None else None
+    body = _stream(upstream, cache, object_name, etag, content_type, expected_size)
+    return StreamingResponse(body, media_type=content_type, headers=headers)
@@ -0,0 +1,127 @@
+"""
+可信响应路径
+
+列表类路由（计划列表、每日餐食、周日历、待办列表）的数据全部来自已落库校验过的 ORM 行，
+逐项构造 Pydantic 模型时做一遍校验，FastAPI 按 response_model 返回前又整棵校验一遍。
+开启可信路径的路由：
+- 各层直接构造字段 dict（补齐默认值），不做字段校验
+- 由 pydantic-core 按运行时类型直接生成 JSON 字节（datetime / Enum / float 的输出格式与
+  模型序列化一致），返回 Response，FastAPI 不再二次校验
+  （response_model 仍声明在路由上，OpenAPI 文档不变；只适用于没有 alias / 自定义序列化器的模型）
+
+model_construct 是纯 Python 实现，逐项调用反而比 pydantic-core 里的校验构造更慢，所以这里不用它。
+
+按路由名开关（TRUSTED_RESPONSE_ROUTES），未开启时与原先一样构造模型并交给 FastAPI 校验。
+
+免校验不等于不校验：
+- 每个响应都把各列表截到第一项后按 response_model 校验一次（抽查），开销与列表长度无关；
+  不合规时与校验路径一样抛出 ValidationError，不会把不合规的数据发给客户端
+- 开发模式下按 TRUSTED_RESPONSE_VALIDATE_RATE 抽样把生成的 JSON 按 response_model 完整校验一遍，
+  发现模型与数据漂移（类型不符、必填缺失、输出与校验后不一致）时记录告警；
+  TRUSTED_RESPONSE_VALIDATE_STRICT 开启时直接抛出（测试默认全量抽样并开启）
+"""
+import logging
+import random
+from typing import Any, Dict, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel, ValidationError
+from pydantic.fields import FieldInfo
+from pydantic_core import to_json
+from starlette.responses import Response
+
+from src.api.config import settings
+from src.utils.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+_optional_fields: Dict[type, Tuple[int, Tuple[Tuple[str, FieldInfo], ...]]] = {}
+
+
+def trusted_response_enabled(route: str) -> bool:
+    """该路由是否走可信响应路径。"""
+    return settings.trusted_responses_enabled and route in settings.trusted_response_routes
+
+
+def _optional_fields_of(model_cls: Type[BaseModel]) -> Tuple[int, Tuple[Tuple[str, FieldInfo], ...]]:
+    """(字段总数, 有默认值的字段)，每个模型类只计算一次。"""
+    cached = _optional_fields.get(model_cls)
+    if cached is None:
+        fields = model_cls.model_fields
+        cached = _optional_fields[model_cls] = (
+            len(fields),
+            tuple((name, field) for name, field in fields.items() if not field.is_required()),
+        )
+    return cached
+
+
+def build_model(model_cls: Type[M], trusted: bool, /, **fields: Any) -> Union[M, Dict[str, Any]]:
+    """
+    构造响应模型
+
+    可信路径直接返回字段 dict，只补齐未传入的默认值（缺失的必填字段留给抽样校验发现）；
+    否则正常校验构造模型实例。
+    """
+    if not trusted:
+        return model_cls(**fields)
+    total, optional = _optional_fields_of(model_cls)
+    if len(fields) < total:
+        for name, field in optional:
+            if name not in fields:
+                fields[name] = field.get_default(call_default_factory=True)
+    return fields
+
+
+def _first_items(value: Any) -> Any:
+    """各层列表只保留第一项，供抽查校验。"""
+    if isinstance(value, list):
+        return [_first_items(item) for item in value[:1]]
+    if isinstance(value, dict):
+        return {key: _first_items(item) for key, item in value.items()}
+    return value
+
+
+def _should_sample() -> bool:
+    rate = settings.trusted_response_validate_rate
+    return settings.is_dev and rate > 0 and random.random() < rate
+
+
+def _check_drift(response_model: Type[BaseModel], route: str, body: bytes) -> None:
+    """抽样校验：按 response_model 完整校验可信路径生成的 JSON。"""
+    try:
+        validated = response_model.model_validate_json(body)
+    except ValidationError as exc:
+        if settings.trusted_response_validate_strict:
+            raise
+        logger.warning(
+            "可信响应校验失败 route=%s errors=%s", route, exc.errors(include_url=False, include_input=False)
+        )
+        return
+    if validated.model_dump(mode="json") != loads(body):
+        if settings.trusted_response_validate_strict:
+            raise AssertionError(f"可信响应与校验后的输出不一致 route={route}")
+        logger.warning("可信响应与校验后的输出不一致 route=%s", route)
+
+
+def api_response(
+    response_model: Type[M], route: str, trusted: bool, /, **fields: Any
+) -> Union[M, Response]:
+    """
+    构造路由返回值
+
+    可信路径抽查每层列表的第一项后直接返回序列化好的 Response；
+    否则返回模型实例，由 FastAPI 按 response_model 校验。
+
+    Raises:
+        ValidationError: 抽查发现数据不符合 response_model
+    """
+    if not trusted:
+        return response_model(**fields)
+
+    payload = build_model(response_model, True, **fields)
+    response_model.model_validate(_first_items(payload))
+    body = to_json(payload)
+    if _should_sample():
+        _check_drift(response_model, route, body)
+    return Response(content=body, media_type="application/json")
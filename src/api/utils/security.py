@@ -2,13 +2,18 @@
 安全工具
 包含密码哈希、JWT Token 生成和验证等功能
 """
-import asyncio
 import bcrypt
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from jose import JWTError, jwt
 
 from src.api.config import settings
+from src.api.utils.errors import ServiceUnavailableException
+from src.utils.executors import ExecutorSaturated, run_bcrypt
 
 # bcrypt 限制：密码最长 72 字节
 _BCRYPT_MAX_PASSWORD_BYTES = 72
@@ -20,7 +25,7 @@ def _hash_password_sync(password: str) -> str:
     if len(password_bytes) > _BCRYPT_MAX_PASSWORD_BYTES:
         raise ValueError("密码最多支持 72 字节（UTF-8）")
 
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode("utf-8")
 
@@ -41,22 +46,28 @@ async def hash_password(password: str) -> str:
     对密码进行哈希（异步版本）。
 
     bcrypt 是 CPU 密集型操作（默认 12 轮约 200-300ms），
-    通过 asyncio.to_thread 卸载到默认线程池，避免阻塞事件循环。
+    卸载到密码哈希专用的有界线程池，不阻塞事件循环，也不挤占其他线程池。
 
     Args:
         password: 明文密码
 
     Returns:
         哈希后的密码
+
+    Raises:
+        ServiceUnavailableException: 哈希线程池排队已满
     """
-    return await asyncio.to_thread(_hash_password_sync, password)
+    try:
+        return await run_bcrypt(_hash_password_sync, password)
+    except ExecutorSaturated:
+        raise ServiceUnavailableException("登录请求过多，请稍后重试")
 
 
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码（异步版本）。
 
-    通过 asyncio.to_thread 卸载 bcrypt 校验到线程池，避免阻塞事件循环。
+    bcrypt 校验卸载到密码哈希专用的有界线程池，排队已满时快速失败。
 
     Args:
         plain_password: 明文密码
@@ -64,8 +75,22 @@ async def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     Returns:
         是否匹配
+
+    Raises:
+        ServiceUnavailableException: 哈希线程池排队已满
     """
-    return await asyncio.to_thread(_verify_password_sync, plain_password, hashed_password)
+    try:
+        return await run_bcrypt(_verify_password_sync, plain_password, hashed_password)
+    except ExecutorSaturated:
+        raise ServiceUnavailableException("登录请求过多，请稍后重试")
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """已有哈希的 cost 是否与当前 BCRYPT_ROUNDS 不同（格式：$2b$12$...）。"""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
 
 
 def create_access_token(
@@ -131,7 +156,9 @@ def create_refresh_token(
         "username": username,
         "type": "refresh",
         "exp": expire,
-        "iat": datetime.now(timezone.utc)
+        "iat": datetime.now(timezone.utc),
+        # 同一秒内签发的两个刷新令牌也要不同（库中按摘要唯一）
+        "jti": uuid.uuid4().hex,
     }
 
     encoded_jwt = jwt.encode(
@@ -142,6 +169,11 @@ def create_refresh_token(
     return encoded_jwt
 
 
+def hash_refresh_token(token: str) -> str:
+    """刷新令牌的 SHA-256 摘要（hex，64 字符），数据库与 Redis 只保存摘要。"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def decode_token(token: str) -> Dict:
     """
     解码 JWT Token
@@ -187,3 +219,63 @@ def verify_token(token: str, token_type: str = "access") -> Dict:
         raise ValueError(f"Token 类型错误，期望 {token_type}，实际 {payload.get('type')}")
 
     return payload
+
+
+class VerifiedTokenCache:
+    """
+    已验证令牌的 LRU：sha256(token) → 载荷，到 exp 为止有效
+
+    命中时只做一次哈希和字典查找，不再重复 jose 解码与 HMAC 校验。
+    只缓存验证成功的令牌；键是令牌哈希，进程内不保存令牌原文。
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+
+    def get(self, digest: bytes) -> Optional[Dict]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return payload
+
+    def put(self, digest: bytes, payload: Dict) -> None:
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return
+        self._entries[digest] = (payload, float(expires_at))
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(settings.jwt_verified_token_cache_size)
+
+
+def verify_token_cached(token: str, token_type: str = "access") -> Dict:
+    """
+    verify_token 的缓存版本（认证依赖使用）
+
+    Raises:
+        ValueError: Token 无效、已过期或类型不匹配
+    """
+    if verified_tokens.max_entries <= 0:
+        return verify_token(token, token_type)
+
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = verified_tokens.get(digest)
+    if payload is None:
+        payload = decode_token(token)
+        verified_tokens.put(digest, payload)
+
+    if payload.get("type") != token_type:
+        raise ValueError(f"Token 类型错误，期望 {token_type}，实际 {payload.get('type')}")
+    return payload
@@ -6,12 +6,13 @@
 心跳机制：通过 SSE 注释行 (`: heartbeat`) 保持连接活跃，
 防止客户端/代理/Nginx 因空闲超时断开长连接。
 """
-import json
 import asyncio
 import logging
 from typing import AsyncGenerator, Dict, Any, TYPE_CHECKING
 from datetime import datetime, timezone
 
+from src.utils.serialization import dumps_str
+
 if TYPE_CHECKING:
     # 仅作类型标注，推迟 langgraph 导入直至图真正执行。
     from langgraph.graph.state import CompiledStateGraph
@@ -21,27 +22,150 @@ logger = logging.getLogger(__name__)
 # SSE 心跳间隔（秒）— 必须小于 Nginx proxy_read_timeout（默认 60s）
 HEARTBEAT_INTERVAL = 15
 
+HEARTBEAT_FRAME = ": heartbeat\n\n"
+
+# 共享调度器的 tick 粒度（秒）：心跳实际间隔落在 [interval, interval + tick) 内
+HEARTBEAT_TICK_SECONDS = 1.0
+
+# 时间轮槽数：覆盖 interval / tick 个 tick 即可让绝大多数连接每圈只被检查一次
+HEARTBEAT_WHEEL_SLOTS = 64
+
+
+class _HeartbeatConnection:
+    """单个 SSE 连接在调度器中的登记项。"""
+
+    __slots__ = ("queue", "interval", "last_write", "due_tick", "closed")
+
+    def __init__(self, queue: "asyncio.Queue[str | None]", interval: float, now: float):
+        self.queue = queue
+        self.interval = interval
+        self.last_write = now
+        self.due_tick = 0
+        self.closed = False
+
+
+class HeartbeatScheduler:
+    """
+    进程级共享心跳调度器（哈希时间轮）。
+
+    所有 SSE 连接共用一个周期 tick 任务，不再为每个连接的每个事件创建
+    wait_for 定时器：
+    - 连接写出真实事件时只更新 last_write（O(1)，不重新排程）
+    - 每个连接按下一次可能到期的 tick 挂在时间轮的一个槽上
+    - tick 只检查当前槽：确实空闲满 interval 的连接注入心跳，
+      其余按 last_write 惰性重排到新的槽
+    连接全部注销后 tick 任务自动退出，下次注册时重新启动。
+    """
+
+    def __init__(
+        self,
+        tick: float = HEARTBEAT_TICK_SECONDS,
+        slots: int = HEARTBEAT_WHEEL_SLOTS,
+    ):
+        self.tick = tick
+        self._wheel: list[set[_HeartbeatConnection]] = [set() for _ in range(slots)]
+        self._size = 0
+        self._current_tick = 0
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _tick_of(self, moment: float) -> int:
+        return int(-(-moment // self.tick))  # 向上取整
+
+    def _schedule(self, conn: _HeartbeatConnection, due: float) -> None:
+        conn.due_tick = max(self._tick_of(due), self._current_tick + 1)
+        self._wheel[conn.due_tick % len(self._wheel)].add(conn)
+
+    def register(
+        self,
+        queue: "asyncio.Queue[str | None]",
+        interval: float,
+    ) -> _HeartbeatConnection:
+        """登记一个连接；调度器需要心跳时向 queue 放入 HEARTBEAT_FRAME。"""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            if self._task is not None and self._task.get_loop() is not loop:
+                # 事件循环已更换（如测试之间），旧循环上的登记项不再有效
+                self._wheel = [set() for _ in self._wheel]
+                self._size = 0
+            self._current_tick = self._tick_of(now)
+            self._task = loop.create_task(self._run())
+        conn = _HeartbeatConnection(queue, interval, now)
+        self._schedule(conn, now + interval)
+        self._size += 1
+        return conn
+
+    def unregister(self, conn: _HeartbeatConnection) -> None:
+        if conn.closed:
+            return
+        conn.closed = True
+        self._wheel[conn.due_tick % len(self._wheel)].discard(conn)
+        self._size -= 1
+
+    @staticmethod
+    def touch(conn: _HeartbeatConnection) -> None:
+        """记录一次真实写出。"""
+        conn.last_write = asyncio.get_running_loop().time()
+
+    def _advance(self, now: float) -> None:
+        """处理截至 now 的所有 tick（事件循环卡顿时补跑漏掉的 tick）。"""
+        target = self._tick_of(now)
+        while self._current_tick < target:
+            self._current_tick += 1
+            slot = self._wheel[self._current_tick % len(self._wheel)]
+            due = [conn for conn in slot if conn.due_tick <= self._current_tick]
+            for conn in due:
+                slot.discard(conn)
+                idle_until = conn.last_write + conn.interval
+                if idle_until <= now:
+                    conn.queue.put_nowait(HEARTBEAT_FRAME)
+                    conn.last_write = now
+                    idle_until = now + conn.interval
+                self._schedule(conn, idle_until)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._size > 0:
+            await asyncio.sleep(self.tick)
+            self._advance(loop.time())
+
+
+_heartbeat_scheduler = HeartbeatScheduler()
+
+
+def get_heartbeat_scheduler() -> HeartbeatScheduler:
+    """返回进程级共享心跳调度器。"""
+    return _heartbeat_scheduler
+
 
 async def stream_with_heartbeat(
     event_gen: AsyncGenerator[str, None],
     interval: float = HEARTBEAT_INTERVAL,
+    *,
+    scheduler: HeartbeatScheduler | None = None,
 ) -> AsyncGenerator[str, None]:
     """
     为异步事件生成器添加心跳保活。
 
-    使用 asyncio.Queue + 后台生产者模式：
-    - 生产者从 event_gen 读取真实事件放入队列
-    - 消费者从队列读取，超时时发送 SSE 注释心跳
+    生产者任务把真实事件放入连接自己的队列，共享 HeartbeatScheduler 在连接
+    空闲满 interval 时向同一队列注入心跳；消费者只做无超时的 queue.get()，
+    每个事件不再创建/取消定时器。
 
     SSE 注释格式 `: heartbeat\\n\\n` 符合规范，客户端应忽略。
 
     Args:
         event_gen: 原始 SSE 事件异步生成器
-        interval: 心跳间隔秒数
+        interval: 心跳间隔秒数（精度为调度器 tick）
+        scheduler: 可选的调度器实例，默认使用进程级共享调度器
 
     Yields:
         SSE 事件字符串（真实事件或心跳注释）
     """
+    if scheduler is None:
+        scheduler = _heartbeat_scheduler
     queue: asyncio.Queue[str | None] = asyncio.Queue()
 
     async def _producer():
@@ -58,19 +182,19 @@ async def stream_with_heartbeat(
         finally:
             await queue.put(None)  # 哨兵值，标记流结束
 
+    conn = scheduler.register(queue, interval)
     producer_task = asyncio.create_task(_producer())
 
     try:
         while True:
-            try:
-                item = await asyncio.wait_for(queue.get(), timeout=interval)
-                if item is None:
-                    break
-                yield item
-            except asyncio.TimeoutError:
-                # 超时未收到事件 → 发送心跳保活
-                yield ": heartbeat\n\n"
+            item = await queue.get()
+            if item is None:
+                break
+            if item != HEARTBEAT_FRAME:
+                scheduler.touch(conn)
+            yield item
     finally:
+        scheduler.unregister(conn)
         producer_task.cancel()
         try:
             await producer_task
@@ -146,19 +270,7 @@ def create_sse_event(data: Dict[str, Any]) -> str:
         SSE 格式字符串（"data: {json}\\n\\n"）
     """
     logger.debug("create_sse_event: %s", data)
-    json_str = json.dumps(data, ensure_ascii=False, default=_json_default)
-    return f"data: {json_str}\n\n"
-
-
-def _json_default(obj):
-    """json.dumps 的 default 处理器：兜底序列化 Pydantic 模型和其他非标准类型"""
-    if hasattr(obj, "model_dump"):
-        return obj.model_dump()
-    if hasattr(obj, "dict"):
-        return obj.dict()
-    if hasattr(obj, "__dict__"):
-        return obj.__dict__
-    return str(obj)
+    return f"data: {dumps_str(data)}\n\n"
 
 
 def _serialize_output(output: Any) -> Any:
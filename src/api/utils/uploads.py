@@ -0,0 +1,228 @@
+"""
+流式图片上传
+
+原先头像上传由 FastAPI 先把整个 multipart 请求体解析进 SpooledTemporaryFile，
+路由再 await file.read() 读出全部字节后才检查大小，最后整块交给 MinIO。
+这里直接按块解析请求体（python-multipart 的推式解析器）：
+- 文件字段的前几个字节到达后立即按魔数判断真实类型（JPEG / PNG / WebP），
+  不信任客户端声明的 Content-Type 与扩展名
+- 边读边累计大小，超过上限立即中止；Content-Length 已经超限的请求不读请求体
+- 数据块以异步迭代器交给 MinioManager.aupload_stream，不在内存中拼出完整文件
+
+校验失败抛 HTTPException（400，code 5002 类型不支持 / 5003 超过大小），
+与原先路由内的校验保持相同的错误码；请求体不是合法的 multipart、字段为空或不是文件
+同样按 5002 返回。
+"""
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from fastapi import HTTPException, status
+from python_multipart import MultipartParser
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import parse_options_header
+from starlette.requests import Request
+
+AVATAR_MAX_BYTES = 2 * 1024 * 1024
+
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+}
+
+# 识别 WebP 需要前 12 字节（RIFF????WEBP）
+_SNIFF_BYTES = 12
+
+# 手动解析请求体后 FastAPI 不再生成表单参数，在 OpenAPI 中补上文件字段
+IMAGE_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary", "description": "头像文件"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """按文件头魔数识别图片类型，无法识别返回 None。"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _bad_request(code: int, message: str, detail: Optional[str]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail={"code": code, "message": message, "detail": detail},
+    )
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return _bad_request(5003, "文件大小超过限制", f"最大支持 {max_size // (1024 * 1024)}MB")
+
+
+class MultipartImageUpload:
+    """
+    从 multipart/form-data 请求体中流式读取单个图片字段
+
+    用法：
+        upload = MultipartImageUpload(request, max_size=AVATAR_MAX_BYTES)
+        await upload.open()                  # 读到文件头并校验类型
+        await storage.aupload_stream(name, upload.chunks(), upload.content_type)
+    """
+
+    def __init__(self, request: Request, max_size: int, field_name: str = "file"):
+        self.max_size = max_size
+        self.field_name = field_name.encode("utf-8")
+        self.filename: Optional[str] = None
+        self.declared_type: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+
+        mimetype, params = parse_options_header(request.headers.get("content-type", ""))
+        if mimetype != b"multipart/form-data" or b"boundary" not in params:
+            raise _bad_request(5002, "请使用 multipart/form-data 上传文件", None)
+        content_length = request.headers.get("content-length")
+        # 请求体还包含边界与字段头，留出余量
+        if content_length and content_length.isdigit() and int(content_length) > max_size + 16 * 1024:
+            raise _too_large(max_size)
+
+        self._body = request.stream().__aiter__()
+        self._body_done = False
+        self._ready: Deque[bytes] = deque()
+        self._head = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._found = False
+        self._is_file = False
+        self._in_target = False
+        self._target_done = False
+        self._parser = MultipartParser(
+            params[b"boundary"],
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    # ──────────── 解析器回调（同步，在 parser.write 内触发） ────────────
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if not self._found and options.get(b"name") == self.field_name:
+            self._found = True
+            self._is_file = b"filename" in options
+            self._in_target = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", "replace")
+            self.declared_type = self._headers.get(b"content-type", b"").decode("latin-1")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_target and end > start:
+            self._ready.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._in_target:
+            self._in_target = False
+            self._target_done = True
+
+    # ──────────── 读取 ────────────
+
+    def _write(self, body_chunk: bytes) -> None:
+        try:
+            self._parser.write(body_chunk)
+        except MultipartParseError as exc:
+            raise _bad_request(5002, "请求体不是合法的 multipart/form-data", str(exc)) from exc
+
+    def _finalize(self) -> None:
+        try:
+            self._parser.finalize()
+        except MultipartParseError as exc:
+            raise _bad_request(5002, "请求体不是合法的 multipart/form-data", str(exc)) from exc
+
+    async def _next_chunk(self) -> Optional[bytes]:
+        """文件字段的下一块数据；字段结束返回 None。"""
+        while not self._ready:
+            if self._target_done or self._body_done:
+                return None
+            try:
+                body_chunk = await self._body.__anext__()
+            except StopAsyncIteration:
+                self._body_done = True
+                self._finalize()
+                continue
+            if body_chunk:
+                self._write(body_chunk)
+        chunk = self._ready.popleft()
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise _too_large(self.max_size)
+        return chunk
+
+    async def open(self) -> None:
+        """读取文件头并按魔数校验类型。"""
+        head = b""
+        while len(head) < _SNIFF_BYTES:
+            chunk = await self._next_chunk()
+            if chunk is None:
+                break
+            head += chunk
+        if not self._found:
+            raise _bad_request(5002, "未找到上传文件", f"缺少表单字段: {self.field_name.decode()}")
+        if not self._is_file:
+            raise _bad_request(5002, "未找到上传文件", f"表单字段不是文件: {self.field_name.decode()}")
+        if not head:
+            raise _bad_request(5002, "上传文件为空", None)
+
+        self.content_type = sniff_image_type(head)
+        if self.content_type is None:
+            raise _bad_request(
+                5002,
+                f"不支持的文件类型: {self.declared_type or 'unknown'}",
+                f"支持的类型: {', '.join(IMAGE_EXTENSIONS)}",
+            )
+        self._head = head
+
+    @property
+    def extension(self) -> str:
+        return IMAGE_EXTENSIONS[self.content_type]
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """文件内容（含 open() 已读取的文件头），超过大小上限时抛出 5003。"""
+        if self._head:
+            yield self._head
+        while True:
+            chunk = await self._next_chunk()
+            if chunk is None:
+                return
+            yield chunk
@@ -4,12 +4,16 @@
 """
 from datetime import datetime, date as date_type
 from typing import Optional
-from sqlalchemy import String, Boolean, DateTime, Text, Integer, ForeignKey, JSON, Numeric, Date, Index, UniqueConstraint
+from sqlalchemy import String, Boolean, DateTime, Text, Integer, ForeignKey, JSON, Numeric, Date, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from src.db.session import Base
 
+# 大 JSON 文档：PostgreSQL 下用 JSONB（二进制存储、TOAST 压缩），其他方言（测试用 SQLite）退回 JSON
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 
 class User(Base):
     """用户表"""
@@ -70,9 +74,11 @@ class Task(Base):
     # 进度信息
     progress: Mapped[int] = mapped_column(Integer, default=0)
     current_node: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
-    # 输入输出
-    input_data: Mapped[dict] = mapped_column(JSON, nullable=False)
-    output_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # 输入输出：延迟加载，列表/状态查询不读取；未显式 undefer 时访问直接报错，避免隐式懒加载
+    input_data: Mapped[dict] = mapped_column(JSONDocument, nullable=False, deferred=True, deferred_raiseload=True)
+    output_data: Mapped[Optional[dict]] = mapped_column(
+        JSONDocument, nullable=True, deferred=True, deferred_raiseload=True
+    )
     # 错误信息
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     # 时间信息
@@ -85,6 +91,11 @@ class Task(Base):
         onupdate=func.now()
     )
 
+    # 索引（列表页 keyset 分页）
+    __table_args__ = (
+        Index("idx_task_user_created", "user_id", "created_at", "id"),
+    )
+
     # 关系
     user: Mapped["User"] = relationship("User", back_populates="tasks")
 
@@ -147,7 +158,12 @@ class Pet(Base):
 
 
 class MealRecord(Base):
-    """餐食记录表"""
+    """
+    餐食记录表
+
+    PostgreSQL 上由迁移 b8c9d0e1f2a3 改为按 meal_date 月度分区，数据库主键为 (id, meal_date)，
+    分区维护见 src/db/partitions.py；ORM 仍以 id 作为标识。
+    """
     __tablename__ = "meal_records"
     id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
     pet_id: Mapped[str] = mapped_column(String(36), ForeignKey("pets.id"), nullable=False, index=True)
@@ -159,8 +175,13 @@ class MealRecord(Base):
     food_name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     calories: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    # 营养信息（JSON 存储，兼容 PetDietPlan 结构）
-    nutrition_data: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    # 营养详情：新记录引用按内容去重的 meal_templates；nutrition_data 仅旧数据内联
+    template_id: Mapped[Optional[str]] = mapped_column(
+        String(64), ForeignKey("meal_templates.id"), nullable=True, index=True
+    )
+    nutrition_data: Mapped[Optional[dict]] = mapped_column(
+        JSONDocument, nullable=True, deferred=True, deferred_raiseload=True
+    )
     # 营养顶级字段（提升查询效率，兼容旧数据 fallback 到 JSON）
     protein: Mapped[Optional[float]] = mapped_column(Numeric(8, 2), nullable=True)
     fat: Mapped[Optional[float]] = mapped_column(Numeric(8, 2), nullable=True)
@@ -183,10 +204,34 @@ class MealRecord(Base):
         Index("idx_pet_date", "pet_id", "meal_date"),
         Index("idx_pet_completed", "pet_id", "is_completed"),
         Index("idx_meal_type", "meal_type"),
+        Index("idx_meal_pet_history", "pet_id", "meal_date", "meal_order", "id"),
+        # 每只宠物每天每个餐次至多一行（虚拟餐食并发落库靠它去重）
+        Index("uq_meal_pet_date_order", "pet_id", "meal_date", "meal_order", unique=True),
     )
 
     # 关系
     pet: Mapped["Pet"] = relationship("Pet", back_populates="meal_records")
+    # 详情接口通过 selectinload 批量加载，其他路径访问即报错，避免隐式逐行查询
+    template: Mapped[Optional["MealTemplate"]] = relationship("MealTemplate", lazy="raise")
+
+
+class MealRecordArchive(Base):
+    """餐食记录归档表：已导出为 Parquet 并从 meal_records 分区表摘除的月份"""
+    __tablename__ = "meal_record_archives"
+    month: Mapped[date_type] = mapped_column(Date, primary_key=True)  # 月初日期
+    object_name: Mapped[str] = mapped_column(String(255), nullable=False)  # 空月份为空串
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class MealTemplate(Base):
+    """餐食模板表：单餐营养详情（食材、营养素汇总、做法、推荐理由），按内容哈希去重"""
+    __tablename__ = "meal_templates"
+    # 规范化 JSON（键排序、紧凑分隔符）的 sha256
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    payload: Mapped[dict] = mapped_column(JSONDocument, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class DietPlan(Base):
@@ -204,7 +249,7 @@ class DietPlan(Base):
     pet_weight: Mapped[int] = mapped_column(Integer)
     health_status: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     # 饮食计划（完整的 JSON 数据，存储 PetDietPlan 结构）
-    plan_data: Mapped[dict] = mapped_column(JSON, nullable=False)
+    plan_data: Mapped[dict] = mapped_column(JSONDocument, nullable=False, deferred=True, deferred_raiseload=True)
     # 计划应用状态
     is_active: Mapped[bool] = mapped_column(Boolean, default=False, server_default="false")
     applied_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -224,17 +269,18 @@ class DietPlan(Base):
     # 索引
     __table_args__ = (
         Index("idx_pet_active_plan", "pet_id", "is_active"),
+        Index("idx_plan_user_created", "user_id", "created_at", "id"),
     )
 
 
 class RefreshToken(Base):
-    """刷新令牌表（用于 Token 黑名单）"""
+    """刷新令牌表（用于 Token 黑名单）；只保存令牌的 SHA-256 摘要，不保存 JWT 原文"""
     __tablename__ = "refresh_tokens"
     id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False, index=True)
-    token: Mapped[str] = mapped_column(String(500), unique=True, nullable=False, index=True)
-    is_revoked: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    is_revoked: Mapped[bool] = mapped_column(Boolean, default=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -329,6 +375,7 @@ class Ingredient(Base):
     __table_args__ = (
         Index("idx_ingredient_category", "category", "sub_category"),
         Index("idx_ingredient_owner", "user_id", "is_system"),
+        Index("idx_ingredient_listing", text("is_system DESC"), "category", "name", "id"),
         UniqueConstraint("user_id", "name", name="uq_ingredient_user_name"),
     )
 
@@ -420,6 +467,7 @@ class TodoItem(Base):
     __table_args__ = (
         Index("idx_todo_user_date", "user_id", "due_date"),
         Index("idx_todo_pet", "pet_id"),
+        Index("idx_todo_user_order", "user_id", "due_date", "is_completed", "created_at", "id"),
     )
 
     # 关系
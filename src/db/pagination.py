@@ -0,0 +1,221 @@
+"""
+列表分页：keyset 游标 + 可选近似总数
+
+OFFSET 分页需要扫描并丢弃前面所有行，count(*) 需要扫描全部匹配行，
+两者的代价都随页深和表大小线性增长。这里提供：
+- keyset 游标：按 (排序键..., id) 记住上一页最后一行，下一页直接 WHERE 定位，
+  配合同序的复合索引，每页代价与页深无关
+- 近似总数：PostgreSQL 下读取规划器估算行数（EXPLAIN），不扫描数据；
+  估算值较小或非 PostgreSQL 时退回精确 count
+- 兼容 OFFSET：未传游标时仍按 offset 翻页，同时返回 next_cursor 便于客户端切换
+
+游标是不透明字符串（base64url JSON），只携带排序键取值。
+"""
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, List, Literal, Optional, Sequence
+
+from sqlalchemy import Select, and_, func, literal, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+logger = logging.getLogger(__name__)
+
+TotalMode = Literal["exact", "approx", "none"]
+
+# 规划器估算低于该值时改用精确 count（小结果集精确计数本身就便宜，且估算误差相对更大）
+APPROX_COUNT_EXACT_BELOW = 1000
+
+
+class InvalidCursorError(ValueError):
+    """游标无法解析或与排序键不匹配。"""
+
+
+@dataclass(frozen=True)
+class KeyColumn:
+    """排序键中的一列。"""
+
+    column: Any
+    descending: bool = False
+
+    @property
+    def ordering(self):
+        return self.column.desc() if self.descending else self.column.asc()
+
+
+@dataclass
+class Page:
+    """一页结果。"""
+
+    items: List[Any]
+    total: Optional[int] = None
+    total_approximate: bool = False
+    next_cursor: Optional[str] = None
+
+
+# ──────────────────────────── 游标编解码 ────────────────────────────
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value: Any, column) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is bool:
+        return bool(value)
+    return python_type(value)
+
+
+def encode_cursor(row: Any, keys: Sequence[KeyColumn]) -> str:
+    """把一行的排序键取值编码为游标。"""
+    values = [_encode_value(getattr(row, key.column.key)) for key in keys]
+    raw = json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[KeyColumn]) -> list:
+    """解析游标为排序键取值列表。"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise InvalidCursorError("游标与排序键不匹配")
+        return [_decode_value(value, key.column) for value, key in zip(values, keys)]
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, TypeError, ValueError) as exc:
+        raise InvalidCursorError("无效的分页游标") from exc
+
+
+# ──────────────────────────── keyset 条件 ────────────────────────────
+
+def keyset_condition(keys: Sequence[KeyColumn], values: Sequence[Any]):
+    """
+    构造"排在游标之后"的条件
+
+    所有键同向时使用行值比较 (a, b) < (x, y)，可直接走复合索引；
+    混合方向时展开为 (a > x) OR (a = x AND b > y) ...
+    """
+    # 显式绑定为参数：布尔列不能直接与 True/False 做大小比较
+    values = [literal(value, key.column.type) for value, key in zip(values, keys)]
+    if len({key.descending for key in keys}) == 1:
+        left = tuple_(*(key.column for key in keys))
+        right = tuple_(*values)
+        return left < right if keys[0].descending else left > right
+
+    clauses = []
+    for i, key in enumerate(keys):
+        prefix = [keys[j].column == values[j] for j in range(i)]
+        step = key.column < values[i] if key.descending else key.column > values[i]
+        clauses.append(and_(*prefix, step))
+    return or_(*clauses)
+
+
+# ──────────────────────────── 总数 ────────────────────────────
+
+class _ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) <stmt>，仅 PostgreSQL。"""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJson, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def _planner_estimate(db: AsyncSession, stmt: Select) -> Optional[int]:
+    """读取规划器对 stmt 的行数估算，失败返回 None。"""
+    try:
+        plan = (await db.execute(_ExplainJson(stmt))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as exc:
+        logger.debug("规划器行数估算失败，回退精确计数: %s", exc)
+        return None
+
+
+async def count_rows(db: AsyncSession, stmt: Select, mode: TotalMode = "exact") -> tuple[Optional[int], bool]:
+    """
+    统计 stmt 的结果行数
+
+    Returns:
+        (总数, 是否近似)；mode="none" 时返回 (None, False)
+    """
+    if mode == "none":
+        return None, False
+    if mode == "approx" and db.bind.dialect.name == "postgresql":
+        estimate = await _planner_estimate(db, stmt)
+        if estimate is not None and estimate >= APPROX_COUNT_EXACT_BELOW:
+            return estimate, True
+    # 直接把投影换成 count(*)，不经子查询，避免把整行（含大字段）物化一遍
+    count_stmt = stmt.with_only_columns(func.count(), maintain_column_froms=True).order_by(None)
+    total = (await db.execute(count_stmt)).scalar() or 0
+    return total, False
+
+
+# ──────────────────────────── 分页 ────────────────────────────
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[KeyColumn],
+    *,
+    limit: Optional[int],
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = "exact",
+) -> Page:
+    """
+    对只含筛选条件的 select(Model) 分页
+
+    Args:
+        stmt: 只含 WHERE 的查询（排序由 keys 决定，最后一个键应唯一，通常为 id）
+        keys: 排序键
+        limit: 每页大小；None 表示不分页
+        offset: 兼容旧接口的偏移量（传入 cursor 时忽略）
+        cursor: 上一页返回的 next_cursor
+        total_mode: exact 精确计数 / approx 规划器估算 / none 不计数
+
+    Raises:
+        InvalidCursorError: 游标无效
+    """
+    total, approximate = await count_rows(db, stmt, total_mode)
+
+    page_stmt = stmt
+    if cursor:
+        page_stmt = page_stmt.where(keyset_condition(keys, decode_cursor(cursor, keys)))
+    elif offset:
+        page_stmt = page_stmt.offset(offset)
+    page_stmt = page_stmt.order_by(*(key.ordering for key in keys))
+    if limit is not None:
+        # 多取一行判断是否还有下一页
+        page_stmt = page_stmt.limit(limit + 1)
+
+    rows = list((await db.execute(page_stmt)).scalars().all())
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], keys)
+
+    return Page(items=rows, total=total, total_approximate=approximate, next_cursor=next_cursor)
@@ -0,0 +1,145 @@
+"""
+meal_records 按月分区维护（仅 PostgreSQL）
+
+meal_records 在迁移 b8c9d0e1f2a3 后是按 meal_date RANGE 分区的父表：
+- 每月一个分区 meal_records_pYYYYMM，另有 meal_records_default 兜底
+- 应用启动和归档任务都会调用 ensure_meal_partitions()，提前建好未来几个月的分区
+- 归档任务把旧分区导出到对象存储后 DETACH 并删除（见 services/meal_archive.py）
+
+非 PostgreSQL（测试用 SQLite）或尚未迁移为分区表时，所有函数都是空操作。
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+MEAL_RECORDS_TABLE = "meal_records"
+DEFAULT_PARTITION = "meal_records_default"
+
+_PARTITION_NAME_RE = re.compile(r"^meal_records_p(\d{4})(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    """所在月份的第一天。"""
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """月初日期加减若干个月。"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """月份分区表名：meal_records_pYYYYMM。"""
+    return f"{MEAL_RECORDS_TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """从分区表名解析月份，非月份分区返回 None。"""
+    match = _PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+@dataclass(frozen=True)
+class MealPartition:
+    """一个月份分区。"""
+
+    name: str
+    month: date
+
+    @property
+    def upper_bound(self) -> date:
+        return add_months(self.month, 1)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    """meal_records 是否已是分区父表。"""
+    if conn.dialect.name != "postgresql":
+        return False
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind = 'p'"),
+        {"name": MEAL_RECORDS_TABLE},
+    )
+    return result.scalar() is not None
+
+
+async def list_meal_partitions(conn: AsyncConnection) -> list[MealPartition]:
+    """当前挂在 meal_records 下的月份分区（按月份升序，不含 default）。"""
+    if not await is_partitioned(conn):
+        return []
+    result = await conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :name
+            """
+        ),
+        {"name": MEAL_RECORDS_TABLE},
+    )
+    partitions = []
+    for name in result.scalars().all():
+        month = partition_month(name)
+        if month is not None:
+            partitions.append(MealPartition(name=name, month=month))
+    return sorted(partitions, key=lambda partition: partition.month)
+
+
+async def create_meal_partition(conn: AsyncConnection, month: date) -> str:
+    """创建（若不存在）某个月的分区。"""
+    name = partition_name(month)
+    await conn.execute(
+        text(
+            f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {MEAL_RECORDS_TABLE} '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+    )
+    return name
+
+
+async def ensure_meal_partitions(
+    conn: AsyncConnection,
+    months_ahead: int,
+    today: Optional[date] = None,
+) -> list[str]:
+    """
+    确保本月及之后 months_ahead 个月的分区存在
+
+    Returns:
+        本次新建的分区名
+    """
+    if not await is_partitioned(conn):
+        return []
+    existing = {partition.name for partition in await list_meal_partitions(conn)}
+    current = month_start(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if partition_name(month) in existing:
+            continue
+        try:
+            # default 分区里已有该月数据时建分区会失败，单独回滚这一步即可
+            async with conn.begin_nested():
+                created.append(await create_meal_partition(conn, month))
+        except Exception as exc:
+            logger.warning("创建 meal_records 分区 %s 失败: %s", partition_name(month), exc)
+    if created:
+        logger.info("已创建 meal_records 分区: %s", ", ".join(created))
+    return created
+
+
+async def detach_meal_partition(conn: AsyncConnection, partition: MealPartition) -> None:
+    """从父表摘下并删除分区（调用方须先确认数据已归档）。"""
+    await conn.execute(text(f'ALTER TABLE {MEAL_RECORDS_TABLE} DETACH PARTITION "{partition.name}"'))
+    await conn.execute(text(f'DROP TABLE "{partition.name}"'))
@@ -0,0 +1,97 @@
+"""
+共享 psycopg3 异步连接池
+
+LangGraph checkpointer 与 agent 工具查询共用同一个池，尺寸取自连接预算的 agent 份额。
+- 连接参数满足 AsyncPostgresSaver 要求：autocommit + dict_row + 关闭服务端预备语句
+- 首次使用时惰性打开；FastAPI lifespan 退出时调用 close_pg_pool()
+- 非 PostgreSQL 数据库（如测试用 sqlite）时不可用
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from src.api.config import settings
+from src.db.pool_budget import pool_size, register_pool, unregister_pool
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[AsyncConnectionPool] = None
+_open_lock: Optional[asyncio.Lock] = None
+
+
+def resolve_postgres_dsn() -> Optional[str]:
+    """
+    从 settings.database_url 推导 psycopg 可识别的 DSN
+
+    移除 SQLAlchemy 方言后缀（+asyncpg / +psycopg2 / +psycopg）；
+    非 PostgreSQL 返回 None。
+    """
+    dsn = settings.database_url
+    for driver in ("+asyncpg", "+psycopg2", "+psycopg"):
+        dsn = dsn.replace(driver, "")
+
+    if not dsn.lower().startswith(("postgres://", "postgresql://")):
+        return None
+    return dsn
+
+
+def _pool_usage() -> dict:
+    """psycopg 连接池用量。"""
+    if _pool is None:
+        return {"size": 0, "checked_out": 0, "waiting": 0}
+    stats = _pool.get_stats()
+    size = stats.get("pool_size", 0)
+    return {
+        "size": size,
+        "checked_out": size - stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+    }
+
+
+async def get_pg_pool() -> AsyncConnectionPool:
+    """
+    获取（必要时打开）共享连接池
+
+    Raises:
+        RuntimeError: 当前数据库不是 PostgreSQL
+    """
+    global _pool, _open_lock
+    if _pool is not None:
+        return _pool
+
+    if _open_lock is None:
+        _open_lock = asyncio.Lock()
+    async with _open_lock:
+        if _pool is not None:
+            return _pool
+
+        dsn = resolve_postgres_dsn()
+        if not dsn:
+            raise RuntimeError("共享连接池仅支持 PostgreSQL")
+
+        size = pool_size("agent")
+        pool = AsyncConnectionPool(
+            conninfo=dsn,
+            min_size=size.min_size,
+            max_size=size.max_size,
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        await pool.open()
+        _pool = pool
+        register_pool("agent", _pool_usage)
+        logger.info("共享 psycopg 连接池已打开 (min=%d, max=%d)", size.min_size, size.max_size)
+    return _pool
+
+
+async def close_pg_pool() -> None:
+    """关闭共享连接池。"""
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    unregister_pool("agent")
+    await pool.close()
@@ -0,0 +1,87 @@
+"""
+Postgres 连接预算
+
+每个节点的连接上限（db_connection_budget）扣除运维预留后按 worker 数均分，
+再按权重分给本进程内的各个连接池消费方：
+- api：SQLAlchemy asyncpg 引擎（请求处理、后台任务写库）
+- agent：psycopg3 异步池（LangGraph checkpointer 与 agent 工具查询共用）
+
+所有 worker 的池上限之和不超过预算，扩容 worker 时池自动收缩，
+不会再出现 "worker 数 × 三套独立池" 撑爆 max_connections 的情况。
+
+各连接池创建后调用 register_pool() 登记用量探针，/health/detail 通过
+pool_usage() 汇总展示。
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict
+
+from src.api.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 每个消费方至少保留的连接数，预算过小时仍保证可用
+MIN_POOL_SIZE = 2
+
+
+@dataclass(frozen=True)
+class PoolSize:
+    """单个连接池的尺寸。"""
+
+    # 常驻连接数（SQLAlchemy pool_size / psycopg min_size）
+    min_size: int
+    # 连接数上限（SQLAlchemy pool_size + max_overflow / psycopg max_size）
+    max_size: int
+
+    @property
+    def overflow(self) -> int:
+        return self.max_size - self.min_size
+
+
+def worker_budget() -> int:
+    """当前 worker 可用的连接总数。"""
+    usable = settings.db_connection_budget - settings.db_reserved_connections
+    workers = max(1, settings.api_workers)
+    return max(MIN_POOL_SIZE * len(settings.db_pool_weights), usable // workers)
+
+
+def pool_size(consumer: str) -> PoolSize:
+    """
+    按权重计算指定消费方的连接池尺寸
+
+    常驻连接取上限的一半，其余作为溢出连接按需创建、空闲回收。
+    """
+    weights = settings.db_pool_weights
+    if consumer not in weights:
+        raise KeyError(f"未配置连接预算权重的消费方: {consumer}")
+    share = weights[consumer] / sum(weights.values())
+    max_size = max(MIN_POOL_SIZE, int(worker_budget() * share))
+    return PoolSize(min_size=max(1, max_size // 2), max_size=max_size)
+
+
+# 消费方 → 用量探针
+_usage_probes: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_pool(consumer: str, probe: Callable[[], Dict[str, Any]]) -> None:
+    """登记连接池用量探针（重复登记以最后一次为准）。"""
+    _usage_probes[consumer] = probe
+
+
+def unregister_pool(consumer: str) -> None:
+    """连接池关闭后注销探针。"""
+    _usage_probes.pop(consumer, None)
+
+
+def pool_usage() -> Dict[str, Dict[str, Any]]:
+    """各消费方连接池的实时用量。"""
+    usage = {}
+    for consumer, probe in _usage_probes.items():
+        limit = pool_size(consumer).max_size if consumer in settings.db_pool_weights else None
+        try:
+            stats = probe()
+        except Exception as exc:
+            logger.debug("连接池用量采集失败 %s: %s", consumer, exc)
+            stats = {"error": str(exc)}
+        usage[consumer] = {"limit": limit, **stats}
+    return usage
@@ -0,0 +1,99 @@
+"""
+SQL 查询计数与 N+1 检测
+
+在 SQLAlchemy Engine 上挂 before/after_cursor_execute 钩子，把每条语句的
+耗时记到当前上下文的 QueryStats 里：
+- 请求级：QueryStatsMiddleware 为每个请求开启统计，结束时检查重复语句
+- 测试级：tests/conftest.py 的 query_budget fixture 断言某段代码的查询次数
+
+统计对象通过 ContextVar 传递，嵌套统计时子统计的记录同时计入父统计，
+因此测试里的 query_budget 能看到中间件内部执行的查询。
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("db_query_stats", default=None)
+
+# 把展开后的 IN 列表、多行 VALUES 归一化，避免参数个数不同被当成不同语句
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """语句形状：参数已经是占位符，只需归一化 IN 列表和空白。"""
+    shape = _IN_LIST_RE.sub("IN (...)", statement)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryStats:
+    """一段执行范围内的查询次数、耗时与语句形状分布。"""
+
+    count: int = 0
+    total_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    parent: Optional["QueryStats"] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        stats: Optional[QueryStats] = self
+        shape = statement_shape(statement)
+        while stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+            stats.shapes[shape] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """执行次数达到 threshold 的语句形状（按次数降序）。"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """在当前上下文内统计 SQL 查询。"""
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """当前上下文的统计对象，未开启统计时返回 None。"""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start_time")
+    elapsed = time.perf_counter() - starts.pop() if starts else 0.0
+    stats.record(statement, elapsed)
+
+
+_installed = False
+
+
+def install_query_hooks() -> None:
+    """在所有 Engine（含副本、测试引擎）上注册计数钩子，重复调用无副作用。"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
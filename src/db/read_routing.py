@@ -0,0 +1,126 @@
+"""
+读写分离路由
+
+标记为只读的接口通过 get_read_db() 取会话，按以下顺序决定走副本还是主库：
+1. 未配置副本（database_replica_url 为空）→ 主库
+2. 该用户在 read-your-writes 窗口内写过库 → 主库，避免读到自己刚写入之前的旧数据
+3. 副本复制延迟超过阈值或探测失败 → 主库
+4. 其余 → 副本
+
+写入标记存 Redis（跨 worker 生效），Redis 不可用时按"刚写过"处理，宁可多读主库。
+副本延迟按固定间隔探测并缓存，不在每个请求上额外查询。
+"""
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.api.config import settings
+from src.db.redis import get_redis
+from src.db.redis_keys import recent_write_key
+from src.db.session import AsyncSessionLocal, ReplicaSessionLocal, replica_engine
+
+logger = logging.getLogger(__name__)
+
+# 已追平（接收与回放 LSN 相同）时延迟为 0；
+# 非 recovery 状态（例如本地用两个独立实例测试）同样视为 0
+_REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaLagMonitor:
+    """副本延迟探测（结果缓存 check_interval 秒，并发请求共享同一次探测）。"""
+
+    def __init__(self, engine, max_lag: float, check_interval: float):
+        self._engine = engine
+        self._max_lag = max_lag
+        self._check_interval = check_interval
+        self._checked_at = float("-inf")
+        self._lag: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def lag(self) -> Optional[float]:
+        """最近一次探测到的延迟（秒），探测失败为 None。"""
+        return self._lag
+
+    async def _probe(self) -> Optional[float]:
+        try:
+            async with self._engine.connect() as conn:
+                return float((await conn.execute(_REPLICA_LAG_SQL)).scalar() or 0)
+        except Exception as exc:
+            logger.warning("副本延迟探测失败，只读请求回退主库: %s", exc)
+            return None
+
+    async def is_healthy(self) -> bool:
+        """副本可用且延迟在阈值内。"""
+        if time.monotonic() - self._checked_at >= self._check_interval:
+            async with self._lock:
+                if time.monotonic() - self._checked_at >= self._check_interval:
+                    self._lag = await self._probe()
+                    self._checked_at = time.monotonic()
+        return self._lag is not None and self._lag <= self._max_lag
+
+
+replica_monitor: Optional[ReplicaLagMonitor] = (
+    ReplicaLagMonitor(
+        replica_engine,
+        max_lag=settings.db_replica_max_lag_seconds,
+        check_interval=settings.db_replica_lag_check_interval,
+    )
+    if replica_engine is not None
+    else None
+)
+
+
+async def mark_recent_write(user_id: str) -> None:
+    """记录用户刚写过库，窗口内的只读请求走主库。"""
+    if replica_monitor is None or not user_id:
+        return
+    try:
+        client = await get_redis()
+        await client.set(recent_write_key(user_id), "1", ex=settings.db_read_your_writes_seconds)
+    except Exception as exc:
+        logger.warning("写入标记失败 user=%s: %s", user_id, exc)
+
+
+async def has_recent_write(user_id: str) -> bool:
+    """用户是否在 read-your-writes 窗口内写过库（Redis 不可用时返回 True）。"""
+    try:
+        client = await get_redis()
+        return bool(await client.exists(recent_write_key(user_id)))
+    except Exception as exc:
+        logger.debug("读取写入标记失败，按刚写入处理 user=%s: %s", user_id, exc)
+        return True
+
+
+async def choose_read_sessionmaker(user_id: Optional[str]) -> async_sessionmaker:
+    """为只读请求选择会话工厂。"""
+    if replica_monitor is None:
+        return AsyncSessionLocal
+    if user_id and await has_recent_write(user_id):
+        return AsyncSessionLocal
+    if not await replica_monitor.is_healthy():
+        return AsyncSessionLocal
+    return ReplicaSessionLocal
+
+
+async def get_read_db(user_id: Optional[str]) -> AsyncGenerator[AsyncSession, None]:
+    """提供只读会话（副本或主库），不提交事务。"""
+    factory = await choose_read_sessionmaker(user_id)
+    async with factory() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
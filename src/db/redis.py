@@ -1,20 +1,189 @@
 """
 Redis 客户端管理
+
+客户端侧缓存（settings.redis_client_cache_enabled）：
+- temp_plan:* 等读多写少的小 key 命中后直接从进程内存返回
+- 依赖 Redis 6+ 的服务端协助失效：CLIENT TRACKING ON BCAST PREFIX ... REDIRECT <id>，
+  任何连接（包括其他 worker）修改匹配前缀的 key 时，服务端把失效通知推送到
+  本进程专用的 __redis__:invalidate 订阅连接
+- 失效监听未就绪或中断时整体旁路缓存，不会返回可能过期的值
+
+集群模式（settings.redis_cluster_mode）：
+- get_redis() 返回 RedisCluster，按 key 的 hash slot 路由
+- key 布局见 src.db.redis_keys，同一任务/同一邮箱的 key 共用 hash tag
+- delete_keys 按 slot 分批 UNLINK，避免 CROSSSLOT
 """
-import json
+import asyncio
 import logging
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import redis.asyncio as redis
-from redis.asyncio import ConnectionPool
+from redis.asyncio import ConnectionPool, RedisCluster
+from redis.crc import key_slot
 
 from src.api.config import settings
+from src.utils.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
+INVALIDATION_CHANNEL = "__redis__:invalidate"
+# delete_keys 单条 UNLINK 的最大 key 数
+DELETE_BATCH_SIZE = 500
+
 
 # 创建 Redis 连接池
 pool: Optional[ConnectionPool] = None
 
+# 进程级共享客户端（单机模式为轻量包装，连接由 pool 管理；集群模式为 RedisCluster）
+_client: Optional[redis.Redis] = None
+
+
+class RedisLocalCache:
+    """
+    基于服务端失效通知的进程内 Redis 读缓存。
+
+    只缓存匹配 prefixes 的 key，按 LRU 淘汰。读回填前记录失效序号，
+    若期间收到任何失效通知则放弃回填，避免把已过期的值写进缓存。
+    """
+
+    def __init__(self, prefixes: Iterable[str], max_entries: int = 10000):
+        self.prefixes = tuple(prefixes)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._invalidation_seq = 0
+        self._listener: Optional[asyncio.Task] = None
+        self._pubsub = None
+        self._tracking_conn = None
+        self.active = False
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, key: str) -> bool:
+        return self.active and key.startswith(self.prefixes)
+
+    def lookup(self, key: str) -> Tuple[bool, Optional[str]]:
+        """返回 (是否命中, 原始字符串值)；未命中时调用方回源 Redis。"""
+        if not self.cacheable(key):
+            return False, None
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def begin_fill(self) -> int:
+        """回源前调用，返回当前失效序号。"""
+        return self._invalidation_seq
+
+    def fill(self, key: str, value: Optional[str], seq: int) -> None:
+        """回源后写入缓存；期间发生过失效则放弃。"""
+        if not self.cacheable(key) or seq != self._invalidation_seq:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, keys: Optional[Iterable[str]] = None) -> None:
+        """失效指定 key；keys 为 None 表示全部失效（FLUSHDB 或监听中断）。"""
+        self._invalidation_seq += 1
+        if keys is None:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "active": self.active,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    async def start(self, connection_pool: ConnectionPool) -> bool:
+        """建立失效订阅连接并开启 BCAST 追踪；失败时保持旁路。"""
+        if self.active:
+            return True
+        try:
+            self._pubsub = redis.Redis(connection_pool=connection_pool).pubsub()
+            await self._pubsub.connect()
+            await self._pubsub.connection.send_command("CLIENT", "ID")
+            listener_id = await self._pubsub.connection.read_response()
+            await self._pubsub.subscribe(INVALIDATION_CHANNEL)
+
+            # 追踪状态挂在发起 CLIENT TRACKING 的连接上，需独占持有直到关闭
+            self._tracking_conn = await connection_pool.get_connection()
+            prefix_args = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+            await self._tracking_conn.send_command(
+                "CLIENT", "TRACKING", "ON", "REDIRECT", listener_id, "BCAST", *prefix_args
+            )
+            await self._tracking_conn.read_response()
+        except Exception as exc:
+            logger.warning("Redis 客户端缓存未启用（失效追踪初始化失败）: %s", exc)
+            await self.stop(connection_pool)
+            return False
+
+        self.invalidate()
+        self.active = True
+        self._listener = asyncio.create_task(self._listen(connection_pool))
+        logger.info("Redis 客户端缓存已启用: prefixes=%s", ",".join(self.prefixes))
+        return True
+
+    async def _listen(self, connection_pool: ConnectionPool) -> None:
+        try:
+            async for message in self._pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message.get("data")
+                if data is None:
+                    self.invalidate()
+                elif isinstance(data, (list, tuple)):
+                    self.invalidate(data)
+                else:
+                    self.invalidate([data])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Redis 失效通知连接中断，客户端缓存已旁路: %s", exc)
+            self.active = False
+            self.invalidate()
+
+    async def stop(self, connection_pool: Optional[ConnectionPool] = None) -> None:
+        self.active = False
+        self.invalidate()
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+        if self._tracking_conn is not None:
+            try:
+                # 断开后追踪状态随连接释放，避免归还后的连接继续带 BCAST 追踪
+                await self._tracking_conn.disconnect()
+                if connection_pool is not None:
+                    await connection_pool.release(self._tracking_conn)
+            except Exception:
+                pass
+            self._tracking_conn = None
+
+
+local_cache = RedisLocalCache(
+    settings.redis_client_cache_prefixes,
+    max_entries=settings.redis_client_cache_max_entries,
+)
+
 
 def get_redis_pool() -> ConnectionPool:
     """
@@ -45,15 +214,46 @@ async def get_redis() -> redis.Redis:
         return {"value": value}
     ```
     """
-    return redis.Redis(connection_pool=get_redis_pool())
+    global _client
+    if _client is None:
+        if settings.redis_cluster_mode:
+            # 集群客户端按 slot 路由，自行维护每个节点的连接池
+            _client = RedisCluster.from_url(
+                settings.redis_url,
+                decode_responses=True,
+                max_connections=50,
+            )
+        else:
+            _client = redis.Redis(connection_pool=get_redis_pool())
+    return _client
+
+
+async def start_client_cache() -> bool:
+    """按配置启用客户端侧缓存（应用启动时调用）。"""
+    if not settings.redis_client_cache_enabled:
+        return False
+    if settings.redis_cluster_mode:
+        # 失效通知需在每个节点单独建立追踪连接，集群模式暂不启用
+        logger.info("Redis Cluster 模式下不启用客户端侧缓存")
+        return False
+    return await local_cache.start(get_redis_pool())
+
+
+def get_client_cache_stats() -> Dict[str, Any]:
+    """客户端侧缓存命中统计。"""
+    return local_cache.stats()
 
 
 async def close_redis():
     """关闭 Redis 连接池"""
-    global pool
+    global pool, _client
+    await local_cache.stop(pool)
     if pool:
         await pool.disconnect()
         pool = None
+    if isinstance(_client, RedisCluster):
+        await _client.aclose()
+    _client = None
 
 
 async def set_json(key: str, value: Any, expire: int = 3600) -> bool:
@@ -70,8 +270,9 @@ async def set_json(key: str, value: Any, expire: int = 3600) -> bool:
     """
     try:
         client = await get_redis()
-        json_str = json.dumps(value, ensure_ascii=False)
-        await client.setex(key, expire, json_str)
+        await client.setex(key, expire, dumps(value))
+        # 本进程的写立即失效，不等待服务端通知回流
+        local_cache.invalidate([key])
         return True
     except Exception as e:
         logger.error("Redis set JSON failed: %s", e)
@@ -89,16 +290,57 @@ async def get_json(key: str) -> Optional[Any]:
         解析后的值，不存在或失败返回 None
     """
     try:
-        client = await get_redis()
-        json_str = await client.get(key)
+        hit, json_str = local_cache.lookup(key)
+        if not hit:
+            seq = local_cache.begin_fill()
+            client = await get_redis()
+            json_str = await client.get(key)
+            local_cache.fill(key, json_str, seq)
         if json_str is None:
             return None
-        return json.loads(json_str)
+        return loads(json_str)
     except Exception as e:
         logger.error("Redis get JSON failed: %s", e)
         return None
 
 
+async def delete_key(key: str) -> int:
+    """
+    删除单个键并立即失效本进程缓存
+
+    Args:
+        key: Redis 键
+
+    Returns:
+        int: 删除的键数量
+    """
+    try:
+        client = await get_redis()
+        deleted = await client.delete(key)
+        local_cache.invalidate([key])
+        return deleted
+    except Exception as e:
+        logger.error("Redis delete failed: %s", e)
+        return 0
+
+
+def group_keys_by_slot(keys: Iterable[str], batch_size: int = DELETE_BATCH_SIZE) -> List[List[str]]:
+    """
+    按 Cluster hash slot 分组并切批
+
+    多 key 命令只能作用于同一 slot，否则集群返回 CROSSSLOT；
+    单机模式下分组同样成立，只是多发几条命令。
+    """
+    by_slot: Dict[int, List[str]] = {}
+    for key in keys:
+        by_slot.setdefault(key_slot(key.encode()), []).append(key)
+    batches = []
+    for slot_keys in by_slot.values():
+        for i in range(0, len(slot_keys), batch_size):
+            batches.append(slot_keys[i:i + batch_size])
+    return batches
+
+
 async def delete_keys(pattern: str) -> int:
     """
     批量删除键
@@ -111,12 +353,13 @@ async def delete_keys(pattern: str) -> int:
     """
     try:
         client = await get_redis()
-        keys = []
-        async for key in client.scan_iter(match=pattern):
-            keys.append(key)
-        if keys:
-            return await client.delete(*keys)
-        return 0
+        # 集群客户端的 scan_iter 会遍历所有主节点
+        keys = [key async for key in client.scan_iter(match=pattern, count=DELETE_BATCH_SIZE)]
+        deleted = 0
+        for batch in group_keys_by_slot(keys):
+            deleted += await client.unlink(*batch)
+        local_cache.invalidate(keys)
+        return deleted
     except Exception as e:
         logger.error("Redis batch delete failed: %s", e)
         return 0
@@ -0,0 +1,72 @@
+"""
+Redis key 布局
+
+所有 key 统一在这里构造，并用 hash tag（花括号内的部分）决定 Redis Cluster slot：
+- 同一任务的事件流与临时计划都以 {task_id} 为 tag，落在同一个 slot，
+  pipeline / 事务 / 多 key 命令不会触发 CROSSSLOT
+- 同一邮箱的验证码、发送冷却、每日计数以 {email} 为 tag
+- 单机模式下 hash tag 只是普通字符，不影响行为
+
+临时计划的 plan_id 与 task_id 相同（每个任务只产出一份临时计划，
+AG-UI 路径也以 thread_id 作为 plan_id），因此 temp_plan key 与事件流天然同 slot。
+"""
+
+
+def hash_tag(value: str) -> str:
+    """包裹为 hash tag。"""
+    return f"{{{value}}}"
+
+
+def task_events_key(task_id: str) -> str:
+    """任务进度事件流。"""
+    return f"plan:events:{hash_tag(task_id)}"
+
+
+def temp_plan_key(plan_id: str) -> str:
+    """待确认的临时计划。"""
+    return f"temp_plan:{hash_tag(plan_id)}"
+
+
+def legacy_temp_plan_key(plan_id: str) -> str:
+    """引入 hash tag 之前的临时计划 key，仅用于读取升级前写入、尚未过期的数据。"""
+    return f"temp_plan:{plan_id}"
+
+
+def rate_limit_key(identifier: str) -> str:
+    """请求速率限制计数器。"""
+    return f"rate_limit:{hash_tag(identifier)}"
+
+
+def verification_code_key(code_type: str, email: str) -> str:
+    """验证码。"""
+    return f"verification_code:{code_type}:{hash_tag(email)}"
+
+
+def legacy_verification_code_key(code_type: str, email: str) -> str:
+    """引入 hash tag 之前的验证码 key，仅用于读取升级前已发出、尚未过期的验证码。"""
+    return f"verification_code:{code_type}:{email}"
+
+
+def send_cooldown_key(email: str) -> str:
+    """验证码发送冷却。"""
+    return f"send_cooldown:{hash_tag(email)}"
+
+
+def daily_send_count_key(email: str, day: str) -> str:
+    """每日验证码发送计数。"""
+    return f"daily_send_count:{hash_tag(email)}:{day}"
+
+
+def recent_write_key(user_id: str) -> str:
+    """用户最近写库标记（读写分离的 read-your-writes 窗口）。"""
+    return f"db_recent_write:{hash_tag(user_id)}"
+
+
+def user_status_key(user_id: str) -> str:
+    """用户启用/管理员状态缓存。"""
+    return f"user_status:{hash_tag(user_id)}"
+
+
+def refresh_token_key(user_id: str, token_hash: str) -> str:
+    """有效刷新令牌（值无意义，存在即有效，TTL 与令牌过期时间一致）。"""
+    return f"refresh_token:{hash_tag(user_id)}:{token_hash}"
@@ -12,20 +12,40 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from sqlalchemy.orm import DeclarativeBase
 
 from src.api.config import settings
+from src.db.pool_budget import pool_size, register_pool
+from src.utils.serialization import dumps_str, loads
 
 logger = logging.getLogger(__name__)
 
+# JSON/JSONB 列的编解码（asyncpg 方言把列值交给这里，不再走 stdlib json）
+JSON_CODEC = {"json_serializer": dumps_str, "json_deserializer": loads}
 
-# 统一复用异步引擎，减少连接创建开销。
+
+# 统一复用异步引擎，减少连接创建开销；池尺寸取自节点连接预算。
+_api_pool = pool_size("api")
 engine = create_async_engine(
     settings.database_url,
     echo=settings.database_echo,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=_api_pool.min_size,
+    max_overflow=_api_pool.overflow,
+    **JSON_CODEC,
 )
 
 
+def _engine_pool_usage() -> dict:
+    """SQLAlchemy 连接池用量。"""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+register_pool("api", _engine_pool_usage)
+
+
 # 统一的异步 Session 工厂。
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -36,6 +56,43 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# 只读副本（可选）：只承接标记为只读的接口，位于另一节点，沿用 api 份额的池尺寸。
+replica_engine = (
+    create_async_engine(
+        settings.database_replica_url,
+        echo=settings.database_echo,
+        pool_pre_ping=True,
+        pool_size=_api_pool.min_size,
+        max_overflow=_api_pool.overflow,
+        **JSON_CODEC,
+    )
+    if settings.database_replica_url
+    else None
+)
+
+ReplicaSessionLocal = (
+    async_sessionmaker(
+        replica_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+    if replica_engine is not None
+    else None
+)
+
+if replica_engine is not None:
+    register_pool(
+        "api_replica",
+        lambda: {
+            "size": replica_engine.pool.size(),
+            "checked_out": replica_engine.pool.checkedout(),
+            "overflow": replica_engine.pool.overflow(),
+        },
+    )
+
+
 class Base(DeclarativeBase):
     """SQLAlchemy ORM 基类。"""
 
@@ -64,6 +121,8 @@ async def init_db():
 async def close_db():
     """关闭数据库连接池。"""
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 
 async def test_connection() -> bool:
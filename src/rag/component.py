@@ -1,5 +1,4 @@
 import logging
-import asyncio
 from typing import Any, List, Sequence
 
 logger = logging.getLogger(__name__)
@@ -75,6 +74,8 @@ from openai import OpenAI
 from langchain_core.documents import Document
 from langchain.retrievers.document_compressors.base import BaseDocumentCompressor
 
+from src.utils.executors import run_blocking_io
+
 
 
 class DashscopeReranker(BaseDocumentCompressor):
@@ -173,12 +174,12 @@ class DashscopeReranker(BaseDocumentCompressor):
         self, documents: List[Document], query: str, callbacks: Optional[Any] = None
     ) -> List[Document]:
         """
-        异步版本：将同步 HTTP 调用 + time.sleep 重试卸载到默认线程池，
+        异步版本：将同步 HTTP 调用 + time.sleep 重试卸载到专用 I/O 线程池，
         避免在 async 路径（如 LangChain ainvoke）阻塞事件循环。
 
         LangChain `BaseDocumentCompressor.acompress_documents` 的默认实现
         行为等价，但显式覆盖可让意图更清晰，也便于后续切换为真正的异步 SDK。
         """
-        return await asyncio.to_thread(
+        return await run_blocking_io(
             self.compress_documents, documents, query, callbacks
         )
@@ -0,0 +1,232 @@
+"""
+按负载类型划分的有界线程池
+
+asyncio.to_thread 共用事件循环的默认线程池（min(32, CPU+4) 个线程），
+bcrypt 哈希、MinIO 调用、重排序 HTTP 请求会互相挤占：登录高峰时
+MinIO 上传排队，大批 MinIO 请求时登录变慢。这里拆成独立的有界池：
+- cpu：响应体压缩等 CPU 密集计算，线程数默认等于 CPU 核数，多开无益
+- io：MinIO、同步 HTTP SDK 等阻塞 I/O
+- bcrypt：密码哈希专用（BoundedExecutor），排队数也有上限，登录风暴时超出部分立即拒绝，
+  而不是让请求在队列里等上几秒、再拖慢 cpu 池上的其他工作
+- image：图片缩放/编码专用进程池（ProcessPoolExecutor，spawn 启动）：一张图解码、
+  多次缩放再编码要几十到上百毫秒，放进 cpu 线程池会与响应压缩争抢，也不能跨核并行
+
+数据库查询不经过线程池（API 走 asyncpg，agent 工具走共享 psycopg 异步池）。
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from src.api.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CPU_EXECUTOR = "cpu"
+IO_EXECUTOR = "io"
+BCRYPT_EXECUTOR = "bcrypt"
+IMAGE_EXECUTOR = "image"
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+class ExecutorSaturated(RuntimeError):
+    """有界线程池的排队已满，任务被拒绝。"""
+
+
+class BoundedExecutor:
+    """
+    线程数与排队数都有上限的线程池
+
+    ThreadPoolExecutor 的队列无界：突发请求全部排进去，最后一个要等前面所有任务跑完。
+    这里在提交前按“执行中 + 排队中”计数，超过 workers + max_queue 直接抛 ExecutorSaturated，
+    调用方可以快速返回 503。
+
+    名额在线程池 Future 完成时（done callback）才释放，而不是在等待的协程结束时：
+    客户端断开导致协程被取消时，线程里的哈希仍在运行，提前释放会让上限在登录风暴中失效。
+    done callback 在工作线程上执行，计数与统计用锁保护。
+
+    同时记录排队等待与执行耗时，供 /health/detail 观察。
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pf-{name}")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} 线程池已满（{self._pending} 个任务）")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+        started: Optional[float] = None
+
+        def _timed() -> T:
+            nonlocal started
+            started = time.perf_counter()
+            return func(*args, **kwargs)
+
+        def _finished(_future: Future) -> None:
+            finished = time.perf_counter()
+            with self._lock:
+                self._pending -= 1
+                if started is not None:
+                    self.completed += 1
+                    self._wait_total += started - submitted
+                    self._run_total += finished - started
+                    self._run_max = max(self._run_max, finished - started)
+
+        ctx = contextvars.copy_context()
+        try:
+            future = self._executor.submit(ctx.run, _timed)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(_finished)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        completed = self.completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queued": max(0, self._pending - self.max_workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self._wait_total / completed * 1000, 2),
+            "avg_run_ms": round(self._run_total / completed * 1000, 2),
+            "max_run_ms": round(self._run_max * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_bcrypt_executor: Optional[BoundedExecutor] = None
+_image_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _max_workers(name: str) -> int:
+    if name == CPU_EXECUTOR:
+        return settings.executor_cpu_workers or os.cpu_count() or 1
+    return settings.executor_io_workers
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """获取（必要时创建）指定类型的线程池。"""
+    executor = _executors.get(name)
+    if executor is None:
+        if name not in (CPU_EXECUTOR, IO_EXECUTOR):
+            raise KeyError(f"未知的线程池类型: {name}")
+        executor = ThreadPoolExecutor(max_workers=_max_workers(name), thread_name_prefix=f"pf-{name}")
+        _executors[name] = executor
+    return executor
+
+
+async def _run(name: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """与 asyncio.to_thread 相同的语义（复制 contextvars），但使用指定线程池。"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(name), call)
+
+
+async def run_cpu_bound(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在 CPU 线程池执行同步函数。"""
+    return await _run(CPU_EXECUTOR, func, *args, **kwargs)
+
+
+async def run_blocking_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在阻塞 I/O 线程池执行同步函数。"""
+    return await _run(IO_EXECUTOR, func, *args, **kwargs)
+
+
+def get_bcrypt_executor() -> BoundedExecutor:
+    """获取（必要时创建）密码哈希专用的有界线程池。"""
+    global _bcrypt_executor
+    if _bcrypt_executor is None:
+        _bcrypt_executor = BoundedExecutor(
+            BCRYPT_EXECUTOR,
+            max_workers=settings.executor_bcrypt_workers or os.cpu_count() or 1,
+            max_queue=settings.executor_bcrypt_max_queue,
+        )
+    return _bcrypt_executor
+
+
+async def run_bcrypt(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """在 bcrypt 线程池执行同步函数；排队已满时抛 ExecutorSaturated。"""
+    return await get_bcrypt_executor().run(func, *args, **kwargs)
+
+
+def get_image_executor() -> ProcessPoolExecutor:
+    """获取（必要时创建）图片处理进程池。"""
+    global _image_executor
+    if _image_executor is None:
+        # spawn：子进程不继承父进程的线程与连接池，fork 多线程进程不安全
+        _image_executor = ProcessPoolExecutor(
+            max_workers=settings.executor_image_workers or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _image_executor
+
+
+async def run_in_image_process(func: Callable[..., T], *args: Any) -> T:
+    """在图片处理进程池执行模块级函数（参数与返回值需可 pickle）。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_image_executor(), func, *args)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """各线程池的容量与排队任务数。"""
+    stats: Dict[str, Dict[str, Any]] = {
+        name: {
+            "max_workers": executor._max_workers,
+            "threads": len(executor._threads),
+            "queued": executor._work_queue.qsize(),
+        }
+        for name, executor in _executors.items()
+    }
+    if _bcrypt_executor is not None:
+        stats[BCRYPT_EXECUTOR] = _bcrypt_executor.stats()
+    if _image_executor is not None:
+        stats[IMAGE_EXECUTOR] = {"max_workers": _image_executor._max_workers}
+    return stats
+
+
+def shutdown_executors() -> None:
+    """应用退出时关闭线程池与进程池（不等待排队任务）。"""
+    global _bcrypt_executor, _image_executor
+    for name, executor in list(_executors.items()):
+        executor.shutdown(wait=False, cancel_futures=True)
+        _executors.pop(name, None)
+    if _bcrypt_executor is not None:
+        _bcrypt_executor.shutdown()
+        _bcrypt_executor = None
+    if _image_executor is not None:
+        _image_executor.shutdown(wait=False, cancel_futures=True)
+        _image_executor = None
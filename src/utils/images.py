@@ -0,0 +1,63 @@
+"""
+图片衍生尺寸编码
+
+在 image 进程池（src/utils/executors.py）中执行，因此只依赖 Pillow，不导入 src.api 下的
+配置与连接：spawn 出来的子进程导入本模块即可工作。
+Pillow 为可选依赖（uv sync --extra images），未安装时调用方会收到 ImportError。
+"""
+import io
+from typing import Dict, Iterable, Tuple
+
+# 格式名 → (Pillow 编码器, Content-Type)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "avif": ("AVIF", "image/avif"),
+}
+
+
+def render_derivatives(
+    data: bytes,
+    widths: Iterable[int],
+    fmt: str,
+    quality: int,
+) -> Tuple[str, Dict[int, bytes]]:
+    """
+    把原图缩放到各个宽度并编码
+
+    - 按宽度从大到小逐级缩放，每级以上一级结果为输入，比每次都从原图缩放快得多
+    - 不放大：不小于原图宽度的尺寸直接跳过，代理会回退原图
+    - 按 EXIF 方向旋正，编码结果不再携带 EXIF（去掉拍摄位置等元数据）
+    - Pillow 未编译 AVIF 支持时回退 WebP
+
+    Returns:
+        (Content-Type, {宽度: 编码后的字节})
+    """
+    from PIL import Image, ImageOps, features
+
+    if fmt == "avif" and not features.check("avif"):
+        fmt = "webp"
+    encoder, content_type = FORMATS[fmt]
+
+    targets = sorted({w for w in widths if w > 0}, reverse=True)
+    rendered: Dict[int, bytes] = {}
+    if not targets:
+        return content_type, rendered
+
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEG 可在解码时直接按 1/2、1/4、1/8 缩小，省掉大部分解码开销
+        source.draft("RGB", (targets[0], targets[0]))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+        for width in targets:
+            if width >= image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format=encoder, quality=quality)
+            rendered[width] = buffer.getvalue()
+
+    return content_type, rendered
@@ -0,0 +1,116 @@
+"""
+基于 orjson 的统一 JSON 序列化
+
+SSE 事件、事件总线、Redis JSON 辅助函数、临时计划、数据库 JSON/JSONB 列与非模型化的
+API 响应都走这里，不再各自调用 json.dumps(default=...)：
+- dict/list/tuple、dataclass、datetime/date/time、UUID、Enum 由 orjson 原生序列化（不回调 Python）
+- 其余类型按类注册转换函数：每个类首次出现时解析一次并缓存，之后同类对象直接命中，
+  不再逐个对象试探 model_dump() / dict() / json.dumps()
+  - Pydantic 模型（含 LangChain Message）用 pydantic-core 直接生成 JSON 片段嵌入（orjson.Fragment）
+  - Decimal（营养数值列）序列化为数字，set 序列化为数组；Pydantic 模型里声明为 Decimal 的字段
+    仍按模型自身的序列化规则输出（与 model_dump(mode="json") 一致，为字符串），要数字请声明为 float
+  - 无法识别的对象兜底为 str()
+
+输出为 UTF-8 紧凑 JSON，非 ASCII 字符不转义（等同 ensure_ascii=False）。
+规范化 JSON（plan_blob_store.canonical_json）决定内容寻址的哈希，仍保持 stdlib 输出不变。
+
+需要 JSON 原生对象（dict/list/基本类型）而不是字节时（任务输出落库、进度事件 detail），
+用 to_jsonable()：先 dumps 再由 orjson 解析回来，两步都在 C 里完成，输出与 dumps 逐字段一致
+（Decimal 同为数字，不会出现落库是字符串、响应是数字的分歧）。
+"""
+from decimal import Decimal
+from typing import Any, Callable, Dict, Union
+
+import orjson
+from starlette.responses import JSONResponse
+
+# 允许非字符串键（如以 int 为键的统计字典），与 json.dumps 行为一致
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+JSONDecodeError = orjson.JSONDecodeError
+
+Converter = Callable[[Any], Any]
+
+_converters: Dict[type, Converter] = {}
+
+_PASSTHROUGH_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def _convert_model(obj: Any) -> orjson.Fragment:
+    # 模型里 Any 字段的未知叶子交回注册表，而不是让 pydantic 抛 PydanticSerializationError
+    return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj, fallback=_default))
+
+
+def _resolve_converter(cls: type) -> Converter:
+    """按类型解析转换函数（每个类只解析一次）。"""
+    if hasattr(cls, "__pydantic_serializer__"):
+        return _convert_model
+    if issubclass(cls, Decimal):
+        return float
+    if issubclass(cls, (set, frozenset)):
+        return list
+    if callable(getattr(cls, "dict", None)):
+        return lambda obj: obj.dict()
+    return str
+
+
+def _converter_for(cls: type) -> Converter:
+    converter = _converters.get(cls)
+    if converter is None:
+        converter = _converters[cls] = _resolve_converter(cls)
+    return converter
+
+
+def register_converter(cls: type, converter: Converter) -> None:
+    """
+    为某个类型注册转换函数（覆盖自动解析的结果，子类不继承）
+
+    转换结果须是 JSON 可序列化的对象。orjson / pydantic-core 原生支持的类型
+    （dict、dataclass、datetime、Pydantic 模型等）不会回调转换函数。
+    """
+    _converters[cls] = converter
+
+
+def _default(obj: Any) -> Any:
+    """orjson 无法原生处理的类型。"""
+    return _converter_for(type(obj))(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节。"""
+    return orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    """序列化为 JSON 字符串（SQLAlchemy JSON 列、SSE 文本帧等需要 str 的场景）。"""
+    return orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS).decode("utf-8")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """解析 JSON（接受 bytes 或 str）。"""
+    return orjson.loads(data)
+
+
+def to_jsonable(obj: Any) -> Any:
+    """
+    把任意嵌套对象转换为 JSON 原生类型（dict / list / str / int / float / bool / None）
+
+    结果等同于 loads(dumps(obj))：Pydantic 模型（含 LangChain Message）按 model_dump(mode="json")
+    的规则转换；tuple/set 变为 list，非字符串键变为字符串，datetime 变为 ISO 字符串，
+    Decimal 变为数字；其余类型走注册表（兜底 str()）。
+    """
+    if type(obj) in _PASSTHROUGH_TYPES:
+        return obj
+    return orjson.loads(orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS))
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    orjson 渲染的 JSON 响应
+
+    只用于没有 response_model 的路由（直接返回 dict / 文档）：带 response_model 的路由
+    FastAPI 会用 Pydantic 直接生成 JSON 字节，指定自定义响应类反而会关掉这条快路径。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,186 @@
+"""
+认证缓存测试
+验证已验证令牌的 LRU 与 Redis 用户状态缓存（命中不查库、禁用后立即失效）
+"""
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.api.dependencies import get_minio_storage
+from src.api.main import app
+from src.api.middleware.auth import get_current_active_user, get_current_user, require_superuser
+from src.api.services import user_status
+from src.api.services.auth_service import AuthService
+from src.api.utils import security
+from src.api.utils.security import (
+    VerifiedTokenCache,
+    create_access_token,
+    create_refresh_token,
+    verify_token_cached,
+)
+
+
+class _Credentials:
+    def __init__(self, token: str):
+        self.credentials = token
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=100)
+    monkeypatch.setattr(security, "verified_tokens", cache)
+    return cache
+
+
+@pytest.fixture
+def decode_calls(monkeypatch):
+    calls = []
+    original = security.decode_token
+
+    def _spy(token):
+        calls.append(token)
+        return original(token)
+
+    monkeypatch.setattr(security, "decode_token", _spy)
+    return calls
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    store = {}
+
+    async def _get_json(key):
+        return store.get(key)
+
+    async def _set_json(key, value, expire=3600):
+        store[key] = value
+        return True
+
+    async def _delete_key(key):
+        return 1 if store.pop(key, None) is not None else 0
+
+    monkeypatch.setattr(user_status, "get_json", _get_json)
+    monkeypatch.setattr(user_status, "set_json", _set_json)
+    monkeypatch.setattr(user_status, "delete_key", _delete_key)
+    return store
+
+
+@pytest.mark.asyncio
+async def test_verified_token_decoded_once(token_cache, decode_calls):
+    token = create_access_token("user-1", "cat")
+
+    assert await get_current_user(_Credentials(token)) == "user-1"
+    assert await get_current_user(_Credentials(token)) == "user-1"
+    assert len(decode_calls) == 1
+
+
+def test_cached_token_type_still_checked(token_cache):
+    token = create_refresh_token("user-1", "cat")
+    verify_token_cached(token, token_type="refresh")
+
+    with pytest.raises(ValueError):
+        verify_token_cached(token, token_type="access")
+
+
+def test_cached_token_expires(token_cache, decode_calls):
+    token = create_access_token("user-1", "cat", expires_delta=timedelta(seconds=30))
+    verify_token_cached(token)
+    digest = next(iter(token_cache._entries))
+    payload, _ = token_cache._entries[digest]
+    token_cache._entries[digest] = (payload, time.time() - 1)
+
+    verify_token_cached(token)
+    assert len(decode_calls) == 2
+
+
+def test_token_cache_bounded():
+    cache = VerifiedTokenCache(max_entries=2)
+    exp = time.time() + 60
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, {"exp": exp})
+
+    assert cache.get(b"a") is None
+    assert cache.get(b"c") == {"exp": exp}
+
+
+@pytest.mark.asyncio
+async def test_user_status_cached(test_session, test_user, fake_redis, query_budget):
+    assert await get_current_active_user(test_user.id, test_session) == test_user.id
+
+    with query_budget(max_queries=0):
+        assert await get_current_active_user(test_user.id, test_session) == test_user.id
+
+    with pytest.raises(HTTPException) as exc_info:
+        await require_superuser(test_user.id, test_session)
+    assert exc_info.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_disabling_user_invalidates_status(test_session, test_user, fake_redis):
+    await get_current_active_user(test_user.id, test_session)
+
+    await AuthService(test_session).set_user_status(test_user.id, is_active=False)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_active_user(test_user.id, test_session)
+    assert exc_info.value.status_code == 403
+
+    await AuthService(test_session).set_user_status(test_user.id, is_active=True, is_superuser=True)
+    assert await require_superuser(test_user.id, test_session) == test_user.id
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_not_cached(test_session, fake_redis):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_active_user("missing-user", test_session)
+    assert exc_info.value.status_code == 404
+    assert fake_redis == {}
+
+
+class _AvatarStorage:
+    def __init__(self):
+        self.uploaded = []
+        self.deleted = []
+
+    async def aupload_stream(self, object_name, chunks, content_type="application/octet-stream"):
+        async for _ in chunks:
+            pass
+        self.uploaded.append(object_name)
+        return True
+
+    async def adelete_file(self, object_name):
+        self.deleted.append(object_name)
+        return True
+
+    def build_object_reference(self, object_name):
+        return f"minio://petfood-bucket/{object_name}"
+
+    def extract_object_name(self, file_reference):
+        prefix = "minio://petfood-bucket/"
+        if not file_reference or not file_reference.startswith(prefix):
+            return None
+        return file_reference.removeprefix(prefix)
+
+
+@pytest.mark.asyncio
+async def test_avatar_upload_skips_user_select(client, auth_headers, test_user, fake_redis, query_budget):
+    storage = _AvatarStorage()
+    app.dependency_overrides[get_minio_storage] = lambda: storage
+    files = {"file": ("avatar.png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 32, "image/png")}
+
+    # 第一次请求回填状态缓存
+    first = await client.post("/api/v1/auth/avatar", files=files, headers=auth_headers)
+    assert first.status_code == 200
+
+    with query_budget(max_queries=2) as stats:
+        second = await client.post("/api/v1/auth/avatar", files=files, headers=auth_headers)
+    assert second.status_code == 200
+    # 认证不再加载用户行：唯一的 SELECT 只读旧头像一列
+    selects = [shape for shape in stats.shapes if shape.upper().startswith("SELECT")]
+    assert len(selects) == 1
+    assert selects[0].upper().startswith("SELECT USERS.AVATAR_URL FROM USERS")
+
+    # 旧头像被清理
+    assert storage.deleted == [storage.uploaded[0]]
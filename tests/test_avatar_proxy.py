@@ -0,0 +1,242 @@
+"""
+头像流式代理测试
+验证 MinIO 对象边转发边写入磁盘缓存、缓存命中不再访问 MinIO、Range / ETag 304、缓存淘汰，
+以及按 ?w= 选择衍生尺寸
+"""
+import io
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import src.api.routes.auth as auth_route_module
+import src.api.routes.pets as pets_route_module
+import src.api.services.image_derivatives as image_derivatives_module
+from src.api.dependencies import get_minio_storage
+from src.api.infrastructure.object_cache import DiskObjectCache
+from src.api.main import app
+from src.api.utils.object_proxy import CHUNK_SIZE, parse_single_range
+
+OBJECT_NAME = "avatars/pets/demo/0a1b2c.png"
+# 跨越多个分块，覆盖逐块转发
+OBJECT_DATA = bytes(range(256)) * (CHUNK_SIZE // 256 * 2 + 3)
+
+
+class _FakeObjectStream:
+    def __init__(self, data: bytes, offset: int, length: int):
+        end = offset + length if length else len(data)
+        self._buffer = io.BytesIO(data[offset:end])
+        self.headers = {
+            "ETag": '"etag-1"',
+            "Content-Type": "image/png",
+            "Content-Length": str(end - offset),
+        }
+        if offset or length:
+            self.headers["Content-Range"] = f"bytes {offset}-{end - 1}/{len(data)}"
+        self.closed = False
+
+    def read(self, amt=None):
+        return self._buffer.read(amt)
+
+    def close(self):
+        self.closed = True
+
+    def release_conn(self):
+        pass
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects = {OBJECT_NAME: OBJECT_DATA}
+        self.opened = []
+
+    async def aopen_object(self, object_name, offset=0, length=0):
+        self.opened.append((object_name, offset, length))
+        data = self.objects.get(object_name)
+        if data is None:
+            return None
+        return _FakeObjectStream(data, offset, length)
+
+
+@pytest.fixture
+def storage():
+    fake = _FakeStorage()
+    app.dependency_overrides[get_minio_storage] = lambda: fake
+    return fake
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    disk_cache = DiskObjectCache(tmp_path / "avatars", max_bytes=len(OBJECT_DATA) * 2)
+    monkeypatch.setattr(pets_route_module, "avatar_cache", disk_cache)
+    monkeypatch.setattr(auth_route_module, "avatar_cache", disk_cache)
+    return disk_cache
+
+
+@pytest.fixture(autouse=True)
+def missing_derivatives(monkeypatch):
+    missing = OrderedDict()
+    monkeypatch.setattr(image_derivatives_module, "_missing", missing)
+    monkeypatch.setattr(image_derivatives_module.settings, "image_derivative_widths", [64, 128, 256])
+    return missing
+
+
+def _url(object_name: str = OBJECT_NAME) -> str:
+    return f"/api/v1/pets/avatar/object/{object_name}"
+
+
+def test_parse_single_range():
+    assert parse_single_range("bytes=0-99") == (0, 100)
+    assert parse_single_range("bytes=100-") == (100, 0)
+    assert parse_single_range("bytes=-100") is None
+    assert parse_single_range("bytes=0-1, 5-9") is None
+    assert parse_single_range("items=0-1") is None
+    assert parse_single_range(None) is None
+
+
+@pytest.mark.asyncio
+async def test_miss_streams_and_fills_cache(client, storage, cache):
+    first = await client.get(_url(), headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.content == OBJECT_DATA
+    # 图片不经压缩中间件，也不带多余的 Content-Encoding
+    assert "content-encoding" not in first.headers
+    assert first.headers["etag"] == '"etag-1"'
+    assert first.headers["content-length"] == str(len(OBJECT_DATA))
+    assert cache.get(OBJECT_NAME).size == len(OBJECT_DATA)
+
+    second = await client.get(_url())
+    assert second.content == OBJECT_DATA
+    assert second.headers["etag"] == '"etag-1"'
+    assert len(storage.opened) == 1
+
+    not_modified = await client.get(_url(), headers={"If-None-Match": '"etag-1"'})
+    assert not_modified.status_code == 304
+    assert len(storage.opened) == 1
+
+
+@pytest.mark.asyncio
+async def test_range_on_cached_object(client, storage, cache):
+    await client.get(_url())
+
+    partial = await client.get(_url(), headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == OBJECT_DATA[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(OBJECT_DATA)}"
+    assert len(storage.opened) == 1
+
+
+@pytest.mark.asyncio
+async def test_range_on_miss_is_passed_through(client, storage, cache):
+    partial = await client.get(_url(), headers={"Range": "bytes=100-"})
+    assert partial.status_code == 206
+    assert partial.content == OBJECT_DATA[100:]
+    assert storage.opened == [(OBJECT_NAME, 100, 0)]
+    # 部分内容不写缓存
+    assert cache.get(OBJECT_NAME) is None
+
+
+@pytest.mark.asyncio
+async def test_miss_with_matching_etag_returns_304(client, storage, cache):
+    response = await client.get(_url(), headers={"If-None-Match": '"etag-1"'})
+    assert response.status_code == 304
+    assert cache.get(OBJECT_NAME) is None
+
+
+@pytest.mark.asyncio
+async def test_missing_object_returns_404(client, storage, cache):
+    response = await client.get(_url("avatars/pets/demo/missing.png"))
+    assert response.status_code == 404
+
+
+def test_cache_evicts_and_restores_from_disk(tmp_path):
+    cache = DiskObjectCache(tmp_path, max_bytes=10)
+    for name in ("a", "b", "c"):
+        temp_path = cache.temp_path()
+        with open(temp_path, "wb") as f:
+            f.write(b"12345")
+        cache.commit(name, temp_path, f'"{name}"', "image/png", 5)
+
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 10
+
+    restored = DiskObjectCache(tmp_path, max_bytes=10)
+    entry = restored.get("c")
+    assert entry is not None and entry.etag == '"c"'
+    assert open(entry.path, "rb").read() == b"12345"
+
+    restored.discard("c")
+    assert restored.get("c") is None
+
+
+@pytest.mark.asyncio
+async def test_width_selects_smallest_sufficient_derivative(client, storage, cache):
+    storage.objects[f"{OBJECT_NAME}@w128"] = b"thumb-128"
+
+    response = await client.get(_url(), params={"w": 100})
+    assert response.status_code == 200
+    assert response.content == b"thumb-128"
+    assert response.headers["cache-control"] == "public, max-age=86400"
+    assert storage.opened == [(f"{OBJECT_NAME}@w128", 0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_missing_derivative_falls_back_to_original(client, storage, cache, missing_derivatives):
+    first = await client.get(_url(), params={"w": 64})
+    assert first.status_code == 200
+    assert first.content == OBJECT_DATA
+    # 衍生图多半还在后台生成，原图不能按缩略图地址长期缓存
+    assert first.headers["cache-control"] == "no-cache"
+    assert f"{OBJECT_NAME}@w64" in missing_derivatives
+
+    # 短期内不再去 MinIO 查缺失的衍生图，原图走磁盘缓存
+    second = await client.get(_url(), params={"w": 64})
+    assert second.content == OBJECT_DATA
+    assert [name for name, _, _ in storage.opened] == [f"{OBJECT_NAME}@w64", OBJECT_NAME]
+
+
+@pytest.mark.asyncio
+async def test_width_larger_than_derivatives_serves_original(client, storage, cache):
+    response = await client.get(_url(), params={"w": 1024})
+    assert response.content == OBJECT_DATA
+    assert response.headers["cache-control"] == "public, max-age=86400"
+    assert storage.opened == [(OBJECT_NAME, 0, 0)]
+
+
+def test_cache_index_consistent_under_threads(tmp_path):
+    cache = DiskObjectCache(tmp_path, max_bytes=5 * 40)
+
+    def _worker(n):
+        for i in range(50):
+            name = f"obj-{(n * 7 + i) % 60}"
+            if cache.get(name) is None:
+                temp_path = cache.temp_path()
+                with open(temp_path, "wb") as f:
+                    f.write(b"12345")
+                cache.commit(name, temp_path, '"e"', "image/png", 5)
+            if i % 5 == 0:
+                cache.discard(f"obj-{i}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(_worker, range(8)))
+
+    stats = cache.stats()
+    assert stats["bytes"] == 5 * stats["objects"] <= cache.max_bytes
+    assert len(list(tmp_path.glob("*.json"))) == stats["objects"]
+
+
+@pytest.mark.asyncio
+async def test_user_avatar_uses_same_proxy(client, storage, cache):
+    url = f"/api/v1/auth/avatar/object/{OBJECT_NAME}"
+    first = await client.get(url)
+    assert first.status_code == 200
+    assert first.content == OBJECT_DATA
+    assert first.headers["cache-control"] == "public, max-age=86400"
+    assert first.headers["etag"] == '"etag-1"'
+
+    partial = await client.get(url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == OBJECT_DATA[:10]
+    assert len(storage.opened) == 1
+
+    assert (await client.get(f"/api/v1/auth/avatar/object/{OBJECT_NAME}.missing")).status_code == 404
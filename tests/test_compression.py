@@ -0,0 +1,44 @@
+"""
+压缩中间件测试
+验证已压缩的媒体类型与部分内容响应原样放行，其余响应照常 gzip
+"""
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from src.api.middleware.compression import CompressionMiddleware
+
+BODY = b"x" * 2048
+
+
+def _app() -> Starlette:
+    async def image(request):
+        return Response(BODY, media_type="image/png")
+
+    async def partial(request):
+        return Response(BODY[:100], status_code=206, headers={"Content-Range": "bytes 0-99/2048"})
+
+    async def text(request):
+        return Response(BODY, media_type="application/json")
+
+    app = Starlette(routes=[Route("/image", image), Route("/partial", partial), Route("/text", text)])
+    app.add_middleware(CompressionMiddleware, minimum_size=500, excluded_content_types=["image/"])
+    return app
+
+
+@pytest.mark.asyncio
+async def test_excluded_and_partial_responses_pass_through():
+    transport = httpx.ASGITransport(app=_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"Accept-Encoding": "gzip"}
+        image = await client.get("/image", headers=headers)
+        partial = await client.get("/partial", headers=headers)
+        text = await client.get("/text", headers=headers)
+
+    assert "content-encoding" not in image.headers
+    assert image.headers["content-length"] == str(len(BODY))
+    assert "content-encoding" not in partial.headers
+    assert text.headers["content-encoding"] == "gzip"
+    assert text.content == BODY
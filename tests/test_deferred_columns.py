@@ -0,0 +1,94 @@
+"""
+大 JSON 列延迟加载测试
+列表 / 状态查询不读取 plan_data、output_data、nutrition_data，详情接口按需读取。
+每个用例先清空身份映射，确保对象来自真实查询而不是 fixture 创建时的缓存。
+"""
+import uuid
+from datetime import date
+
+import pytest
+from httpx import AsyncClient
+
+from src.api.services.plan_service import PlanService
+from src.api.services.task_service import TaskService
+from src.db.models import DietPlan, MealRecord, Task
+
+PLAN_DATA = {"pet_diet_plan": {"monthly_diet_plan": [{"marker": "x" * 1000}]}}
+
+
+@pytest.fixture
+async def stored(test_session, test_user, test_pet):
+    task = Task(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        task_type="diet_plan",
+        status="completed",
+        progress=100,
+        input_data={"pet_type": "cat"},
+        output_data={"report": "done"},
+    )
+    plan = DietPlan(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        task_id=task.id,
+        pet_id=test_pet.id,
+        pet_type="cat",
+        pet_age=12,
+        pet_weight=4,
+        plan_data=PLAN_DATA,
+    )
+    meal = MealRecord(
+        id=str(uuid.uuid4()),
+        pet_id=test_pet.id,
+        meal_date=date.today(),
+        meal_type="breakfast",
+        meal_order=1,
+        food_name="鸡胸肉",
+        nutrition_data={"cook_method": "蒸煮"},
+    )
+    test_session.add_all([task, plan, meal])
+    await test_session.commit()
+    test_session.expunge_all()
+    return task.id, plan.id
+
+
+@pytest.mark.asyncio
+async def test_list_queries_skip_large_columns(test_session, test_user, stored, query_budget):
+    with query_budget(max_queries=4) as stats:
+        plans = await PlanService(test_session).list_diet_plans(user_id=test_user.id)
+        tasks = await TaskService(test_session).list_tasks(user_id=test_user.id)
+
+    assert plans.items and tasks.items
+    selected = " ".join(stats.shapes)
+    assert "plan_data" not in selected
+    assert "output_data" not in selected
+    assert "input_data" not in selected
+
+
+@pytest.mark.asyncio
+async def test_detail_paths_load_what_they_return(test_session, test_user, stored):
+    task_id, plan_id = stored
+    service = TaskService(test_session)
+
+    task = await service.get_task(task_id, test_user.id)
+    assert task.status == "completed"
+    assert await service.get_task_output(task_id, test_user.id) == {"report": "done"}
+
+    detail = await PlanService(test_session).get_diet_plan_detail(plan_id=plan_id, user_id=test_user.id)
+    assert detail.plan_data == PLAN_DATA
+
+
+@pytest.mark.asyncio
+async def test_meal_endpoints_after_deferral(
+    client: AsyncClient, auth_headers: dict, test_pet, stored
+):
+    today = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    assert today.status_code == 200
+    assert today.json()["data"]["meals"][0]["ai_tip"] == "蒸煮"
+
+    history = await client.get(f"/api/v1/meals/history?pet_id={test_pet.id}", headers=auth_headers)
+    assert history.status_code == 200
+    assert history.json()["data"]["items"][0]["meal_type"] == "breakfast"
+
+    week = await client.get(f"/api/v1/calendar/weekly?pet_id={test_pet.id}", headers=auth_headers)
+    assert week.status_code == 200
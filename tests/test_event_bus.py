@@ -0,0 +1,211 @@
+"""
+事件总线测试
+验证进程内快速通道：同进程订阅者直接从内存收到事件，Redis 仍保留完整副本
+"""
+import asyncio
+import json
+
+import pytest
+
+from src.api.services import event_bus
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def xadd(self, key, fields, **kwargs):
+        self.ops.append((key, fields))
+
+    def expire(self, key, seconds):
+        pass
+
+    async def execute(self):
+        if self.redis.fail_writes:
+            raise ConnectionError("redis down")
+        for key, fields in self.ops:
+            entries = self.redis.streams.setdefault(key, [])
+            entries.append((f"{len(entries) + 1}-0", fields))
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.streams = {}
+        self.fail_writes = False
+        self.xread_calls = 0
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+    async def xread(self, streams, count=100, block=0):
+        self.xread_calls += 1
+        ((key, last_id),) = streams.items()
+        entries = self.streams.get(key, [])
+        if last_id == "$":
+            await asyncio.sleep(block / 1000)
+            return []
+        last_seq = int(last_id.split("-")[0])
+        fresh = [(eid, f) for eid, f in entries if int(eid.split("-")[0]) > last_seq]
+        if not fresh:
+            await asyncio.sleep(block / 1000)
+            return []
+        return [(key, fresh)]
+
+    async def exists(self, key):
+        return int(key in self.streams)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = _FakeRedis()
+
+    async def _get_redis():
+        return fake
+
+    monkeypatch.setattr(event_bus, "get_redis", _get_redis)
+    monkeypatch.setattr(event_bus.settings, "event_bus_local_fast_path", True)
+    yield fake
+    event_bus._LOCAL_FIRST_BUS.channels.clear()
+
+
+async def _collect(task_id, **kwargs):
+    return [event async for event in event_bus.subscribe_events(task_id, **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_local_subscriber_replays_and_follows(fake_redis):
+    """订阅前已发布的事件被回放，之后的事件实时送达，sentinel 结束订阅"""
+    task_id = "task-local"
+    event_bus.open_local_channel(task_id)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 10})
+
+    consumer = asyncio.create_task(_collect(task_id, from_beginning=True))
+    await asyncio.sleep(0)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 50})
+    await event_bus.publish_end_sentinel(task_id)
+    received = await asyncio.wait_for(consumer, timeout=1)
+
+    assert [e["progress"] for e in received] == [10, 50]
+    assert fake_redis.xread_calls == 0
+    # Redis 中仍持久化了全部事件（含 sentinel），供跨 worker 与断线回放
+    assert len(fake_redis.streams[event_bus._stream_key(task_id)]) == 3
+    assert task_id not in event_bus._LOCAL_FIRST_BUS.channels
+
+
+@pytest.mark.asyncio
+async def test_local_events_match_redis_encoding(fake_redis):
+    """本地投递的是 JSON 往返后的副本，与 Redis 回放内容一致"""
+    task_id = "task-encoding"
+    event_bus.open_local_channel(task_id)
+    source = {"type": "progress", "detail": {"when": object()}}
+
+    consumer = asyncio.create_task(_collect(task_id))
+    await asyncio.sleep(0)
+    await event_bus.publish_event(task_id, source)
+    await event_bus.publish_end_sentinel(task_id)
+    (received,) = await asyncio.wait_for(consumer, timeout=1)
+
+    stored = json.loads(fake_redis.streams[event_bus._stream_key(task_id)][0][1]["data"])
+    assert received == stored
+    assert received is not source
+
+
+@pytest.mark.asyncio
+async def test_failed_persist_is_not_delivered_locally(fake_redis):
+    """Redis 写入失败的事件不会只出现在本地订阅者那里"""
+    task_id = "task-failed-write"
+    event_bus.open_local_channel(task_id)
+    fake_redis.fail_writes = True
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 1})
+    assert not event_bus._LOCAL_FIRST_BUS.channels[task_id].history
+
+
+@pytest.mark.asyncio
+async def test_publish_without_open_channel_stays_on_redis(fake_redis):
+    """未预注册通道的 worker 发布时不会自动创建本地通道"""
+    await event_bus.publish_event("task-remote", {"type": "progress", "progress": 1})
+    assert "task-remote" not in event_bus._LOCAL_FIRST_BUS.channels
+
+
+@pytest.mark.asyncio
+async def test_from_beginning_false_skips_backlog(fake_redis):
+    """from_beginning=False 的本地订阅者只接收新事件"""
+    task_id = "task-tail"
+    event_bus.open_local_channel(task_id)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 10})
+
+    consumer = asyncio.create_task(_collect(task_id, from_beginning=False))
+    await asyncio.sleep(0)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 20})
+    await event_bus.publish_end_sentinel(task_id)
+    received = await asyncio.wait_for(consumer, timeout=1)
+
+    assert [e["progress"] for e in received] == [20]
+
+
+@pytest.mark.asyncio
+async def test_flag_off_falls_back_to_xread(fake_redis, monkeypatch):
+    """关闭快速通道时即使已注册通道也统一走 XREAD"""
+    monkeypatch.setattr(event_bus.settings, "event_bus_local_fast_path", False)
+    task_id = "task-flag-off"
+    event_bus.open_local_channel(task_id)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 30})
+    await event_bus.publish_end_sentinel(task_id)
+
+    received = await asyncio.wait_for(_collect(task_id, from_beginning=True), timeout=1)
+
+    assert [e["progress"] for e in received] == [30]
+    assert fake_redis.xread_calls >= 1
+    assert task_id not in event_bus._LOCAL_FIRST_BUS.channels
+
+
+@pytest.mark.asyncio
+async def test_subscriber_after_close_replays_from_redis(fake_redis):
+    """通道关闭后到达的订阅者从 Redis 回放完整历史"""
+    task_id = "task-closed"
+    event_bus.open_local_channel(task_id)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 40})
+    await event_bus.publish_end_sentinel(task_id)
+
+    received = await asyncio.wait_for(_collect(task_id, from_beginning=True), timeout=1)
+
+    assert [e["progress"] for e in received] == [40]
+    assert fake_redis.xread_calls >= 1
+
+
+@pytest.mark.asyncio
+async def test_local_subscriber_idle_timeout_without_sentinel(fake_redis):
+    """发布方未发送 sentinel 就消失时，本地订阅者按空闲超时退出"""
+    task_id = "task-orphan"
+    event_bus.open_local_channel(task_id)
+
+    received = await asyncio.wait_for(
+        _collect(task_id, from_beginning=True, idle_timeout_seconds=0.05),
+        timeout=1,
+    )
+
+    assert received == []
+
+
+@pytest.mark.asyncio
+async def test_close_local_channel_wakes_subscribers(fake_redis):
+    """发布方退出兜底关闭通道时，等待中的订阅者立即结束"""
+    task_id = "task-cancelled"
+    event_bus.open_local_channel(task_id)
+
+    consumer = asyncio.create_task(_collect(task_id, from_beginning=True))
+    await asyncio.sleep(0)
+    event_bus.close_local_channel(task_id)
+
+    assert await asyncio.wait_for(consumer, timeout=1) == []
+    assert task_id not in event_bus._LOCAL_FIRST_BUS.channels
+
+
+@pytest.mark.asyncio
+async def test_stream_exists_uses_local_history(fake_redis):
+    """本地通道已有历史时无需查询 Redis"""
+    task_id = "task-exists"
+    event_bus.open_local_channel(task_id)
+    await event_bus.publish_event(task_id, {"type": "progress", "progress": 1})
+    assert await event_bus.stream_exists(task_id) is True
@@ -0,0 +1,63 @@
+"""
+有界线程池测试
+验证 CPU / I/O 线程池互相隔离、并发受限，并保留 contextvars
+"""
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from src.utils import executors
+
+
+@pytest.fixture(autouse=True)
+def _fresh_executors(monkeypatch):
+    monkeypatch.setattr(executors.settings, "executor_cpu_workers", 1)
+    monkeypatch.setattr(executors.settings, "executor_io_workers", 2)
+    executors.shutdown_executors()
+    yield
+    executors.shutdown_executors()
+
+
+@pytest.mark.asyncio
+async def test_pools_are_isolated_and_bounded():
+    """CPU 池排满时 I/O 池任务不受影响；I/O 池并发不超过上限"""
+    release = threading.Event()
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _io_task():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return threading.current_thread().name
+
+    cpu_block = asyncio.ensure_future(executors.run_cpu_bound(release.wait, 5))
+    names = await asyncio.gather(*(executors.run_blocking_io(_io_task) for _ in range(6)))
+    release.set()
+    await cpu_block
+
+    assert peak <= 2
+    assert all(name.startswith("pf-io") for name in names)
+    assert executors.executor_stats()[executors.CPU_EXECUTOR]["max_workers"] == 1
+
+
+@pytest.mark.asyncio
+async def test_context_is_propagated():
+    """与 asyncio.to_thread 一样复制 contextvars"""
+    var = contextvars.ContextVar("request_id")
+    var.set("req-1")
+
+    assert await executors.run_cpu_bound(var.get) == "req-1"
+
+
+def test_unknown_executor_rejected():
+    with pytest.raises(KeyError):
+        executors.get_executor("gpu")
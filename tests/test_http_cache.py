@@ -0,0 +1,172 @@
+"""
+条件请求与预压缩响应体缓存测试
+验证 ETag / 304、按编码缓存的预压缩响应体、版本变化后的 ETag 更新
+"""
+import uuid
+
+import pytest
+import zstandard
+
+from src.api.config import settings
+from src.api.services.ingredient_service import IngredientService
+from src.api.utils import http_cache
+from src.api.utils.http_cache import EncodedBodyCache, encoded_etag, etag_matches, negotiate_encoding
+from src.db.models import DietPlan, Ingredient
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = EncodedBodyCache(settings.response_cache_max_bytes)
+    monkeypatch.setattr(http_cache, "body_cache", cache)
+    monkeypatch.setattr(settings, "response_precompress_encodings", ["zstd", "gzip"])
+    return cache
+
+
+@pytest.fixture
+def list_calls(monkeypatch):
+    calls = []
+    original = IngredientService.list_ingredients
+
+    async def _spy(self, **kwargs):
+        calls.append(kwargs)
+        return await original(self, **kwargs)
+
+    monkeypatch.setattr(IngredientService, "list_ingredients", _spy)
+    return calls
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip, deflate, br, zstd") == "zstd"
+    assert negotiate_encoding("gzip;q=0.5, zstd;q=0") == "gzip"
+    assert negotiate_encoding("*") == "zstd"
+    assert negotiate_encoding("deflate") == "identity"
+    assert negotiate_encoding(None) == "identity"
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_encoded_etag():
+    assert encoded_etag('"a"', "identity") == '"a"'
+    assert encoded_etag('"a"', "br") == '"a-br"'
+
+
+def test_body_cache_evicts_by_bytes():
+    cache = EncodedBodyCache(max_bytes=10)
+    cache.put('"a"', "gzip", b"12345")
+    cache.put('"b"', "gzip", b"12345")
+    cache.get('"a"', "gzip")
+    cache.put('"c"', "gzip", b"12345")
+
+    assert cache.get('"b"', "gzip") is None
+    assert cache.get('"a"', "gzip") == b"12345"
+    # 单个超过上限的响应体不缓存
+    cache.put('"d"', "gzip", b"x" * 11)
+    assert cache.get('"d"', "gzip") is None
+
+
+@pytest.mark.asyncio
+async def test_ingredient_list_conditional(client, auth_headers, test_session, test_user, list_calls):
+    test_session.add_all([
+        Ingredient(
+            id=str(uuid.uuid4()), name=f"鸡胸肉-{i}", category="肉类", sub_category="禽肉",
+            is_system=True, user_id=None, note="去皮生重",
+        )
+        for i in range(20)
+    ])
+    await test_session.commit()
+
+    first = await client.get("/api/v1/ingredients/", headers={**auth_headers, "Accept-Encoding": "zstd"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "zstd"
+    assert first.headers["vary"] == "Accept-Encoding"
+    etag = first.headers["etag"]
+    assert first.json()["data"]["total"] >= 20
+
+    not_modified = await client.get(
+        "/api/v1/ingredients/", headers={**auth_headers, "Accept-Encoding": "zstd", "If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+    # 同一版本换编码：复用已序列化的响应体，只压缩一次；字节不同，ETag 也不同
+    gzipped = await client.get("/api/v1/ingredients/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.json() == first.json()
+    assert len(list_calls) == 1
+    assert etag.endswith('-zstd"')
+    assert gzipped.headers["etag"] == etag.replace("-zstd", "-gzip")
+
+    # 另一种编码的 ETag 不能让这次协商出的表示 304
+    mismatched = await client.get(
+        "/api/v1/ingredients/", headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": etag}
+    )
+    assert mismatched.status_code == 200
+    assert mismatched.headers["etag"] == gzipped.headers["etag"]
+
+    # 查询参数不同，ETag 不同
+    filtered = await client.get("/api/v1/ingredients/?limit=5", headers=auth_headers)
+    assert filtered.headers["etag"] != etag
+
+    created = await client.post(
+        "/api/v1/ingredients/",
+        json={"name": "自制鸭肉", "category": "肉类", "sub_category": "禽肉"},
+        headers=auth_headers,
+    )
+    assert created.status_code == 200
+    changed = await client.get("/api/v1/ingredients/", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_plan_detail_conditional(client, auth_headers, second_auth_headers, test_session, test_user):
+    plan = DietPlan(
+        id=str(uuid.uuid4()), user_id=test_user.id, pet_type="cat", pet_age=12, pet_weight=4,
+        plan_data={"ai_suggestions": "少量多餐" * 200},
+    )
+    test_session.add(plan)
+    await test_session.commit()
+
+    response = await client.get(f"/api/v1/plans/{plan.id}", headers={**auth_headers, "Accept-Encoding": "zstd"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.json()["data"]["plan_data"]["ai_suggestions"].startswith("少量多餐")
+    cached = http_cache.body_cache.get(response.headers["etag"].replace("-zstd", ""), "zstd")
+    assert zstandard.ZstdDecompressor().decompress(cached) == response.content
+
+    not_modified = await client.get(
+        f"/api/v1/plans/{plan.id}",
+        headers={**auth_headers, "Accept-Encoding": "zstd", "If-None-Match": response.headers["etag"]},
+    )
+    assert not_modified.status_code == 304
+
+    # 归属校验仍然生效
+    other = await client.get(
+        f"/api/v1/plans/{plan.id}", headers={**second_auth_headers, "If-None-Match": response.headers["etag"]}
+    )
+    assert other.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_task_status_etag_follows_progress(client, auth_headers, test_session, test_task):
+    first = await client.get(f"/api/v1/tasks/{test_task.id}", headers=auth_headers)
+    etag = first.headers["etag"]
+    # 小响应体不压缩
+    assert "content-encoding" not in first.headers
+
+    polled = await client.get(f"/api/v1/tasks/{test_task.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert polled.status_code == 304
+
+    test_task.progress = 40
+    test_task.status = "running"
+    await test_session.commit()
+
+    progressed = await client.get(f"/api/v1/tasks/{test_task.id}", headers={**auth_headers, "If-None-Match": etag})
+    assert progressed.status_code == 200
+    assert progressed.json()["data"]["progress"] == 40
@@ -0,0 +1,139 @@
+"""
+图片衍生尺寸流水线测试
+验证宽度选择、衍生图命名与地址、后台生成写回 MinIO、替换头像时清理旧衍生图，
+以及（安装 Pillow 时）真实的缩放编码
+"""
+import io
+
+import pytest
+
+import src.api.services.image_derivatives as image_derivatives_module
+from src.api.infrastructure.object_cache import DiskObjectCache
+from src.api.services.image_derivatives import (
+    derivative_object_name,
+    derivative_urls,
+    generate_derivatives,
+    pick_derivative_width,
+    schedule_derivatives,
+)
+
+
+@pytest.fixture(autouse=True)
+def widths(monkeypatch):
+    monkeypatch.setattr(image_derivatives_module.settings, "image_derivative_widths", [256, 64, 128])
+
+
+class _Storage:
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.content_types = {}
+        self.deleted = []
+
+    async def adownload_file(self, object_name):
+        return self.objects.get(object_name)
+
+    async def aupload_file(self, object_name, file_data, content_type="application/octet-stream", metadata=None):
+        self.objects[object_name] = file_data
+        self.content_types[object_name] = content_type
+        return True
+
+    async def adelete_file(self, object_name):
+        self.deleted.append(object_name)
+        self.objects.pop(object_name, None)
+        return True
+
+
+def _fake_render(data, widths, fmt, quality):
+    return "image/webp", {w: f"{fmt}-{w}-{quality}".encode() for w in widths if w < 200}
+
+
+async def _run_inline(func, *args):
+    return func(*args)
+
+
+def test_pick_derivative_width():
+    assert pick_derivative_width(None) is None
+    assert pick_derivative_width(1) == 64
+    assert pick_derivative_width(64) == 64
+    assert pick_derivative_width(65) == 128
+    assert pick_derivative_width(257) is None
+
+
+def test_derivative_names_and_urls(monkeypatch):
+    assert derivative_object_name("avatars/pets/p/a.png", 64) == "avatars/pets/p/a.png@w64"
+    assert derivative_urls("http://test/a.png") == {
+        64: "http://test/a.png?w=64",
+        128: "http://test/a.png?w=128",
+        256: "http://test/a.png?w=256",
+    }
+    assert derivative_urls(None) is None
+
+    monkeypatch.setattr(image_derivatives_module.settings, "image_derivative_widths", [])
+    assert derivative_urls("http://test/a.png") is None
+
+
+@pytest.mark.asyncio
+async def test_generate_writes_derivatives(monkeypatch):
+    monkeypatch.setattr(image_derivatives_module, "run_in_image_process", _run_inline)
+    monkeypatch.setattr(image_derivatives_module, "render_derivatives", _fake_render)
+    storage = _Storage({"a.png": b"original"})
+
+    written = await generate_derivatives(storage, "a.png")
+
+    # 原图比 256 窄时不生成（不放大）
+    assert written == {64: "a.png@w64", 128: "a.png@w128"}
+    assert storage.objects["a.png@w64"] == b"webp-64-80"
+    assert storage.content_types["a.png@w128"] == "image/webp"
+
+
+@pytest.mark.asyncio
+async def test_generate_skips_without_pillow(monkeypatch):
+    def _no_pillow(*args):
+        raise ImportError("No module named 'PIL'")
+
+    monkeypatch.setattr(image_derivatives_module, "run_in_image_process", _run_inline)
+    monkeypatch.setattr(image_derivatives_module, "render_derivatives", _no_pillow)
+    storage = _Storage({"a.png": b"original"})
+
+    assert await generate_derivatives(storage, "a.png") == {}
+    assert list(storage.objects) == ["a.png"]
+
+
+@pytest.mark.asyncio
+async def test_schedule_replaces_old_derivatives(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_derivatives_module, "run_in_image_process", _run_inline)
+    monkeypatch.setattr(image_derivatives_module, "render_derivatives", _fake_render)
+    cache = DiskObjectCache(tmp_path, max_bytes=1024)
+    temp_path = cache.temp_path()
+    with open(temp_path, "wb") as f:
+        f.write(b"old")
+    cache.commit("old.png@w64", temp_path, '"old"', "image/webp", 3)
+    storage = _Storage({"new.png": b"original", "old.png@w64": b"old"})
+
+    task = schedule_derivatives(storage, "new.png", cache, replaced_object_name="old.png")
+    await task
+
+    assert storage.deleted == ["old.png@w64", "old.png@w128", "old.png@w256"]
+    assert cache.get("old.png@w64") is None
+    assert "new.png@w64" in storage.objects
+
+
+def test_schedule_disabled(monkeypatch, tmp_path):
+    monkeypatch.setattr(image_derivatives_module.settings, "image_derivative_widths", [])
+    assert schedule_derivatives(_Storage(), "a.png", DiskObjectCache(tmp_path, 0)) is None
+
+
+def test_render_derivatives_with_pillow():
+    Image = pytest.importorskip("PIL.Image")
+    from src.utils.images import render_derivatives
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 150), "red").save(buffer, format="PNG")
+
+    content_type, rendered = render_derivatives(buffer.getvalue(), (64, 128, 512), "webp", 80)
+
+    assert content_type == "image/webp"
+    assert set(rendered) == {64, 128}
+    with Image.open(io.BytesIO(rendered[64])) as thumb:
+        assert thumb.format == "WEBP"
+        assert thumb.size == (64, 32)
@@ -0,0 +1,207 @@
+"""
+meal_records 分区与冷数据归档测试
+分区 DDL 只在 PostgreSQL 上生效，这里覆盖月份计算、非 PostgreSQL 空操作、
+按批导出，以及读路径按归档目录确定边界、透明合并归档月份（Parquet 读写需要 pyarrow）。
+"""
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text
+
+from src.api.config import settings
+from src.api.services import meal_archive
+from src.api.services.meal_archive import archive_object_name
+from src.api.services.meal_service import MealService
+from src.db.models import MealRecord, MealRecordArchive, MealTemplate
+from src.db.partitions import (
+    MealPartition,
+    add_months,
+    ensure_meal_partitions,
+    list_meal_partitions,
+    partition_month,
+    partition_name,
+)
+
+OLD_MONTH = date(2024, 3, 1)
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects = {}
+        self.downloads = 0
+
+    async def aupload_file(self, object_name, data, content_type="application/octet-stream", metadata=None):
+        self.objects[object_name] = data
+        return True
+
+    async def adownload_file(self, object_name):
+        self.downloads += 1
+        return self.objects.get(object_name)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    fake = _FakeStorage()
+    monkeypatch.setattr(meal_archive.meal_archiver, "_storage", fake)
+    monkeypatch.setattr(meal_archive.meal_archiver, "_cache", OrderedDict())
+    monkeypatch.setattr(meal_archive.meal_archiver, "_boundary_expires_at", 0.0)
+    monkeypatch.setattr(settings, "meal_archive_after_months", 12)
+    return fake
+
+
+def _archived_row(pet_id: str, day: int, order: int, **overrides) -> dict:
+    row = {
+        "id": str(uuid.uuid4()),
+        "pet_id": pet_id,
+        "plan_id": None,
+        "template_id": None,
+        "meal_date": OLD_MONTH.replace(day=day),
+        "meal_type": "breakfast" if order == 1 else "dinner",
+        "meal_order": order,
+        "food_name": "鸡胸肉",
+        "description": "",
+        "calories": 200,
+        "protein": Decimal("20.50"),
+        "fat": Decimal("5.00"),
+        "carbohydrates": Decimal("10.00"),
+        "dietary_fiber": Decimal("1.00"),
+        "is_completed": True,
+        "completed_at": datetime(2024, 3, day, 8, tzinfo=timezone.utc),
+        "notes": None,
+        "nutrition_data": None,
+        "created_at": datetime(2024, 3, day, tzinfo=timezone.utc),
+        "updated_at": datetime(2024, 3, day, tzinfo=timezone.utc),
+    }
+    row.update(overrides)
+    return row
+
+
+def test_month_helpers():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert partition_name(date(2026, 10, 1)) == "meal_records_p202610"
+    assert partition_month("meal_records_p202610") == date(2026, 10, 1)
+    assert partition_month("meal_records_default") is None
+    assert archive_object_name(OLD_MONTH) == "archive/meal_records/2024/2024-03.parquet"
+
+
+@pytest.mark.asyncio
+async def test_archive_boundary_follows_catalog(test_session, storage, monkeypatch):
+    archiver = meal_archive.meal_archiver
+    assert await archiver.archive_boundary(test_session) is None
+
+    # 脚本用比配置更小的月数归档：边界按目录里实际归档到的月份，而不是 MEAL_ARCHIVE_AFTER_MONTHS
+    monkeypatch.setattr(settings, "meal_archive_after_months", 24)
+    recent = add_months(date.today().replace(day=1), -2)
+    test_session.add_all([
+        MealRecordArchive(month=OLD_MONTH, object_name="", row_count=0, size_bytes=0),
+        MealRecordArchive(month=recent, object_name="", row_count=0, size_bytes=0),
+    ])
+    await test_session.commit()
+
+    # 进程内缓存到期前沿用旧边界
+    assert await archiver.archive_boundary(test_session) is None
+    monkeypatch.setattr(archiver, "_boundary_expires_at", 0.0)
+    assert await archiver.archive_boundary(test_session) == add_months(recent, 1)
+
+
+@pytest.mark.asyncio
+async def test_partition_maintenance_is_noop_outside_postgres(test_session):
+    conn = await test_session.connection()
+    assert await ensure_meal_partitions(conn, months_ahead=3) == []
+    assert await list_meal_partitions(conn) == []
+
+
+@pytest.mark.asyncio
+async def test_recent_reads_skip_archive_catalog(test_session, test_pet, storage, query_budget):
+    service = MealService(test_session)
+    # 首次读取加载归档边界，之后缓存期内不再查归档目录
+    await service.get_schedule(test_pet.id, date.today(), date.today())
+    with query_budget(max_queries=5) as stats:
+        await service.get_schedule(test_pet.id, date.today(), date.today())
+    assert not any("meal_record_archives" in shape for shape in stats.shapes)
+
+
+@pytest.mark.asyncio
+async def test_unreadable_archive_degrades_to_hot_rows(test_session, test_pet, storage):
+    # 目录里有记录但对象缺失：读路径告警并只返回热表数据
+    test_session.add(MealRecordArchive(
+        month=OLD_MONTH, object_name=archive_object_name(OLD_MONTH), row_count=2, size_bytes=100,
+    ))
+    await test_session.commit()
+
+    meals = await MealService(test_session).get_schedule(test_pet.id, date(2024, 1, 1), date.today())
+    assert meals == []
+
+
+@pytest.mark.asyncio
+async def test_archived_month_served_transparently(test_session, test_pet, storage):
+    pytest.importorskip("pyarrow")
+    payload = {"cook_method": "蒸煮", "food_items": [{"name": "鸡胸肉"}]}
+    template = MealTemplate(id="t" * 64, payload=payload)
+    rows = [
+        _archived_row(test_pet.id, 2, 1, template_id=template.id),
+        _archived_row(test_pet.id, 2, 2, nutrition_data={"cook_method": "生食"}, is_completed=False),
+        _archived_row(str(uuid.uuid4()), 2, 1),
+    ]
+    data = meal_archive.encode_month_rows(rows)
+    storage.objects[archive_object_name(OLD_MONTH)] = data
+    test_session.add_all([
+        template,
+        MealRecordArchive(
+            month=OLD_MONTH, object_name=archive_object_name(OLD_MONTH), row_count=3, size_bytes=len(data),
+        ),
+    ])
+    await test_session.commit()
+
+    service = MealService(test_session)
+    meals = await service.get_schedule(test_pet.id, date(2024, 3, 1), date(2024, 3, 31), with_details=True)
+    assert [(meal.meal_date, meal.meal_order) for meal in meals] == [(date(2024, 3, 2), 1), (date(2024, 3, 2), 2)]
+    assert meals[0].protein == 20.5
+    assert meals[0].nutrition_data == payload
+    assert meals[1].nutrition_data == {"cook_method": "生食"}
+
+    analysis_start = date(2024, 3, 2)
+    again = await service.get_schedule(test_pet.id, analysis_start, analysis_start)
+    assert len(again) == 2
+    assert storage.downloads == 1
+
+
+@pytest.mark.asyncio
+async def test_archive_partition_streams_in_batches(test_session, test_pet, storage, monkeypatch):
+    pytest.importorskip("pyarrow")
+    # SQLite 没有分区：用同结构的普通表代替月份分区，摘除改为直接删表
+    partition = MealPartition(name=partition_name(OLD_MONTH), month=OLD_MONTH)
+    conn = await test_session.connection()
+    await conn.execute(text(f'CREATE TABLE "{partition.name}" AS SELECT * FROM meal_records WHERE 0'))
+    test_session.add_all([
+        MealRecord(**_archived_row(test_pet.id, day, order))
+        for day in (3, 2) for order in (2, 1)
+    ])
+    await test_session.flush()
+    await conn.execute(text(f'INSERT INTO "{partition.name}" SELECT * FROM meal_records'))
+    await conn.execute(text("DELETE FROM meal_records"))
+
+    async def _drop(conn, partition):
+        await conn.execute(text(f'DROP TABLE "{partition.name}"'))
+
+    writes = []
+    write = meal_archive.MonthArchiveWriter.write
+    monkeypatch.setattr(meal_archive, "detach_meal_partition", _drop)
+    monkeypatch.setattr(meal_archive, "ARCHIVE_BATCH_ROWS", 3)
+    monkeypatch.setattr(
+        meal_archive.MonthArchiveWriter, "write", lambda self, rows: writes.append(len(rows)) or write(self, rows)
+    )
+
+    archive = await meal_archive.meal_archiver.archive_partition(test_session, partition)
+
+    assert writes == [3, 1]
+    assert archive.row_count == 4
+    stored = (await test_session.execute(select(MealRecordArchive))).scalar_one()
+    assert stored.object_name == archive_object_name(OLD_MONTH)
+
+    meals = await MealService(test_session).get_schedule(test_pet.id, date(2024, 3, 1), date(2024, 3, 31))
+    assert [(meal.meal_date.day, meal.meal_order) for meal in meals] == [(2, 1), (2, 2), (3, 1), (3, 2)]
@@ -0,0 +1,311 @@
+"""
+虚拟餐食排期测试
+应用计划只切换活跃状态；读接口由活跃计划 + active_start_date 展开，
+完成打卡时才落一条稀疏 MealRecord。
+"""
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from src.api.config import settings
+from src.api.services.meal_service import (
+    SCHEDULE_DAYS,
+    MealService,
+    parse_virtual_meal_id,
+    virtual_meal_id,
+)
+from src.db.models import DietPlan, MealRecord
+
+
+def _meal(name: str, protein: float, fat: float = 5, carbohydrates: float = 10) -> dict:
+    return {
+        "food_items": [
+            {
+                "name": name,
+                "amount": "100g",
+                "macro_nutrients": {"protein": protein, "fat": fat, "carbohydrates": carbohydrates},
+            },
+        ],
+        "cook_method": "蒸煮",
+        "recommend_reason": "高蛋白",
+    }
+
+
+PLAN_DATA = {
+    "pet_diet_plan": {
+        "monthly_diet_plan": [
+            {"weekly_diet_plan": {"daily_diet_plans": [_meal("鸡胸肉", 20), _meal("三文鱼", 18)]}},
+            {"weekly_diet_plan": {"daily_diet_plans": [_meal("牛肉", 22), _meal("鸭肉", 16)]}},
+        ]
+    }
+}
+MEALS_PER_DAY = 2
+
+
+@pytest.fixture
+async def diet_plan(test_session, test_user, test_pet):
+    plan = DietPlan(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        pet_id=test_pet.id,
+        pet_type="cat",
+        pet_age=12,
+        pet_weight=4,
+        plan_data=PLAN_DATA,
+    )
+    test_session.add(plan)
+    await test_session.commit()
+    return plan
+
+
+@pytest.fixture
+async def applied_plan(client: AsyncClient, auth_headers: dict, diet_plan):
+    response = await client.post(f"/api/v1/plans/{diet_plan.id}/apply", headers=auth_headers)
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+async def _meal_record_count(test_session) -> int:
+    return (await test_session.execute(select(func.count()).select_from(MealRecord))).scalar()
+
+
+def test_virtual_meal_id_roundtrip():
+    plan_id = str(uuid.uuid4())
+    meal_id = virtual_meal_id(plan_id, date(2026, 10, 19), 2)
+    assert parse_virtual_meal_id(meal_id) == (plan_id, date(2026, 10, 19), 2)
+    assert parse_virtual_meal_id(str(uuid.uuid4())) is None
+    assert parse_virtual_meal_id("v.x.notadate.1") is None
+
+
+@pytest.mark.asyncio
+async def test_apply_writes_no_meal_records(test_session, applied_plan):
+    assert applied_plan["meals_created"] == SCHEDULE_DAYS * MEALS_PER_DAY
+    assert await _meal_record_count(test_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_apply_materialized_mode(monkeypatch, client, auth_headers, test_session, diet_plan):
+    monkeypatch.setattr(settings, "meal_schedule_mode", "materialized")
+    response = await client.post(f"/api/v1/plans/{diet_plan.id}/apply", headers=auth_headers)
+    assert response.json()["data"]["meals_created"] == SCHEDULE_DAYS * MEALS_PER_DAY
+    assert await _meal_record_count(test_session) == SCHEDULE_DAYS * MEALS_PER_DAY
+
+    # 已有持久化行时不再重复展开虚拟餐食
+    meals = await MealService(test_session).get_schedule(
+        diet_plan.pet_id, date.today(), date.today() + timedelta(days=6)
+    )
+    assert len(meals) == 7 * MEALS_PER_DAY
+    assert all(isinstance(meal, MealRecord) for meal in meals)
+
+
+@pytest.mark.asyncio
+async def test_today_meals_expanded_from_plan(client, auth_headers, test_pet, applied_plan):
+    response = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    assert response.status_code == 200
+    meals = response.json()["data"]["meals"]
+    assert [meal["name"] for meal in meals] == ["鸡胸肉", "三文鱼"]
+    assert [meal["type"] for meal in meals] == ["breakfast", "lunch"]
+    assert all(parse_virtual_meal_id(meal["id"]) for meal in meals)
+    assert meals[0]["ai_tip"] == "高蛋白"
+    assert meals[0]["food_items"][0]["name"] == "鸡胸肉"
+    assert meals[0]["calories"] == 20 * 4 + 5 * 9 + 10 * 4
+
+
+@pytest.mark.asyncio
+async def test_second_week_and_window_end(test_session, test_pet, applied_plan):
+    service = MealService(test_session)
+    today = date.today()
+
+    week_two = await service.get_schedule(test_pet.id, today + timedelta(days=7), today + timedelta(days=7))
+    assert [meal.food_name for meal in week_two] == ["牛肉", "鸭肉"]
+
+    # 第 5 周沿用最后一周，排期周期之后不再有餐食
+    last_day = today + timedelta(days=SCHEDULE_DAYS - 1)
+    assert len(await service.get_schedule(test_pet.id, last_day, last_day)) == MEALS_PER_DAY
+    after = today + timedelta(days=SCHEDULE_DAYS)
+    assert await service.get_schedule(test_pet.id, after, after) == []
+
+
+@pytest.mark.asyncio
+async def test_complete_virtual_meal_persists_sparse_row(
+    client, auth_headers, test_session, test_pet, applied_plan
+):
+    today = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    meal_id = today.json()["data"]["meals"][0]["id"]
+
+    response = await client.post(f"/api/v1/meals/{meal_id}/complete?notes=吃光了", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["data"]["is_completed"] is True
+
+    rows = (await test_session.execute(
+        select(MealRecord.food_name, MealRecord.notes, MealRecord.nutrition_data)
+    )).all()
+    assert rows == [("鸡胸肉", "吃光了", None)]
+
+    # 再次完成同一虚拟餐食不会重复落库
+    await client.post(f"/api/v1/meals/{meal_id}/complete", headers=auth_headers)
+    assert await _meal_record_count(test_session) == 1
+
+    today = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    meals = today.json()["data"]["meals"]
+    assert len(meals) == MEALS_PER_DAY
+    assert meals[0]["is_completed"] is True
+    assert meals[0]["notes"] == "吃光了"
+    assert meals[0]["food_items"][0]["name"] == "鸡胸肉"
+    assert meals[1]["is_completed"] is False
+
+    response = await client.delete(f"/api/v1/meals/{meals[0]['id']}/complete", headers=auth_headers)
+    assert response.status_code == 200
+    today = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    assert today.json()["data"]["meals"][0]["is_completed"] is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_materialize_reuses_row(monkeypatch, test_session, test_user, diet_plan, applied_plan):
+    meal_id = virtual_meal_id(diet_plan.id, date.today(), 1)
+    first = await MealService(test_session).complete_meal(test_user.id, meal_id)
+
+    # 模拟并发：本请求查询时该餐次还没落库，插入前另一个请求已经写入
+    lookup = MealService._meal_at_slot
+    calls = []
+
+    async def _stale_first_lookup(self, *args):
+        calls.append(args)
+        return None if len(calls) == 1 else await lookup(self, *args)
+
+    monkeypatch.setattr(MealService, "_meal_at_slot", _stale_first_lookup)
+    second = await MealService(test_session).complete_meal(test_user.id, meal_id, notes="又吃了一次")
+
+    assert second.id == first.id
+    assert second.notes == "又吃了一次"
+    assert await _meal_record_count(test_session) == 1
+
+
+@pytest.mark.asyncio
+async def test_materialized_apply_keeps_completed_slot(
+    monkeypatch, client, auth_headers, test_session, test_user, diet_plan, applied_plan
+):
+    completed = await MealService(test_session).complete_meal(
+        test_user.id, virtual_meal_id(diet_plan.id, date.today(), 1)
+    )
+
+    monkeypatch.setattr(settings, "meal_schedule_mode", "materialized")
+    response = await client.post(f"/api/v1/plans/{diet_plan.id}/apply", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["data"]["meals_created"] == SCHEDULE_DAYS * MEALS_PER_DAY - 1
+    assert await _meal_record_count(test_session) == SCHEDULE_DAYS * MEALS_PER_DAY
+    slot = await MealService(test_session)._meal_at_slot(diet_plan.pet_id, date.today(), 1)
+    assert slot.id == completed.id
+
+
+@pytest.mark.asyncio
+async def test_complete_virtual_meal_rejects_other_users_and_stale_ids(
+    client, auth_headers, test_session, diet_plan, applied_plan
+):
+    outside = virtual_meal_id(diet_plan.id, date.today() + timedelta(days=SCHEDULE_DAYS), 1)
+    response = await client.post(f"/api/v1/meals/{outside}/complete", headers=auth_headers)
+    assert response.status_code == 404
+
+    service = MealService(test_session)
+    meal_id = virtual_meal_id(diet_plan.id, date.today(), 1)
+    assert await service.complete_meal(str(uuid.uuid4()), meal_id) is None
+    assert await _meal_record_count(test_session) == 0
+
+
+@pytest.mark.asyncio
+async def test_weekly_calendar_includes_virtual_meals(client, auth_headers, test_pet, applied_plan):
+    start = date.today().isoformat()
+    response = await client.get(
+        f"/api/v1/calendar/weekly?pet_id={test_pet.id}&start_date={start}", headers=auth_headers
+    )
+    days = response.json()["data"]["days"]
+    assert all(day["has_plan"] for day in days)
+    assert all(len(day["meals"]) == MEALS_PER_DAY for day in days)
+
+
+@pytest.mark.asyncio
+async def test_history_merges_virtual_and_persisted(
+    client, auth_headers, test_session, test_pet, applied_plan
+):
+    # 计划窗口之前的一条旧记录
+    test_session.add(MealRecord(
+        id=str(uuid.uuid4()),
+        pet_id=test_pet.id,
+        meal_date=date.today() - timedelta(days=3),
+        meal_type="breakfast",
+        meal_order=1,
+        food_name="旧记录",
+        is_completed=True,
+    ))
+    await test_session.commit()
+    await client.post(
+        f"/api/v1/meals/{virtual_meal_id(applied_plan['plan_id'], date.today(), 2)}/complete",
+        headers=auth_headers,
+    )
+
+    expected = SCHEDULE_DAYS * MEALS_PER_DAY + 1
+    seen, cursor = [], None
+    while True:
+        url = f"/api/v1/meals/history?pet_id={test_pet.id}&page_size=7"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = (await client.get(url, headers=auth_headers)).json()["data"]
+        assert data["total"] == expected
+        seen.extend(data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == expected
+    assert len({item["id"] for item in seen}) == expected
+    keys = [(item["meal_date"], item["meal_type"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert seen[-1]["meal_date"] == (date.today() - timedelta(days=3)).isoformat()
+    completed = [(item["meal_date"], item["meal_type"]) for item in seen if item["is_completed"]]
+    assert sorted(completed) == sorted([
+        (date.today().isoformat(), "lunch"),
+        ((date.today() - timedelta(days=3)).isoformat(), "breakfast"),
+    ])
+
+    # OFFSET 翻页与游标翻页结果一致
+    page_three = (await client.get(
+        f"/api/v1/meals/history?pet_id={test_pet.id}&page=3&page_size=7", headers=auth_headers
+    )).json()["data"]["items"]
+    assert [item["id"] for item in page_three] == [item["id"] for item in seen[14:21]]
+
+
+@pytest.mark.asyncio
+async def test_fractional_macros_round_calories(client, auth_headers, test_session, test_user, test_pet):
+    plan = DietPlan(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        pet_id=test_pet.id,
+        pet_type="cat",
+        pet_age=12,
+        pet_weight=4,
+        plan_data={
+            "pet_diet_plan": {
+                "monthly_diet_plan": [
+                    {"weekly_diet_plan": {"daily_diet_plans": [
+                        _meal("鸡胸肉", 20.7, fat=5.3, carbohydrates=10.1),
+                    ]}},
+                ]
+            }
+        },
+    )
+    test_session.add(plan)
+    await test_session.commit()
+    assert (await client.post(f"/api/v1/plans/{plan.id}/apply", headers=auth_headers)).status_code == 200
+
+    expected = round(20.7 * 4 + 5.3 * 9 + 10.1 * 4)
+
+    today = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    assert today.status_code == 200
+    assert today.json()["data"]["meals"][0]["calories"] == expected
+
+    history = await client.get(f"/api/v1/meals/history?pet_id={test_pet.id}&page_size=3", headers=auth_headers)
+    assert history.status_code == 200
+    assert all(item["calories"] == expected for item in history.json()["data"]["items"])
@@ -0,0 +1,124 @@
+"""
+餐食模板去重测试
+营养详情按内容哈希存入 meal_templates，MealRecord 只保留 template_id 与顶级营养字段。
+"""
+import importlib.util
+import logging
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import func, select
+
+from src.api.config import settings
+from src.api.services.meal_service import MealService, meal_template_id
+from src.db.models import DietPlan, MealRecord, MealTemplate
+from src.db.session import Base
+
+from tests.test_meal_schedule import MEALS_PER_DAY, PLAN_DATA
+
+MIGRATION = (
+    Path(__file__).resolve().parent.parent
+    / "alembic" / "versions" / "20261019_1200_a7b8c9d0e1f2_add_meal_templates.py"
+)
+
+
+async def _count(test_session, model) -> int:
+    return (await test_session.execute(select(func.count()).select_from(model))).scalar()
+
+
+@pytest.fixture
+async def materialized_plan(monkeypatch, client, auth_headers, test_session, test_user, test_pet):
+    monkeypatch.setattr(settings, "meal_schedule_mode", "materialized")
+    plan = DietPlan(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        pet_id=test_pet.id,
+        pet_type="cat",
+        pet_age=12,
+        pet_weight=4,
+        plan_data=PLAN_DATA,
+    )
+    test_session.add(plan)
+    await test_session.commit()
+    response = await client.post(f"/api/v1/plans/{plan.id}/apply", headers=auth_headers)
+    assert response.status_code == 200
+    return plan
+
+
+@pytest.mark.asyncio
+async def test_materialized_records_reference_templates(test_session, materialized_plan):
+    # 两周 × 每天两餐 → 4 个模板，30 天的记录全部引用模板
+    assert await _count(test_session, MealTemplate) == 2 * MEALS_PER_DAY
+    rows = (await test_session.execute(
+        select(MealRecord.template_id, MealRecord.nutrition_data, MealRecord.protein)
+    )).all()
+    assert len(rows) == 30 * MEALS_PER_DAY
+    assert all(template_id and nutrition is None for template_id, nutrition, _ in rows)
+    assert all(protein is not None for *_, protein in rows)
+
+
+@pytest.mark.asyncio
+async def test_reapply_reuses_templates(client, auth_headers, test_session, materialized_plan):
+    await client.post(f"/api/v1/plans/{materialized_plan.id}/apply", headers=auth_headers)
+    assert await _count(test_session, MealTemplate) == 2 * MEALS_PER_DAY
+
+
+@pytest.mark.asyncio
+async def test_details_loaded_from_templates(
+    client, auth_headers, test_session, test_pet, materialized_plan, query_budget
+):
+    response = await client.get(f"/api/v1/meals/today?pet_id={test_pet.id}", headers=auth_headers)
+    meals = response.json()["data"]["meals"]
+    assert [meal["food_items"][0]["name"] for meal in meals] == ["鸡胸肉", "三文鱼"]
+    assert meals[0]["ai_tip"] == "高蛋白"
+
+    # 模板一次性批量加载，不随餐食数增长
+    test_session.expunge_all()
+    service = MealService(test_session)
+    with query_budget(max_queries=5) as stats:
+        meals = await service.get_schedule(
+            test_pet.id, date.today(), date.today() + timedelta(days=13), with_details=True
+        )
+    assert len(meals) == 14 * MEALS_PER_DAY
+    assert all(meal.nutrition_data["cook_method"] == "蒸煮" for meal in meals)
+    assert sum(n for shape, n in stats.shapes.items() if "FROM meal_templates" in shape) == 1
+
+
+def test_migration_deduplicates_inline_nutrition_data(caplog):
+    spec = importlib.util.spec_from_file_location("meal_templates_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    payload = {"food_items": [{"name": "鸡胸肉"}], "cook_method": "蒸煮", "macro_nutrients": {"protein": 20}}
+    other = {"food_items": [{"name": "三文鱼"}], "cook_method": "煎"}
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn, tables=[
+            Base.metadata.tables[name] for name in ("users", "pets", "diet_plans", "meal_templates", "meal_records")
+        ])
+        conn.execute(MealRecord.__table__.insert(), [
+            {
+                "id": str(uuid.uuid4()), "pet_id": "p", "meal_date": date(2026, 10, day),
+                "meal_type": "breakfast", "meal_order": order, "nutrition_data": doc,
+            }
+            for day in range(1, 8)
+            for order, doc in ((1, payload), (2, other))
+        ])
+
+        with caplog.at_level(logging.INFO, logger="alembic.runtime.migration"):
+            with Operations.context(MigrationContext.configure(conn)):
+                migration._deduplicate_nutrition_data()
+
+        templates = dict(conn.execute(sa.text("SELECT id, payload FROM meal_templates")).all())
+        rows = conn.execute(sa.text("SELECT template_id, nutrition_data FROM meal_records")).all()
+
+    assert set(templates) == {meal_template_id(payload), meal_template_id(other)}
+    assert len(rows) == 14
+    assert all(template_id in templates and nutrition is None for template_id, nutrition in rows)
+    assert "14 行 → 2 个新模板" in caplog.text
+    assert "节省" in caplog.text
@@ -0,0 +1,100 @@
+"""
+列表分页测试
+覆盖游标编解码、混合方向 keyset 条件，以及任务列表按游标逐页读取
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from src.db.models import Ingredient, Task
+from src.db.pagination import InvalidCursorError, KeyColumn, decode_cursor, encode_cursor, paginate
+from src.api.services.ingredient_service import INGREDIENT_LIST_KEYS
+
+TASK_KEYS = (KeyColumn(Task.created_at, descending=True), KeyColumn(Task.id, descending=True))
+
+
+def test_cursor_round_trip():
+    """游标可还原排序键取值（含时间类型）"""
+    created = datetime(2026, 5, 1, 8, 30, tzinfo=timezone.utc)
+    task = Task(id="t-1", created_at=created)
+
+    cursor = encode_cursor(task, TASK_KEYS)
+    assert decode_cursor(cursor, TASK_KEYS) == [created, "t-1"]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!!", "bnVsbA", "WzFd"])
+def test_invalid_cursor_rejected(cursor):
+    """无法解析或键数量不匹配的游标"""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, TASK_KEYS)
+
+
+@pytest.mark.asyncio
+async def test_mixed_direction_keyset(test_session, test_user):
+    """食材列表（系统优先 + 名称正序）按游标翻页不重不漏"""
+    for name, is_system in [("b", True), ("a", True), ("d", False), ("c", False), ("e", True)]:
+        test_session.add(Ingredient(
+            id=str(uuid.uuid4()),
+            name=f"{name}-{uuid.uuid4().hex[:6]}",
+            category="肉类",
+            sub_category="禽肉",
+            is_system=is_system,
+            user_id=None if is_system else test_user.id,
+        ))
+    await test_session.commit()
+
+    stmt = select(Ingredient)
+    seen, cursor = [], None
+    while True:
+        page = await paginate(test_session, stmt, INGREDIENT_LIST_KEYS, limit=2, cursor=cursor)
+        seen.extend((row.is_system, row.name) for row in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert page.total == 5
+    assert [name[0] for _, name in seen] == ["a", "b", "e", "c", "d"]
+    assert [is_system for is_system, _ in seen] == [True, True, True, False, False]
+
+
+@pytest.mark.asyncio
+class TestTaskCursorPaging:
+    """任务列表游标翻页"""
+
+    async def test_walk_all_pages(self, client: AsyncClient, auth_headers: dict, test_session, test_user):
+        base = datetime(2026, 5, 1, tzinfo=timezone.utc)
+        for i in range(5):
+            test_session.add(Task(
+                id=str(uuid.uuid4()),
+                user_id=test_user.id,
+                task_type="diet_plan",
+                status="completed",
+                input_data={},
+                created_at=base + timedelta(minutes=i),
+            ))
+        await test_session.commit()
+
+        ids, cursor = [], None
+        for _ in range(5):
+            params = {"page_size": 2, "total_mode": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            response = await client.get("/api/v1/tasks/", params=params, headers=auth_headers)
+            assert response.status_code == 200
+            data = response.json()["data"]
+            assert data["total"] is None
+            ids.extend(item["id"] for item in data["items"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        assert len(ids) == len(set(ids)) == 5
+
+    async def test_bad_cursor_returns_400(self, client: AsyncClient, auth_headers: dict):
+        response = await client.get(
+            "/api/v1/tasks/", params={"cursor": "garbage!!"}, headers=auth_headers
+        )
+        assert response.status_code == 400
@@ -0,0 +1,103 @@
+"""
+密码哈希线程池测试
+验证 bcrypt 专用线程池排满时快速拒绝（503）、统计指标，以及 cost 变化后登录时重新哈希
+"""
+import asyncio
+import threading
+
+import pytest
+
+from src.api.config import settings
+from src.api.utils.security import password_needs_rehash, verify_password
+from src.utils import executors
+from src.utils.executors import BoundedExecutor, ExecutorSaturated
+
+
+@pytest.fixture
+def small_bcrypt_pool(monkeypatch):
+    pool = BoundedExecutor(executors.BCRYPT_EXECUTOR, max_workers=1, max_queue=1)
+    monkeypatch.setattr(executors, "_bcrypt_executor", pool)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_bounded_executor_rejects_when_full(small_bcrypt_pool):
+    release = threading.Event()
+    running = asyncio.ensure_future(small_bcrypt_pool.run(release.wait, 5))
+    queued = asyncio.ensure_future(small_bcrypt_pool.run(lambda: "queued"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorSaturated):
+        await small_bcrypt_pool.run(lambda: "rejected")
+
+    stats = executors.executor_stats()[executors.BCRYPT_EXECUTOR]
+    assert stats["in_flight"] == 1
+    assert stats["queued"] == 1
+    assert stats["rejected"] == 1
+
+    release.set()
+    assert await running is True
+    assert await queued == "queued"
+    stats = small_bcrypt_pool.stats()
+    assert stats["completed"] == 2
+    assert stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    pool = BoundedExecutor(executors.BCRYPT_EXECUTOR, max_workers=1, max_queue=0)
+    release = threading.Event()
+    try:
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+
+        # 线程仍在执行，名额不能被新任务占用
+        with pytest.raises(ExecutorSaturated):
+            await pool.run(lambda: "rejected")
+
+        release.set()
+        for _ in range(100):
+            if pool.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await pool.run(lambda: "admitted") == "admitted"
+        assert pool.stats()["completed"] == 2
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_pool_saturated(client, test_user, small_bcrypt_pool):
+    release = threading.Event()
+    blockers = [asyncio.ensure_future(small_bcrypt_pool.run(release.wait, 5)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    response = await client.post(
+        "/api/v1/auth/login", json={"username": test_user.username, "password": "testpass123"}
+    )
+    release.set()
+    await asyncio.gather(*blockers)
+
+    assert response.status_code == 503
+    assert small_bcrypt_pool.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_when_cost_changes(client, test_session, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    assert password_needs_rehash(test_user.hashed_password)
+
+    response = await client.post(
+        "/api/v1/auth/login", json={"username": test_user.username, "password": "testpass123"}
+    )
+    assert response.status_code == 200
+
+    await test_session.refresh(test_user)
+    assert test_user.hashed_password.startswith("$2b$04$")
+    assert not password_needs_rehash(test_user.hashed_password)
+    assert await verify_password("testpass123", test_user.hashed_password)
@@ -2,11 +2,16 @@
 宠物管理 API 测试
 覆盖宠物 CRUD 全流程：创建、列表、详情、更新、删除
 """
+import io
+
 import pytest
 from httpx import AsyncClient
 
 import src.api.routes.pets as pets_route_module
 import src.api.infrastructure.minio_storage as minio_storage_module
+from src.api.dependencies import get_minio_storage
+from src.api.infrastructure.object_cache import DiskObjectCache
+from src.api.main import app
 
 
 @pytest.mark.asyncio
@@ -310,6 +315,40 @@ class FakeMinioStorage:
             "content_type": stored["content_type"],
         }
 
+    async def aupload_stream(self, object_name: str, chunks, content_type: str = "application/octet-stream") -> bool:
+        data = b"".join([chunk async for chunk in chunks])
+        return self.upload_file(object_name, data, content_type)
+
+    async def adelete_file(self, object_name: str) -> bool:
+        return self.delete_file(object_name)
+
+    async def aopen_object(self, object_name: str, offset: int = 0, length: int = 0):
+        stored = self.uploaded.get(object_name)
+        if not stored:
+            return None
+        return FakeObjectStream(stored["data"], stored["content_type"])
+
+
+class FakeObjectStream:
+    """模拟 minio get_object 返回的 urllib3 响应"""
+
+    def __init__(self, data: bytes, content_type: str):
+        self._buffer = io.BytesIO(data)
+        self.headers = {
+            "ETag": '"fake-etag"',
+            "Content-Type": content_type,
+            "Content-Length": str(len(data)),
+        }
+
+    def read(self, amt=None):
+        return self._buffer.read(amt)
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
 
 class FakePresignMinioClient:
     def __init__(self, endpoint: str, access_key: str, secret_key: str, secure: bool):
@@ -327,22 +366,31 @@ class TestPetAvatarUpload:
         self, client: AsyncClient, auth_headers: dict, test_pet, monkeypatch
     ):
         fake_storage = FakeMinioStorage()
+        scheduled = []
         monkeypatch.setattr(pets_route_module, "get_minio_storage", lambda: fake_storage)
+        monkeypatch.setattr(
+            pets_route_module,
+            "schedule_derivatives",
+            lambda storage, object_name, cache, replaced_object_name=None: scheduled.append(object_name),
+        )
 
         response = await client.post(
             f"/api/v1/pets/{test_pet.id}/avatar",
-            files={"file": ("avatar.png", b"fake-image-bytes", "image/png")},
+            files={"file": ("avatar.png", b"\x89PNG\r\n\x1a\nfake-image-bytes", "image/png")},
             headers=auth_headers,
         )
 
         assert response.status_code == 200
         data = response.json()
         assert data["code"] == 0
-        assert data["data"]["avatar_url"].startswith("http://test/api/v1/pets/avatar/object/avatars/pets/")
+        avatar_url = data["data"]["avatar_url"]
+        assert avatar_url.startswith("http://test/api/v1/pets/avatar/object/avatars/pets/")
+        assert data["data"]["avatar_thumbnails"]["128"] == f"{avatar_url}?w=128"
         assert len(fake_storage.uploaded) == 1
+        assert scheduled == list(fake_storage.uploaded)
 
     async def test_get_pet_avatar_object_success(
-        self, client: AsyncClient, monkeypatch
+        self, client: AsyncClient, monkeypatch, tmp_path
     ):
         fake_storage = FakeMinioStorage()
         object_name = "avatars/pets/demo/avatar.png"
@@ -350,14 +398,16 @@ class TestPetAvatarUpload:
             "data": b"fake-image-bytes",
             "content_type": "image/png",
         }
-        monkeypatch.setattr(pets_route_module, "get_minio_storage", lambda: fake_storage)
+        monkeypatch.setattr(pets_route_module, "avatar_cache", DiskObjectCache(tmp_path, 1024 * 1024))
+        app.dependency_overrides[get_minio_storage] = lambda: fake_storage
 
         response = await client.get(f"/api/v1/pets/avatar/object/{object_name}")
 
         assert response.status_code == 200
         assert response.content == b"fake-image-bytes"
         assert response.headers["content-type"].startswith("image/png")
-        assert response.headers["cache-control"] == "public, max-age=3600"
+        assert response.headers["cache-control"] == "public, max-age=86400"
+        assert response.headers["etag"] == '"fake-etag"'
 
     async def test_upload_pet_avatar_invalid_content_type(
         self, client: AsyncClient, auth_headers: dict, test_pet, monkeypatch
@@ -383,7 +433,7 @@ class TestPetAvatarUpload:
 
         response = await client.post(
             f"/api/v1/pets/{test_pet.id}/avatar",
-            files={"file": ("avatar.jpg", b"a" * (2 * 1024 * 1024 + 1), "image/jpeg")},
+            files={"file": ("avatar.jpg", b"\xff\xd8\xff" + b"a" * (2 * 1024 * 1024), "image/jpeg")},
             headers=auth_headers,
         )
 
@@ -0,0 +1,118 @@
+"""
+计划文档对象存储卸载测试
+覆盖阈值判断、内容去重、存根还原，以及计划文档接口的 zstd 透传
+"""
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from src.api.config import settings
+from src.api.infrastructure import plan_blob_store as blob_module
+from src.api.infrastructure.plan_blob_store import (
+    PLAN_BLOB_MARKER,
+    hydrate_document,
+    is_blob_stub,
+    offload_document,
+)
+from src.db.models import DietPlan
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+        self.fail = False
+
+    async def afile_exists(self, object_name):
+        return object_name in self.objects
+
+    async def aupload_file(self, object_name, data, content_type="application/octet-stream", metadata=None):
+        if self.fail:
+            return False
+        self.uploads += 1
+        self.objects[object_name] = data
+        return True
+
+    async def adownload_file(self, object_name):
+        return self.objects.get(object_name)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    fake = _FakeStorage()
+    monkeypatch.setattr(blob_module.plan_blob_store, "_storage", fake)
+    monkeypatch.setattr(settings, "plan_blob_min_bytes", 1024)
+    return fake
+
+
+def _big_plan(marker: str = "a") -> dict:
+    week = {"meals": [{"food": marker * 50, "calories": i} for i in range(100)]}
+    return {
+        "pet_information": {"pet_type": "cat"},
+        "ai_suggestions": "少量多餐",
+        "pet_diet_plan": {"monthly_diet_plan": [week] * 4},
+    }
+
+
+@pytest.mark.asyncio
+async def test_small_documents_stay_inline(storage):
+    doc = {"pet_information": {"pet_type": "cat"}}
+    assert await offload_document(doc) is doc
+    assert storage.uploads == 0
+
+
+@pytest.mark.asyncio
+async def test_offload_dedupes_and_hydrates(storage):
+    stub = await offload_document(_big_plan())
+    again = await offload_document(_big_plan())
+
+    assert is_blob_stub(stub)
+    assert stub == again
+    assert storage.uploads == 1
+    # 存根保留小字段摘要，不含完整周计划
+    assert stub["ai_suggestions"] == "少量多餐"
+    assert "pet_diet_plan" not in stub
+    assert await hydrate_document(stub) == _big_plan()
+    # 已是存根时原样返回
+    assert await offload_document(stub) is stub
+
+
+@pytest.mark.asyncio
+async def test_upload_failure_keeps_inline(storage):
+    storage.fail = True
+    doc = _big_plan("b")
+    assert await offload_document(doc) is doc
+
+
+@pytest.mark.asyncio
+async def test_document_endpoint_passes_through_zstd(
+    client: AsyncClient, auth_headers: dict, test_session, test_user, storage
+):
+    stub = await offload_document(_big_plan("c"))
+    plan = DietPlan(
+        id=str(uuid.uuid4()),
+        user_id=test_user.id,
+        pet_type="cat",
+        pet_age=12,
+        pet_weight=4,
+        plan_data=stub,
+    )
+    test_session.add(plan)
+    await test_session.commit()
+
+    url = f"/api/v1/plans/{plan.id}/document"
+    raw = await client.get(url, headers={**auth_headers, "Accept-Encoding": "zstd"})
+    assert raw.status_code == 200
+    assert raw.headers["content-encoding"] == "zstd"
+    # httpx 按 Content-Encoding 自动解压，能还原出原文档即说明透传的是合法 zstd 帧
+    assert raw.json() == _big_plan("c")
+
+    plain = await client.get(url, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert "content-encoding" not in plain.headers
+    assert plain.json() == _big_plan("c")
+
+    detail = await client.get(f"/api/v1/plans/{plan.id}", headers=auth_headers)
+    assert detail.json()["data"]["plan_data"] == _big_plan("c")
+    assert stub[PLAN_BLOB_MARKER] in next(iter(storage.objects))
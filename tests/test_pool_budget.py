@@ -0,0 +1,145 @@
+"""
+Postgres 连接预算与共享池查询测试
+验证池尺寸随 worker 数收缩、用量探针汇总，以及 agent 工具查询在共享池上的结果映射
+"""
+import pytest
+from sqlalchemy import func, select
+
+from src.agent.v2.tools import db as tool_db
+from src.api.config import settings
+from src.db import pool_budget
+from src.db.models import Ingredient
+
+
+def test_pool_sizes_stay_within_node_budget(monkeypatch):
+    """所有 worker 的池上限之和不超过预算"""
+    monkeypatch.setattr(settings, "db_connection_budget", 100)
+    monkeypatch.setattr(settings, "db_reserved_connections", 10)
+    monkeypatch.setattr(settings, "db_pool_weights", {"api": 0.6, "agent": 0.4})
+
+    for workers in (1, 2, 4, 8):
+        monkeypatch.setattr(settings, "api_workers", workers)
+        per_worker = sum(pool_budget.pool_size(c).max_size for c in settings.db_pool_weights)
+        assert per_worker * workers <= 90
+
+    monkeypatch.setattr(settings, "api_workers", 1)
+    api = pool_budget.pool_size("api")
+    assert api.max_size == 54
+    assert api.min_size + api.overflow == api.max_size
+
+
+def test_pool_size_has_floor_and_rejects_unknown(monkeypatch):
+    """预算过小时保留最小连接数；未配置权重的消费方报错"""
+    monkeypatch.setattr(settings, "db_connection_budget", 5)
+    monkeypatch.setattr(settings, "api_workers", 16)
+
+    assert pool_budget.pool_size("agent").max_size >= pool_budget.MIN_POOL_SIZE
+    with pytest.raises(KeyError):
+        pool_budget.pool_size("unknown")
+
+
+def test_pool_usage_collects_probes():
+    """用量汇总包含上限与探针数据，探针异常不影响其他消费方"""
+    pool_budget.register_pool("agent", lambda: {"checked_out": 3})
+
+    def _broken():
+        raise RuntimeError("closed")
+
+    pool_budget.register_pool("extra", _broken)
+    try:
+        usage = pool_budget.pool_usage()
+        assert usage["agent"]["checked_out"] == 3
+        assert usage["agent"]["limit"] == pool_budget.pool_size("agent").max_size
+        assert usage["extra"] == {"limit": None, "error": "closed"}
+    finally:
+        pool_budget.unregister_pool("agent")
+        pool_budget.unregister_pool("extra")
+
+
+class _FakeCursor:
+    def __init__(self, conn, row_factory):
+        self.conn = conn
+        self.row_factory = row_factory
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params):
+        self.conn.executed.append((sql, params))
+
+    async def fetchall(self):
+        return [self.conn.make_row(self.row_factory, r) for r in self.conn.rows]
+
+
+class _FakeConn:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def cursor(self, row_factory):
+        return _FakeCursor(self, row_factory)
+
+    @staticmethod
+    def make_row(row_factory, row):
+        if row_factory is tool_db.dict_row:
+            return dict(row)
+        from collections import namedtuple
+        return namedtuple("Row", row.keys())(*row.values())
+
+
+class _FakePool:
+    def __init__(self, rows):
+        self.conn = _FakeConn(rows)
+
+    def connection(self):
+        conn = self.conn
+
+        class _Ctx:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Ctx()
+
+
+def _use_pool(monkeypatch, rows):
+    pool = _FakePool(rows)
+
+    async def _get_pool():
+        return pool
+
+    monkeypatch.setattr(tool_db, "get_pg_pool", _get_pool)
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_run_query_maps_rows_to_orm_instances(monkeypatch):
+    """select(Model) 映射为 ORM 实例，IN 列表展开为独立参数"""
+    pool = _use_pool(monkeypatch, [{"id": "1", "name": "鸡胸肉", "category": "白肉", "protein": 22}])
+
+    rows = await tool_db.run_query(select(Ingredient).where(Ingredient.name.in_(["鸡胸肉", "牛肉"])))
+
+    assert isinstance(rows[0], Ingredient)
+    assert rows[0].name == "鸡胸肉"
+    assert rows[0].protein == 22
+    sql, params = pool.conn.executed[0]
+    assert "%(" in sql
+    assert sorted(v for v in params.values() if isinstance(v, str)) == ["牛肉", "鸡胸肉"]
+
+
+@pytest.mark.asyncio
+async def test_run_query_one_and_raw_rows(monkeypatch):
+    """one=True 返回单个实例或 None；scalars=False 返回可按列名访问的行"""
+    _use_pool(monkeypatch, [])
+    assert await tool_db.run_query(select(Ingredient).where(Ingredient.name == "x"), one=True) is None
+
+    _use_pool(monkeypatch, [{"category": "白肉", "count": 3}])
+    stmt = select(Ingredient.category, func.count(Ingredient.id).label("count")).group_by(Ingredient.category)
+    rows = await tool_db.run_query(stmt, scalars=False)
+    assert rows[0].category == "白肉"
+    assert rows[0].count == 3
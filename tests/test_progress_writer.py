@@ -0,0 +1,102 @@
+"""
+任务进度写后缓冲测试
+"""
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.api.services.progress_writer import ProgressWriter
+from src.db.models import Task, User
+from src.db.session import Base
+
+
+@pytest_asyncio.fixture
+async def writer_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def _insert_task(engine, status="running") -> str:
+    user_id, task_id = str(uuid.uuid4()), str(uuid.uuid4())
+    async with engine.begin() as conn:
+        await conn.execute(User.__table__.insert().values(
+            id=user_id, username=user_id[:8], email=f"{user_id[:8]}@example.com",
+            hashed_password="x", is_active=True, is_superuser=False,
+        ))
+        await conn.execute(Task.__table__.insert().values(
+            id=task_id, user_id=user_id, task_type="diet_plan", status=status,
+            progress=0, input_data={}, created_at=datetime.now(timezone.utc),
+        ))
+    return task_id
+
+
+async def _load(engine, task_id):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(Task.status, Task.progress, Task.current_node)
+                                   .where(Task.id == task_id))).one()
+
+
+@pytest.mark.asyncio
+async def test_flush_coalesces_latest_progress(writer_engine):
+    """同一任务多次 record 只落库最新值，多个任务一次刷写"""
+    writer = ProgressWriter(engine=writer_engine, flush_interval=3600)
+    first = await _insert_task(writer_engine)
+    second = await _insert_task(writer_engine, status="pending")
+
+    writer.record(first, 10, "plan_agent")
+    writer.record(first, 40, "week_agent")
+    writer.record(second, 5, "plan_agent")
+    assert writer.pending == 2
+
+    assert await writer.flush() == 2
+    assert writer.pending == 0
+    assert tuple(await _load(writer_engine, first)) == ("running", 40, "week_agent")
+    assert tuple(await _load(writer_engine, second)) == ("running", 5, "plan_agent")
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_never_overwrites_terminal_status(writer_engine):
+    """迟到的进度不会把已完成任务改回 running"""
+    writer = ProgressWriter(engine=writer_engine, flush_interval=3600)
+    task_id = await _insert_task(writer_engine, status="completed")
+
+    writer.record(task_id, 90, "gather_and_structure")
+    await writer.flush()
+
+    assert (await _load(writer_engine, task_id)).status == "completed"
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_discard_drops_pending_progress(writer_engine):
+    writer = ProgressWriter(engine=writer_engine, flush_interval=3600)
+    task_id = await _insert_task(writer_engine)
+
+    writer.record(task_id, 50, "week_agent")
+    writer.discard(task_id)
+
+    assert await writer.flush() == 0
+    assert (await _load(writer_engine, task_id)).progress == 0
+    await writer.close()
+
+
+def test_postgres_statement_is_single_values_update():
+    """PostgreSQL 路径把所有脏任务合并为一条 UPDATE ... FROM (VALUES ...)"""
+    now = datetime.now(timezone.utc)
+    stmt, params = ProgressWriter._build_values_update({
+        "a": (10, "n1", now),
+        "b": (20, "n2", now),
+    })
+    sql = str(stmt)
+    assert sql.count("UPDATE tasks") == 1
+    assert "FROM (VALUES" in sql
+    assert "tasks.status IN ('pending', 'running')" in sql
+    assert params["id_0"] == "a" and params["progress_1"] == 20
@@ -0,0 +1,70 @@
+"""
+SQL 查询统计测试
+覆盖语句形状归一化、嵌套统计，以及宠物列表的查询次数不随宠物数量增长
+"""
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from src.db.models import DietPlan, Pet
+from src.db.query_stats import QueryStats, statement_shape, track_queries
+
+
+def test_statement_shape_collapses_in_lists():
+    """IN 列表参数个数不同仍视为同一语句"""
+    a = statement_shape("SELECT * FROM pets WHERE id IN (?, ?)")
+    b = statement_shape("SELECT *\n  FROM pets WHERE id IN ($1, $2, $3)")
+    assert a == b == "SELECT * FROM pets WHERE id IN (...)"
+
+
+def test_nested_tracking_propagates_to_parent():
+    with track_queries() as outer:
+        with track_queries() as inner:
+            inner.record("SELECT 1", 0.002)
+            inner.record("SELECT 1", 0.001)
+    assert inner.count == outer.count == 2
+    assert outer.repeated(2) == [("SELECT 1", 2)]
+    assert QueryStats().repeated(1) == []
+
+
+async def _add_pets(session, user_id: str, n: int):
+    for i in range(n):
+        pet = Pet(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            name=f"pet-{i}",
+            type="cat",
+            age=12,
+            weight=4.0,
+            is_active=True,
+        )
+        session.add(pet)
+        session.add(DietPlan(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            pet_id=pet.id,
+            pet_type="cat",
+            pet_age=12,
+            pet_weight=4,
+            plan_data={},
+        ))
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_pet_list_query_count_is_constant(
+    client: AsyncClient, auth_headers: dict, test_session, test_user, query_budget
+):
+    """宠物列表：计划状态一次分组查询，不随宠物数量增长"""
+    await _add_pets(test_session, test_user.id, 6)
+
+    with query_budget(max_queries=3) as stats:
+        response = await client.get("/api/v1/pets/", headers=auth_headers)
+
+    assert response.status_code == 200
+    items = response.json()["data"]["items"]
+    assert len(items) == 6
+    assert all(item["has_plan"] for item in items)
+    assert stats.repeated(2) == []
+    assert response.headers["X-DB-Queries"] == str(stats.count)
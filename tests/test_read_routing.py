@@ -0,0 +1,131 @@
+"""
+读写分离路由测试
+验证副本选择顺序：未配置 → 刚写过 → 副本延迟 → 副本，以及延迟探测缓存
+"""
+import pytest
+
+from src.db import read_routing
+from src.db.redis_keys import recent_write_key
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+        self.fail = False
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def exists(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return int(key in self.store)
+
+
+class _StubMonitor:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+
+    async def is_healthy(self):
+        return self.healthy
+
+
+@pytest.fixture
+def routing(monkeypatch):
+    fake = _FakeRedis()
+
+    async def _get_redis():
+        return fake
+
+    replica_factory = object()
+    monkeypatch.setattr(read_routing, "get_redis", _get_redis)
+    monkeypatch.setattr(read_routing, "ReplicaSessionLocal", replica_factory)
+    monkeypatch.setattr(read_routing, "replica_monitor", _StubMonitor())
+    return fake, replica_factory
+
+
+@pytest.mark.asyncio
+async def test_without_replica_reads_primary(monkeypatch):
+    monkeypatch.setattr(read_routing, "replica_monitor", None)
+    assert await read_routing.choose_read_sessionmaker("u1") is read_routing.AsyncSessionLocal
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_until_user_writes(routing):
+    fake, replica_factory = routing
+
+    assert await read_routing.choose_read_sessionmaker("u1") is replica_factory
+
+    await read_routing.mark_recent_write("u1")
+    assert recent_write_key("u1") in fake.store
+    assert await read_routing.choose_read_sessionmaker("u1") is read_routing.AsyncSessionLocal
+    # 其他用户不受影响
+    assert await read_routing.choose_read_sessionmaker("u2") is replica_factory
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_primary_on_lag_or_redis_failure(routing, monkeypatch):
+    fake, replica_factory = routing
+
+    fake.fail = True
+    assert await read_routing.choose_read_sessionmaker("u1") is read_routing.AsyncSessionLocal
+
+    fake.fail = False
+    monkeypatch.setattr(read_routing, "replica_monitor", _StubMonitor(healthy=False))
+    assert await read_routing.choose_read_sessionmaker("u1") is read_routing.AsyncSessionLocal
+
+
+class _FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class _FakeEngine:
+    def __init__(self, lags):
+        self.lags = list(lags)
+        self.probes = 0
+
+    def connect(self):
+        engine = self
+
+        class _Conn:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, stmt):
+                engine.probes += 1
+                lag = engine.lags.pop(0)
+                if isinstance(lag, Exception):
+                    raise lag
+                return _FakeResult(lag)
+
+        return _Conn()
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_caches_and_thresholds():
+    engine = _FakeEngine([0.5, 30.0])
+    monitor = read_routing.ReplicaLagMonitor(engine, max_lag=5.0, check_interval=60.0)
+
+    assert await monitor.is_healthy()
+    assert await monitor.is_healthy()
+    assert engine.probes == 1
+
+    monitor = read_routing.ReplicaLagMonitor(engine, max_lag=5.0, check_interval=0)
+    assert not await monitor.is_healthy()
+    assert monitor.lag == 30.0
+
+
+@pytest.mark.asyncio
+async def test_lag_monitor_treats_probe_failure_as_unhealthy():
+    engine = _FakeEngine([OSError("connection refused")])
+    monitor = read_routing.ReplicaLagMonitor(engine, max_lag=5.0, check_interval=0)
+
+    assert not await monitor.is_healthy()
+    assert monitor.lag is None
@@ -0,0 +1,88 @@
+"""
+Redis 客户端侧缓存测试
+只验证进程内缓存逻辑；服务端失效推送由 _listen 转换为 invalidate 调用
+"""
+import pytest
+
+from src.db import redis as redis_module
+from src.db.redis import RedisLocalCache
+
+
+def _active_cache(**kwargs) -> RedisLocalCache:
+    cache = RedisLocalCache(["temp_plan:"], **kwargs)
+    cache.active = True
+    return cache
+
+
+def test_only_prefixed_keys_are_cached():
+    cache = _active_cache()
+    seq = cache.begin_fill()
+    cache.fill("temp_plan:1", '{"a": 1}', seq)
+    cache.fill("rate_limit:1.2.3.4", "5", seq)
+
+    assert cache.lookup("temp_plan:1") == (True, '{"a": 1}')
+    assert cache.lookup("rate_limit:1.2.3.4") == (False, None)
+
+
+def test_invalidation_during_fill_skips_stale_value():
+    """回源期间收到失效通知时不回填"""
+    cache = _active_cache()
+    seq = cache.begin_fill()
+    cache.invalidate(["temp_plan:1"])
+    cache.fill("temp_plan:1", "old", seq)
+
+    assert cache.lookup("temp_plan:1") == (False, None)
+
+
+def test_inactive_cache_bypasses():
+    """失效监听未就绪时不缓存任何值"""
+    cache = RedisLocalCache(["temp_plan:"])
+    cache.fill("temp_plan:1", "v", cache.begin_fill())
+    assert cache.lookup("temp_plan:1") == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_and_hit_ratio():
+    cache = _active_cache(max_entries=2)
+    for i in range(3):
+        cache.fill(f"temp_plan:{i}", str(i), cache.begin_fill())
+
+    assert cache.lookup("temp_plan:0") == (False, None)
+    assert cache.lookup("temp_plan:2") == (True, "2")
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_get_json_served_from_cache(monkeypatch):
+    """命中后 get_json 不再访问 Redis，set_json 立即失效本地副本"""
+    cache = _active_cache()
+    monkeypatch.setattr(redis_module, "local_cache", cache)
+
+    class _FakeClient:
+        def __init__(self):
+            self.store = {"temp_plan:p": '{"v": 1}'}
+            self.gets = 0
+
+        async def get(self, key):
+            self.gets += 1
+            return self.store.get(key)
+
+        async def setex(self, key, expire, value):
+            self.store[key] = value
+
+    fake = _FakeClient()
+
+    async def _get_redis():
+        return fake
+
+    monkeypatch.setattr(redis_module, "get_redis", _get_redis)
+
+    assert await redis_module.get_json("temp_plan:p") == {"v": 1}
+    assert await redis_module.get_json("temp_plan:p") == {"v": 1}
+    assert fake.gets == 1
+
+    await redis_module.set_json("temp_plan:p", {"v": 2})
+    assert await redis_module.get_json("temp_plan:p") == {"v": 2}
+    assert fake.gets == 2
@@ -0,0 +1,114 @@
+"""
+Redis key 布局测试
+验证 hash tag 让同一任务/同一邮箱的 key 落在同一 Cluster slot，且批量删除按 slot 分组
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from redis.crc import key_slot
+
+from src.api.domain.verification import VerificationCode, VerificationCodeType
+from src.api.infrastructure.redis_code_storage import RedisCodeStorage
+from src.db import redis as redis_module
+from src.db import redis_keys
+
+
+def _slot(key: str) -> int:
+    return key_slot(key.encode())
+
+
+def test_task_keys_share_slot():
+    """任务事件流与临时计划同 slot"""
+    task_id = "3f0c1f7e-8d3a-4a47-9a52-0d6f4b1e2c11"
+    assert _slot(redis_keys.task_events_key(task_id)) == _slot(redis_keys.temp_plan_key(task_id))
+
+
+def test_verification_keys_share_slot():
+    """同一邮箱的验证码、冷却、每日计数同 slot"""
+    email = "user@example.com"
+    slots = {
+        _slot(redis_keys.verification_code_key("register", email)),
+        _slot(redis_keys.send_cooldown_key(email)),
+        _slot(redis_keys.daily_send_count_key(email, "2026-01-01")),
+    }
+    assert len(slots) == 1
+
+
+def test_group_keys_by_slot_batches():
+    """每批只包含同一 slot 的 key，且不超过批大小"""
+    keys = [redis_keys.temp_plan_key(f"p{i}") for i in range(20)]
+    keys += [f"cache:{{same}}:{i}" for i in range(5)]
+    batches = redis_module.group_keys_by_slot(keys, batch_size=3)
+
+    assert sorted(k for batch in batches for k in batch) == sorted(keys)
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len({_slot(k) for k in batch}) == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_keys_unlinks_per_slot(monkeypatch):
+    """delete_keys 对每个 slot 单独 UNLINK"""
+
+    class _FakeClient:
+        def __init__(self):
+            self.store = {redis_keys.temp_plan_key(f"p{i}"): "1" for i in range(10)}
+            self.unlinks = []
+
+        async def scan_iter(self, match=None, count=None):
+            for key in list(self.store):
+                yield key
+
+        async def unlink(self, *keys):
+            assert len({_slot(k) for k in keys}) == 1
+            self.unlinks.append(keys)
+            return sum(self.store.pop(k, None) is not None for k in keys)
+
+    fake = _FakeClient()
+
+    async def _get_redis():
+        return fake
+
+    monkeypatch.setattr(redis_module, "get_redis", _get_redis)
+
+    assert await redis_module.delete_keys("temp_plan:*") == 10
+    assert not fake.store
+    assert len(fake.unlinks) > 1
+
+
+class _DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+
+@pytest.mark.asyncio
+async def test_verification_code_legacy_key_fallback():
+    """升级前写入旧 key 的验证码仍可读取，删除时新旧 key 一并清理"""
+    redis = _DictRedis()
+    code = VerificationCode(
+        code="123456",
+        email="user@example.com",
+        code_type=VerificationCodeType.REGISTER,
+        expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+    )
+    legacy_key = redis_keys.legacy_verification_code_key("register", "user@example.com")
+    redis.data[legacy_key] = json.dumps(code.model_dump(mode="json"))
+    storage = RedisCodeStorage(redis)
+
+    loaded = await storage.get_code("user@example.com", VerificationCodeType.REGISTER)
+    assert loaded is not None and loaded.code == "123456"
+
+    loaded.attempt_count = 1
+    await storage.update_code(loaded)
+    assert legacy_key not in redis.data
+    assert (await storage.get_code("user@example.com", VerificationCodeType.REGISTER)).attempt_count == 1
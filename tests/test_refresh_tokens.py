@@ -0,0 +1,145 @@
+"""
+刷新令牌存储测试
+验证库中只存摘要、令牌只能使用一次且以数据库撤销状态为准、后台按批清理
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.api.services import refresh_token_store
+from src.api.services.auth_service import AuthService
+from src.api.services.refresh_token_store import RefreshTokenSweeper
+from src.api.utils.errors import AuthException
+from src.api.utils.security import hash_refresh_token
+from src.db.models import RefreshToken, User
+from src.db.session import Base
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def getdel(self, key):
+        return self.store.pop(key, None)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = _FakeRedis()
+
+    async def _get_redis():
+        return client
+
+    monkeypatch.setattr(refresh_token_store, "get_redis", _get_redis)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_only_digest_is_stored(test_session, test_user):
+    _, tokens = await AuthService(test_session).login(test_user.username, "testpass123")
+    _, again = await AuthService(test_session).login(test_user.username, "testpass123")
+    # 同一秒内签发的令牌也不同
+    assert tokens.refresh_token != again.refresh_token
+
+    stored = (
+        await test_session.execute(select(RefreshToken.token_hash).where(RefreshToken.user_id == test_user.id))
+    ).scalars().all()
+    assert hash_refresh_token(tokens.refresh_token) in stored
+    assert all(len(token_hash) == 64 for token_hash in stored)
+
+
+@pytest.mark.asyncio
+async def test_refresh_via_redis_is_single_use(test_session, test_user, fake_redis):
+    service = AuthService(test_session)
+    _, tokens = await service.login(test_user.username, "testpass123")
+    assert len(fake_redis.store) == 1
+
+    new_tokens = await service.refresh_tokens(tokens.refresh_token)
+    assert list(fake_redis.store) == [
+        refresh_token_store.refresh_token_key(test_user.id, hash_refresh_token(new_tokens.refresh_token))
+    ]
+
+    # Redis 中已被消费，回源数据库时旧令牌已撤销
+    with pytest.raises(AuthException):
+        await service.refresh_tokens(tokens.refresh_token)
+
+
+@pytest.mark.asyncio
+async def test_refresh_falls_back_to_database(test_session, test_user, fake_redis):
+    service = AuthService(test_session)
+    _, tokens = await service.login(test_user.username, "testpass123")
+    fake_redis.store.clear()  # 模拟 Redis 淘汰或签发时不可用
+
+    new_tokens = await service.refresh_tokens(tokens.refresh_token)
+    assert new_tokens.refresh_token != tokens.refresh_token
+
+    revoked = (
+        await test_session.execute(
+            select(RefreshToken.is_revoked).where(
+                RefreshToken.token_hash == hash_refresh_token(tokens.refresh_token)
+            )
+        )
+    ).scalar_one()
+    assert revoked is True
+    with pytest.raises(AuthException):
+        await service.refresh_tokens(tokens.refresh_token)
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_token_revoked_only_in_database(test_session, test_user, fake_redis):
+    service = AuthService(test_session)
+    _, tokens = await service.login(test_user.username, "testpass123")
+    token_hash = hash_refresh_token(tokens.refresh_token)
+    # 登出 / 管理员撤销只改数据库，Redis 记录还在
+    row = (await test_session.execute(select(RefreshToken).where(RefreshToken.token_hash == token_hash))).scalar_one()
+    row.is_revoked = True
+    await test_session.commit()
+    assert len(fake_redis.store) == 1
+
+    with pytest.raises(AuthException):
+        await service.refresh_tokens(tokens.refresh_token)
+    assert fake_redis.store == {}
+
+
+@pytest_asyncio.fixture
+async def sweeper_engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tokens.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sweeper_deletes_expired_and_revoked_in_batches(sweeper_engine):
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"expires_at": now - timedelta(days=1), "is_revoked": False},
+        {"expires_at": now - timedelta(days=2), "is_revoked": False},
+        {"expires_at": now + timedelta(days=1), "is_revoked": True},
+        {"expires_at": now + timedelta(days=1), "is_revoked": True},
+        {"expires_at": now + timedelta(days=1), "is_revoked": False},
+    ]
+    async with sweeper_engine.begin() as conn:
+        await conn.execute(User.__table__.insert().values(
+            id=user_id, username=user_id[:8], email=f"{user_id[:8]}@example.com",
+            hashed_password="x", is_active=True, is_superuser=False,
+        ))
+        await conn.execute(RefreshToken.__table__.insert(), [
+            {"id": str(uuid.uuid4()), "user_id": user_id, "token_hash": uuid.uuid4().hex * 2, **row}
+            for row in rows
+        ])
+
+    assert await RefreshTokenSweeper(engine=sweeper_engine).sweep(batch_size=2) == 4
+
+    async with sweeper_engine.connect() as conn:
+        remaining = (await conn.execute(select(func.count()).select_from(RefreshToken))).scalar_one()
+    assert remaining == 1
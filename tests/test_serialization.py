@@ -0,0 +1,171 @@
+"""
+orjson 序列化模块测试
+验证 dataclass / datetime / Decimal / Pydantic 的原生序列化，以及 SSE、响应类与 JSON 列的接入
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import select
+
+from src.agent.common.stream_events import ProgressEvent, ProgressEventType
+from src.api.utils.stream import create_sse_event
+from src.db.models import DietPlan
+from src.utils import serialization
+from src.utils.serialization import ORJSONResponse, dumps, dumps_str, loads, register_converter, to_jsonable
+
+
+class _Kind(str, Enum):
+    CAT = "cat"
+
+
+@dataclass
+class _Point:
+    day: date
+    value: Decimal
+
+
+class _Meal(BaseModel):
+    name: str
+    at: datetime
+    kind: _Kind
+
+
+def test_native_types():
+    at = datetime(2026, 10, 19, 8, 30, tzinfo=timezone.utc)
+    payload = {
+        "point": _Point(day=date(2026, 10, 19), value=Decimal("20.50")),
+        "meal": _Meal(name="鸡胸肉", at=at, kind=_Kind.CAT),
+        "tags": {"a"},
+        1: "int key",
+    }
+
+    assert loads(dumps(payload)) == {
+        "point": {"day": "2026-10-19", "value": 20.5},
+        "meal": {"name": "鸡胸肉", "at": "2026-10-19T08:30:00Z", "kind": "cat"},
+        "tags": ["a"],
+        "1": "int key",
+    }
+    # 非 ASCII 不转义，输出紧凑
+    assert dumps_str({"name": "鸡胸肉"}) == '{"name":"鸡胸肉"}'
+
+
+def test_unknown_objects_fall_back_to_str():
+    class _Opaque:
+        def __str__(self):
+            return "opaque"
+
+    class _Legacy:
+        def dict(self):
+            return {"x": 1}
+
+    assert loads(dumps({"a": _Opaque(), "b": _Legacy()})) == {"a": "opaque", "b": {"x": 1}}
+
+
+def test_sse_event_serializes_models():
+    frame = create_sse_event({"type": "completed", "detail": {"plans": [_Meal(
+        name="南瓜", at=datetime(2026, 1, 1, tzinfo=timezone.utc), kind=_Kind.CAT,
+    )]}})
+
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    assert loads(frame[len("data: "):])["detail"]["plans"][0]["name"] == "南瓜"
+
+
+def test_orjson_response_renders_bytes():
+    response = ORJSONResponse({"code": 0, "data": {"at": date(2026, 10, 19)}})
+
+    assert response.media_type == "application/json"
+    assert loads(response.body) == {"code": 0, "data": {"at": "2026-10-19"}}
+
+
+def test_to_jsonable_matches_dumps():
+    from langchain_core.messages import AIMessage
+
+    message = AIMessage(content="完成", additional_kwargs={"raw": object()})
+    result = to_jsonable({
+        "messages": [message],
+        "point": _Point(day=date(2026, 10, 19), value=Decimal("1.25")),
+        "meal": _Meal(name="鸡胸肉", at=datetime(2026, 1, 1, tzinfo=timezone.utc), kind=_Kind.CAT),
+        "kind": _Kind.CAT,
+        "tags": {"a"},
+        2: ("a", None),
+    })
+
+    assert result["messages"][0]["content"] == "完成"
+    # 模型内不认识的叶子交给注册表兜底
+    assert result["messages"][0]["additional_kwargs"]["raw"].startswith("<object")
+    # Decimal 与 dumps 一致输出为数字
+    assert result["point"] == {"day": "2026-10-19", "value": 1.25}
+    assert result["meal"] == {"name": "鸡胸肉", "at": "2026-01-01T00:00:00Z", "kind": "cat"}
+    assert result["kind"] == "cat"
+    assert result["tags"] == ["a"]
+    assert result["2"] == ["a", None]
+
+
+def test_decimal_same_in_dumps_and_to_jsonable():
+    payload = {
+        "protein": Decimal("20.50"),
+        "items": [Decimal("3")],
+        "point": _Point(day=date(2026, 10, 19), value=Decimal("1.25")),
+    }
+
+    assert to_jsonable(payload) == loads(dumps(payload)) == {
+        "protein": 20.5,
+        "items": [3.0],
+        "point": {"day": "2026-10-19", "value": 1.25},
+    }
+
+
+def test_model_decimal_fields_follow_model_serializer():
+    class _Nutrition(BaseModel):
+        protein: Decimal
+
+    # 模型字段按模型自身规则输出（同 model_dump(mode="json")），两条路径一致
+    payload = {"model": _Nutrition(protein=Decimal("20.50")), "bare": Decimal("20.50")}
+
+    assert to_jsonable(payload) == loads(dumps(payload)) == {"model": {"protein": "20.50"}, "bare": 20.5}
+
+
+def test_register_converter_overrides(monkeypatch):
+    class _Money:
+        def __init__(self, cents):
+            self.cents = cents
+
+    monkeypatch.setattr(serialization, "_converters", {})
+    register_converter(_Money, lambda obj: obj.cents / 100)
+
+    assert to_jsonable([_Money(1250)]) == [12.5]
+    assert loads(dumps({"m": _Money(99)})) == {"m": 0.99}
+
+
+def test_progress_event_detail_converted_once():
+    event = ProgressEvent(
+        type=ProgressEventType.PLAN_CREATED,
+        message="完成",
+        detail={"plans": [_Meal(name="鸡胸肉", at=datetime(2026, 1, 1, tzinfo=timezone.utc), kind=_Kind.CAT)]},
+    )
+
+    data = event.to_dict()
+
+    assert data["type"] == "plan_created"
+    assert data["detail"]["plans"][0] == {"name": "鸡胸肉", "at": "2026-01-01T00:00:00Z", "kind": "cat"}
+    assert "node" not in data
+
+
+@pytest.mark.asyncio
+async def test_json_column_round_trip(test_session, test_user):
+    document = {"pet_information": {"pet_type": "cat"}, "ai_suggestions": "少量多餐", "weights": {1: 4.2}}
+    plan = DietPlan(
+        id="plan-json-codec", user_id=test_user.id, pet_type="cat", pet_age=12, pet_weight=4,
+        plan_data=document,
+    )
+    test_session.add(plan)
+    await test_session.commit()
+    test_session.expunge_all()
+
+    stored = await test_session.scalar(select(DietPlan.plan_data).where(DietPlan.id == "plan-json-codec"))
+    assert stored["ai_suggestions"] == "少量多餐"
+    assert stored["weights"] == {"1": 4.2}
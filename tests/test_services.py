@@ -368,62 +368,62 @@ class TestWeightServiceDB:
             await svc.record_weight(test_user.id, str(uuid.uuid4()), 5.0)
 
 
-# ==================== TaskService._sanitize_for_json 测试 ====================
+# ==================== 任务输出 JSON 清洗（to_jsonable）测试 ====================
 
 @pytest.mark.asyncio
-class TestSanitizeForJson:
+class TestToJsonable:
     """JSON 清洗函数测试"""
 
     async def test_primitive_types(self):
         """基本类型直通"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
 
-        assert _sanitize_for_json(None) is None
-        assert _sanitize_for_json(True) is True
-        assert _sanitize_for_json(42) == 42
-        assert _sanitize_for_json(3.14) == 3.14
-        assert _sanitize_for_json("hello") == "hello"
+        assert to_jsonable(None) is None
+        assert to_jsonable(True) is True
+        assert to_jsonable(42) == 42
+        assert to_jsonable(3.14) == 3.14
+        assert to_jsonable("hello") == "hello"
 
     async def test_dict_recursive(self):
         """dict 递归清洗"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
 
-        result = _sanitize_for_json({"a": 1, "b": {"c": "deep"}})
+        result = to_jsonable({"a": 1, "b": {"c": "deep"}})
         assert result == {"a": 1, "b": {"c": "deep"}}
 
     async def test_list_recursive(self):
         """list 递归清洗"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
 
-        result = _sanitize_for_json([1, "two", [3]])
+        result = to_jsonable([1, "two", [3]])
         assert result == [1, "two", [3]]
 
     async def test_set_to_list(self):
         """set 转为 list"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
 
-        result = _sanitize_for_json({1, 2, 3})
+        result = to_jsonable({1, 2, 3})
         assert set(result) == {1, 2, 3}
 
     async def test_non_serializable_fallback(self):
         """不可序列化对象 fallback 到 str()"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
 
         class Custom:
             def __str__(self):
                 return "custom_object"
 
-        result = _sanitize_for_json(Custom())
+        result = to_jsonable(Custom())
         assert result == "custom_object"
 
     async def test_pydantic_model(self):
         """Pydantic 模型通过 model_dump 转换"""
-        from src.api.services.task_service import _sanitize_for_json
+        from src.utils.serialization import to_jsonable
         from pydantic import BaseModel
 
         class TestModel(BaseModel):
             name: str
             value: int
 
-        result = _sanitize_for_json(TestModel(name="test", value=42))
+        result = to_jsonable(TestModel(name="test", value=42))
         assert result == {"name": "test", "value": 42}
@@ -0,0 +1,69 @@
+"""
+SSE 流式工具测试
+验证共享心跳调度器：空闲连接收到心跳，活跃连接不被打扰，结束后自动注销
+"""
+import asyncio
+
+import pytest
+
+from src.api.utils.stream import HEARTBEAT_FRAME, HeartbeatScheduler, stream_with_heartbeat
+
+
+async def _events(items, delay=0.0, hold: asyncio.Event | None = None):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+    if hold is not None:
+        await hold.wait()
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_receives_heartbeat():
+    """空闲超过 interval 后由共享调度器注入心跳"""
+    scheduler = HeartbeatScheduler(tick=0.01)
+    hold = asyncio.Event()
+    stream = stream_with_heartbeat(_events(["data: a\n\n"], hold=hold), 0.03, scheduler=scheduler)
+
+    assert await stream.__anext__() == "data: a\n\n"
+    assert await asyncio.wait_for(stream.__anext__(), timeout=1) == HEARTBEAT_FRAME
+    hold.set()
+    await stream.aclose()
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_busy_stream_gets_no_heartbeat():
+    """事件间隔小于 interval 时不插入心跳，流结束后注销连接"""
+    scheduler = HeartbeatScheduler(tick=0.01)
+    items = [f"data: {i}\n\n" for i in range(5)]
+
+    received = [
+        chunk async for chunk in stream_with_heartbeat(
+            _events(items, delay=0.01), 0.2, scheduler=scheduler
+        )
+    ]
+
+    assert received == items
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_many_streams_share_one_tick_task():
+    """多条连接共享同一个 tick 任务"""
+    scheduler = HeartbeatScheduler(tick=0.01)
+    hold = asyncio.Event()
+    streams = [
+        stream_with_heartbeat(_events([], hold=hold), 0.02, scheduler=scheduler)
+        for _ in range(50)
+    ]
+    beats = await asyncio.wait_for(
+        asyncio.gather(*(s.__anext__() for s in streams)), timeout=1
+    )
+
+    assert beats == [HEARTBEAT_FRAME] * 50
+    assert len(scheduler) == 50
+    hold.set()
+    for s in streams:
+        await s.aclose()
+    assert len(scheduler) == 0
@@ -0,0 +1,163 @@
+"""
+可信响应路径测试
+验证开启/关闭可信路径时列表路由输出一致、每个响应的首项抽查能拦下不合规数据，
+以及开发模式抽样校验能发现数据漂移
+"""
+import logging
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+import pytest_asyncio
+from pydantic import ValidationError
+
+from src.api.config import settings
+from src.api.models.response import ApiResponse, TodoItemResponse, TodoListResponse
+from src.api.utils import responses
+from src.api.services.meal_service import MealService
+from src.api.utils.responses import api_response, build_model
+from src.db.models import DietPlan, TodoItem
+
+ROUTES = ["list_diet_plans", "get_today_meals", "get_meals_by_date", "get_weekly_calendar", "list_todos"]
+
+
+@pytest_asyncio.fixture
+async def list_data(test_session, test_user, test_pet, test_meals):
+    test_meals[0].is_completed = True
+    test_meals[0].completed_at = datetime(2026, 10, 19, 8, 5, tzinfo=timezone.utc)
+    test_session.add_all([
+        DietPlan(
+            id=str(uuid.uuid4()), user_id=test_user.id, pet_id=test_pet.id, pet_type="cat",
+            pet_age=12, pet_weight=4, plan_data={}, is_active=True,
+        ),
+        TodoItem(
+            id=str(uuid.uuid4()), user_id=test_user.id, pet_id=test_pet.id, title="买猫粮",
+            due_date=date.today(), priority="high",
+        ),
+    ])
+    await test_session.commit()
+
+
+async def _fetch_all(client, headers, pet_id: str) -> list[bytes]:
+    urls = [
+        "/api/v1/plans/",
+        f"/api/v1/meals/today?pet_id={pet_id}",
+        f"/api/v1/meals/date?pet_id={pet_id}&target_date={date.today()}",
+        f"/api/v1/calendar/weekly?pet_id={pet_id}",
+        "/api/v1/todos/",
+    ]
+    bodies = []
+    for url in urls:
+        response = await client.get(url, headers=headers)
+        assert response.status_code == 200, url
+        assert response.headers["content-type"] == "application/json"
+        bodies.append(response.content)
+    return bodies
+
+
+@pytest.mark.asyncio
+async def test_trusted_output_matches_validated(client, auth_headers, test_pet, list_data, monkeypatch):
+    monkeypatch.setattr(settings, "trusted_response_routes", ROUTES)
+    trusted = await _fetch_all(client, auth_headers, test_pet.id)
+
+    monkeypatch.setattr(settings, "trusted_response_routes", [])
+    validated = await _fetch_all(client, auth_headers, test_pet.id)
+
+    assert trusted == validated
+    assert b'"pet_name":"' in trusted[-1]
+
+
+def test_route_toggle(monkeypatch):
+    monkeypatch.setattr(settings, "trusted_response_routes", ["list_todos"])
+    assert responses.trusted_response_enabled("list_todos")
+    assert not responses.trusted_response_enabled("get_today_meals")
+
+    monkeypatch.setattr(settings, "trusted_responses_enabled", False)
+    assert not responses.trusted_response_enabled("list_todos")
+
+
+def test_untrusted_build_still_validates():
+    with pytest.raises(ValidationError):
+        build_model(TodoListResponse, False, items=[{"id": "x"}])
+
+
+def _todo(todo_id: str, **fields) -> dict:
+    return build_model(TodoItemResponse, True, id=todo_id, user_id="u1", title="买猫粮", due_date="2026-10-19", **fields)
+
+
+def _bad_todo_list() -> dict:
+    # 模型新增了必填字段、数据没跟上：首项合规时抽查放行，抽样校验负责发现后面的项
+    now = datetime(2026, 10, 19, tzinfo=timezone.utc)
+    good = _todo("t1", created_at=now, updated_at=now)
+    return build_model(TodoListResponse, True, total=2, items=[good, _todo("t2")])
+
+
+def test_trusted_build_fills_defaults():
+    data = build_model(TodoListResponse, True, total=0, items=[])
+
+    assert data == {"total": 0, "items": [], "next_cursor": None, "total_approximate": False}
+
+
+def test_spot_check_rejects_first_item(monkeypatch):
+    # 生产环境不抽样，也不能把不合规的数据发出去
+    monkeypatch.setattr(settings, "api_reload", False)
+    monkeypatch.setattr(settings, "trusted_response_validate_rate", 0.0)
+    data = build_model(TodoListResponse, True, total=1, items=[_todo("t1")])
+
+    with pytest.raises(ValidationError):
+        api_response(ApiResponse[TodoListResponse], "list_todos", True, data=data)
+
+
+@pytest.mark.asyncio
+async def test_non_conforming_meal_rejected_like_validated(client, auth_headers, test_pet, monkeypatch):
+    async def _fractional_calories(self, user_id, pet_id):
+        meal = {
+            "id": "m1", "type": "breakfast", "name": "鸡肉饭", "time": "08:00", "description": "",
+            "calories": 170.9, "is_completed": False, "completed_at": None, "details": {},
+        }
+        summary = {"total_calories": 170, "consumed_calories": 0, "protein": {}, "fat": {}, "carbs": {}}
+        return {"date": date.today().isoformat(), "meals": [meal], "nutrition_summary": summary}
+
+    monkeypatch.setattr(settings, "api_reload", False)
+    monkeypatch.setattr(MealService, "get_today_meals", _fractional_calories)
+    url = f"/api/v1/meals/today?pet_id={test_pet.id}"
+
+    monkeypatch.setattr(settings, "trusted_response_routes", ROUTES)
+    trusted = await client.get(url, headers=auth_headers)
+    monkeypatch.setattr(settings, "trusted_response_routes", [])
+    validated = await client.get(url, headers=auth_headers)
+
+    assert trusted.status_code == validated.status_code != 200
+    assert b'"calories":170.9' not in trusted.content
+
+
+def test_sampler_logs_drift(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "api_reload", True)
+    monkeypatch.setattr(settings, "trusted_response_validate_rate", 1.0)
+    monkeypatch.setattr(settings, "trusted_response_validate_strict", False)
+
+    with caplog.at_level(logging.WARNING, logger=responses.__name__):
+        response = api_response(ApiResponse[TodoListResponse], "list_todos", True, data=_bad_todo_list())
+
+    assert response.status_code == 200
+    assert "route=list_todos" in caplog.text
+    assert "created_at" in caplog.text
+
+
+def test_sampler_strict_raises(monkeypatch):
+    monkeypatch.setattr(settings, "api_reload", True)
+    monkeypatch.setattr(settings, "trusted_response_validate_rate", 1.0)
+    monkeypatch.setattr(settings, "trusted_response_validate_strict", True)
+
+    with pytest.raises(ValidationError):
+        api_response(ApiResponse[TodoListResponse], "list_todos", True, data=_bad_todo_list())
+
+
+def test_sampler_off_outside_dev(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "api_reload", False)
+    monkeypatch.setattr(settings, "trusted_response_validate_rate", 1.0)
+
+    with caplog.at_level(logging.WARNING, logger=responses.__name__):
+        api_response(ApiResponse[TodoListResponse], "list_todos", True, data=_bad_todo_list())
+
+    assert caplog.text == ""
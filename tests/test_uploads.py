@@ -0,0 +1,199 @@
+"""
+流式图片上传测试
+验证魔数校验、无 Content-Length 时的流式大小限制、小文件单次 PUT 与大文件分片上传
+"""
+import pytest
+
+from src.api.dependencies import get_minio_storage
+from src.api.infrastructure.minio_storage import MinioManager, STREAM_PART_SIZE
+from src.api.main import app
+from src.api.utils.uploads import AVATAR_MAX_BYTES, sniff_image_type
+
+BOUNDARY = "test-boundary"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+WEBP = b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 64
+
+
+class _RecordingStorage:
+    def __init__(self):
+        self.uploaded = {}
+        self.deleted = []
+
+    async def aupload_stream(self, object_name, chunks, content_type="application/octet-stream"):
+        self.uploaded[object_name] = {
+            "chunks": [chunk async for chunk in chunks],
+            "content_type": content_type,
+        }
+        return True
+
+    async def adelete_file(self, object_name):
+        self.deleted.append(object_name)
+        self.uploaded.pop(object_name, None)
+        return True
+
+    def build_object_reference(self, object_name):
+        return f"minio://petfood-bucket/{object_name}"
+
+    def extract_object_name(self, file_reference):
+        prefix = "minio://petfood-bucket/"
+        if not file_reference or not file_reference.startswith(prefix):
+            return None
+        return file_reference.removeprefix(prefix)
+
+
+@pytest.fixture
+def storage():
+    fake = _RecordingStorage()
+    app.dependency_overrides[get_minio_storage] = lambda: fake
+    return fake
+
+
+def _multipart(data: bytes, declared_type: str, field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="avatar.png"\r\n'
+        f"Content-Type: {declared_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def _chunked(body: bytes, size: int = 64 * 1024):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def _headers(auth_headers):
+    return {**auth_headers, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+def test_sniff_image_type():
+    assert sniff_image_type(b"\xff\xd8\xff\xe0") == "image/jpeg"
+    assert sniff_image_type(PNG) == "image/png"
+    assert sniff_image_type(WEBP) == "image/webp"
+    assert sniff_image_type(b"GIF89a") is None
+
+
+@pytest.mark.asyncio
+async def test_type_comes_from_magic_bytes(client, auth_headers, test_user, storage):
+    response = await client.post(
+        "/api/v1/auth/avatar", content=_multipart(WEBP, "image/png"), headers=_headers(auth_headers)
+    )
+
+    assert response.status_code == 200
+    (object_name, stored), = storage.uploaded.items()
+    assert object_name.startswith(f"avatars/users/{test_user.id}/")
+    assert object_name.endswith(".webp")
+    assert stored["content_type"] == "image/webp"
+    assert b"".join(stored["chunks"]) == WEBP
+
+
+@pytest.mark.asyncio
+async def test_spoofed_content_type_rejected(client, auth_headers, test_user, storage):
+    response = await client.post(
+        "/api/v1/auth/avatar",
+        content=_multipart(b"<svg onload=alert(1)>", "image/png"),
+        headers=_headers(auth_headers),
+    )
+
+    assert response.status_code == 400
+    assert response.json()["message"]["code"] == 5002
+    assert storage.uploaded == {}
+
+
+@pytest.mark.asyncio
+async def test_size_limit_enforced_while_streaming(client, auth_headers, test_user, storage):
+    body = _multipart(PNG + b"\x00" * AVATAR_MAX_BYTES, "image/png")
+    # 分块传输，没有 Content-Length，只能边读边计数
+    response = await client.post("/api/v1/auth/avatar", content=_chunked(body), headers=_headers(auth_headers))
+
+    assert response.status_code == 400
+    assert response.json()["message"]["code"] == 5003
+    assert storage.uploaded == {}
+
+
+@pytest.mark.asyncio
+async def test_missing_file_field(client, auth_headers, test_user, storage):
+    response = await client.post(
+        "/api/v1/auth/avatar", content=_multipart(PNG, "image/png", field="other"), headers=_headers(auth_headers)
+    )
+
+    assert response.status_code == 400
+    assert response.json()["message"]["code"] == 5002
+
+
+@pytest.mark.asyncio
+async def test_malformed_multipart_body_rejected(client, auth_headers, test_user, storage):
+    response = await client.post(
+        "/api/v1/auth/avatar", content=b"garbage without any boundary", headers=_headers(auth_headers)
+    )
+
+    assert response.status_code == 400
+    assert response.json()["message"]["code"] == 5002
+    assert storage.uploaded == {}
+
+
+@pytest.mark.asyncio
+async def test_empty_or_non_file_field_rejected(client, auth_headers, test_user, storage):
+    empty = await client.post("/api/v1/auth/avatar", content=_multipart(b"", "image/png"), headers=_headers(auth_headers))
+    assert empty.status_code == 400
+    assert empty.json()["message"]["code"] == 5002
+
+    plain_field = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"\r\n\r\n'
+        f"{PNG.decode('latin-1')}\r\n--{BOUNDARY}--\r\n"
+    ).encode("latin-1")
+    response = await client.post("/api/v1/auth/avatar", content=plain_field, headers=_headers(auth_headers))
+    assert response.status_code == 400
+    assert response.json()["message"]["code"] == 5002
+    assert storage.uploaded == {}
+
+
+class _FakeMinioClient:
+    def __init__(self):
+        self.calls = []
+
+    def put_object(self, bucket_name, object_name, data, length, part_size=0, content_type=None, metadata=None):
+        # 与 minio 一样按分片大小调用 read()
+        parts = []
+        while True:
+            part = data.read(part_size or length)
+            if not part:
+                break
+            parts.append(part)
+            if length >= 0:
+                break
+        self.calls.append({"length": length, "parts": [len(p) for p in parts], "data": b"".join(parts)})
+
+
+@pytest.fixture
+def minio_manager(monkeypatch):
+    manager = MinioManager()
+    manager.client = _FakeMinioClient()
+    monkeypatch.setattr(manager, "_ensure_initialized", lambda: None)
+    return manager
+
+
+async def _chunks(total: int, size: int = 256 * 1024):
+    for i in range(0, total, size):
+        yield bytes([i // size % 256]) * min(size, total - i)
+
+
+@pytest.mark.asyncio
+async def test_small_stream_is_single_put(minio_manager):
+    assert await minio_manager.aupload_stream("a.png", _chunks(1024 * 1024), "image/png")
+
+    (call,) = minio_manager.client.calls
+    assert call["length"] == 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_large_stream_uses_multipart(minio_manager):
+    total = STREAM_PART_SIZE * 2 + 123
+    expected = b"".join([chunk async for chunk in _chunks(total)])
+
+    assert await minio_manager.aupload_stream("big.bin", _chunks(total))
+
+    (call,) = minio_manager.client.calls
+    assert call["length"] == -1
+    assert call["parts"] == [STREAM_PART_SIZE, STREAM_PART_SIZE, 123]
+    assert call["data"] == expected